@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+熔断器
+按依赖（模型供应商、交易所）统计滚动错误率与延迟：错误率超过阈值时断开，之后的调用立即跳过；
+断开期间由后台线程探测恢复（半开），探测成功后重新闭合
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from .llm_base import LLMAdapter, FALLBACK_RESPONSE
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """熔断器断开，调用被直接跳过"""
+
+
+class CircuitBreaker:
+    """滚动窗口熔断器（线程安全）"""
+
+    def __init__(self, name: str, failure_threshold: float = 0.5, min_calls: int = 5, window: int = 20,
+                 slow_call_threshold: Optional[float] = None, open_timeout: float = 30.0,
+                 max_open_timeout: float = 300.0, probe: Optional[Callable[[], bool]] = None,
+                 is_failure: Callable[[Exception], bool] = lambda e: True,
+                 clock: Callable[[], float] = time.monotonic, wall_clock: Callable[[], float] = time.time):
+        """
+        初始化熔断器
+
+        Args:
+            name: 依赖名称（用于日志）
+            failure_threshold: 窗口内失败比例达到该值时断开
+            min_calls: 窗口内至少有这么多次调用才会评估错误率
+            window: 滚动窗口的调用次数
+            slow_call_threshold: 超过该耗时（秒）的成功调用也计为失败，None 表示不计
+            open_timeout: 断开后首次探测前的等待时间（秒）
+            max_open_timeout: 探测连续失败时等待时间指数增长的上限（秒）
+            probe: 后台探测函数，返回 True 表示依赖已恢复；None 时在超时后放行一次真实调用（半开）
+            is_failure: 判断异常是否计为依赖故障（如参数错误导致的4xx不计）
+            clock: 单调时钟（秒）
+            wall_clock: 墙上时钟（秒），跨进程恢复状态时计算两次运行之间经过的时间
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.min_calls = min_calls
+        self.slow_call_threshold = slow_call_threshold
+        self.open_timeout = open_timeout
+        self.max_open_timeout = max_open_timeout
+        self.probe = probe
+        self.is_failure = is_failure
+        self.clock = clock
+        self.wall_clock = wall_clock
+
+        self.state = CLOSED
+        self.opened_count = 0
+        self.skipped = 0
+        # (是否成功, 耗时秒)
+        self._calls = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._current_timeout = open_timeout
+        self._trial_in_flight = False
+        self._probe_thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """
+        当前是否允许调用
+
+        Returns:
+            闭合时返回 True；断开时立即返回 False；半开时只放行一次试探调用
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and self.probe is None and \
+                    self.clock() - self._opened_at >= self._current_timeout:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.skipped += 1
+            return False
+
+    def record_success(self, latency: float = 0.0):
+        """记录一次成功调用"""
+        slow = self.slow_call_threshold is not None and latency > self.slow_call_threshold
+        self._record(not slow, latency)
+
+    def record_failure(self, latency: float = 0.0):
+        """记录一次失败调用"""
+        self._record(False, latency)
+
+    def release_trial(self):
+        """调用被中断且无法判断结果时，只释放半开状态的试探名额，不记录样本"""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._trial_in_flight = False
+
+    def _record(self, ok: bool, latency: float):
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._trial_in_flight = False
+                if ok:
+                    self._close()
+                else:
+                    self._open(backoff=True)
+                return
+            self._calls.append((ok, latency))
+            if self.state == CLOSED and len(self._calls) >= self.min_calls:
+                failures = sum(1 for success, _ in self._calls if not success)
+                if failures / len(self._calls) >= self.failure_threshold:
+                    self._open(backoff=False)
+
+    def _open(self, backoff: bool):
+        """断开（调用方持有锁）"""
+        if backoff:
+            self._current_timeout = min(self._current_timeout * 2, self.max_open_timeout)
+        else:
+            self._current_timeout = self.open_timeout
+        if self.state != OPEN:
+            self.opened_count += 1
+            print(f"⚠️ {self.name} 熔断器断开，{self._current_timeout:.0f}s 后探测恢复")
+        self.state = OPEN
+        self._opened_at = self.clock()
+        self._start_probe()
+
+    def _start_probe(self):
+        """启动后台探测线程（调用方持有锁）"""
+        if self.probe is not None and (self._probe_thread is None or not self._probe_thread.is_alive()):
+            self._probe_thread = threading.Thread(target=self._probe_loop, name=f"probe-{self.name}", daemon=True)
+            self._probe_thread.start()
+
+    def _close(self):
+        """闭合并清空窗口（调用方持有锁）"""
+        self.state = CLOSED
+        self._calls.clear()
+        self._current_timeout = self.open_timeout
+        print(f"✅ {self.name} 已恢复，熔断器闭合")
+
+    def _probe_loop(self):
+        """后台探测：等待超时后调用 probe，失败则按指数退避继续等待"""
+        while True:
+            with self._lock:
+                if self.state != OPEN:
+                    return
+                wait = self._current_timeout
+            if self._stop.wait(wait):
+                return
+            try:
+                recovered = bool(self.probe())
+            except Exception:
+                recovered = False
+            with self._lock:
+                if self.state != OPEN:
+                    return
+                if recovered:
+                    self._close()
+                    return
+                self._current_timeout = min(self._current_timeout * 2, self.max_open_timeout)
+
+    def call(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        经过熔断器调用函数
+
+        Args:
+            fn: 被调用的函数
+            args/kwargs: 调用参数
+
+        Returns:
+            函数返回值
+
+        Raises:
+            CircuitOpenError: 熔断器断开时立即抛出
+        """
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} 熔断器断开，跳过调用")
+        start = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            if self.is_failure(e):
+                self.record_failure(time.perf_counter() - start)
+            else:
+                self.record_success(time.perf_counter() - start)
+            raise
+        self.record_success(time.perf_counter() - start)
+        return result
+
+    def health_score(self) -> float:
+        """
+        健康评分：窗口内成功（且不慢）的调用比例，断开时为 0
+
+        Returns:
+            0.0 ~ 1.0
+        """
+        with self._lock:
+            if self.state == OPEN:
+                return 0.0
+            if not self._calls:
+                return 1.0
+            return sum(1 for ok, _ in self._calls if ok) / len(self._calls)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取熔断器统计
+
+        Returns:
+            {'state', 'error_rate', 'avg_latency', 'health', 'opened_count', 'skipped'}
+        """
+        with self._lock:
+            calls = list(self._calls)
+            state = self.state
+        error_rate = sum(1 for ok, _ in calls if not ok) / len(calls) if calls else 0.0
+        avg_latency = sum(latency for _, latency in calls) / len(calls) if calls else 0.0
+        return {
+            'state': state,
+            'error_rate': error_rate,
+            'avg_latency': avg_latency,
+            'health': self.health_score(),
+            'opened_count': self.opened_count,
+            'skipped': self.skipped,
+        }
+
+    def get_state(self) -> Dict[str, Any]:
+        """
+        导出可在下次运行中恢复的状态（可 JSON 序列化）
+
+        Returns:
+            {'state', 'calls', 'opened_count', 'open_elapsed', 'current_timeout', 'saved_at'}
+        """
+        with self._lock:
+            return {
+                'state': self.state,
+                'calls': [[ok, latency] for ok, latency in self._calls],
+                'opened_count': self.opened_count,
+                'open_elapsed': self.clock() - self._opened_at if self.state != CLOSED else 0.0,
+                'current_timeout': self._current_timeout,
+                'saved_at': self.wall_clock(),
+            }
+
+    def set_state(self, saved: Dict[str, Any]):
+        """
+        恢复 get_state() 导出的状态，断开时长包含两次运行之间经过的墙上时间
+
+        Args:
+            saved: get_state() 的返回值
+        """
+        with self._lock:
+            self.state = saved['state']
+            self._calls.clear()
+            self._calls.extend((bool(ok), float(latency)) for ok, latency in saved['calls'])
+            self.opened_count = saved['opened_count']
+            self._current_timeout = saved['current_timeout']
+            elapsed = saved['open_elapsed'] + max(0.0, self.wall_clock() - saved['saved_at'])
+            self._opened_at = self.clock() - elapsed
+            self._trial_in_flight = False
+            if self.state == OPEN:
+                self._start_probe()
+
+    def shutdown(self):
+        """停止后台探测线程"""
+        self._stop.set()
+
+
+def save_breaker_states(breakers: Iterable[CircuitBreaker], path: str):
+    """
+    按名称保存熔断器状态（JSON），供每次只运行一个周期的 main.py 跨运行累计
+
+    Args:
+        breakers: 熔断器列表
+        path: 文件路径
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({breaker.name: breaker.get_state() for breaker in breakers}, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def load_breaker_states(breakers: Iterable[CircuitBreaker], path: str):
+    """
+    恢复 save_breaker_states() 保存的状态（文件不存在或没有对应名称时保持初始状态）
+
+    Args:
+        breakers: 熔断器列表
+        path: 文件路径
+    """
+    if not os.path.exists(path):
+        return
+    with open(path, encoding='utf-8') as f:
+        saved = json.load(f)
+    for breaker in breakers:
+        if breaker.name in saved:
+            breaker.set_state(saved[breaker.name])
+
+
+class CircuitBreakerAdapter(LLMAdapter):
+    """
+    为任意 LLMAdapter 增加熔断器
+
+    适配器内部吞掉异常并返回 FALLBACK_RESPONSE，因此以该响应作为失败信号；
+    断开期间直接返回 FALLBACK_RESPONSE，不再等待SDK的超时与重试。
+    """
+
+    def __init__(self, adapter: LLMAdapter, breaker: Optional[CircuitBreaker] = None,
+                 background_probe: bool = True, **breaker_kwargs):
+        """
+        初始化熔断适配器
+
+        Args:
+            adapter: 被包装的适配器
+            breaker: 熔断器，默认按模型名称新建
+            background_probe: 断开后是否在后台用被包装适配器的 probe()（不带系统提示词、只生成1个token的最小请求）探测恢复
+            breaker_kwargs: 新建熔断器时的参数
+        """
+        self.adapter = adapter
+        self.api_key = adapter.api_key
+        if breaker is None:
+            probe = self._probe if background_probe else None
+            breaker = CircuitBreaker(adapter.get_model_name(), probe=probe, **breaker_kwargs)
+        self.breaker = breaker
+
+    def __getattr__(self, name: str):
+        return getattr(self.adapter, name)
+
+    def _probe(self) -> bool:
+        return self.adapter.probe()
+
+    def call(self, prompt: str) -> str:
+        """
+        调用LLM API，熔断器断开时立即返回默认响应
+
+        Args:
+            prompt: 输入提示词
+
+        Returns:
+            LLM响应文本
+        """
+        if not self.breaker.allow():
+            return FALLBACK_RESPONSE
+        start = time.perf_counter()
+        try:
+            response = self.adapter.call(prompt)
+        except Exception:
+            self.breaker.record_failure(time.perf_counter() - start)
+            raise
+        self._record(response, time.perf_counter() - start)
+        return response
+
+    async def acall(self, prompt: str) -> str:
+        """
+        异步调用LLM API，熔断器断开时立即返回默认响应
+
+        Args:
+            prompt: 输入提示词
+
+        Returns:
+            LLM响应文本
+        """
+        if not self.breaker.allow():
+            return FALLBACK_RESPONSE
+        start = time.perf_counter()
+        try:
+            response = await self.adapter.acall(prompt)
+        except (asyncio.CancelledError, Exception):
+            # 被竞技场在截止时间取消即供应商太慢，与调用失败同样计为失败
+            self.breaker.record_failure(time.perf_counter() - start)
+            raise
+        except BaseException:
+            self.breaker.release_trial()
+            raise
+        self._record(response, time.perf_counter() - start)
+        return response
+
+    def _record(self, response: str, latency: float):
+        if response == FALLBACK_RESPONSE:
+            self.breaker.record_failure(latency)
+        else:
+            self.breaker.record_success(latency)
+
+    def get_model_name(self) -> str:
+        """获取模型名称"""
+        return self.adapter.get_model_name()
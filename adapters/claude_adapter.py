@@ -6,25 +6,24 @@ Claude适配器
 """
 
 import os
-from typing import Dict, Any
-from .llm_base import LLMAdapter
-
-try:
-    import anthropic
-except ImportError:
-    print("❌ 请安装anthropic: pip install anthropic")
-    anthropic = None
+from functools import cached_property
+from typing import Dict, Any, AsyncIterator, Iterator, Optional
+from .llm_base import LLMAdapter, FALLBACK_RESPONSE, require_sdk
 
 
 class ClaudeAdapter(LLMAdapter):
     """Claude适配器"""
     
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, model: str = "claude-3-sonnet-20240229", streaming: bool = False,
+                 system_prompt: Optional[str] = None):
         """
         初始化Claude适配器
         
         Args:
             api_key: Anthropic API密钥，如果为None则从环境变量获取
+            model: 使用的模型名称，默认为claude-3-sonnet-20240229
+            streaming: 是否使用流式输出（决策JSON完整后提前结束）
+            system_prompt: 系统提示词，默认为 DEFAULT_SYSTEM_PROMPT
         """
         if api_key is None:
             api_key = os.getenv('ANTHROPIC_API_KEY')
@@ -32,13 +31,64 @@ class ClaudeAdapter(LLMAdapter):
         if not api_key:
             raise ValueError("Anthropic API密钥未设置，请设置ANTHROPIC_API_KEY环境变量")
         
-        super().__init__(api_key)
+        super().__init__(api_key, system_prompt)
+        
+        self.model = model
+        self.streaming = streaming
+        
+        # Anthropic客户端（同步 + 异步）在首次调用时才导入SDK并创建
+        require_sdk('anthropic')
+    
+    @cached_property
+    def client(self):
+        """同步客户端（首次访问时创建）"""
+        import anthropic
+        return anthropic.Anthropic(api_key=self.api_key)
+    
+    @cached_property
+    def async_client(self):
+        """异步客户端（首次访问时创建）"""
+        import anthropic
+        return anthropic.AsyncAnthropic(api_key=self.api_key)
+    
+    def build_request(self, prompt: str) -> Dict[str, Any]:
+        """
+        构建 messages.create 请求参数，同步与异步调用共用
+        
+        Args:
+            prompt: 输入提示词
+            
+        Returns:
+            请求参数字典
+        """
+        system: Any = self.system_prompt
+        if self.prompt_cache:
+            # 系统提示词作为固定前缀标记缓存，5分钟周期内的后续调用按缓存价读取
+            # （前缀不足模型的最小缓存长度时服务端会忽略该标记）
+            system = [{"type": "text", "text": self.system_prompt, "cache_control": {"type": "ephemeral"}}]
+        return {
+            "model": self.model,
+            "max_tokens": self.max_tokens,
+            "temperature": self.temperature,
+            "system": system,
+            "messages": [
+                {"role": "user", "content": prompt}
+            ],
+        }
+    
+    def _record_claude_usage(self, usage: Any):
+        """
+        记录 Anthropic 用量：input_tokens 不含缓存读取与写入的部分
         
-        # 初始化Anthropic客户端
-        if anthropic:
-            self.client = anthropic.Anthropic(api_key=self.api_key)
-        else:
-            raise ImportError("Anthropic库未安装")
+        Args:
+            usage: 响应中的 usage 对象
+        """
+        if usage is None:
+            return
+        cached = getattr(usage, 'cache_read_input_tokens', None) or 0
+        written = getattr(usage, 'cache_creation_input_tokens', None) or 0
+        total = (usage.input_tokens or 0) + cached + written
+        self._record_usage(total, cached, usage.output_tokens or 0, written)
     
     def call(self, prompt: str) -> str:
         """
@@ -51,21 +101,94 @@ class ClaudeAdapter(LLMAdapter):
             Claude响应文本
         """
         try:
-            response = self.client.messages.create(
-                model="claude-3-sonnet-20240229",
-                max_tokens=500,
-                temperature=0.7,
-                system="你是一个专业的量化交易分析师，请根据市场数据给出交易决策。",
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
-            )
+            if self.streaming:
+                return self.call_streaming(prompt)
+            response = self.client.messages.create(**self.build_request(prompt))
+            self._record_claude_usage(response.usage)
+            return response.content[0].text.strip()
+            
+        except Exception as e:
+            print(f"❌ Claude API调用失败: {e}")
+            return FALLBACK_RESPONSE
+    
+    async def acall(self, prompt: str) -> str:
+        """
+        异步调用Claude API
+        
+        Args:
+            prompt: 输入提示词
             
+        Returns:
+            Claude响应文本
+        """
+        try:
+            if self.streaming:
+                return await self.acall_streaming(prompt)
+            response = await self.async_client.messages.create(**self.build_request(prompt))
+            self._record_claude_usage(response.usage)
             return response.content[0].text.strip()
             
         except Exception as e:
             print(f"❌ Claude API调用失败: {e}")
-            return '{"symbol": null, "action": "HOLD", "confidence": 0.0, "rationale": "API调用失败"}'
+            return FALLBACK_RESPONSE
+    
+    def probe(self) -> bool:
+        """
+        以最小请求探测Claude服务：不带系统提示词，只生成1个token
+        
+        Returns:
+            True 表示服务可用
+        """
+        try:
+            self.client.messages.create(
+                model=self.model, max_tokens=1, messages=[{"role": "user", "content": self.PROBE_PROMPT}])
+            return True
+        except Exception:
+            return False
+    
+    def stream(self, prompt: str) -> Iterator[str]:
+        """
+        流式调用Claude API
+        
+        Args:
+            prompt: 输入提示词
+            
+        Yields:
+            响应文本片段
+        """
+        # 生成器关闭时退出上下文管理器，随之关闭HTTP流
+        with self.client.messages.stream(**self.build_request(prompt)) as stream:
+            try:
+                for text in stream.text_stream:
+                    yield text
+            finally:
+                # 输入与缓存用量在 message_start 事件中即已返回，提前结束也能统计
+                self._record_stream_usage(stream)
+    
+    async def astream(self, prompt: str) -> AsyncIterator[str]:
+        """
+        异步流式调用Claude API
+        
+        Args:
+            prompt: 输入提示词
+            
+        Yields:
+            响应文本片段
+        """
+        async with self.async_client.messages.stream(**self.build_request(prompt)) as stream:
+            try:
+                async for text in stream.text_stream:
+                    yield text
+            finally:
+                self._record_stream_usage(stream)
+    
+    def _record_stream_usage(self, stream: Any):
+        """从流的当前消息快照记录用量"""
+        try:
+            snapshot = stream.current_message_snapshot
+        except Exception:
+            return
+        self._record_claude_usage(snapshot.usage)
     
     def get_model_name(self) -> str:
         """获取模型名称"""
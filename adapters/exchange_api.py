@@ -7,19 +7,46 @@
 
 import os
 from typing import Dict, List, Optional
-from dotenv import load_dotenv
-from binance.spot import Spot
 from binance.error import ClientError, ServerError
 
-# 加载环境变量
-load_dotenv()
+from .circuit_breaker import CircuitBreaker
+from .hedging import BINANCE_API_HOSTS, HEDGEABLE_METHODS, HedgedRequester
+from .price_cache import PriceSnapshotCache
+from .rate_limiter import WeightRateLimiter, get_global_limiter, install_weight_hook, request_weight
+from .registry import load_env
+
+
+def is_exchange_failure(error: Exception) -> bool:
+    """参数错误等4xx说明交易所仍在正常响应，不计为故障；限流（429/418）与服务端、网络错误计为故障"""
+    if isinstance(error, ClientError):
+        return error.status_code in (418, 429)
+    return True
 
 
 class ExchangeAPI:
     """交易所API封装类"""
 
-    def __init__(self):
-        """初始化币安API客户端"""
+    def __init__(self, price_ttl: float = 2.0, rate_limiter: Optional[WeightRateLimiter] = None,
+                 hedge: bool = False, hedge_hosts: Optional[List[str]] = None,
+                 breaker: Optional[CircuitBreaker] = None):
+        """
+        初始化币安API客户端
+
+        Args:
+            price_ttl: 价格快照缓存有效期（秒），同一周期内的重复读取直接命中缓存
+            rate_limiter: 请求权重限流器，默认使用进程内共享的现货限流器
+            hedge: 是否对行情GET请求启用多主机对冲
+            hedge_hosts: 对冲使用的主机列表，默认为 BINANCE_API_HOSTS
+            breaker: 熔断器，默认新建一个以 ping 接口在后台探测恢复的熔断器
+        """
+        # binance.spot 导入较慢，只在真正创建客户端时导入
+        from binance.spot import Spot
+
+        self.price_cache = PriceSnapshotCache(ttl=price_ttl)
+        self.rate_limiter = rate_limiter or get_global_limiter('spot')
+
+        # 加载环境变量（进程内只加载一次）
+        load_env()
         api_key = os.getenv('BINANCE_API_KEY')
         api_secret = os.getenv('BINANCE_API_SECRET')
 
@@ -37,6 +64,51 @@ class ExchangeAPI:
             self.client = None
             self.is_authenticated = False
 
+        if self.client is not None:
+            install_weight_hook(self.client, self.rate_limiter)
+
+        # 对冲模式：每个主机一个公开客户端，只用于幂等的行情请求
+        self.hedger = None
+        if hedge and self.client is not None:
+            clients = {}
+            for host in hedge_hosts or BINANCE_API_HOSTS:
+                clients[host] = Spot(base_url=host)
+                install_weight_hook(clients[host], self.rate_limiter)
+            self.hedger = HedgedRequester(clients, rate_limiter=self.rate_limiter)
+
+        # 交易所不可用时熔断：后续请求立即失败，不再逐个等待超时
+        self.breaker = breaker or CircuitBreaker('binance-spot', probe=self._probe,
+                                                 is_failure=is_exchange_failure)
+
+    def _probe(self) -> bool:
+        """熔断器后台探测：调用权重为1的 ping 接口"""
+        self.rate_limiter.acquire(request_weight('ping'))
+        self.client.ping()
+        return True
+
+    def _request(self, method: str, *args, **kwargs):
+        """
+        经过熔断器与限流器调用客户端方法，对冲模式下行情请求交给 HedgedRequester
+
+        Args:
+            method: 客户端方法名，如'ticker_price'
+            args/kwargs: 调用参数
+
+        Returns:
+            接口返回数据
+
+        Raises:
+            CircuitOpenError: 熔断器断开时立即抛出
+        """
+        return self.breaker.call(self._send, method, *args, **kwargs)
+
+    def _send(self, method: str, *args, **kwargs):
+        weight = request_weight(method, *args, **kwargs)
+        if self.hedger is not None and method in HEDGEABLE_METHODS:
+            return self.hedger.call(method, weight, *args, **kwargs)
+        self.rate_limiter.acquire(weight)
+        return getattr(self.client, method)(*args, **kwargs)
+
     def get_current_price(self, symbol: str) -> float:
         """
         获取指定交易对的当前价格
@@ -47,12 +119,17 @@ class ExchangeAPI:
         Returns:
             float: 当前价格，失败返回 0.0
         """
+        cached = self.price_cache.get(symbol)
+        if cached is not None:
+            return cached
+
         if self.client is None:
             return 0.0
 
         try:
-            result = self.client.ticker_price(symbol)
+            result = self._request('ticker_price', symbol)
             price = float(result['price'])
+            self.price_cache.update({symbol: price})
             return price
         except (ClientError, ServerError) as e:
             print(f"❌ 获取{symbol}价格失败: {e}")
@@ -87,27 +164,29 @@ class ExchangeAPI:
             print("❌ API客户端未初始化")
             return {symbol: 0.0 for symbol in symbols}
 
-        prices = {}
+        # 优先使用TTL内的快照，只请求缺失的交易对
+        prices, missing = self.price_cache.get_many(symbols)
+        if not missing:
+            return {symbol: prices[symbol] for symbol in symbols}
 
-        # 方法1：批量获取（推荐，效率更高）
+        # 方法1：批量获取（只请求需要的交易对，而不是全市场数千个）
         try:
-            # 币安支持不带参数获取所有交易对价格
-            all_prices = self.client.ticker_price()
-            price_dict = {item['symbol']: float(item['price']) for item in all_prices}
-
-            # 提取需要的交易对
-            for symbol in symbols:
-                if symbol in price_dict:
-                    prices[symbol] = price_dict[symbol]
-                    print(f"✅ {symbol}: ${price_dict[symbol]:.4f}")
+            result = self._request('ticker_price', symbols=missing)
+            fetched = {item['symbol']: float(item['price']) for item in result}
+            self.price_cache.update(fetched)
+
+            for symbol in missing:
+                if symbol in fetched:
+                    prices[symbol] = fetched[symbol]
+                    print(f"✅ {symbol}: ${fetched[symbol]:.4f}")
                 else:
                     print(f"⚠️ {symbol} 未找到")
                     prices[symbol] = 0.0
 
         except Exception as e:
             print(f"⚠️ 批量获取价格失败，切换到单个获取: {e}")
-            # 方法2：单个获取（降级方案）
-            for symbol in symbols:
+            # 方法2：单个获取（降级方案，例如列表中包含无效交易对时）
+            for symbol in missing:
                 try:
                     price = self.get_current_price(symbol)
                     prices[symbol] = price
@@ -117,7 +196,33 @@ class ExchangeAPI:
                     print(f"❌ 获取{symbol}价格失败: {e}")
                     prices[symbol] = 0.0
 
-        return prices
+        return {symbol: prices[symbol] for symbol in symbols}
+
+    def get_tick_sizes(self, symbols: List[str]) -> Dict[str, float]:
+        """
+        获取交易对的价格步长（exchangeInfo 中 PRICE_FILTER 的 tickSize）
+
+        Args:
+            symbols: 交易对列表，如['BTCUSDT', 'ETHUSDT']
+
+        Returns:
+            {symbol: tick_size}，失败返回空字典
+        """
+        if self.client is None:
+            return {}
+
+        try:
+            info = self._request('exchange_info', symbols=symbols)
+        except Exception as e:
+            print(f"❌ 获取交易规则失败: {e}")
+            return {}
+
+        tick_sizes = {}
+        for item in info.get('symbols', []):
+            for rule in item.get('filters', []):
+                if rule.get('filterType') == 'PRICE_FILTER':
+                    tick_sizes[item['symbol']] = float(rule['tickSize'])
+        return tick_sizes
 
     def is_available(self) -> bool:
         """
@@ -131,14 +236,14 @@ class ExchangeAPI:
 
         try:
             # 方法1: 尝试获取BTC价格（最可靠的方式）
-            result = self.client.ticker_price('BTCUSDT')
+            result = self._request('ticker_price', 'BTCUSDT')
             return 'price' in result and float(result['price']) > 0
         except Exception as e:
             print(f"⚠️ API可用性检查失败: {e}")
 
             # 方法2: 降级到time接口（仅公开模式可能有效）
             try:
-                self.client.time()
+                self._request('time')
                 return True
             except Exception:
                 return False
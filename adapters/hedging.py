@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+对冲请求
+幂等的行情GET请求先发往延迟最低的主机；若超过其 p95 延迟仍未返回，
+再向备用主机发送一份副本，采用先返回的结果
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional
+
+from .rate_limiter import WeightRateLimiter
+
+# 币安公布的现货 REST 主机
+BINANCE_API_HOSTS = [
+    'https://api.binance.com',
+    'https://api1.binance.com',
+    'https://api2.binance.com',
+    'https://api3.binance.com',
+    'https://api4.binance.com',
+]
+
+# 可以安全重复发送的行情接口
+HEDGEABLE_METHODS = frozenset([
+    'ping', 'time', 'exchange_info', 'depth', 'klines', 'ui_klines', 'avg_price',
+    'ticker_price', 'ticker_24hr', 'book_ticker',
+])
+
+
+class LatencyStats:
+    """单个主机的滚动延迟统计"""
+
+    def __init__(self, window: int = 200):
+        """
+        初始化统计
+
+        Args:
+            window: 保留的最近样本数
+        """
+        self._samples = deque(maxlen=window)
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def record(self, latency: float):
+        """记录一次成功请求的延迟（秒）"""
+        with self._lock:
+            self._samples.append(latency)
+
+    def record_error(self, penalty: float):
+        """记录一次失败，以惩罚延迟计入样本"""
+        with self._lock:
+            self.errors += 1
+            self._samples.append(penalty)
+
+    def count(self) -> int:
+        """样本数"""
+        return len(self._samples)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """
+        计算延迟分位数
+
+        Args:
+            pct: 分位，如 95
+
+        Returns:
+            分位延迟（秒），无样本时返回 None
+        """
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(round(pct / 100 * (len(samples) - 1))))
+        return samples[index]
+
+
+class HedgedRequester:
+    """多主机对冲请求调度器"""
+
+    def __init__(self, clients: Dict[str, Any], rate_limiter: Optional[WeightRateLimiter] = None,
+                 default_delay: float = 0.3, min_delay: float = 0.02, max_delay: float = 2.0,
+                 min_samples: int = 5, error_penalty: float = 5.0, max_workers: int = 8):
+        """
+        初始化对冲调度器
+
+        Args:
+            clients: {主机地址: 客户端}，至少两个主机才会对冲
+            rate_limiter: 限流器，对冲副本同样计入权重
+            default_delay: 样本不足时的对冲延迟（秒）
+            min_delay: 对冲延迟下限（秒）
+            max_delay: 对冲延迟上限（秒）
+            min_samples: 使用 p95 之前需要的最少样本数
+            error_penalty: 失败请求计入统计的惩罚延迟（秒）
+            max_workers: 线程池大小
+        """
+        self.clients = dict(clients)
+        self.rate_limiter = rate_limiter
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.min_samples = min_samples
+        self.error_penalty = error_penalty
+        self.stats = {host: LatencyStats() for host in self.clients}
+        self.hedges_sent = 0
+        self.hedges_won = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+
+    def ranked_hosts(self) -> List[str]:
+        """按 p95 延迟从低到高排序的主机列表，样本不足的主机按默认延迟估计"""
+        def score(host: str) -> float:
+            stats = self.stats[host]
+            if stats.count() < self.min_samples:
+                return self.default_delay
+            return stats.percentile(95)
+
+        return sorted(self.clients, key=score)
+
+    def hedge_delay(self, host: str) -> float:
+        """主请求发出后等待多久再发送对冲副本"""
+        stats = self.stats[host]
+        if stats.count() < self.min_samples:
+            return self.default_delay
+        return min(self.max_delay, max(self.min_delay, stats.percentile(95)))
+
+    def _timed_call(self, host: str, method: str, args, kwargs):
+        start = time.perf_counter()
+        try:
+            result = getattr(self.clients[host], method)(*args, **kwargs)
+        except Exception:
+            self.stats[host].record_error(self.error_penalty)
+            raise
+        self.stats[host].record(time.perf_counter() - start)
+        return result
+
+    def call(self, method: str, weight: int, *args, **kwargs) -> Any:
+        """
+        发送对冲请求
+
+        Args:
+            method: 客户端方法名，必须属于 HEDGEABLE_METHODS
+            weight: 单次请求权重
+            args/kwargs: 调用参数
+
+        Returns:
+            先成功返回的结果；所有请求都失败时抛出主请求的异常
+        """
+        hosts = self.ranked_hosts()
+        primary = hosts[0]
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(weight)
+        first = self._executor.submit(self._timed_call, primary, method, args, kwargs)
+
+        if method not in HEDGEABLE_METHODS or len(hosts) < 2:
+            return first.result()
+
+        done, _ = wait([first], timeout=self.hedge_delay(primary))
+        if done and first.exception() is None:
+            return first.result()
+
+        # 主请求超过 p95 仍未返回（或已失败）：对冲副本不阻塞等待限额，额度不足时放弃对冲
+        if self.rate_limiter is not None and not self.rate_limiter.acquire(weight, timeout=0):
+            return first.result()
+        second = self._executor.submit(self._timed_call, hosts[1], method, args, kwargs)
+        self.hedges_sent += 1
+        return self._first_success([first, second])
+
+    def _first_success(self, futures: List[Future]) -> Any:
+        pending = set(futures)
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    # 取消另一个请求；已在传输中的同步请求无法中断，其结果会被丢弃
+                    for other in pending:
+                        other.cancel()
+                    if future is futures[1]:
+                        self.hedges_won += 1
+                    return future.result()
+                if future is futures[0] or error is None:
+                    error = future.exception()
+        raise error
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        获取各主机的延迟统计
+
+        Returns:
+            {主机: {'p50', 'p95', 'samples', 'errors'}}
+        """
+        return {
+            host: {
+                'p50': stats.percentile(50),
+                'p95': stats.percentile(95),
+                'samples': stats.count(),
+                'errors': stats.errors,
+            }
+            for host, stats in self.stats.items()
+        }
+
+    def shutdown(self):
+        """关闭线程池"""
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+增量JSON扫描器
+逐块读取流式响应，第一个完整且可解析的顶层JSON对象一出现就返回，
+调用方据此提前结束流，模型在JSON之后追加的说明文字不再占用等待时间
+"""
+
+import json
+from typing import Any, Callable, Dict, Optional
+
+
+def is_decision(obj: Dict[str, Any]) -> bool:
+    """是否像一个交易决策对象（旧格式含 action，新格式含 signal）"""
+    return 'action' in obj or 'signal' in obj
+
+
+class JSONObjectScanner:
+    """
+    顶层JSON对象的增量扫描器
+
+    只跟踪花括号深度与字符串/转义状态，每个字符只扫描一次；对象闭合后尝试解析，
+    解析失败或未通过校验时（例如前置说明文字中的花括号）丢弃该候选继续扫描。
+    """
+
+    def __init__(self, validate: Optional[Callable[[Dict[str, Any]], bool]] = None):
+        """
+        初始化扫描器
+
+        Args:
+            validate: 可选的校验函数，返回 False 的对象不视为决策
+        """
+        self.validate = validate
+        self.buffer = ""
+        self.result: Optional[Dict[str, Any]] = None
+        self.text: Optional[str] = None
+        self._pos = 0
+        self._start = -1
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk: str) -> Optional[str]:
+        """
+        喂入一段文本
+
+        Args:
+            chunk: 新到达的文本
+
+        Returns:
+            完整JSON对象的原文（只在首次完成时返回一次），否则 None
+        """
+        if self.text is not None:
+            return None
+        self.buffer += chunk
+        buffer = self.buffer
+
+        i = self._pos
+        end = len(buffer)
+        while i < end:
+            ch = buffer[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                if self._depth:
+                    self._in_string = True
+            elif ch == '{':
+                if self._depth == 0:
+                    self._start = i
+                self._depth += 1
+            elif ch == '}' and self._depth:
+                self._depth -= 1
+                if self._depth == 0:
+                    candidate = buffer[self._start:i + 1]
+                    obj = self._parse(candidate)
+                    if obj is not None:
+                        self._pos = i + 1
+                        self.result = obj
+                        self.text = candidate
+                        return candidate
+                    self._start = -1
+            i += 1
+        self._pos = end
+        return None
+
+    def _parse(self, candidate: str) -> Optional[Dict[str, Any]]:
+        try:
+            obj = json.loads(candidate)
+        except ValueError:
+            return None
+        if not isinstance(obj, dict):
+            return None
+        if self.validate is not None and not self.validate(obj):
+            return None
+        return obj
+
+    @property
+    def done(self) -> bool:
+        """是否已找到完整对象"""
+        return self.text is not None
+
+
+def find_json_object(text: str, validate: Optional[Callable[[Dict[str, Any]], bool]] = None) -> Optional[str]:
+    """
+    在完整文本中查找第一个可解析的顶层JSON对象
+
+    Args:
+        text: 响应文本
+        validate: 可选的校验函数
+
+    Returns:
+        JSON对象原文，未找到时返回 None
+    """
+    return JSONObjectScanner(validate).feed(text)
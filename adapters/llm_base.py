@@ -5,21 +5,87 @@ LLM适配器基类
 定义统一的LLM接口规范
 """
 
+import asyncio
+import importlib.util
+import os
+import time
+from functools import lru_cache
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Any, AsyncIterator, Iterator, Optional
+
+from .json_stream import JSONObjectScanner, is_decision
+
+# 所有适配器共用的系统提示词
+DEFAULT_SYSTEM_PROMPT = "你是一个专业的量化交易分析师，请根据市场数据给出交易决策。"
+
+# API调用失败时返回的默认观望决策
+FALLBACK_RESPONSE = '{"symbol": null, "action": "HOLD", "confidence": 0.0, "rationale": "API调用失败"}'
+
+# 完整的静态系统提示词（约 7.5 KB），作为可被服务端缓存的固定前缀
+SYSTEM_PROMPT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                  'prompt', 'system_prompt.md')
+
+
+def require_sdk(module: str, package: Optional[str] = None):
+    """
+    检查SDK是否已安装（只查找模块，不导入），SDK在首次创建客户端时才导入
+
+    Args:
+        module: 模块名，如'openai'
+        package: pip 包名，默认与模块名相同
+
+    Raises:
+        ImportError: SDK未安装
+    """
+    if importlib.util.find_spec(module) is None:
+        print(f"❌ 请安装{module}: pip install {package or module}")
+        raise ImportError(f"{module}库未安装")
+
+
+@lru_cache(maxsize=None)
+def load_system_prompt(path: str = SYSTEM_PROMPT_PATH) -> str:
+    """
+    读取系统提示词文件（每个进程只读取一次，保证每次请求的前缀逐字节一致）
+
+    Args:
+        path: 系统提示词路径，默认为 prompt/system_prompt.md
+
+    Returns:
+        系统提示词文本
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read().strip()
 
 
 class LLMAdapter(ABC):
     """LLM适配器基类"""
+
+    # 熔断器探测恢复时发送的提示词
+    PROBE_PROMPT = "ping"
     
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, system_prompt: Optional[str] = None):
         """
         初始化LLM适配器
         
         Args:
             api_key: API密钥
+            system_prompt: 系统提示词，默认为 DEFAULT_SYSTEM_PROMPT；
+                           传入 load_system_prompt() 时作为可被服务端缓存的固定前缀
         """
         self.api_key = api_key
+        self.system_prompt = system_prompt or DEFAULT_SYSTEM_PROMPT
+        self.max_tokens = 500
+        self.temperature = 0.7
+        # 为 True 时 call/acall 使用流式输出，决策JSON闭合后立即结束
+        self.streaming = False
+        # 最近一次流式调用的耗时统计，见 call_streaming
+        self.last_call_stats: Optional[Dict[str, Any]] = None
+        # 是否标记系统提示词前缀供服务端缓存（Anthropic cache_control；OpenAI兼容接口自动缓存）
+        self.prompt_cache = True
+        # 最近一次调用与累计的token用量，见 _record_usage
+        self.last_usage: Optional[Dict[str, int]] = None
+        self.usage_totals = {'input_tokens': 0, 'cached_tokens': 0, 'uncached_tokens': 0,
+                             'cache_write_tokens': 0, 'output_tokens': 0, 'calls': 0}
     
     @abstractmethod
     def call(self, prompt: str) -> str:
@@ -34,6 +100,164 @@ class LLMAdapter(ABC):
         """
         pass
     
+    async def acall(self, prompt: str) -> str:
+        """
+        异步调用LLM API
+        
+        默认实现将同步的 call 放到线程池执行；有原生异步客户端的适配器应覆盖此方法，
+        使大量并发请求共享同一个事件循环而不是各占一个线程。
+        
+        Args:
+            prompt: 输入提示词
+            
+        Returns:
+            LLM响应文本
+        """
+        return await asyncio.to_thread(self.call, prompt)
+    
+    def probe(self) -> bool:
+        """
+        探测服务是否可用（熔断器断开后的后台探测使用）
+
+        默认实现发送一次完整的 call；有SDK客户端的适配器应覆盖为不带系统提示词、只生成1个token的最小请求，
+        避免每次探测都按完整系统前缀与输出上限计费。
+
+        Returns:
+            True 表示服务可用
+        """
+        return self.call(self.PROBE_PROMPT) != FALLBACK_RESPONSE
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        """
+        流式调用LLM API，逐块产出文本
+
+        生成器被关闭时（GeneratorExit）实现必须关闭底层的HTTP流。
+
+        Args:
+            prompt: 输入提示词
+
+        Yields:
+            响应文本片段
+        """
+        raise NotImplementedError(f"{self.get_model_name()} 不支持流式输出")
+
+    def astream(self, prompt: str) -> AsyncIterator[str]:
+        """
+        stream 的异步版本
+
+        Args:
+            prompt: 输入提示词
+
+        Yields:
+            响应文本片段
+        """
+        raise NotImplementedError(f"{self.get_model_name()} 不支持流式输出")
+
+    def _record_usage(self, input_tokens: int, cached_tokens: int = 0, output_tokens: int = 0,
+                      cache_write_tokens: int = 0):
+        """
+        记录一次调用的token用量
+
+        Args:
+            input_tokens: 输入token总数（含命中缓存的部分）
+            cached_tokens: 命中服务端前缀缓存的输入token数
+            output_tokens: 输出token数
+            cache_write_tokens: 本次写入缓存的输入token数（Anthropic）
+        """
+        usage = {
+            'input_tokens': input_tokens,
+            'cached_tokens': cached_tokens,
+            'uncached_tokens': input_tokens - cached_tokens,
+            'cache_write_tokens': cache_write_tokens,
+            'output_tokens': output_tokens,
+        }
+        self.last_usage = usage
+        for key, value in usage.items():
+            self.usage_totals[key] += value
+        self.usage_totals['calls'] += 1
+
+    def _record_openai_usage(self, usage: Any):
+        """从 OpenAI 兼容接口的 usage 对象记录用量，cached_tokens 位于 prompt_tokens_details"""
+        if usage is None:
+            return
+        details = getattr(usage, 'prompt_tokens_details', None)
+        cached = getattr(details, 'cached_tokens', None) or 0
+        self._record_usage(usage.prompt_tokens or 0, cached, usage.completion_tokens or 0)
+
+    def _finish_stats(self, start: float, first_token: Optional[float], chunks: int,
+                      scanner: JSONObjectScanner):
+        now = time.perf_counter()
+        self.last_call_stats = {
+            'first_token': None if first_token is None else first_token - start,
+            'decision': now - start if scanner.done else None,
+            'total': now - start,
+            'chunks': chunks,
+            'early_stop': scanner.done,
+        }
+
+    def call_streaming(self, prompt: str) -> str:
+        """
+        流式调用，第一个完整的决策JSON对象出现后立即关闭流
+
+        耗时写入 last_call_stats：first_token（首个片段）、decision（决策完成）、
+        total（流关闭）、chunks、early_stop。
+
+        Args:
+            prompt: 输入提示词
+
+        Returns:
+            决策JSON原文；流结束仍未找到完整对象时返回全部文本
+        """
+        scanner = JSONObjectScanner(is_decision)
+        start = time.perf_counter()
+        first_token = None
+        chunks = 0
+        parts = []
+        stream = self.stream(prompt)
+        try:
+            for chunk in stream:
+                if first_token is None:
+                    first_token = time.perf_counter()
+                chunks += 1
+                parts.append(chunk)
+                decision = scanner.feed(chunk)
+                if decision is not None:
+                    return decision
+        finally:
+            stream.close()
+            self._finish_stats(start, first_token, chunks, scanner)
+        return "".join(parts).strip()
+
+    async def acall_streaming(self, prompt: str) -> str:
+        """
+        call_streaming 的异步版本
+
+        Args:
+            prompt: 输入提示词
+
+        Returns:
+            决策JSON原文；流结束仍未找到完整对象时返回全部文本
+        """
+        scanner = JSONObjectScanner(is_decision)
+        start = time.perf_counter()
+        first_token = None
+        chunks = 0
+        parts = []
+        stream = self.astream(prompt)
+        try:
+            async for chunk in stream:
+                if first_token is None:
+                    first_token = time.perf_counter()
+                chunks += 1
+                parts.append(chunk)
+                decision = scanner.feed(chunk)
+                if decision is not None:
+                    return decision
+        finally:
+            await stream.aclose()
+            self._finish_stats(start, first_token, chunks, scanner)
+        return "".join(parts).strip()
+
     @abstractmethod
     def get_model_name(self) -> str:
         """
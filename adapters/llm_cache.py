@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LLM响应缓存
+按 (模型, 采样参数, 提示词哈希) 缓存响应：内存LRU + SQLite 磁盘存储，支持TTL与容量淘汰，
+重复运行与回测回放同一市场快照时不再产生API延迟和费用
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from .llm_base import LLMAdapter, FALLBACK_RESPONSE
+
+# 磁盘命中只在内存中记录访问时间，累计到该条数（或写入、淘汰、关闭时）再批量写回，
+# 回测回放时不必每次命中都提交一次事务
+TOUCH_BATCH = 512
+
+
+def cache_key(model: str, params: Dict[str, Any], prompt: str) -> str:
+    """
+    计算缓存键
+
+    Args:
+        model: 模型名称
+        params: 影响输出的参数（系统提示词、max_tokens、temperature等）
+        prompt: 用户提示词
+
+    Returns:
+        sha256 十六进制摘要
+    """
+    digest = hashlib.sha256()
+    digest.update(model.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(json.dumps(params, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(prompt.encode('utf-8'))
+    return digest.hexdigest()
+
+
+class ResponseCache:
+    """两级响应缓存：内存LRU在前，SQLite 持久化在后"""
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 1024, max_disk_entries: int = 100_000,
+                 ttl: Optional[float] = None, clock: Callable[[], float] = time.time):
+        """
+        初始化响应缓存
+
+        Args:
+            path: SQLite 文件路径，None 表示只使用内存缓存
+            max_entries: 内存LRU最多保留的条数
+            max_disk_entries: 磁盘最多保留的条数，超出时按最近访问时间淘汰
+            ttl: 条目有效期（秒），None 表示永不过期
+            clock: 时间函数（秒），回测可注入虚拟时钟
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+
+        # key -> (created_at, response)
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        # key -> 尚未写回磁盘的最近访问时间
+        self._touched: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                " key TEXT PRIMARY KEY,"
+                " model TEXT NOT NULL,"
+                " response TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache (accessed_at)")
+            self._db.commit()
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl is not None and now - created_at > self.ttl
+
+    def _remember(self, key: str, created_at: float, response: str):
+        self._memory[key] = (created_at, response)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        读取缓存
+
+        Args:
+            key: cache_key() 计算的键
+
+        Returns:
+            缓存的响应，未命中或已过期时返回 None
+        """
+        with self._lock:
+            now = self.clock()
+            entry = self._memory.get(key)
+            if entry is not None:
+                if not self._expired(entry[0], now):
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT created_at, response FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    if not self._expired(row[0], now):
+                        self._touched[key] = now
+                        if len(self._touched) >= TOUCH_BATCH:
+                            self._flush_touched()
+                            self._db.commit()
+                        self._remember(key, row[0], row[1])
+                        self.hits += 1
+                        return row[1]
+                    self._db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    self._db.commit()
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, model: str, response: str):
+        """
+        写入缓存
+
+        Args:
+            key: cache_key() 计算的键
+            model: 模型名称（便于按模型清理）
+            response: 响应文本
+        """
+        with self._lock:
+            now = self.clock()
+            self._remember(key, now, response)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, model, response, created_at, accessed_at)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (key, model, response, now, now),
+                )
+                self._flush_touched()
+                self._evict_disk(now)
+                self._db.commit()
+
+    def _flush_touched(self):
+        """批量写回磁盘命中的访问时间（调用方负责提交）"""
+        if self._touched:
+            self._db.executemany("UPDATE llm_cache SET accessed_at = ? WHERE key = ?",
+                                 [(accessed_at, key) for key, accessed_at in self._touched.items()])
+            self._touched.clear()
+
+    def _evict_disk(self, now: float):
+        """删除过期条目，并按最近访问时间淘汰超出容量的条目"""
+        if self.ttl is not None:
+            self._db.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl,))
+        count = self._db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        overflow = count - self.max_disk_entries
+        if overflow > 0:
+            self._db.execute(
+                "DELETE FROM llm_cache WHERE key IN"
+                " (SELECT key FROM llm_cache ORDER BY accessed_at LIMIT ?)",
+                (overflow,),
+            )
+
+    def clear(self):
+        """清空内存与磁盘缓存"""
+        with self._lock:
+            self._memory.clear()
+            self._touched.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM llm_cache")
+                self._db.commit()
+
+    def hit_rate(self) -> float:
+        """命中率"""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计
+
+        Returns:
+            {'hits', 'misses', 'hit_rate', 'memory_entries'}
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hit_rate(),
+            'memory_entries': len(self._memory),
+        }
+
+    def close(self):
+        """关闭磁盘存储"""
+        with self._lock:
+            if self._db is not None:
+                self._flush_touched()
+                self._db.commit()
+                self._db.close()
+                self._db = None
+
+
+class CachedLLMAdapter(LLMAdapter):
+    """
+    为任意 LLMAdapter 增加响应缓存
+
+    系统提示词、max_tokens、temperature 均从被包装的适配器读取并计入缓存键；
+    调用失败返回的 FALLBACK_RESPONSE 不会被缓存。
+    """
+
+    def __init__(self, adapter: LLMAdapter, cache: ResponseCache):
+        """
+        初始化缓存适配器
+
+        Args:
+            adapter: 被包装的适配器
+            cache: 响应缓存（可被多个适配器共用）
+        """
+        self.adapter = adapter
+        self.cache = cache
+        self.api_key = adapter.api_key
+
+    def __getattr__(self, name: str):
+        # 未定义的属性（system_prompt、max_tokens、client 等）转发给被包装的适配器
+        return getattr(self.adapter, name)
+
+    def _key(self, prompt: str) -> str:
+        params = {
+            'system_prompt': self.adapter.system_prompt,
+            'max_tokens': self.adapter.max_tokens,
+            'temperature': self.adapter.temperature,
+        }
+        return cache_key(self.adapter.get_model_name(), params, prompt)
+
+    def call(self, prompt: str) -> str:
+        """
+        调用LLM API，命中缓存时直接返回
+
+        Args:
+            prompt: 输入提示词
+
+        Returns:
+            LLM响应文本
+        """
+        key = self._key(prompt)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        response = self.adapter.call(prompt)
+        if response != FALLBACK_RESPONSE:
+            self.cache.put(key, self.adapter.get_model_name(), response)
+        return response
+
+    async def acall(self, prompt: str) -> str:
+        """
+        异步调用LLM API，命中缓存时直接返回
+
+        Args:
+            prompt: 输入提示词
+
+        Returns:
+            LLM响应文本
+        """
+        key = self._key(prompt)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        response = await self.adapter.acall(prompt)
+        if response != FALLBACK_RESPONSE:
+            self.cache.put(key, self.adapter.get_model_name(), response)
+        return response
+
+    def get_model_name(self) -> str:
+        """获取模型名称"""
+        return self.adapter.get_model_name()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+价格快照缓存
+在TTL内复用最近一次拉取的价格，避免同一周期内重复请求交易所
+"""
+
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class PriceSnapshotCache:
+    """带TTL的线程安全价格缓存"""
+
+    def __init__(self, ttl: float = 2.0):
+        """
+        初始化价格缓存
+
+        Args:
+            ttl: 缓存有效期（秒），<= 0 表示禁用缓存
+        """
+        self.ttl = ttl
+        self._prices: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, symbol: str) -> Optional[float]:
+        """
+        读取单个交易对的缓存价格
+
+        Args:
+            symbol: 交易对符号
+
+        Returns:
+            未过期的价格，否则返回 None
+        """
+        entry = self._prices.get(symbol)
+        if entry is None or time.monotonic() - entry[1] > self.ttl:
+            return None
+        return entry[0]
+
+    def get_many(self, symbols: Iterable[str]) -> Tuple[Dict[str, float], List[str]]:
+        """
+        批量读取缓存价格
+
+        Args:
+            symbols: 交易对符号列表
+
+        Returns:
+            (命中的价格字典, 未命中或已过期的交易对列表)
+        """
+        hits = {}
+        misses = []
+        for symbol in symbols:
+            price = self.get(symbol)
+            if price is None:
+                misses.append(symbol)
+            else:
+                hits[symbol] = price
+        return hits, misses
+
+    def update(self, prices: Dict[str, float]):
+        """
+        写入一批价格，共用同一个时间戳
+
+        Args:
+            prices: {symbol: price}
+        """
+        if self.ttl <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            for symbol, price in prices.items():
+                self._prices[symbol] = (price, now)
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._prices.clear()
@@ -6,26 +6,26 @@ Qwen适配器
 """
 
 import os
-from typing import Dict, Any
-from .llm_base import LLMAdapter
-
-try:
-    from openai import OpenAI
-except ImportError:
-    print("❌ 请安装openai: pip install openai")
-    OpenAI = None
+from functools import cached_property
+from typing import Dict, Any, AsyncIterator, Iterator, Optional
+from .llm_base import LLMAdapter, FALLBACK_RESPONSE, require_sdk
 
 
 class QwenAdapter(LLMAdapter):
     """Qwen适配器"""
 
-    def __init__(self, api_key: str = None, model: str = "qwen-plus"):
+    BASE_URL = "https://dashscope.aliyuncs.com/compatible-mode/v1"
+
+    def __init__(self, api_key: str = None, model: str = "qwen-plus", streaming: bool = False,
+                 system_prompt: Optional[str] = None):
         """
         初始化Qwen适配器
 
         Args:
             api_key: Qwen API密钥，如果为None则从环境变量获取
             model: 使用的模型名称，默认为qwen-plus
+            streaming: 是否使用流式输出（决策JSON完整后提前结束）
+            system_prompt: 系统提示词，默认为 DEFAULT_SYSTEM_PROMPT
         """
         if api_key is None:
             api_key = os.getenv('QWEN_API_KEY')
@@ -33,18 +33,46 @@ class QwenAdapter(LLMAdapter):
         if not api_key:
             raise ValueError("Qwen API密钥未设置，请设置QWEN_API_KEY环境变量")
 
-        super().__init__(api_key)
+        super().__init__(api_key, system_prompt)
 
         self.model = model
+        self.streaming = streaming
+
+        # OpenAI兼容客户端（同步 + 异步）在首次调用时才导入SDK并创建
+        require_sdk('openai')
+
+    @cached_property
+    def client(self):
+        """同步客户端（首次访问时创建）"""
+        from openai import OpenAI
+        return OpenAI(api_key=self.api_key, base_url=self.BASE_URL)
+
+    @cached_property
+    def async_client(self):
+        """异步客户端（首次访问时创建）"""
+        from openai import AsyncOpenAI
+        return AsyncOpenAI(api_key=self.api_key, base_url=self.BASE_URL)
+
+    def build_request(self, prompt: str) -> Dict[str, Any]:
+        """
+        构建 chat.completions 请求参数，同步与异步调用共用
+
+        Args:
+            prompt: 输入提示词
 
-        # 初始化OpenAI兼容客户端
-        if OpenAI:
-            self.client = OpenAI(
-                api_key=self.api_key,
-                base_url="https://dashscope.aliyuncs.com/compatible-mode/v1",
-            )
-        else:
-            raise ImportError("OpenAI库未安装")
+        Returns:
+            请求参数字典
+        """
+        # 系统消息固定放在最前且内容不变，服务端按前缀自动缓存
+        return {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            "max_tokens": self.max_tokens,
+            "temperature": self.temperature,
+        }
 
     def call(self, prompt: str) -> str:
         """
@@ -57,22 +85,95 @@ class QwenAdapter(LLMAdapter):
             Qwen响应文本
         """
         try:
-            completion = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "你是一个专业的量化交易分析师，请根据市场数据给出交易决策。"},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=500,
-                temperature=0.7
-            )
+            if self.streaming:
+                return self.call_streaming(prompt)
+            completion = self.client.chat.completions.create(**self.build_request(prompt))
+            self._record_openai_usage(completion.usage)
+            return completion.choices[0].message.content.strip()
+
+        except Exception as e:
+            print(f"❌ Qwen API调用失败: {e}")
+            return FALLBACK_RESPONSE
+
+    async def acall(self, prompt: str) -> str:
+        """
+        异步调用Qwen API
 
+        Args:
+            prompt: 输入提示词
+
+        Returns:
+            Qwen响应文本
+        """
+        try:
+            if self.streaming:
+                return await self.acall_streaming(prompt)
+            completion = await self.async_client.chat.completions.create(**self.build_request(prompt))
+            self._record_openai_usage(completion.usage)
             return completion.choices[0].message.content.strip()
 
         except Exception as e:
             print(f"❌ Qwen API调用失败: {e}")
-            return '{"symbol": null, "action": "HOLD", "confidence": 0.0, "rationale": "API调用失败"}'
+            return FALLBACK_RESPONSE
+
+    def probe(self) -> bool:
+        """
+        以最小请求探测Qwen服务：不带系统提示词，只生成1个token
+
+        Returns:
+            True 表示服务可用
+        """
+        try:
+            self.client.chat.completions.create(
+                model=self.model, messages=[{"role": "user", "content": self.PROBE_PROMPT}], max_tokens=1)
+            return True
+        except Exception:
+            return False
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        """
+        流式调用Qwen API
+
+        Args:
+            prompt: 输入提示词
+
+        Yields:
+            响应文本片段
+        """
+        response = self.client.chat.completions.create(
+            **self.build_request(prompt), stream=True, stream_options={"include_usage": True})
+        try:
+            for chunk in response:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+                elif getattr(chunk, 'usage', None) is not None:
+                    # 用量在最后一个数据块中返回，提前结束的流没有用量统计
+                    self._record_openai_usage(chunk.usage)
+        finally:
+            # 提前结束时关闭HTTP连接，服务端停止生成
+            response.close()
+
+    async def astream(self, prompt: str) -> AsyncIterator[str]:
+        """
+        异步流式调用Qwen API
+
+        Args:
+            prompt: 输入提示词
+
+        Yields:
+            响应文本片段
+        """
+        response = await self.async_client.chat.completions.create(
+            **self.build_request(prompt), stream=True, stream_options={"include_usage": True})
+        try:
+            async for chunk in response:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+                elif getattr(chunk, 'usage', None) is not None:
+                    self._record_openai_usage(chunk.usage)
+        finally:
+            await response.close()
 
     def get_model_name(self) -> str:
         """获取模型名称"""
-        return f"self.model"
+        return self.model
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+币安请求权重限流器
+按接口权重扣减的令牌桶，根据响应头 X-MBX-USED-WEIGHT-1M 与服务器同步，
+线程与 asyncio 任务均可安全共用
+"""
+
+import asyncio
+import threading
+import time
+from typing import Any, Callable, Dict, Mapping, Optional
+
+# 各账户类型每分钟的请求权重上限
+WEIGHT_LIMITS = {
+    'spot': 6000,
+    'futures': 2400,
+}
+
+# 现货/合约接口的请求权重（方法名与 binance-connector 一致）
+ENDPOINT_WEIGHTS = {
+    'ping': 1,
+    'time': 1,
+    'ticker_price': 2,
+    'book_ticker': 2,
+    'klines': 2,
+    'ui_klines': 2,
+    'avg_price': 2,
+    'depth': 5,
+    'exchange_info': 20,
+    'account': 20,
+    'open_interest': 1,
+    'funding_rate': 1,
+    'open_interest_hist': 1,
+}
+
+# 同时返回多个/全部交易对时的权重
+MULTI_SYMBOL_WEIGHTS = {
+    'ticker_price': 4,
+    'book_ticker': 4,
+}
+
+
+def request_weight(method: str, *args, **kwargs) -> int:
+    """
+    计算一次请求的权重
+
+    Args:
+        method: binance-connector 客户端方法名，如'ticker_price'
+        args/kwargs: 调用参数
+
+    Returns:
+        请求权重，未知接口按 1 计算
+    """
+    if method == 'ticker_24hr':
+        symbols = kwargs.get('symbols')
+        if args or kwargs.get('symbol'):
+            return 2
+        if symbols is None:
+            return 80
+        return 2 if len(symbols) <= 20 else 40 if len(symbols) <= 100 else 80
+    if method in MULTI_SYMBOL_WEIGHTS and not args and not kwargs.get('symbol'):
+        return MULTI_SYMBOL_WEIGHTS[method]
+    return ENDPOINT_WEIGHTS.get(method, 1)
+
+
+class WeightRateLimiter:
+    """按请求权重扣减的令牌桶"""
+
+    def __init__(self, limit: int = WEIGHT_LIMITS['spot'], window: float = 60.0, safety_margin: float = 0.9,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        初始化限流器
+
+        Args:
+            limit: 交易所在 window 内允许的权重上限
+            window: 限额窗口（秒）
+            safety_margin: 实际使用的比例，给同一IP下的其他进程留出余量
+            clock: 单调时钟（秒）
+        """
+        self.limit = limit
+        self.capacity = limit * safety_margin
+        self.refill_rate = self.capacity / window
+        self.clock = clock
+        self._tokens = self.capacity
+        self._updated_at = clock()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.refill_rate)
+        self._updated_at = now
+
+    def _try_acquire(self, weight: int) -> float:
+        """尝试扣减权重，成功返回 0，否则返回需要等待的秒数"""
+        weight = min(weight, self.capacity)
+        with self._lock:
+            now = self.clock()
+            if now < self._blocked_until:
+                return self._blocked_until - now
+            self._refill(now)
+            if self._tokens >= weight:
+                self._tokens -= weight
+                return 0.0
+            return (weight - self._tokens) / self.refill_rate
+
+    def acquire(self, weight: int = 1, timeout: Optional[float] = None) -> bool:
+        """
+        阻塞直到可以发送权重为 weight 的请求（线程安全）
+
+        Args:
+            weight: 请求权重
+            timeout: 最长等待秒数，None 表示一直等待
+
+        Returns:
+            是否成功获取
+        """
+        deadline = None if timeout is None else self.clock() + timeout
+        while True:
+            wait = self._try_acquire(weight)
+            if wait <= 0:
+                return True
+            if deadline is not None:
+                remaining = deadline - self.clock()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+    async def acquire_async(self, weight: int = 1):
+        """
+        acquire 的协程版本：等待期间让出事件循环而不阻塞线程
+
+        Args:
+            weight: 请求权重
+        """
+        while True:
+            wait = self._try_acquire(weight)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def update_from_headers(self, headers: Mapping[str, Any]):
+        """
+        根据响应头中服务器统计的已用权重校正本地令牌
+
+        服务器的统计包含同一IP下其他进程的请求，因此只会向下校正。
+
+        Args:
+            headers: 响应头（大小写不敏感的映射或普通字典）
+        """
+        used = None
+        for key, value in headers.items():
+            if key.lower() == 'x-mbx-used-weight-1m':
+                used = value
+                break
+        if used is None:
+            return
+        try:
+            used = float(used)
+        except (TypeError, ValueError):
+            return
+
+        with self._lock:
+            self._refill(self.clock())
+            self._tokens = min(self._tokens, self.capacity - used)
+
+    def penalize(self, retry_after: float):
+        """
+        收到 429/418 后暂停所有请求
+
+        Args:
+            retry_after: Retry-After 秒数
+        """
+        with self._lock:
+            now = self.clock()
+            self._blocked_until = max(self._blocked_until, now + retry_after)
+            self._tokens = 0.0
+            self._updated_at = now
+
+    def available(self) -> float:
+        """当前可用的权重"""
+        with self._lock:
+            self._refill(self.clock())
+            return self._tokens
+
+
+def install_weight_hook(client: Any, limiter: WeightRateLimiter):
+    """
+    在 binance-connector 客户端的 requests 会话上注册响应钩子，
+    用每个响应的权重头同步限流器，遇到 429/418 时按 Retry-After 暂停
+
+    Args:
+        client: Spot / UMFutures 等客户端
+        limiter: 限流器
+    """
+    def hook(response, *args, **kwargs):
+        limiter.update_from_headers(response.headers)
+        if response.status_code in (418, 429):
+            try:
+                retry_after = float(response.headers.get('Retry-After', 60))
+            except (TypeError, ValueError):
+                retry_after = 60.0
+            limiter.penalize(retry_after)
+        return response
+
+    session = getattr(client, 'session', None)
+    if session is not None:
+        session.hooks.setdefault('response', []).append(hook)
+
+
+_limiters: Dict[str, WeightRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_global_limiter(account: str = 'spot') -> WeightRateLimiter:
+    """
+    获取进程内共享的限流器（同一IP共用同一份交易所限额）
+
+    Args:
+        account: 'spot' 或 'futures'
+
+    Returns:
+        限流器实例
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(account)
+        if limiter is None:
+            limiter = _limiters[account] = WeightRateLimiter(limit=WEIGHT_LIMITS[account])
+        return limiter
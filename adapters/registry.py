@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+适配器注册表
+按供应商名称登记适配器所在模块，首次使用时才导入模块（及其SDK）并创建实例，
+避免一次性运行为未使用的SDK支付导入开销
+"""
+
+import importlib
+from typing import Any, Dict, List, Tuple
+
+# 供应商名称 -> (模块, 类名, 默认参数)；Deepseek 通过 Qwen 兼容接口调用
+ADAPTER_REGISTRY: Dict[str, Tuple[str, str, Dict[str, Any]]] = {
+    'qwen': ('adapters.qwen_adapter', 'QwenAdapter', {}),
+    'deepseek': ('adapters.qwen_adapter', 'QwenAdapter', {'model': 'deepseek-v3.1'}),
+    'openai': ('adapters.openai_adapter', 'OpenAIAdapter', {}),
+    'claude': ('adapters.claude_adapter', 'ClaudeAdapter', {}),
+}
+
+_env_loaded = False
+
+
+def load_env():
+    """加载 .env 环境变量（进程内只加载一次）"""
+    global _env_loaded
+    if _env_loaded:
+        return
+    from dotenv import load_dotenv
+    load_dotenv()
+    _env_loaded = True
+
+
+def register_adapter(provider: str, module: str, class_name: str, **defaults):
+    """
+    登记适配器（不导入模块）
+
+    Args:
+        provider: 供应商名称，如'qwen'
+        module: 适配器所在模块，如'adapters.qwen_adapter'
+        class_name: 适配器类名
+        defaults: 创建实例时的默认参数
+    """
+    ADAPTER_REGISTRY[provider] = (module, class_name, defaults)
+
+
+def available_providers() -> List[str]:
+    """
+    已登记的供应商名称
+
+    Returns:
+        供应商名称列表
+    """
+    return list(ADAPTER_REGISTRY)
+
+
+def get_adapter_class(provider: str) -> type:
+    """
+    获取适配器类，首次调用时导入所在模块
+
+    Args:
+        provider: 供应商名称
+
+    Returns:
+        适配器类
+
+    Raises:
+        KeyError: 供应商未登记
+    """
+    if provider not in ADAPTER_REGISTRY:
+        raise KeyError(f"未知的供应商: {provider}，可选: {', '.join(ADAPTER_REGISTRY)}")
+    module, class_name, _ = ADAPTER_REGISTRY[provider]
+    return getattr(importlib.import_module(module), class_name)
+
+
+def create_adapter(provider: str, **kwargs):
+    """
+    创建适配器实例；SDK客户端由适配器在首次调用时创建
+
+    Args:
+        provider: 供应商名称
+        kwargs: 构造参数，覆盖登记的默认参数
+
+    Returns:
+        LLMAdapter 实例
+    """
+    load_env()
+    adapter_class = get_adapter_class(provider)
+    params = dict(ADAPTER_REGISTRY[provider][2])
+    params.update(kwargs)
+    return adapter_class(**params)
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+回测引擎性能测试
+5个币种30天的5m K线（8640个决策点）、两个模型：首次回放填充响应缓存（模拟每次调用的延迟），
+再次回放全部命中缓存，在虚拟时间上几秒内跑完一个月
+"""
+
+import os
+import re
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# 添加父目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from adapters.llm_base import LLMAdapter
+from adapters.llm_cache import ResponseCache
+from core.backtest import BacktestEngine, VirtualClock
+from core.decision import DecisionMaker
+from data.kline_cache import INTERVAL_MS
+
+SYMBOLS = ['BTCUSDT', 'ETHUSDT', 'XRPUSDT', 'BNBUSDT', 'SOLUSDT']
+DAYS = 30
+STEP = INTERVAL_MS['5m']
+START = 1_740_787_200_000  # 2025-03-01 UTC
+CALL_LATENCY = 0.0005  # 首次回放时每次调用的模拟延迟（秒）
+
+
+class MomentumAdapter(LLMAdapter):
+    """按BTC价格相对上一次的变化决策的假模型"""
+
+    def __init__(self, name: str, threshold: float):
+        super().__init__(api_key="bench")
+        self.name = name
+        self.threshold = threshold
+        self.last = None
+        self.calls = 0
+
+    def call(self, prompt: str) -> str:
+        self.calls += 1
+        time.sleep(CALL_LATENCY)
+        price = float(re.search(r"BTCUSDT: \$([\d.]+)", prompt).group(1))
+        change = 0.0 if self.last is None else price / self.last - 1
+        self.last = price
+        action = 'BUY' if change > self.threshold else 'SELL' if change < -self.threshold else 'HOLD'
+        return '{"symbol": "BTCUSDT", "action": "%s", "confidence": 0.6, "rationale": "momentum"}' % action
+
+    def get_model_name(self) -> str:
+        return self.name
+
+
+def history():
+    rng = np.random.default_rng(0)
+    n = DAYS * 86_400_000 // STEP
+    open_time = START + np.arange(n, dtype=np.int64) * STEP
+    data = {}
+    for i, symbol in enumerate(SYMBOLS):
+        close = (100 + 50 * i) * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+        data[symbol] = (open_time, close, close * 1.001, close * 0.999, close)
+    return data
+
+
+def replay(data, cache_path):
+    clock = VirtualClock()
+    cache = ResponseCache(cache_path, max_entries=50_000, clock=clock.time)
+    adapters = [MomentumAdapter('model_a', 0.001), MomentumAdapter('model_b', 0.002)]
+    engine = BacktestEngine({a.name: DecisionMaker(a) for a in adapters}, data, response_cache=cache, clock=clock)
+    start = time.perf_counter()
+    reports = engine.run()
+    elapsed = time.perf_counter() - start
+    cache.close()
+    return reports, elapsed, sum(a.calls for a in adapters)
+
+
+def main():
+    print("🚀 回测引擎性能测试")
+    print("=" * 50)
+
+    data = history()
+    cycles = len(data['BTCUSDT'][0])
+    print(f"   数据: {len(SYMBOLS)} 个币种 × {cycles:,} 根5m K线（{DAYS}天）")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "llm_cache.sqlite")
+        _, cold, cold_calls = replay(data, path)
+        reports, warm, warm_calls = replay(data, path)
+
+    print("\n📊 结果:")
+    print(f"   首次回放: {cold:6.2f}s  API调用 {cold_calls:,} 次")
+    print(f"   缓存回放: {warm:6.2f}s  API调用 {warm_calls:,} 次  ({cycles / warm:,.0f} 周期/秒)")
+    for name, report in reports.items():
+        print(f"   {BacktestEngine.format_report(name, report)}")
+
+
+if __name__ == "__main__":
+    main()
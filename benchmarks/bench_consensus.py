@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+共识统计性能测试
+90天的5分钟周期（25920个）× 几十个模型：对比遍历决策字典的两两一致率统计与
+ConsensusEngine 的滚动计数 / 按窗口矩阵运算
+"""
+
+import os
+import random
+import sys
+import time
+
+# 添加父目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.consensus import DEFAULT_CAPACITY, ConsensusEngine
+from core.decision_parser import Decision
+
+MODEL_COUNTS = [12, 48]
+OPTIONS = [(symbol, action) for symbol in ['BTCUSDT', 'ETHUSDT', 'SOLUSDT', 'BNBUSDT'] for action in ['BUY', 'SELL']]
+OPTIONS.append((None, 'HOLD'))
+
+
+def make_history(models, cycles: int, seed: int = 42):
+    """随机决策历史：[{模型名称: 决策或 None}]，约5%的决策缺失"""
+    rng = random.Random(seed)
+    history = []
+    for _ in range(cycles):
+        cycle = {}
+        for name in models:
+            if rng.random() < 0.05:
+                cycle[name] = None
+            else:
+                symbol, action = rng.choice(OPTIONS)
+                cycle[name] = Decision(symbol, action, round(rng.random(), 2), "bench")
+        history.append(cycle)
+    return history
+
+
+def dict_agreement(models, history):
+    """遍历决策字典的两两一致率"""
+    matrix = {}
+    for a in models:
+        for b in models:
+            agree = both = 0
+            for cycle in history:
+                da, db = cycle[a], cycle[b]
+                if da is None or db is None:
+                    continue
+                both += 1
+                if (da.get('symbol'), da.get('action')) == (db.get('symbol'), db.get('action')):
+                    agree += 1
+            matrix[(a, b)] = agree / both if both else float('nan')
+    return matrix
+
+
+def timed(fn, rounds: int = 3) -> float:
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    print("🚀 共识统计性能测试")
+    print("=" * 50)
+
+    for count in MODEL_COUNTS:
+        models = [f"model-{i}" for i in range(count)]
+        history = make_history(models, DEFAULT_CAPACITY)
+        engine = ConsensusEngine(models)
+        start = time.perf_counter()
+        for cycle in history:
+            engine.record(cycle)
+        record_time = (time.perf_counter() - start) / len(history)
+
+        print(f"\n📊 {len(history)} 个周期 × {count} 个模型:")
+        print(f"   记录: {record_time * 1e6:.0f} µs/周期")
+        print(f"   一致率（滚动计数）:   {timed(engine.agreement_matrix) * 1e3:9.3f} ms")
+        print(f"   一致率（按窗口重算）: {timed(lambda: engine.agreement_matrix(last=len(history))) * 1e3:9.3f} ms")
+        print(f"   全体一致率:           {timed(engine.unanimity_rate) * 1e3:9.3f} ms")
+        print(f"   加权投票:             {timed(lambda: engine.vote(history[-1])) * 1e3:9.3f} ms")
+        if count <= 12:
+            print(f"   遍历决策字典:         {timed(lambda: dict_agreement(models, history), 1) * 1e3:9.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+决策解析性能测试
+在模型响应语料上对比原 parse_decision（去代码块 + json.loads）与新解析器的吞吐量和恢复率。
+语料按常见模型输出形态生成：纯JSON、```json 代码块、前置说明/追加解释、<think> 推理段、
+小写 action、字符串 confidence、包装对象，以及截断/无JSON等确实无法恢复的响应。
+另外测量完整格式（prompt/system_prompt.md）买入决策的单次校验耗时。
+"""
+
+import io
+import json
+import os
+import random
+import sys
+import time
+from contextlib import redirect_stdout
+
+# 添加父目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.decision_parser import DecisionParser
+from core.trade_decision import TRADE_DECISION_SCHEMA, TradeDecision
+
+CORPUS_SIZE = 20000
+ROUNDS = 5
+SYMBOLS = ['BTCUSDT', 'ETHUSDT', 'XRPUSDT', 'BNBUSDT', 'SOLUSDT', None]
+
+
+def legacy_parse(response: str):
+    """原 DecisionMaker.parse_decision 的实现（失败时返回 None，并保留原有的输出）"""
+    try:
+        response = response.strip()
+        if response.startswith('```json'):
+            response = response[7:]
+        if response.endswith('```'):
+            response = response[:-3]
+        decision = json.loads(response)
+        for field in ['symbol', 'action', 'confidence', 'rationale']:
+            if field not in decision:
+                print(f"⚠️ 决策缺少字段: {field}")
+                return None
+        if decision['action'] not in ['BUY', 'SELL', 'HOLD']:
+            print(f"⚠️ 无效的action: {decision['action']}")
+            decision['action'] = 'HOLD'
+        if not isinstance(decision['confidence'], (int, float)) or not (0 <= decision['confidence'] <= 1):
+            print(f"⚠️ 无效的confidence: {decision['confidence']}")
+            decision['confidence'] = 0.5
+        return decision
+    except json.JSONDecodeError as e:
+        print(f"❌ JSON解析失败: {e}")
+        print(f"原始响应: {response}")
+        return None
+    except Exception as e:
+        print(f"❌ 决策解析失败: {e}")
+        return None
+
+
+def make_corpus(n: int, seed: int = 42):
+    """
+    生成响应语料
+
+    Returns:
+        [(响应文本, 期望的 (symbol, action)，无法恢复时为 None)]
+    """
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(n):
+        symbol = rng.choice(SYMBOLS)
+        action = rng.choice(['BUY', 'SELL', 'HOLD'])
+        decision = {"symbol": symbol, "action": action, "confidence": round(rng.random(), 2),
+                    "rationale": rng.choice(["RSI超卖，MACD金叉", "价格突破 {关键阻力}", "趋势不明，观望"])}
+        text = json.dumps(decision, ensure_ascii=False, indent=rng.choice([None, 2]))
+        expected = (symbol, action)
+        shape = rng.random()
+        if shape < 0.35:
+            pass
+        elif shape < 0.55:
+            text = f"```json\n{text}\n```"
+        elif shape < 0.65:
+            text = f"好的，根据当前 {{5分钟}} 行情分析，我的决策如下：\n\n```json\n{text}\n```"
+        elif shape < 0.73:
+            text = f"{text}\n\n说明：以上决策基于短期动量，仅供参考。"
+        elif shape < 0.80:
+            text = f"<think>\n先比较 {{\"action\": \"HOLD\"}} 与其他选项……\n</think>\n\n{text}"
+        elif shape < 0.85:
+            text = text.replace(f'"{action}"', f'"{action.lower()}"')
+        elif shape < 0.89:
+            text = text.replace(f'"confidence": {decision["confidence"]}', f'"confidence": "{decision["confidence"]}"')
+        elif shape < 0.92:
+            text = f'{{"decision": {text}}}'
+        elif shape < 0.96:
+            text, expected = text[:len(text) // 2], None
+        else:
+            text, expected = "抱歉，当前市场数据不足，无法给出决策。", None
+        corpus.append((text, expected))
+    return corpus
+
+
+def recovery_rate(parse, corpus) -> float:
+    """给出正确 (symbol, action) 的响应比例"""
+    ok = 0
+    for text, expected in corpus:
+        decision = parse(text)
+        if expected is not None and decision is not None \
+                and (decision.get('symbol'), decision.get('action')) == expected:
+            ok += 1
+    return ok / len(corpus)
+
+
+def throughput(parse, corpus) -> float:
+    """每秒解析的响应数（取多轮最好成绩）"""
+    best = float('inf')
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        for text, _ in corpus:
+            parse(text)
+        best = min(best, time.perf_counter() - start)
+    return len(corpus) / best
+
+
+def main():
+    print("🚀 决策解析性能测试")
+    print("=" * 50)
+
+    corpus = make_corpus(CORPUS_SIZE)
+    recoverable = sum(1 for _, expected in corpus if expected is not None) / len(corpus)
+    print(f"   语料: {len(corpus)} 条响应，可恢复上限 {recoverable:.1%}")
+
+    parser = DecisionParser()
+    sink = io.StringIO()
+    with redirect_stdout(sink):
+        legacy_recovery = recovery_rate(legacy_parse, corpus)
+        legacy_speed = throughput(legacy_parse, corpus)
+    new_recovery = recovery_rate(parser.parse, corpus)
+    new_speed = throughput(parser.parse, corpus)
+
+    print("\n📊 结果:")
+    print(f"   原实现:   {legacy_speed:10,.0f} 条/秒  恢复率 {legacy_recovery:6.1%}  (失败时的输出已重定向)")
+    print(f"   新解析器: {new_speed:10,.0f} 条/秒  恢复率 {new_recovery:6.1%}")
+    print(f"   吞吐量对比: {new_speed / legacy_speed:.2f}x")
+
+    trade = {"signal": "buy", "coin": "BTC", "quantity": 0.05, "profit_target": 66800.0, "stop_loss": 64100.0,
+             "invalidation_condition": "5m close below EMA50", "confidence": 0.65, "risk_usd": 45.0,
+             "justification": "EMA20 上穿 EMA50"}
+    context = {'prices': {'BTC': 65000.0}, 'account_value': 3000.0}
+    n = 100000
+    start = time.perf_counter()
+    for _ in range(n):
+        TradeDecision.from_values(TRADE_DECISION_SCHEMA.validate(trade, context))
+    print(f"\n📊 完整格式校验（含跨字段规则）: {(time.perf_counter() - start) / n * 1e6:.2f} µs/条")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+技术指标引擎性能测试
+对比 500 个交易对 × 4 个周期下，逐序列 pandas 参考实现、批量计算与增量更新的每周期耗时
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# 添加父目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.data_fetcher import TradingDataFetcher
+from data.indicators import IndicatorEngine
+
+N_SYMBOLS = 500
+N_BARS = 200
+TIMEFRAMES = ['3m', '5m', '15m', '4h']
+
+
+def random_ohlc(n_symbols: int, n_bars: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (n_symbols, n_bars)), axis=1))
+    high = close * (1 + rng.uniform(0, 0.01, close.shape))
+    low = close * (1 - rng.uniform(0, 0.01, close.shape))
+    return high, low, close
+
+
+def bench_pandas(high, low, close) -> float:
+    """逐交易对的 pandas 参考实现"""
+    start = time.perf_counter()
+    for i in range(close.shape[0]):
+        df = pd.DataFrame({'high': high[i], 'low': low[i], 'close': close[i]})
+        TradingDataFetcher.calculate_ema(df['close'], 20)
+        TradingDataFetcher.calculate_ema(df['close'], 50)
+        TradingDataFetcher.calculate_macd(df)
+        TradingDataFetcher.calculate_rsi(df['close'], 14)
+        TradingDataFetcher.calculate_atr(df, 3)
+        TradingDataFetcher.calculate_atr(df, 14)
+    return time.perf_counter() - start
+
+
+def main():
+    print("🚀 技术指标引擎性能测试")
+    print("=" * 50)
+    print(f"   交易对: {N_SYMBOLS}  K线: {N_BARS}  周期: {', '.join(TIMEFRAMES)}")
+
+    engine = IndicatorEngine()
+    data = {tf: random_ohlc(N_SYMBOLS, N_BARS + 1, seed=i) for i, tf in enumerate(TIMEFRAMES)}
+
+    pandas_time = sum(bench_pandas(h[:, :-1], l[:, :-1], c[:, :-1]) for h, l, c in data.values())
+
+    states = {}
+    start = time.perf_counter()
+    for tf, (h, l, c) in data.items():
+        _, states[tf] = engine.compute(h[:, :-1], l[:, :-1], c[:, :-1])
+    batch_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for tf, (h, l, c) in data.items():
+        engine.update(states[tf], h[:, -1], l[:, -1], c[:, -1])
+    update_time = time.perf_counter() - start
+
+    print("\n📊 每周期耗时（4个周期合计）:")
+    print(f"   pandas 逐序列: {pandas_time * 1000:10.2f} ms")
+    print(f"   批量完整计算: {batch_time * 1000:10.2f} ms  ({pandas_time / batch_time:6.1f}x)")
+    print(f"   增量更新:     {update_time * 1000:10.2f} ms  ({pandas_time / update_time:6.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地K线存储性能测试
+6个币种 × 提示词使用的周期，各写入90天历史：测量批量写入、重复写入（幂等覆盖）
+以及热启动时读取每个 (币种, 周期) 最近 500 条K线的耗时
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# 添加父目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.kline_cache import INTERVAL_MS
+from data.kline_store import KlineStore
+
+SYMBOLS = ['BTCUSDT', 'ETHUSDT', 'SOLUSDT', 'BNBUSDT', 'DOGEUSDT', 'XRPUSDT']
+INTERVALS = ['3m', '5m', '15m', '4h']
+DAYS = 90
+END = 1_740_000_000_000
+READ_LIMIT = 500
+
+
+def history(interval: str, seed: int):
+    """随机游走的OHLCV历史"""
+    rng = np.random.default_rng(seed)
+    n = DAYS * 86_400_000 // INTERVAL_MS[interval]
+    open_time = END - np.arange(n, 0, -1, dtype=np.int64) * INTERVAL_MS[interval]
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+    ohlcv = np.column_stack([close, close * 1.001, close * 0.999, close, rng.random(n) * 10])
+    return open_time, ohlcv
+
+
+def main():
+    print("🚀 本地K线存储性能测试")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "klines.sqlite")
+        store = KlineStore(path)
+        data = {(symbol, interval): history(interval, i)
+                for i, (symbol, interval) in enumerate((s, iv) for s in SYMBOLS for iv in INTERVALS)}
+        total = sum(len(t) for t, _ in data.values())
+
+        start = time.perf_counter()
+        for (symbol, interval), (open_time, ohlcv) in data.items():
+            store.upsert(symbol, interval, open_time, ohlcv)
+        elapsed = time.perf_counter() - start
+        print(f"   批量写入: {total:,} 条  {elapsed:.2f}s  ({total / elapsed:,.0f} 条/秒)")
+
+        start = time.perf_counter()
+        for (symbol, interval), (open_time, ohlcv) in data.items():
+            store.upsert(symbol, interval, open_time[-1000:], ohlcv[-1000:])
+        print(f"   重复写入最近1000条 × {len(data)}: {(time.perf_counter() - start) * 1e3:.1f} ms")
+        store.close()
+
+        # 热启动：新进程打开文件后读取每个 (币种, 周期) 的最近K线
+        start = time.perf_counter()
+        store = KlineStore(path)
+        for symbol, interval in data:
+            open_time, ohlcv = store.read(symbol, interval, limit=READ_LIMIT)
+        elapsed = time.perf_counter() - start
+        print(f"   热启动读取 {len(data)} × {READ_LIMIT} 条: {elapsed * 1e3:.1f} ms")
+
+        start = time.perf_counter()
+        open_time, ohlcv = store.read('BTCUSDT', '5m', start=END - 30 * 86_400_000, end=END)
+        print(f"   区间读取30天 5m ({len(open_time):,} 条): {(time.perf_counter() - start) * 1e3:.1f} ms")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LLM响应缓存性能测试
+模拟回测回放：同一组市场快照先冷运行一次，再用新的缓存实例（模拟新进程）重放，
+报告两次运行的命中率与耗时
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+# 添加父目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from adapters.llm_base import LLMAdapter
+from adapters.llm_cache import CachedLLMAdapter, ResponseCache
+from core.decision import DecisionMaker
+
+N_SNAPSHOTS = 200
+LATENCY = 0.02  # 模拟的单次API延迟（秒）
+
+
+class SimulatedAdapter(LLMAdapter):
+    """固定延迟的模拟模型"""
+
+    def __init__(self):
+        super().__init__(api_key="bench")
+        self.calls = 0
+
+    def call(self, prompt: str) -> str:
+        self.calls += 1
+        time.sleep(LATENCY)
+        return '{"symbol": "BTCUSDT", "action": "HOLD", "confidence": 0.5, "rationale": "bench"}'
+
+    def get_model_name(self) -> str:
+        return "simulated"
+
+
+def replay(path: str, snapshots) -> dict:
+    cache = ResponseCache(path)
+    adapter = SimulatedAdapter()
+    maker = DecisionMaker(CachedLLMAdapter(adapter, cache))
+
+    start = time.perf_counter()
+    for prices in snapshots:
+        maker.get_decision(prices)
+    elapsed = time.perf_counter() - start
+
+    stats = cache.get_stats()
+    cache.close()
+    stats.update(elapsed=elapsed, api_calls=adapter.calls)
+    return stats
+
+
+def main():
+    print("🚀 LLM响应缓存性能测试")
+    print("=" * 50)
+    print(f"   快照: {N_SNAPSHOTS}  模拟API延迟: {LATENCY * 1000:.0f} ms")
+
+    snapshots = [{'BTCUSDT': 60000.0 + i, 'ETHUSDT': 3000.0 + i * 0.1} for i in range(N_SNAPSHOTS)]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "llm_cache.sqlite")
+        cold = replay(path, snapshots)
+        warm = replay(path, snapshots)
+
+    print("\n📊 回放结果:")
+    for label, stats in (("冷运行", cold), ("重放", warm)):
+        print(f"   {label}: 命中率 {stats['hit_rate'] * 100:6.1f}%  API调用 {stats['api_calls']:4d}  "
+              f"耗时 {stats['elapsed'] * 1000:9.2f} ms")
+    print(f"   加速: {cold['elapsed'] / warm['elapsed']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
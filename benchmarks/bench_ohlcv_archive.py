@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+列式OHLCV归档性能测试
+2年的1m K线（约105万条）：对比把全部历史读成 pandas DataFrame（CSV）与
+内存映射归档的打开、区间切片和指标预热耗时，以及追加一根K线的耗时
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+# 添加父目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.indicators import IndicatorEngine
+from data.kline_cache import INTERVAL_MS
+from data.ohlcv_archive import OHLCVArchive
+
+DAYS = 730
+STEP = INTERVAL_MS['1m']
+START = 1_672_531_200_000  # 2023-01-01 UTC
+WARMUP = 500
+
+
+def history():
+    rng = np.random.default_rng(0)
+    n = DAYS * 1440
+    open_time = START + np.arange(n, dtype=np.int64) * STEP
+    close = 20000 * np.exp(np.cumsum(rng.normal(0, 0.0008, n)))
+    ohlcv = np.column_stack([close, close * 1.0005, close * 0.9995, close, rng.random(n) * 50])
+    return open_time, ohlcv
+
+
+def main():
+    print("🚀 列式OHLCV归档性能测试")
+    print("=" * 50)
+
+    open_time, ohlcv = history()
+    engine = IndicatorEngine()
+    window_start = int(open_time[-1] - 7 * 86_400_000)
+    print(f"   数据: {len(open_time):,} 条 1m K线")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "BTCUSDT_1m.csv")
+        df = pd.DataFrame(ohlcv, columns=['open', 'high', 'low', 'close', 'volume'])
+        df.insert(0, 'timestamp', open_time)
+        df.to_csv(csv_path, index=False)
+
+        start = time.perf_counter()
+        df = pd.read_csv(csv_path)
+        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+        recent = df[df['timestamp'] >= pd.to_datetime(window_start, unit='ms')]
+        engine.compute(recent['high'].to_numpy()[-WARMUP:], recent['low'].to_numpy()[-WARMUP:],
+                       recent['close'].to_numpy()[-WARMUP:])
+        pandas_time = time.perf_counter() - start
+        pandas_memory = df.memory_usage(deep=True).sum()
+        del df, recent
+
+        archive = OHLCVArchive(os.path.join(tmp, "archive"))
+        start = time.perf_counter()
+        archive.append('BTCUSDT', '1m', open_time, ohlcv)
+        write_time = time.perf_counter() - start
+
+        # 新的归档对象相当于新进程：只映射文件，不读取全部数据
+        start = time.perf_counter()
+        series = OHLCVArchive(os.path.join(tmp, "archive")).read('BTCUSDT', '1m', start=window_start)
+        engine.compute(series.high[-WARMUP:], series.low[-WARMUP:], series.close[-WARMUP:])
+        archive_time = time.perf_counter() - start
+
+        next_time = np.array([open_time[-1] + STEP])
+        start = time.perf_counter()
+        archive.append('BTCUSDT', '1m', next_time, ohlcv[-1:])
+        append_time = time.perf_counter() - start
+
+        print("\n📊 结果:")
+        print(f"   pandas 读取CSV + 切片 + 预热: {pandas_time * 1e3:9.1f} ms  DataFrame {pandas_memory / 1e6:.0f} MB")
+        print(f"   归档映射 + 切片 + 预热:       {archive_time * 1e3:9.1f} ms  (只读取访问到的页)")
+        print(f"   归档首次写入:                 {write_time * 1e3:9.1f} ms")
+        print(f"   追加一根K线:                  {append_time * 1e3:9.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+提示词模板渲染性能测试
+对比每个周期重新解析模板（正则逐个替换占位符）与预编译模板的渲染耗时
+"""
+
+import os
+import sys
+import time
+
+# 添加父目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.prompt_template import (PLACEHOLDER_RE, SERIES, DEFAULT_FORMATTERS, PromptTemplate,
+                                  get_user_prompt_template)
+
+COIN_COUNTS = [6, 50, 300]
+ROUNDS = 20
+
+
+def make_context(template: PromptTemplate, n_coins: int):
+    values = {field: 1.0 for field in template.global_fields}
+    coins = {}
+    for i in range(n_coins):
+        coin = f"C{i}"
+        coins[coin] = {
+            field: ([100.0 + i + k * 0.01 for k in range(10)]
+                    if template.coin_block.kinds[field] == SERIES else 100.0 + i)
+            for field in template.coin_fields
+        }
+    return values, coins
+
+
+def render_naive(text: str, template: PromptTemplate, values, coins) -> str:
+    """每次渲染都重新切分币种段并用正则替换占位符"""
+    start = text.index("### ALL BTC DATA")
+    end = text.index("## USAGE GUIDANCE")
+    block = text[start:end]
+    sections = []
+    for coin, data in coins.items():
+        flat = {f"btc_{k}": v for k, v in data.items()}
+        section = block.replace("### ALL BTC DATA", f"### ALL {coin} DATA")
+
+        def sub(match, flat=flat):
+            name = match.group(1)
+            if name not in flat:
+                return match.group(0)
+            value = flat[name]
+            if isinstance(value, list):
+                return DEFAULT_FORMATTERS[SERIES](value)
+            return DEFAULT_FORMATTERS['number'](value)
+
+        sections.append(PLACEHOLDER_RE.sub(sub, section))
+    rest = PLACEHOLDER_RE.sub(lambda m: DEFAULT_FORMATTERS['number'](values.get(m.group(1))), text[end:])
+    head = PLACEHOLDER_RE.sub(lambda m: DEFAULT_FORMATTERS['number'](values.get(m.group(1))), text[:start])
+    return head + ''.join(sections) + rest
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        fn()
+    return (time.perf_counter() - start) / ROUNDS
+
+
+def main():
+    print("🚀 提示词模板渲染性能测试")
+    print("=" * 50)
+
+    start = time.perf_counter()
+    template = get_user_prompt_template()
+    print(f"   模板编译（仅启动时一次）: {(time.perf_counter() - start) * 1000:.3f} ms")
+    with open(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           'prompt', 'user_prompt.md'), encoding='utf-8') as f:
+        text = f.read()
+
+    print("\n📊 每周期渲染耗时:")
+    for n in COIN_COUNTS:
+        values, coins = make_context(template, n)
+        naive = timed(lambda: render_naive(text, template, values, coins))
+        check = timed(lambda: template.missing(values, coins))
+        compiled = timed(lambda: template.render(values, coins))
+        print(f"   {n:4d} 个币种: 逐次解析 {naive * 1000:8.2f} ms  预编译 {compiled * 1000:8.2f} ms "
+              f"({naive / compiled:4.1f}x)  缺失检查 {check * 1000:6.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
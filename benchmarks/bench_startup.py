@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启动耗时测试
+在新的解释器中以 -X importtime 导入 main，统计总导入耗时与最慢的模块，
+并与模块加载时即导入SDK的旧方式对比
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROUNDS = 5
+TOP_N = 10
+
+CASES = [
+    ("import main", "import main"),
+    ("首次创建适配器与客户端", "from adapters.registry import create_adapter; "
+                         "create_adapter('qwen', api_key='test').client"),
+    ("旧方式（加载时导入 openai 与 binance.spot）", "import main, openai, binance.spot"),
+    ("旧方式 + 未使用的 anthropic", "import main, openai, binance.spot, anthropic"),
+]
+
+
+def import_times(code: str):
+    """
+    运行一次 -X importtime，解析各顶层导入的累计耗时
+
+    Returns:
+        (总耗时微秒, [(累计微秒, 模块名)])
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            cwd=ROOT, capture_output=True, text=True)
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # 只统计顶层导入（缩进的是被它们间接导入的模块）
+        if name.startswith(" ") and not name.startswith("  "):
+            modules.append((int(cumulative), name.strip()))
+    return sum(us for us, _ in modules), modules
+
+
+def wall_time(code: str) -> float:
+    """新解释器执行代码的墙钟时间（秒），取多次运行的最小值"""
+    best = float('inf')
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    print("🚀 启动耗时测试")
+    print("=" * 50)
+
+    baseline = wall_time("pass")
+    print(f"   空解释器启动: {baseline * 1000:.1f} ms")
+
+    for label, code in CASES:
+        total, modules = import_times(code)
+        print(f"\n📊 {label}")
+        print(f"   导入耗时 (-X importtime): {total / 1000:8.1f} ms")
+        print(f"   墙钟时间 (含解释器启动):  {wall_time(code) * 1000:8.1f} ms")
+        for us, name in sorted(modules, reverse=True)[:TOP_N]:
+            print(f"     {us / 1000:8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+决策竞技场
+将同一份市场快照并发分发给所有模型，按完成顺序收集决策
+"""
+
+import asyncio
+import json
+import os
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+from core.decision import DecisionMaker
+
+
+class DecisionArena:
+    """多模型并发决策调度器"""
+
+    def __init__(self, decision_makers: Dict[str, DecisionMaker], max_workers: Optional[int] = None):
+        """
+        初始化决策竞技场
+
+        Args:
+            decision_makers: {显示名称: DecisionMaker} 字典，数量不限
+            max_workers: 线程池大小，默认与模型数量相同
+        """
+        self.decision_makers = dict(decision_makers)
+        self.max_workers = max_workers or max(len(self.decision_makers), 1)
+        # {模型名称: [按时完成次数, 参与计时的次数]}，见 race / get_on_time_rates
+        self.on_time_counts: Dict[str, List[int]] = {name: [0, 0] for name in self.decision_makers}
+
+    def iter_decisions(self, market_data: Dict[str, float]) -> Iterator[Tuple[str, Dict[str, Any], float]]:
+        """
+        并发获取所有模型的决策，按完成顺序逐个产出
+
+        Args:
+            market_data: 所有模型共享的同一份价格快照
+
+        Yields:
+            (模型名称, 决策字典, 耗时秒数)
+        """
+        if not self.decision_makers:
+            return
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="decision") as executor:
+            futures = {
+                executor.submit(maker.get_decision, market_data): name
+                for name, maker in self.decision_makers.items()
+            }
+            for future in as_completed(futures):
+                name = futures[future]
+                elapsed = time.perf_counter() - start
+                try:
+                    decision = future.result()
+                except Exception as e:
+                    print(f"❌ {name}决策获取失败: {e}")
+                    decision = self.decision_makers[name].get_default_decision()
+                yield name, decision, elapsed
+
+    def run(self, market_data: Dict[str, float]) -> Dict[str, Dict[str, Any]]:
+        """
+        并发获取所有模型的决策
+
+        Args:
+            market_data: 价格快照
+
+        Returns:
+            {模型名称: 决策字典}，顺序与初始化时一致
+        """
+        results = {name: decision for name, decision, _ in self.iter_decisions(market_data)}
+        return {name: results[name] for name in self.decision_makers if name in results}
+
+    async def arun(self, market_data: Dict[str, float]) -> Dict[str, Dict[str, Any]]:
+        """
+        在同一个事件循环中并发获取所有模型的决策（使用适配器的原生异步接口）
+
+        Args:
+            market_data: 价格快照
+
+        Returns:
+            {模型名称: 决策字典}，顺序与初始化时一致
+        """
+        names = list(self.decision_makers)
+        results = await asyncio.gather(
+            *(self.decision_makers[name].aget_decision(market_data) for name in names),
+            return_exceptions=True
+        )
+
+        decisions = {}
+        for name, result in zip(names, results):
+            if isinstance(result, Exception):
+                print(f"❌ {name}决策获取失败: {result}")
+                result = self.decision_makers[name].get_default_decision()
+            decisions[name] = result
+        return decisions
+
+    @staticmethod
+    def majority_decision(decisions: Dict[str, Dict[str, Any]],
+                          min_votes: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        按 (symbol, action) 计票得出多数决策
+
+        Args:
+            decisions: {模型名称: 决策字典}
+            min_votes: 需要的最少票数，默认为过半数
+
+        Returns:
+            多数决策（confidence 取支持者的平均值），票数不足时返回 None
+        """
+        if not decisions:
+            return None
+        votes = Counter((d.get('symbol'), d.get('action')) for d in decisions.values())
+        (symbol, action), count = votes.most_common(1)[0]
+        needed = min_votes if min_votes is not None else len(decisions) // 2 + 1
+        if count < needed:
+            return None
+        supporters = [name for name, d in decisions.items()
+                      if (d.get('symbol'), d.get('action')) == (symbol, action)]
+        confidence = sum(float(decisions[name].get('confidence') or 0.0) for name in supporters) / len(supporters)
+        return {
+            'symbol': symbol,
+            'action': action,
+            'confidence': confidence,
+            'rationale': f"{len(supporters)}/{len(decisions)} 个模型一致: {', '.join(supporters)}",
+        }
+
+    async def arace(self, market_data: Dict[str, float], deadline: float, first_n: Optional[int] = None,
+                    quorum: Optional[int] = None) -> Dict[str, Any]:
+        """
+        带截止时间的多模型竞速
+
+        满足以下任一条件即返回并取消仍在等待的模型：
+        - 已收到 first_n 个有效决策
+        - 某个 (symbol, action) 已获得 quorum 票
+        - 到达截止时间
+        调用失败/解析失败的默认决策不计为有效决策。
+
+        Args:
+            market_data: 价格快照
+            deadline: 截止时间（秒，从调用开始计）
+            first_n: 收到这么多有效决策后立即返回，None 表示不限
+            quorum: 达到该票数的决策直接作为共识返回，None 表示截止时按过半数计票
+
+        Returns:
+            {'decisions': {模型: 决策}, 'consensus': 共识决策或 None, 'late': [超时被取消的模型],
+             'elapsed': {模型: 耗时}, 'reason': 'first_n' | 'quorum' | 'complete' | 'deadline'}
+        """
+        start = time.perf_counter()
+
+        async def timed(name: str, maker: DecisionMaker):
+            decision = await maker.aget_decision(market_data)
+            return name, decision, time.perf_counter() - start
+
+        tasks = {asyncio.ensure_future(timed(name, maker)): name for name, maker in self.decision_makers.items()}
+        pending = set(tasks)
+        decisions: Dict[str, Dict[str, Any]] = {}
+        elapsed: Dict[str, float] = {}
+        consensus = None
+        reason = 'complete'
+
+        try:
+            while pending:
+                remaining = deadline - (time.perf_counter() - start)
+                if remaining <= 0:
+                    reason = 'deadline'
+                    break
+                done, pending = await asyncio.wait(pending, timeout=remaining,
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    name = tasks[task]
+                    try:
+                        _, decision, took = task.result()
+                    except Exception as e:
+                        print(f"❌ {name}决策获取失败: {e}")
+                        decision = self.decision_makers[name].get_default_decision()
+                        took = time.perf_counter() - start
+                    elapsed[name] = took
+                    if not DecisionMaker.is_fallback(decision):
+                        decisions[name] = decision
+
+                if quorum is not None:
+                    consensus = self.majority_decision(decisions, quorum)
+                    if consensus is not None:
+                        reason = 'quorum'
+                        break
+                if first_n is not None and len(decisions) >= first_n:
+                    reason = 'first_n'
+                    break
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        late = [tasks[task] for task in pending] if reason == 'deadline' else []
+        for name in self.decision_makers:
+            # 因提前返回而被取消的模型没有超时，不计入按时率
+            if name in elapsed or name in late:
+                counts = self.on_time_counts.setdefault(name, [0, 0])
+                counts[0] += name in elapsed
+                counts[1] += 1
+
+        if consensus is None:
+            consensus = self.majority_decision(decisions)
+        return {
+            'decisions': {name: decisions[name] for name in self.decision_makers if name in decisions},
+            'consensus': consensus,
+            'late': late,
+            'elapsed': elapsed,
+            'reason': reason,
+        }
+
+    def race(self, market_data: Dict[str, float], deadline: float, first_n: Optional[int] = None,
+             quorum: Optional[int] = None) -> Dict[str, Any]:
+        """
+        arace 的同步版本（在新的事件循环中运行）
+
+        Args:
+            market_data: 价格快照
+            deadline: 截止时间（秒）
+            first_n: 收到这么多有效决策后立即返回
+            quorum: 共识所需票数
+
+        Returns:
+            同 arace
+        """
+        return asyncio.run(self.arace(market_data, deadline, first_n, quorum))
+
+    def get_on_time_rates(self) -> Dict[str, float]:
+        """
+        各模型在截止时间内完成的比例
+
+        Returns:
+            {模型名称: 按时率}，从未参与计时的模型不返回
+        """
+        return {name: on_time / total for name, (on_time, total) in self.on_time_counts.items() if total}
+
+    def save_on_time_counts(self, path: str):
+        """
+        保存按时完成计数（JSON），供每次只运行一个周期的 main.py 跨运行累计
+
+        Args:
+            path: 文件路径
+        """
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.on_time_counts, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def load_on_time_counts(self, path: str):
+        """
+        累加 save_on_time_counts() 写出的计数（文件不存在时忽略）
+
+        Args:
+            path: 文件路径
+        """
+        if not os.path.exists(path):
+            return
+        with open(path, encoding='utf-8') as f:
+            saved = json.load(f)
+        for name, (on_time, total) in saved.items():
+            counts = self.on_time_counts.setdefault(name, [0, 0])
+            counts[0] += on_time
+            counts[1] += total
@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+事件驱动回测引擎
+在虚拟时间上回放已存储的K线：每根K线收盘检查止损/止盈，每个决策点（默认5分钟）用与实盘相同的
+DecisionMaker 构建提示词，在同一个事件循环中并发获取所有模型的决策，按 prompt/system_prompt.md 的假设（手续费约0.1%、
+市价单滑点0.01%-0.1%）模拟成交。适配器经过响应缓存，重复回放不产生API调用，一个月的周期几秒内完成
+"""
+
+import asyncio
+import heapq
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from adapters.llm_cache import CachedLLMAdapter, ResponseCache
+from core.arena import DecisionArena
+from core.decision import DecisionMaker
+from data.kline_cache import INTERVAL_MS
+
+# prompt/system_prompt.md: Trading Fees ~0.1% per trade；Slippage 0.01-0.1%，取中间值
+FEE_RATE = 0.001
+SLIPPAGE = 0.0005
+
+# 同一时刻的事件顺序：先处理K线（更新价格、触发止损止盈），再做决策
+_BAR = 0
+_DECISION = 1
+
+# (开盘时间, 开盘价, 最高价, 最低价, 收盘价)
+History = Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]]
+
+
+class VirtualClock:
+    """回测使用的虚拟时钟（毫秒），time() 可注入 ResponseCache、KlineCache 等组件"""
+
+    def __init__(self, now_ms: int = 0):
+        self.now_ms = now_ms
+
+    def time(self) -> float:
+        """当前虚拟时间（秒），与 time.time 接口一致"""
+        return self.now_ms / 1000
+
+    def advance_to(self, now_ms: int):
+        """前进到指定时间（不允许倒退）"""
+        if now_ms < self.now_ms:
+            raise ValueError("虚拟时间不能倒退")
+        self.now_ms = now_ms
+
+
+def load_history(source: Any, symbols: Sequence[str], interval: str = '5m',
+                 start: Optional[int] = None, end: Optional[int] = None) -> History:
+    """
+    从本地存储读取回测用的K线
+
+    Args:
+        source: data/kline_store.KlineStore 或 data/ohlcv_archive.OHLCVArchive
+        symbols: 交易对列表
+        interval: K线周期
+        start/end: 开盘时间范围 [start, end)（毫秒）
+
+    Returns:
+        {交易对: (open_time, open, high, low, close)}，没有数据的交易对被跳过
+    """
+    history = {}
+    for symbol in symbols:
+        data = source.read(symbol, interval, start, end)
+        if isinstance(data, tuple):
+            open_time, ohlcv = data
+            open_, high, low, close = ohlcv[:, 0], ohlcv[:, 1], ohlcv[:, 2], ohlcv[:, 3]
+        else:
+            open_time, open_, high, low, close = data.open_time, data.open, data.high, data.low, data.close
+        if len(open_time):
+            history[symbol] = (open_time, open_, high, low, close)
+    return history
+
+
+class Position:
+    """单个币种的持仓（每个币种最多一个）"""
+
+    __slots__ = ('symbol', 'quantity', 'entry_price', 'entry_time', 'stop_loss', 'profit_target', 'cost')
+
+    def __init__(self, symbol: str, quantity: float, entry_price: float, entry_time: int,
+                 stop_loss: Optional[float], profit_target: Optional[float], cost: float):
+        self.symbol = symbol
+        self.quantity = quantity
+        self.entry_price = entry_price
+        self.entry_time = entry_time
+        self.stop_loss = stop_loss
+        self.profit_target = profit_target
+        self.cost = cost
+
+
+class Portfolio:
+    """现货账户：按成交价加减滑点、按成交额扣手续费"""
+
+    def __init__(self, initial_cash: float = 10_000.0, fee_rate: float = FEE_RATE, slippage: float = SLIPPAGE):
+        """
+        初始化账户
+
+        Args:
+            initial_cash: 初始资金（USD）
+            fee_rate: 每笔成交的手续费率
+            slippage: 市价单滑点（买入价上浮、卖出价下浮的比例）
+        """
+        self.initial_cash = initial_cash
+        self.cash = initial_cash
+        self.fee_rate = fee_rate
+        self.slippage = slippage
+        self.positions: Dict[str, Position] = {}
+        self.trades: List[Dict[str, Any]] = []
+        self.fees = 0.0
+
+    def equity(self, prices: Dict[str, float]) -> float:
+        """现金 + 持仓市值"""
+        return self.cash + sum(p.quantity * prices.get(symbol, p.entry_price) for symbol, p in self.positions.items())
+
+    def buy(self, symbol: str, price: float, now_ms: int, quantity: Optional[float] = None,
+            notional: Optional[float] = None, stop_loss: Optional[float] = None,
+            profit_target: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        市价买入（已持有该币种时忽略；资金不足时按可用资金缩减数量）
+
+        Args:
+            symbol: 交易对
+            price: 参考价格（成交价 = price × (1 + slippage)）
+            now_ms: 成交时间
+            quantity: 数量，None 时由 notional 计算
+            notional: 目标成交额
+            stop_loss/profit_target: 退出计划
+
+        Returns:
+            成交记录，未成交时返回 None
+        """
+        if symbol in self.positions or price <= 0:
+            return None
+        fill = price * (1 + self.slippage)
+        if quantity is None:
+            quantity = (notional or 0.0) / fill
+        quantity = min(quantity, self.cash / (fill * (1 + self.fee_rate)))
+        if quantity <= 0:
+            return None
+        value = quantity * fill
+        fee = value * self.fee_rate
+        self.cash -= value + fee
+        self.fees += fee
+        self.positions[symbol] = Position(symbol, quantity, fill, now_ms, stop_loss, profit_target, value + fee)
+        return self._record(now_ms, symbol, 'buy', fill, quantity, fee, None, 'signal')
+
+    def sell(self, symbol: str, price: float, now_ms: int, reason: str = 'signal') -> Optional[Dict[str, Any]]:
+        """
+        市价卖出全部持仓
+
+        Args:
+            symbol: 交易对
+            price: 参考价格（成交价 = price × (1 - slippage)）
+            now_ms: 成交时间
+            reason: 'signal' / 'stop_loss' / 'profit_target'
+
+        Returns:
+            成交记录，未持有时返回 None
+        """
+        position = self.positions.pop(symbol, None)
+        if position is None:
+            return None
+        fill = price * (1 - self.slippage)
+        value = position.quantity * fill
+        fee = value * self.fee_rate
+        self.cash += value - fee
+        self.fees += fee
+        pnl = value - fee - position.cost
+        return self._record(now_ms, symbol, 'sell', fill, position.quantity, fee, pnl, reason)
+
+    def _record(self, now_ms: int, symbol: str, side: str, price: float, quantity: float, fee: float,
+                pnl: Optional[float], reason: str) -> Dict[str, Any]:
+        trade = {'time': now_ms, 'symbol': symbol, 'side': side, 'price': price, 'quantity': quantity,
+                 'fee': fee, 'pnl': pnl, 'reason': reason}
+        self.trades.append(trade)
+        return trade
+
+
+class BacktestEngine:
+    """多模型回测：所有模型在同一决策点收到同一份快照，各自使用独立账户"""
+
+    def __init__(self, decision_makers: Dict[str, DecisionMaker], history: History, interval: str = '5m',
+                 decision_interval: str = '5m', initial_cash: float = 10_000.0, fee_rate: float = FEE_RATE,
+                 slippage: float = SLIPPAGE, allocation: float = 0.2,
+                 response_cache: Optional[ResponseCache] = None, clock: Optional[VirtualClock] = None,
+                 snapshot_builder: Optional[Callable[['BacktestEngine', Dict[str, float]], Dict[str, Any]]] = None):
+        """
+        初始化回测引擎
+
+        Args:
+            decision_makers: {模型名称: DecisionMaker}，与实盘相同的提示词构建与解析
+            history: load_history() 的结果
+            interval: history 的K线周期
+            decision_interval: 决策间隔，需为 interval 的整数倍
+            initial_cash: 每个模型的初始资金
+            fee_rate: 手续费率
+            slippage: 市价单滑点
+            allocation: 决策没有给出 quantity（旧格式）时，买入金额占账户价值的比例
+            response_cache: 响应缓存，给出时未缓存的适配器被包装为 CachedLLMAdapter；
+                            建议以 clock=engine_clock.time 创建，使TTL按虚拟时间计算
+            clock: 虚拟时钟，默认新建
+            snapshot_builder: (engine, prices) -> market_data，默认与 main.py 相同，直接使用 {交易对: 价格}
+        """
+        self.interval_ms = INTERVAL_MS[interval]
+        self.decision_interval_ms = INTERVAL_MS[decision_interval]
+        if self.decision_interval_ms % self.interval_ms:
+            raise ValueError("决策间隔必须是K线周期的整数倍")
+        self.allocation = allocation
+        self.clock = clock or VirtualClock()
+        self.snapshot_builder = snapshot_builder or (lambda engine, prices: dict(prices))
+
+        if response_cache is not None:
+            for maker in decision_makers.values():
+                if not isinstance(maker.llm_adapter, CachedLLMAdapter):
+                    maker.llm_adapter = CachedLLMAdapter(maker.llm_adapter, response_cache)
+        self.decision_makers = decision_makers
+        self.arena = DecisionArena(decision_makers)
+        self.portfolios = {name: Portfolio(initial_cash, fee_rate, slippage) for name in decision_makers}
+
+        # 对齐到统一的时间轴：(K线数, 交易对数) 的矩阵，缺失处为 NaN
+        self.symbols = list(history)
+        open_times = np.unique(np.concatenate([history[s][0] for s in self.symbols])) if history \
+            else np.empty(0, dtype=np.int64)
+        self.close_times = open_times.astype(np.int64) + self.interval_ms
+        shape = (len(open_times), len(self.symbols))
+        self.open, self.high, self.low, self.close = (np.full(shape, np.nan) for _ in range(4))
+        for j, symbol in enumerate(self.symbols):
+            open_time, open_, high, low, close = history[symbol]
+            rows = np.searchsorted(open_times, open_time)
+            self.open[rows, j], self.high[rows, j] = open_, high
+            self.low[rows, j], self.close[rows, j] = low, close
+
+        self.prices: Dict[str, float] = {}
+        self.equity_times: List[int] = []
+        self.equity: Dict[str, List[float]] = {name: [] for name in decision_makers}
+        self.decisions = 0
+        self.fallbacks = {name: 0 for name in decision_makers}
+        self._events: List[Tuple[int, int, int]] = []
+        self._stop = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    # ---- 事件循环 ----
+
+    def run(self, start: Optional[int] = None, end: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        运行回测
+
+        Args:
+            start/end: 只回放收盘时间在 [start, end) 内的K线，之前的K线用于初始化价格
+
+        Returns:
+            {模型名称: report()}
+        """
+        first = 0 if start is None else int(np.searchsorted(self.close_times, start))
+        self._stop = len(self.close_times) if end is None else int(np.searchsorted(self.close_times, end))
+        for i in range(first):
+            self._update_prices(i)
+        if first < self._stop:
+            heapq.heappush(self._events, (int(self.close_times[first]), _BAR, first))
+
+        # 整个回放共用一个事件循环：命中缓存的调用直接返回，不必每个周期新建线程池
+        self._loop = asyncio.new_event_loop()
+        try:
+            while self._events:
+                now_ms, kind, index = heapq.heappop(self._events)
+                self.clock.advance_to(now_ms)
+                if kind == _BAR:
+                    self._on_bar(index)
+                else:
+                    self._on_decision(index)
+        finally:
+            self._loop.close()
+        return {name: self.report(name) for name in self.decision_makers}
+
+    def _update_prices(self, index: int):
+        for j in np.flatnonzero(~np.isnan(self.close[index])):
+            self.prices[self.symbols[j]] = float(self.close[index, j])
+
+    def _on_bar(self, index: int):
+        """K线收盘：更新价格、检查退出计划，并安排下一根K线与本时刻的决策"""
+        now_ms = int(self.close_times[index])
+        self._update_prices(index)
+        self._check_exits(index, now_ms)
+        if index + 1 < self._stop:
+            heapq.heappush(self._events, (int(self.close_times[index + 1]), _BAR, index + 1))
+        if now_ms % self.decision_interval_ms == 0:
+            heapq.heappush(self._events, (now_ms, _DECISION, index))
+
+    def _check_exits(self, index: int, now_ms: int):
+        """
+        本根K线触及止损或止盈时卖出（同一根K线同时触及时按止损处理）
+
+        开盘即跳空越过触发价时按开盘价成交：止损为 min(开盘价, 止损价)，止盈为 max(开盘价, 止盈价)
+        """
+        for portfolio in self.portfolios.values():
+            for symbol, position in list(portfolio.positions.items()):
+                if position.entry_time >= now_ms:
+                    continue
+                j = self.symbols.index(symbol)
+                open_, low, high = self.open[index, j], self.low[index, j], self.high[index, j]
+                if np.isnan(low):
+                    continue
+                if position.stop_loss is not None and low <= position.stop_loss:
+                    portfolio.sell(symbol, min(open_, position.stop_loss), now_ms, 'stop_loss')
+                elif position.profit_target is not None and high >= position.profit_target:
+                    portfolio.sell(symbol, max(open_, position.profit_target), now_ms, 'profit_target')
+
+    def _on_decision(self, index: int):
+        """决策点：构建与实盘相同的快照，获取所有模型的决策并模拟成交"""
+        now_ms = self.clock.now_ms
+        market_data = self.snapshot_builder(self, self.prices)
+        decisions = self._loop.run_until_complete(self.arena.arun(market_data))
+        self.decisions += 1
+        for name, decision in decisions.items():
+            if DecisionMaker.is_fallback(decision):
+                self.fallbacks[name] += 1
+                continue
+            self.execute(name, decision, now_ms)
+
+        self.equity_times.append(now_ms)
+        for name, portfolio in self.portfolios.items():
+            self.equity[name].append(portfolio.equity(self.prices))
+
+    def execute(self, name: str, decision: Dict[str, Any], now_ms: int) -> Optional[Dict[str, Any]]:
+        """
+        按决策在该模型的账户中下单
+
+        Args:
+            name: 模型名称
+            decision: 决策（旧格式或完整格式）
+            now_ms: 成交时间
+
+        Returns:
+            成交记录，未成交时返回 None
+        """
+        action, symbol = decision.get('action'), decision.get('symbol')
+        price = self.prices.get(symbol)
+        if price is None:
+            return None
+        portfolio = self.portfolios[name]
+        if action == 'BUY':
+            quantity = decision.get('quantity')
+            notional = None if quantity else self.allocation * portfolio.equity(self.prices)
+            return portfolio.buy(symbol, price, now_ms, quantity=quantity, notional=notional,
+                                 stop_loss=decision.get('stop_loss'), profit_target=decision.get('profit_target'))
+        if action == 'SELL':
+            return portfolio.sell(symbol, price, now_ms)
+        return None
+
+    # ---- 结果 ----
+
+    def report(self, name: str) -> Dict[str, Any]:
+        """
+        单个模型的回测结果
+
+        Returns:
+            {'final_equity', 'return_pct', 'max_drawdown_pct', 'sharpe', 'trades', 'win_rate', 'fees',
+             'decisions', 'fallbacks', 'equity_curve'}，equity_curve 为 (决策时间数组, 账户价值数组)
+        """
+        portfolio = self.portfolios[name]
+        equity = np.asarray(self.equity[name], dtype=np.float64)
+        final = float(equity[-1]) if len(equity) else portfolio.equity(self.prices)
+        sharpe = 0.0
+        max_drawdown = 0.0
+        if len(equity) > 1:
+            returns = np.diff(equity) / equity[:-1]
+            if returns.std() > 0:
+                periods_per_year = 365 * 86_400_000 / self.decision_interval_ms
+                sharpe = float(returns.mean() / returns.std() * np.sqrt(periods_per_year))
+            peak = np.maximum.accumulate(equity)
+            max_drawdown = float(((peak - equity) / peak).max() * 100)
+        closed = [trade['pnl'] for trade in portfolio.trades if trade['side'] == 'sell']
+        return {
+            'final_equity': final,
+            'return_pct': (final / portfolio.initial_cash - 1) * 100,
+            'max_drawdown_pct': max_drawdown,
+            'sharpe': sharpe,
+            'trades': len(portfolio.trades),
+            'win_rate': sum(1 for pnl in closed if pnl > 0) / len(closed) if closed else 0.0,
+            'fees': portfolio.fees,
+            'decisions': self.decisions,
+            'fallbacks': self.fallbacks[name],
+            'equity_curve': (np.asarray(self.equity_times, dtype=np.int64), equity),
+        }
+
+    @staticmethod
+    def format_report(name: str, report: Dict[str, Any]) -> str:
+        """终端友好的结果展示"""
+        return (f"🤖 {name}: 收益 {report['return_pct']:+.2f}%  最大回撤 {report['max_drawdown_pct']:.2f}%  "
+                f"夏普 {report['sharpe']:.2f}  成交 {report['trades']} 笔  胜率 {report['win_rate']:.0%}  "
+                f"手续费 ${report['fees']:.2f}  默认决策 {report['fallbacks']}/{report['decisions']}")
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+离线批量推理
+把历史快照的决策提示词写成 OpenAI 兼容的批量输入 JSONL，提交给供应商的 Batch 接口或本地执行器，
+再按 custom_id 把结果文件解析回决策，用于回测中的大批量决策回放
+"""
+
+import asyncio
+import json
+import os
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+from adapters.llm_base import LLMAdapter, FALLBACK_RESPONSE
+from core.decision import DecisionMaker
+
+CHAT_COMPLETIONS_URL = "/v1/chat/completions"
+
+
+def request_body(adapter: LLMAdapter, prompt: str) -> Dict[str, Any]:
+    """
+    构建单条请求的 body，与适配器实时调用的请求参数一致
+
+    非 OpenAI 格式的请求（如 ClaudeAdapter 的 Messages 格式：顶层 system 与 cache_control）
+    转换为 chat.completions 格式，系统提示词作为首条 system 消息
+
+    Args:
+        adapter: LLM适配器
+        prompt: 用户提示词
+
+    Returns:
+        chat.completions 请求参数
+    """
+    if hasattr(adapter, 'build_request'):
+        body = adapter.build_request(prompt)
+        if 'system' not in body:
+            return body
+        system = body['system']
+        if not isinstance(system, str):
+            system = "".join(block.get('text', '') for block in system)
+        return {
+            "model": body['model'],
+            "messages": [{"role": "system", "content": system}] + list(body['messages']),
+            "max_tokens": body['max_tokens'],
+            "temperature": body['temperature'],
+        }
+    return {
+        "model": adapter.get_model_name(),
+        "messages": [
+            {"role": "system", "content": adapter.system_prompt},
+            {"role": "user", "content": prompt}
+        ],
+        "max_tokens": adapter.max_tokens,
+        "temperature": adapter.temperature,
+    }
+
+
+def write_batch_input(path: str, adapter: LLMAdapter, prompts: Iterable[Tuple[str, str]],
+                      url: str = CHAT_COMPLETIONS_URL) -> int:
+    """
+    写出批量输入文件（每行一个请求）
+
+    Args:
+        path: 输出的 JSONL 路径
+        adapter: 用于构建请求参数的适配器
+        prompts: (custom_id, 提示词) 序列，custom_id 在文件内必须唯一
+        url: 请求的接口路径
+
+    Returns:
+        写入的请求数
+    """
+    seen = set()
+    with open(path, 'w', encoding='utf-8') as f:
+        for custom_id, prompt in prompts:
+            if custom_id in seen:
+                raise ValueError(f"custom_id 重复: {custom_id}")
+            seen.add(custom_id)
+            line = {"custom_id": custom_id, "method": "POST", "url": url, "body": request_body(adapter, prompt)}
+            f.write(json.dumps(line, ensure_ascii=False) + "\n")
+    return len(seen)
+
+
+def write_decision_batch(path: str, decision_maker: DecisionMaker, snapshots: Dict[str, Dict[str, Any]]) -> int:
+    """
+    为历史快照生成决策批量输入文件，提示词与实时决策完全相同
+
+    Args:
+        path: 输出的 JSONL 路径
+        decision_maker: 决策引擎（提供提示词与适配器）
+        snapshots: {custom_id: 市场数据}，custom_id 通常为快照时间戳
+
+    Returns:
+        写入的请求数
+    """
+    prompts = ((custom_id, decision_maker.build_prompt(data)) for custom_id, data in snapshots.items())
+    return write_batch_input(path, decision_maker.llm_adapter, prompts)
+
+
+def iter_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    """逐行读取 JSONL 文件，跳过空行"""
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def read_batch_output(path: str) -> Dict[str, Optional[str]]:
+    """
+    读取批量结果文件
+
+    Args:
+        path: 结果 JSONL 路径（供应商下载的 output/error 文件或本地执行器的输出）
+
+    Returns:
+        {custom_id: 响应文本}，失败的请求为 None；同一 custom_id 出现多次时以最后一行为准
+    """
+    results = {}
+    for line in iter_jsonl(path):
+        response = line.get('response') or {}
+        content = None
+        if not line.get('error') and response.get('status_code') == 200:
+            choices = response.get('body', {}).get('choices') or []
+            if choices:
+                content = choices[0].get('message', {}).get('content')
+        results[line['custom_id']] = content
+    return results
+
+
+def ingest_decisions(path: str, decision_maker: DecisionMaker,
+                     custom_ids: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    把结果文件解析为决策
+
+    Args:
+        path: 结果 JSONL 路径
+        decision_maker: 用于解析响应的决策引擎
+        custom_ids: 期望的 custom_id，缺失或失败的请求返回默认决策；None 表示只返回文件中出现的请求
+
+    Returns:
+        {custom_id: 决策字典}
+    """
+    responses = read_batch_output(path)
+    ids = list(responses) if custom_ids is None else list(custom_ids)
+    decisions = {}
+    for custom_id in ids:
+        text = responses.get(custom_id)
+        decisions[custom_id] = decision_maker.parse_decision(text if text is not None else FALLBACK_RESPONSE)
+    return decisions
+
+
+def completed_ids(path: str) -> set:
+    """结果文件中已成功的 custom_id（文件不存在时为空集合）"""
+    if not os.path.exists(path):
+        return set()
+    return {custom_id for custom_id, text in read_batch_output(path).items() if text is not None}
+
+
+class LocalBatchExecutor:
+    """
+    本地批量执行器
+
+    读取批量输入文件，以有限并发通过任意适配器的 acall 执行，并写出与 OpenAI Batch 接口相同格式的结果文件。
+    也用作测试中的本地替身：配合假适配器即可在不访问网络的情况下产生结果文件。
+    """
+
+    def __init__(self, adapter: LLMAdapter, max_concurrency: int = 8):
+        """
+        初始化执行器
+
+        Args:
+            adapter: 执行请求的适配器（请求中的 model/max_tokens 等参数以适配器自身配置为准）
+            max_concurrency: 最大并发请求数
+        """
+        self.adapter = adapter
+        self.max_concurrency = max_concurrency
+        self.max_in_flight = 0
+
+    @staticmethod
+    def user_prompt(body: Dict[str, Any]) -> str:
+        """取出请求中最后一条用户消息"""
+        for message in reversed(body.get('messages', [])):
+            if message.get('role') == 'user':
+                return message['content']
+        raise ValueError("请求中没有用户消息")
+
+    def _result_line(self, index: int, custom_id: str, text: Optional[str], error: Optional[str]) -> Dict[str, Any]:
+        if error is not None:
+            return {"id": f"batch_req_{index}", "custom_id": custom_id, "response": None,
+                    "error": {"code": "request_failed", "message": error}}
+        body = {
+            "object": "chat.completion",
+            "model": self.adapter.get_model_name(),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+        }
+        return {"id": f"batch_req_{index}", "custom_id": custom_id,
+                "response": {"status_code": 200, "request_id": f"local_{index}", "body": body}, "error": None}
+
+    async def arun(self, input_path: str, output_path: str, resume: bool = True) -> Dict[str, int]:
+        """
+        异步执行批量输入文件
+
+        Args:
+            input_path: 批量输入 JSONL 路径
+            output_path: 结果 JSONL 路径
+            resume: 为 True 时跳过结果文件中已成功的请求并追加写入，否则覆盖
+
+        Returns:
+            {'total', 'skipped', 'succeeded', 'failed'}
+        """
+        done = completed_ids(output_path) if resume else set()
+        requests = [line for line in iter_jsonl(input_path) if line['custom_id'] not in done]
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        in_flight = 0
+
+        async def execute(index: int, line: Dict[str, Any]) -> Dict[str, Any]:
+            nonlocal in_flight
+            async with semaphore:
+                in_flight += 1
+                self.max_in_flight = max(self.max_in_flight, in_flight)
+                try:
+                    text = await self.adapter.acall(self.user_prompt(line['body']))
+                    # 适配器吞掉异常并返回默认响应，此时记为失败以便重跑
+                    error = "适配器调用失败" if text == FALLBACK_RESPONSE else None
+                except Exception as e:
+                    text, error = None, str(e)
+                finally:
+                    in_flight -= 1
+            return self._result_line(index, line['custom_id'], text, error)
+
+        results = await asyncio.gather(*(execute(i, line) for i, line in enumerate(requests)))
+
+        with open(output_path, 'a' if resume else 'w', encoding='utf-8') as f:
+            for result in results:
+                f.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+        failed = sum(1 for result in results if result['error'] is not None)
+        return {'total': len(requests) + len(done), 'skipped': len(done),
+                'succeeded': len(results) - failed, 'failed': failed}
+
+    def run(self, input_path: str, output_path: str, resume: bool = True) -> Dict[str, int]:
+        """同步执行批量输入文件（参数与返回值同 arun）"""
+        return asyncio.run(self.arun(input_path, output_path, resume))
+
+
+def submit_batch(client, input_path: str, url: str = CHAT_COMPLETIONS_URL, completion_window: str = "24h") -> str:
+    """
+    上传批量输入文件并创建批量任务（OpenAI 及兼容接口，如 DashScope）
+
+    Args:
+        client: openai.OpenAI 客户端（如 QwenAdapter.client）
+        input_path: 批量输入 JSONL 路径
+        url: 请求的接口路径
+        completion_window: 完成时限
+
+    Returns:
+        批量任务ID
+    """
+    with open(input_path, 'rb') as f:
+        input_file = client.files.create(file=f, purpose="batch")
+    batch = client.batches.create(input_file_id=input_file.id, endpoint=url, completion_window=completion_window)
+    print(f"📤 批量任务已提交: {batch.id}")
+    return batch.id
+
+
+def download_batch_output(client, batch_id: str, output_path: str) -> str:
+    """
+    任务完成时下载结果文件（失败请求的 error 文件追加在后面）
+
+    Args:
+        client: openai.OpenAI 客户端
+        batch_id: 批量任务ID
+        output_path: 结果 JSONL 保存路径
+
+    Returns:
+        任务状态，为 'completed' 时结果已写入 output_path
+    """
+    batch = client.batches.retrieve(batch_id)
+    if batch.status != "completed":
+        return batch.status
+    with open(output_path, 'w', encoding='utf-8') as f:
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                text = client.files.content(file_id).text
+                f.write(text if text.endswith("\n") or not text else text + "\n")
+    print(f"📥 批量结果已下载: {output_path}")
+    return batch.status
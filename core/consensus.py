@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多模型共识引擎
+每个周期的决策编码为 (symbol, action) 选项编号，写入 周期 × 模型 的 NumPy 环形缓冲区；
+按 置信度 × 历史准确率 加权投票，模型两两一致率的计数随每个周期滚动更新，
+几个月的周期、几十个模型的统计只需矩阵运算，不遍历决策字典
+"""
+
+import json
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.decision import DecisionMaker
+
+# 默认保留90天的5分钟周期
+DEFAULT_CAPACITY = 90 * 288
+# 按历史窗口重新计算一致率时每批处理的周期数
+_CHUNK = 4096
+
+Option = Tuple[Optional[str], str]
+
+
+class ConsensusEngine:
+    """任意数量模型的加权投票与一致率统计"""
+
+    def __init__(self, models: Sequence[str] = (), capacity: int = DEFAULT_CAPACITY,
+                 prior_accuracy: float = 0.5, prior_strength: float = 4.0,
+                 default_confidence: float = 0.5, hold_band: float = 0.001):
+        """
+        初始化共识引擎
+
+        Args:
+            models: 模型名称，之后出现的新模型会自动加入
+            capacity: 保留的周期数，超出后覆盖最早的周期
+            prior_accuracy: 没有历史结果时的准确率
+            prior_strength: 先验相当于的已评估周期数，历史越少准确率越接近先验
+            default_confidence: 决策没有 confidence（如 hold）时使用的置信度
+            hold_band: 评估结果时视为"不变"的收益率区间 ±hold_band
+        """
+        self.capacity = capacity
+        self.prior_accuracy = prior_accuracy
+        self.prior_strength = prior_strength
+        self.default_confidence = default_confidence
+        self.hold_band = hold_band
+
+        self.models: List[str] = []
+        self._model_index: Dict[str, int] = {}
+        # 选项编号：HOLD 不区分币种，统一为 (None, 'HOLD')
+        self.options: List[Option] = []
+        self._option_index: Dict[Option, int] = {}
+
+        # 环形缓冲区：选项编号（-1 表示无有效决策）、置信度、结果（-1 未评估，0 错误，1 正确）
+        self._codes = np.full((capacity, 0), -1, dtype=np.int16)
+        self._confidence = np.full((capacity, 0), np.nan, dtype=np.float32)
+        self._correct = np.full((capacity, 0), -1, dtype=np.int8)
+        self.cycles = 0
+
+        # 保留窗口内的滚动计数：两两一致次数、两两都有决策的次数、评估正确次数、已评估次数
+        self._agree = np.zeros((0, 0), dtype=np.int64)
+        self._both = np.zeros((0, 0), dtype=np.int64)
+        self._hits = np.zeros(0, dtype=np.int64)
+        self._scored = np.zeros(0, dtype=np.int64)
+
+        # 最近一个周期的价格，下个周期用于评估该周期的决策
+        self._pending_cycle: Optional[int] = None
+        self._pending_prices: Dict[str, float] = {}
+
+        for name in models:
+            self._model(name)
+
+    # ---- 编码 ----
+
+    def _model(self, name: str) -> int:
+        """模型列号，新模型追加一列"""
+        index = self._model_index.get(name)
+        if index is None:
+            index = len(self.models)
+            self.models.append(name)
+            self._model_index[name] = index
+            self._codes = np.pad(self._codes, ((0, 0), (0, 1)), constant_values=-1)
+            self._confidence = np.pad(self._confidence, ((0, 0), (0, 1)), constant_values=np.nan)
+            self._correct = np.pad(self._correct, ((0, 0), (0, 1)), constant_values=-1)
+            self._agree = np.pad(self._agree, ((0, 1), (0, 1)))
+            self._both = np.pad(self._both, ((0, 1), (0, 1)))
+            self._hits = np.pad(self._hits, (0, 1))
+            self._scored = np.pad(self._scored, (0, 1))
+        return index
+
+    def encode(self, decision: Optional[Dict[str, Any]]) -> int:
+        """
+        决策的选项编号
+
+        Args:
+            decision: 决策（字典或 SlotDecision）
+
+        Returns:
+            选项编号，没有决策或为默认决策时返回 -1
+        """
+        if decision is None or DecisionMaker.is_fallback(decision):
+            return -1
+        action = decision.get('action') or 'HOLD'
+        option = (None, 'HOLD') if action == 'HOLD' else (decision.get('symbol'), action)
+        code = self._option_index.get(option)
+        if code is None:
+            code = len(self.options)
+            self.options.append(option)
+            self._option_index[option] = code
+        return code
+
+    def _encode_cycle(self, decisions: Dict[str, Optional[Dict[str, Any]]]) -> Tuple[np.ndarray, np.ndarray]:
+        """一个周期的决策 → (选项编号行, 置信度行)"""
+        for name in decisions:
+            self._model(name)
+        codes = np.full(len(self.models), -1, dtype=np.int16)
+        confidence = np.full(len(self.models), np.nan)
+        for name, decision in decisions.items():
+            code = self.encode(decision)
+            if code >= 0:
+                index = self._model_index[name]
+                codes[index] = code
+                value = decision.get('confidence')
+                confidence[index] = self.default_confidence if value is None else value
+        return codes, confidence
+
+    # ---- 记录 ----
+
+    @staticmethod
+    def _pair_counts(codes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """一行选项编号的两两一致矩阵与两两都有决策的矩阵"""
+        valid = codes >= 0
+        both = valid[:, None] & valid[None, :]
+        return (codes[:, None] == codes[None, :]) & both, both
+
+    def record(self, decisions: Dict[str, Optional[Dict[str, Any]]],
+               prices: Optional[Dict[str, float]] = None) -> int:
+        """
+        记录一个周期的决策
+
+        Args:
+            decisions: {模型名称: 决策}，未返回决策的模型可省略或为 None
+            prices: 本周期的价格 {交易对: 价格}，下个周期调用 score() 时用于评估本周期的决策
+
+        Returns:
+            周期编号
+        """
+        codes, confidence = self._encode_cycle(decisions)
+        row = self.cycles % self.capacity
+        if self.cycles >= self.capacity:
+            # 覆盖最早的周期前，从滚动计数中减去它
+            agree, both = self._pair_counts(self._codes[row])
+            self._agree -= agree
+            self._both -= both
+            self._unscore(row)
+        self._codes[row] = codes
+        self._confidence[row] = confidence
+        self._correct[row] = -1
+        agree, both = self._pair_counts(codes)
+        self._agree += agree
+        self._both += both
+
+        cycle = self.cycles
+        self.cycles += 1
+        self._pending_cycle = cycle if prices else None
+        self._pending_prices = dict(prices or {})
+        return cycle
+
+    def _row(self, cycle: int) -> int:
+        if not self.cycles - min(self.cycles, self.capacity) <= cycle < self.cycles:
+            raise IndexError(f"周期 {cycle} 不在保留的历史中")
+        return cycle % self.capacity
+
+    def _unscore(self, row: int):
+        scored = self._correct[row] >= 0
+        self._scored -= scored
+        self._hits -= self._correct[row] == 1
+
+    def record_outcome(self, cycle: int, results: Dict[str, bool]):
+        """
+        记录某个周期各模型决策的对错
+
+        Args:
+            cycle: record() 返回的周期编号
+            results: {模型名称: 是否正确}，未列出的模型保持未评估
+        """
+        row = self._row(cycle)
+        self._unscore(row)
+        for name, correct in results.items():
+            index = self._model_index.get(name)
+            if index is not None and self._codes[row, index] >= 0:
+                self._correct[row, index] = 1 if correct else 0
+        self._scored += self._correct[row] >= 0
+        self._hits += self._correct[row] == 1
+
+    def score(self, prices: Dict[str, float]) -> Dict[str, bool]:
+        """
+        用当前价格评估上一个周期的决策
+
+        BUY 在收益率 > hold_band 时正确，SELL 在收益率 < -hold_band 时正确，
+        HOLD 在各交易对平均绝对收益率不超过 hold_band 时正确；缺少价格的选项不评估。
+
+        Args:
+            prices: 当前价格 {交易对: 价格}
+
+        Returns:
+            {模型名称: 是否正确}，没有待评估的周期时返回空字典
+        """
+        cycle, reference = self._pending_cycle, self._pending_prices
+        self._pending_cycle, self._pending_prices = None, {}
+        if cycle is None or cycle < self.cycles - self.capacity:
+            return {}
+        returns = {symbol: prices[symbol] / price - 1 for symbol, price in reference.items()
+                   if price and prices.get(symbol)}
+        if not returns:
+            return {}
+        moved = float(np.mean(np.abs(list(returns.values()))))
+
+        # 先按选项评估（选项数很少），再按编号映射到各模型
+        outcome = np.full(len(self.options) + 1, -1, dtype=np.int8)
+        for code, (symbol, action) in enumerate(self.options):
+            if action == 'HOLD':
+                outcome[code] = moved <= self.hold_band
+            elif symbol in returns:
+                r = returns[symbol]
+                outcome[code] = r > self.hold_band if action == 'BUY' else r < -self.hold_band
+        row = self._row(cycle)
+        # 编号 -1 映射到末尾的"未评估"
+        correct = outcome[self._codes[row]]
+        results = {self.models[i]: bool(correct[i]) for i in np.flatnonzero(correct >= 0)}
+        self.record_outcome(cycle, results)
+        return results
+
+    # ---- 统计 ----
+
+    def _rows(self, last: Optional[int]) -> np.ndarray:
+        """最近 last 个周期在缓冲区中的行号（按时间顺序）"""
+        kept = min(self.cycles, self.capacity)
+        last = kept if last is None else min(last, kept)
+        return np.arange(self.cycles - last, self.cycles) % self.capacity
+
+    def accuracy(self, last: Optional[int] = None) -> np.ndarray:
+        """
+        各模型的历史准确率（按 prior_strength 向先验收缩）
+
+        Args:
+            last: 只统计最近的周期数，None 表示保留的全部历史（使用滚动计数）
+
+        Returns:
+            按 models 顺序的准确率数组
+        """
+        if last is None:
+            hits, scored = self._hits, self._scored
+        else:
+            correct = self._correct[self._rows(last)]
+            hits, scored = (correct == 1).sum(axis=0), (correct >= 0).sum(axis=0)
+        return (hits + self.prior_accuracy * self.prior_strength) / (scored + self.prior_strength)
+
+    def _count_pairs(self, codes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        多个周期的两两一致次数与两两都有决策的次数
+
+        每个选项的 one-hot (周期, 模型) 矩阵自乘即为两两同选该选项的次数，所有选项一次批量矩阵乘法，
+        按 _CHUNK 个周期分批以限制内存。
+        """
+        n = len(self.models)
+        agree = np.zeros((n, n), dtype=np.float64)
+        both = np.zeros((n, n), dtype=np.float64)
+        choices = np.arange(len(self.options), dtype=codes.dtype)[:, None, None]
+        for start in range(0, len(codes), _CHUNK):
+            chunk = codes[start:start + _CHUNK]
+            onehot = (chunk[None, :, :] == choices).astype(np.float32)
+            agree += np.matmul(onehot.transpose(0, 2, 1), onehot).sum(axis=0)
+            valid = (chunk >= 0).astype(np.float32)
+            both += valid.T @ valid
+        return agree, both
+
+    def agreement_matrix(self, last: Optional[int] = None) -> np.ndarray:
+        """
+        模型两两一致率
+
+        Args:
+            last: 只统计最近的周期数，None 表示保留的全部历史（使用滚动计数）
+
+        Returns:
+            (模型数, 模型数) 数组：两者都有决策的周期中选项相同的比例，没有共同周期时为 nan
+        """
+        if last is None:
+            agree, both = self._agree, self._both
+        else:
+            agree, both = self._count_pairs(self._codes[self._rows(last)])
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(both > 0, agree / np.maximum(both, 1), np.nan)
+
+    def unanimity_rate(self, last: Optional[int] = None) -> float:
+        """
+        至少两个模型给出决策的周期中，所有模型选项相同的比例
+
+        Args:
+            last: 只统计最近的周期数，None 表示保留的全部历史
+
+        Returns:
+            比例，没有符合条件的周期时为 nan
+        """
+        codes = self._codes[self._rows(last)]
+        valid = codes >= 0
+        counted = valid.sum(axis=1) >= 2
+        if not counted.any():
+            return float('nan')
+        high = codes.max(axis=1)
+        low = np.where(valid, codes, np.iinfo(codes.dtype).max).min(axis=1)
+        return float((high == low)[counted].mean())
+
+    def model_stats(self, last: Optional[int] = None) -> Dict[str, Dict[str, float]]:
+        """
+        各模型的汇总统计
+
+        Args:
+            last: 只统计最近的周期数，None 表示保留的全部历史
+
+        Returns:
+            {模型名称: {'accuracy': 准确率, 'agreement': 与其他模型的平均一致率, 'decisions': 有效决策数}}
+        """
+        accuracy = self.accuracy(last)
+        matrix = self.agreement_matrix(last)
+        np.fill_diagonal(matrix, np.nan)
+        decisions = (self._codes[self._rows(last)] >= 0).sum(axis=0)
+        stats = {}
+        for i, name in enumerate(self.models):
+            row = matrix[i][~np.isnan(matrix[i])]
+            stats[name] = {
+                'accuracy': float(accuracy[i]),
+                'agreement': float(row.mean()) if len(row) else float('nan'),
+                'decisions': int(decisions[i]),
+            }
+        return stats
+
+    # ---- 投票 ----
+
+    def vote(self, decisions: Dict[str, Optional[Dict[str, Any]]],
+             min_share: float = 0.0) -> Optional[Dict[str, Any]]:
+        """
+        加权投票：每个模型的票数为 置信度 × 历史准确率
+
+        Args:
+            decisions: {模型名称: 决策}，默认决策与 None 不参与投票
+            min_share: 胜出选项需要的最低权重占比
+
+        Returns:
+            共识决策 {'symbol', 'action', 'confidence', 'rationale', 'share', 'support'}，
+            其中 confidence 为支持者的加权平均置信度，share 为胜出选项的权重占比，
+            support 为 {(symbol, action): 权重占比}；没有有效决策或占比不足时返回 None
+        """
+        codes, confidence = self._encode_cycle(decisions)
+        valid = codes >= 0
+        if not valid.any():
+            return None
+        weights = np.where(valid, confidence, 0.0) * self.accuracy()
+        total = weights.sum()
+        if total <= 0:
+            # 所有置信度都为0时退化为等权投票
+            weights, total = valid.astype(np.float64), float(valid.sum())
+        support = np.bincount(codes[valid], weights=weights[valid], minlength=len(self.options))
+        winner = int(np.argmax(support))
+        share = float(support[winner] / total)
+        if share < min_share:
+            return None
+
+        supporters = np.flatnonzero(codes == winner)
+        winner_weights = weights[supporters]
+        if winner_weights.sum() > 0:
+            mean_confidence = float(np.average(confidence[supporters], weights=winner_weights))
+        else:
+            mean_confidence = float(confidence[supporters].mean())
+        symbol, action = self.options[winner]
+        names = [self.models[i] for i in supporters]
+        return {
+            'symbol': symbol,
+            'action': action,
+            'confidence': mean_confidence,
+            'rationale': f"加权 {share:.0%} 支持，{len(names)}/{int(valid.sum())} 个模型: {', '.join(names)}",
+            'share': share,
+            'support': {self.options[code]: float(support[code] / total)
+                        for code in np.argsort(-support) if support[code] > 0},
+        }
+
+    # ---- 持久化 ----
+
+    def save(self, path: str):
+        """
+        保存历史到 .npz 文件（按时间顺序写出保留的周期）
+
+        Args:
+            path: 文件路径
+        """
+        rows = self._rows(None)
+        meta = {
+            'models': self.models,
+            'options': [list(option) for option in self.options],
+            'cycles': self.cycles,
+            'capacity': self.capacity,
+            'pending_cycle': self._pending_cycle,
+            'pending_prices': self._pending_prices,
+        }
+        with open(path, 'wb') as f:
+            np.savez(f, codes=self._codes[rows], confidence=self._confidence[rows],
+                     correct=self._correct[rows], meta=np.array(json.dumps(meta)))
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> 'ConsensusEngine':
+        """
+        从 save() 写出的文件恢复
+
+        Args:
+            path: 文件路径
+            **kwargs: 传给构造函数的其他参数（capacity 默认沿用文件中的值）
+
+        Returns:
+            ConsensusEngine
+        """
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data['meta']))
+            codes, confidence, correct = data['codes'], data['confidence'], data['correct']
+        kwargs.setdefault('capacity', meta['capacity'])
+        engine = cls(meta['models'], **kwargs)
+        for symbol, action in meta['options']:
+            engine._option_index[(symbol, action)] = len(engine.options)
+            engine.options.append((symbol, action))
+
+        # 容量变小时只保留最近的周期
+        kept = min(len(codes), engine.capacity)
+        rows = np.arange(meta['cycles'] - kept, meta['cycles']) % engine.capacity
+        engine._codes[rows] = codes[len(codes) - kept:]
+        engine._confidence[rows] = confidence[len(codes) - kept:]
+        engine._correct[rows] = correct[len(codes) - kept:]
+        engine.cycles = meta['cycles']
+
+        # 由保留的历史重建滚动计数
+        agree, both = engine._count_pairs(engine._codes[rows])
+        engine._agree, engine._both = agree.astype(np.int64), both.astype(np.int64)
+        kept_correct = engine._correct[rows]
+        engine._hits = (kept_correct == 1).sum(axis=0).astype(np.int64)
+        engine._scored = (kept_correct >= 0).sum(axis=0).astype(np.int64)
+        engine._pending_cycle = meta['pending_cycle']
+        engine._pending_prices = meta['pending_prices']
+        return engine
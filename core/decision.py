@@ -6,33 +6,55 @@
 """
 
 import json
-from typing import Dict, Any
-from adapters.llm_base import LLMAdapter
+from typing import Dict, Any, Optional
+from adapters.llm_base import LLMAdapter, FALLBACK_RESPONSE
+from core.decision_parser import DecisionParser, SlotDecision
+from core.prompt_template import PromptTemplate
+from core.trade_decision import QUOTE_ASSET, TradeDecisionParser
+
+# 调用失败或解析失败时默认决策的理由，用于区分模型真实给出的观望决策
+FALLBACK_RATIONALES = frozenset([
+    json.loads(FALLBACK_RESPONSE)['rationale'],
+    "解析失败，默认观望",
+])
 
 
 class DecisionMaker:
     """交易决策引擎"""
     
-    def __init__(self, llm_adapter: LLMAdapter):
+    def __init__(self, llm_adapter: LLMAdapter, prompt_template: Optional[PromptTemplate] = None,
+                 parser: Optional[DecisionParser] = None):
         """
         初始化决策引擎
         
         Args:
             llm_adapter: LLM适配器实例
+            prompt_template: 预编译的提示词模板，为 None 时使用内置的价格提示词
+            parser: 决策解析器，默认解析旧格式；使用 prompt/system_prompt.md 时传入 TradeDecisionParser
         """
         self.llm_adapter = llm_adapter
         self.model_name = llm_adapter.get_model_name()
+        self.prompt_template = prompt_template
+        self.parser = parser or DecisionParser()
+        # 最近一次决策的提示词与原始响应（交易日志记录用），调用失败时响应为 None
+        self.last_prompt: Optional[str] = None
+        self.last_response: Optional[str] = None
     
     def build_prompt(self, market_data: Dict[str, float]) -> str:
         """
         构建交易决策提示词
         
         Args:
-            market_data: 市场数据字典
+            market_data: 市场数据字典；使用模板时为 {'coins': {...}, 'positions': [...], 其余全局字段}
             
         Returns:
             构建的提示词
         """
+        if self.prompt_template is not None:
+            return self.prompt_template.render_snapshot(market_data)
+        if isinstance(self.parser, TradeDecisionParser):
+            return self.build_trade_prompt(market_data)
+
         prompt = f"""
 你是专业的量化交易分析师，请根据当前市场价格给出交易决策。
 
@@ -61,8 +83,43 @@ class DecisionMaker:
 JSON:
 """
         return prompt
+
+    @staticmethod
+    def build_trade_prompt(market_data: Dict[str, Any]) -> str:
+        """
+        构建与 prompt/system_prompt.md 输出格式一致的价格提示词（signal/coin/quantity/justification）
+
+        Args:
+            market_data: {交易对: 价格}，可选 'account_value' 账户价值
+
+        Returns:
+            构建的提示词
+        """
+        lines = [f"- {symbol[:-len(QUOTE_ASSET)]}: ${price:.4f}" for symbol, price in market_data.items()
+                 if symbol.endswith(QUOTE_ASSET) and price]
+        account_value = market_data.get('account_value')
+        account = f"{account_value:.2f} USDT" if account_value else "未知"
+
+        return f"""
+当前市场价格：
+{chr(10).join(lines)}
+
+账户价值: {account}
+
+请按系统提示词的输出格式只返回一个JSON对象：
+买入: {{"signal": "buy", "coin": "BTC", "quantity": 0.0, "profit_target": 0.0, "stop_loss": 0.0, "invalidation_condition": "...", "confidence": 0.0-1.0, "risk_usd": 0.0, "justification": "..."}}
+卖出: {{"signal": "sell", "coin": "BTC", "justification": "..."}}
+观望: {{"signal": "hold", "justification": "..."}}
+
+注意事项：
+1. 买入要求 stop_loss < 当前价格 < profit_target，盈亏比不低于2
+2. risk_usd = (当前价格 - stop_loss) × quantity，且为账户价值的1%-3%
+3. 只返回JSON，不要其他文字
+
+JSON:
+"""
     
-    def get_decision(self, market_data: Dict[str, float]) -> Dict[str, Any]:
+    def get_decision(self, market_data: Dict[str, float]) -> SlotDecision:
         """
         获取交易决策
         
@@ -70,71 +127,93 @@ JSON:
             market_data: 市场数据
             
         Returns:
-            解析后的决策字典
+            解析后的决策对象
         """
         prompt = self.build_prompt(market_data)
+        self.last_prompt, self.last_response = prompt, None
         
         try:
             response = self.llm_adapter.call(prompt)
-            return self.parse_decision(response)
+            self.last_response = response
+            return self.parse_decision(response, self.decision_context(market_data))
         except Exception as e:
             print(f"❌ {self.model_name}决策获取失败: {e}")
             return self.get_default_decision()
     
-    def parse_decision(self, response: str) -> Dict[str, Any]:
+    async def aget_decision(self, market_data: Dict[str, float]) -> SlotDecision:
         """
-        解析LLM响应
+        异步获取交易决策（使用适配器的 acall）
         
         Args:
-            response: LLM响应文本
+            market_data: 市场数据
             
         Returns:
-            解析后的决策字典
+            解析后的决策对象
         """
+        prompt = self.build_prompt(market_data)
+        self.last_prompt, self.last_response = prompt, None
+        
         try:
-            # 尝试提取JSON
-            response = response.strip()
-            if response.startswith('```json'):
-                response = response[7:]
-            if response.endswith('```'):
-                response = response[:-3]
-            
-            decision = json.loads(response)
-            
-            # 验证必要字段
-            required_fields = ['symbol', 'action', 'confidence', 'rationale']
-            for field in required_fields:
-                if field not in decision:
-                    print(f"⚠️ 决策缺少字段: {field}")
-                    return self.get_default_decision()
-            
-            # 验证字段值
-            if decision['action'] not in ['BUY', 'SELL', 'HOLD']:
-                print(f"⚠️ 无效的action: {decision['action']}")
-                decision['action'] = 'HOLD'
-            
-            if not isinstance(decision['confidence'], (int, float)) or not (0 <= decision['confidence'] <= 1):
-                print(f"⚠️ 无效的confidence: {decision['confidence']}")
-                decision['confidence'] = 0.5
+            response = await self.llm_adapter.acall(prompt)
+            self.last_response = response
+            return self.parse_decision(response, self.decision_context(market_data))
+        except Exception as e:
+            print(f"❌ {self.model_name}决策获取失败: {e}")
+            return self.get_default_decision()
+    
+    @staticmethod
+    def decision_context(market_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        从市场数据中取出跨字段校验需要的当前价格与账户价值
+        
+        Args:
+            market_data: 模板快照 {'coins': {币种: {'price': ...}}, 'account_value': ...} 或 {交易对: 价格}
             
-            return decision
+        Returns:
+            {'prices': {币种: 价格}, 'account_value': 账户价值或 None}
+        """
+        if 'coins' in market_data:
+            prices = {coin: data.get('price') for coin, data in market_data['coins'].items()}
+        else:
+            prices = {symbol[:-4]: price for symbol, price in market_data.items()
+                      if isinstance(symbol, str) and symbol.endswith('USDT')}
+        return {'prices': prices, 'account_value': market_data.get('account_value')}
+    
+    def parse_decision(self, response: str, context: Optional[Dict[str, Any]] = None) -> SlotDecision:
+        """
+        解析LLM响应
+        
+        在响应任意位置查找第一个决策JSON（代码块、前置说明、追加解释均可），按预编译规则校验；
+        失败时返回默认决策，原因记录在 self.parser.last_error
+        
+        Args:
+            response: LLM响应文本
+            context: 跨字段校验的上下文（见 decision_context），None 时只做不依赖价格的检查
             
-        except json.JSONDecodeError as e:
-            print(f"❌ JSON解析失败: {e}")
-            print(f"原始响应: {response}")
-            return self.get_default_decision()
-        except Exception as e:
-            print(f"❌ 决策解析失败: {e}")
+        Returns:
+            决策对象（支持字典式读取）
+        """
+        decision = self.parser.parse(response, context)
+        if decision is None:
             return self.get_default_decision()
+        return decision
     
-    def get_default_decision(self) -> Dict[str, Any]:
+    def get_default_decision(self) -> SlotDecision:
         """获取默认决策"""
-        return {
-            "symbol": None,
-            "action": "HOLD",
-            "confidence": 0.0,
-            "rationale": "解析失败，默认观望"
-        }
+        return self.parser.decision_class.fallback("解析失败，默认观望")
+    
+    @staticmethod
+    def is_fallback(decision: Dict[str, Any]) -> bool:
+        """
+        判断决策是否为调用/解析失败后的默认决策
+        
+        Args:
+            decision: 决策字典
+            
+        Returns:
+            是默认决策返回 True
+        """
+        return decision.get('rationale') in FALLBACK_RATIONALES
     
     def format_decision_for_display(self, decision: Dict[str, Any]) -> str:
         """
@@ -148,7 +227,11 @@ JSON:
         """
         symbol = decision.get('symbol', 'None')
         action = decision.get('action', 'HOLD')
-        confidence = decision.get('confidence', 0.0)
+        confidence = decision.get('confidence') or 0.0
         rationale = decision.get('rationale', '无理由')
         
-        return f"   决策: {action} {symbol}\n   信心: {confidence:.2f}\n   理由: {rationale}"
+        text = f"   决策: {action} {symbol}\n   信心: {confidence:.2f}\n   理由: {rationale}"
+        if decision.get('stop_loss') is not None:
+            text += (f"\n   计划: 数量 {decision.get('quantity')}  止盈 {decision.get('profit_target')}  "
+                     f"止损 {decision.get('stop_loss')}  风险 ${decision.get('risk_usd')}")
+        return text
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+决策解析器
+在模型响应的任意位置找到第一个完整的JSON对象，按预编译的字段规则校验并转换，
+返回紧凑的 __slots__ 决策对象；解析失败不打印，错误原因记录在 last_error
+"""
+
+import json
+import operator
+import re
+from typing import Any, Callable, Dict, Iterator, Optional, Sequence, Tuple
+
+ACTIONS = ('BUY', 'SELL', 'HOLD')
+
+# 直接使用C实现的扫描函数：从给定位置解析一个JSON值，返回 (值, 结束位置)，失败时抛出 StopIteration
+_scan_once = json.JSONDecoder().scan_once
+# JSON对象只能以 '{"' 或 '{}' 开头（中间可有空白）：先用正则筛掉说明文字中的花括号，避免无谓的解析异常
+_OBJECT_START = re.compile(r'\{\s*["}]')
+
+
+_MISSING = object()
+
+
+class SchemaError(ValueError):
+    """决策对象不符合字段规则"""
+
+
+def extract_json_object(text: str, validate: Optional[Callable[[Dict[str, Any]], bool]] = None
+                        ) -> Optional[Dict[str, Any]]:
+    """
+    找到文本中第一个可解析（且通过校验）的JSON对象
+
+    从每个候选的 '{"' 处用C实现的扫描函数解析，解析到对象末尾即停止，因此代码块标记、
+    前置说明与追加的解释文字都不影响结果；<think> 推理段会被跳过。
+
+    Args:
+        text: 模型响应
+        validate: 可选的校验函数，返回 False 时继续在该对象内部及之后查找
+
+    Returns:
+        JSON对象，未找到时返回 None
+    """
+    think_end = text.rfind('</think>')
+    search = _OBJECT_START.search
+    match = search(text, think_end + 1 if think_end != -1 else 0)
+    while match is not None:
+        i = match.start()
+        try:
+            obj, _ = _scan_once(text, i)
+        except (StopIteration, ValueError):
+            obj = None
+        if obj is not None and (validate is None or validate(obj)):
+            return obj
+        # 继续查找下一个候选（包括当前对象内部，兼容 {"decision": {...}} 形式的包装）
+        match = search(text, i + 1)
+    return None
+
+
+# ---- 字段规则：每个规则把原始值转换为规范值，不合法时抛出 SchemaError ----
+
+def enum_field(choices: Sequence[str], default: Optional[str] = None,
+               normalize: Callable[[str], str] = str.upper) -> Callable[[Any], str]:
+    """
+    枚举字段（大小写与首尾空白不敏感）
+
+    Args:
+        choices: 允许的取值（已规范化）
+        default: 取值不合法时的替代值，None 表示视为错误
+        normalize: 规范化函数，默认转为大写
+    """
+    allowed = frozenset(choices)
+
+    def convert(value: Any) -> str:
+        if type(value) is str and value in allowed:
+            return value
+        if isinstance(value, str):
+            value = normalize(value.strip())
+            if value in allowed:
+                return value
+        if default is not None:
+            return default
+        raise SchemaError(f"取值不在 {'/'.join(choices)} 中: {value!r}")
+    return convert
+
+
+def number_field(low: Optional[float] = None, high: Optional[float] = None,
+                 default: Optional[float] = None) -> Callable[[Any], float]:
+    """
+    数值字段（接受数字字符串）
+
+    Args:
+        low/high: 取值范围（闭区间），None 表示不限
+        default: 不是数值或超出范围时的替代值，None 表示视为错误
+    """
+    def convert(value: Any) -> float:
+        if type(value) is float and (low is None or value >= low) and (high is None or value <= high):
+            return value
+        if isinstance(value, str):
+            try:
+                value = float(value.strip())
+            except ValueError:
+                pass
+        if isinstance(value, (int, float)) and not isinstance(value, bool) and value == value \
+                and (low is None or value >= low) and (high is None or value <= high):
+            return float(value)
+        if default is not None:
+            return default
+        raise SchemaError(f"无效的数值: {value!r}")
+    return convert
+
+
+def optional_str_field(null_values: Sequence[str] = ('', 'null', 'none')) -> Callable[[Any], Optional[str]]:
+    """可为空的字符串字段，'null'/'None'/空串视为 None"""
+    nulls = frozenset(null_values)
+
+    def convert(value: Any) -> Optional[str]:
+        if value is None:
+            return None
+        if isinstance(value, str):
+            value = value.strip()
+            return None if value.lower() in nulls else value
+        raise SchemaError(f"应为字符串或 null: {value!r}")
+    return convert
+
+
+def text_field(value: Any) -> str:
+    """文本字段，任意值转为字符串"""
+    return value if isinstance(value, str) else str(value)
+
+
+class DecisionSchema:
+    """
+    预编译的决策字段规则
+
+    创建时把规则表展开为 (字段名, 是否必填, 转换函数) 元组，校验时只做一次遍历。
+    """
+
+    def __init__(self, fields: Dict[str, Tuple[bool, Callable[[Any], Any]]],
+                 rules: Sequence[Callable[[Dict[str, Any], Dict[str, Any]], Optional[str]]] = ()):
+        """
+        初始化字段规则
+
+        Args:
+            fields: {字段名: (是否必填, 转换函数)}，非必填字段缺失或为 null 时为 None
+            rules: 跨字段规则，参数为 (转换后的 {字段名: 值}, 上下文)，返回错误说明或 None
+        """
+        self.fields = tuple(fields)
+        self._compiled = tuple((name, required, convert) for name, (required, convert) in fields.items())
+        self._rules = tuple(rules)
+
+    def validate(self, obj: Dict[str, Any], context: Optional[Dict[str, Any]] = None) -> Tuple[Any, ...]:
+        """
+        校验并转换
+
+        Args:
+            obj: 解析出的JSON对象
+            context: 跨字段规则使用的上下文（如当前价格、账户价值），None 表示无上下文
+
+        Returns:
+            按 fields 顺序排列的规范值
+
+        Raises:
+            SchemaError: 缺少必填字段、取值不合法或违反跨字段规则
+        """
+        values = []
+        append = values.append
+        for name, required, convert in self._compiled:
+            value = obj.get(name, _MISSING)
+            if value is _MISSING or (value is None and not required):
+                if value is _MISSING and required:
+                    raise SchemaError(f"决策缺少字段: {name}")
+                append(None)
+                continue
+            try:
+                append(convert(value))
+            except SchemaError as e:
+                raise SchemaError(f"{name}: {e}") from None
+        if self._rules:
+            named = dict(zip(self.fields, values))
+            context = context or {}
+            for rule in self._rules:
+                error = rule(named, context)
+                if error:
+                    raise SchemaError(error)
+        return tuple(values)
+
+
+# 与 DecisionMaker 原有校验一致：四个字段必填，action 不合法时观望，confidence 不合法时取 0.5
+DECISION_SCHEMA = DecisionSchema({
+    'symbol': (True, optional_str_field()),
+    'action': (True, enum_field(ACTIONS, default='HOLD')),
+    'confidence': (True, number_field(0.0, 1.0, default=0.5)),
+    'rationale': (True, text_field),
+})
+
+
+class SlotDecision:
+    """
+    __slots__ 决策对象的基类
+
+    子类在 __slots__ 中声明字段（顺序与 DecisionSchema 一致），在 ALIASES 中声明只读的兼容字段；
+    支持 decision['action'] 与 decision.get('action') 的字典式读取，原先按字典使用决策的代码无需修改。
+    """
+
+    __slots__ = ()
+    ALIASES: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_values(cls, values: Tuple[Any, ...]) -> 'SlotDecision':
+        """由 DecisionSchema.validate 的结果（按字段顺序）创建"""
+        return cls(*values)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in self.__slots__ or key in self.ALIASES:
+            return getattr(self, key)
+        return default
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.__slots__ and key not in self.ALIASES:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value: Any):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.__slots__ or key in self.ALIASES
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.__slots__)
+
+    def keys(self) -> Tuple[str, ...]:
+        return self.__slots__
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转为普通字典（用于JSON序列化）"""
+        return {key: getattr(self, key) for key in self.__slots__}
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, SlotDecision):
+            return type(self) is type(other) and self.to_dict() == other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f"{key}={getattr(self, key)!r}" for key in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class Decision(SlotDecision):
+    """交易决策（旧格式 symbol/action/confidence/rationale）"""
+
+    __slots__ = ('symbol', 'action', 'confidence', 'rationale')
+
+    def __init__(self, symbol: Optional[str] = None, action: str = 'HOLD', confidence: float = 0.0,
+                 rationale: str = ''):
+        self.symbol = symbol
+        self.action = action
+        self.confidence = confidence
+        self.rationale = rationale
+
+    @classmethod
+    def fallback(cls, rationale: str) -> 'Decision':
+        """调用或解析失败时的默认观望决策"""
+        return cls(None, 'HOLD', 0.0, rationale)
+
+
+class DecisionParser:
+    """决策解析器：提取JSON对象 → 预编译规则校验 → 决策对象"""
+
+    def __init__(self, schema: DecisionSchema = DECISION_SCHEMA, decision_class: type = Decision,
+                 key_field: str = 'action'):
+        """
+        初始化解析器
+
+        Args:
+            schema: 字段规则
+            decision_class: 决策类（SlotDecision 子类），需提供 from_values(values) 与 fallback(rationale)
+            key_field: 用于识别决策对象的字段，不含该字段的JSON对象会被跳过
+        """
+        self.schema = schema
+        self.decision_class = decision_class
+        self.key_field = key_field
+        self._is_candidate = operator.methodcaller('__contains__', key_field)
+        self.last_error: Optional[str] = None
+        self.parsed = 0
+        self.failed = 0
+
+    def parse(self, text: Optional[str], context: Optional[Dict[str, Any]] = None) -> Optional[SlotDecision]:
+        """
+        解析模型响应
+
+        Args:
+            text: 模型响应
+            context: 跨字段规则使用的上下文
+
+        Returns:
+            决策对象，失败时返回 None（原因见 last_error）
+        """
+        if not text:
+            return self._fail("响应为空")
+        obj = extract_json_object(text, self._is_candidate)
+        if obj is None:
+            return self._fail("未找到决策JSON")
+        try:
+            values = self.schema.validate(obj, context)
+        except SchemaError as e:
+            return self._fail(str(e))
+        self.last_error = None
+        self.parsed += 1
+        return self.decision_class.from_values(values)
+
+    def _fail(self, error: str) -> None:
+        self.last_error = error
+        self.failed += 1
+        return None
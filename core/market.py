@@ -5,18 +5,35 @@
 获取和管理市场数据
 """
 
-from typing import Dict, List
+from typing import Dict, List, Optional
 from adapters.exchange_api import ExchangeAPI
 
 
 class MarketData:
     """市场数据管理器"""
     
-    def __init__(self):
-        """初始化市场数据管理器"""
-        self.exchange_api = ExchangeAPI()
+    def __init__(self, price_ttl: float = 2.0, data_fetcher=None, max_stream_age: float = 5.0,
+                 hedge: bool = False):
+        """
+        初始化市场数据管理器
+        
+        Args:
+            price_ttl: 价格快照缓存有效期（秒），get_current_prices 与 get_price 共用
+            data_fetcher: 已启动 WebSocket 的 TradingDataFetcher，提供时优先从内存读取价格
+            max_stream_age: WebSocket 价格的最大允许年龄（秒），过期则回退到REST
+            hedge: 是否对REST行情请求启用多主机对冲
+        """
+        self.exchange_api = ExchangeAPI(price_ttl=price_ttl, hedge=hedge)
+        self.data_fetcher = data_fetcher
+        self.max_stream_age = max_stream_age
         self.symbols = ['BTCUSDT', 'ETHUSDT', 'XRPUSDT', 'BNBUSDT', 'SOLUSDT']
     
+    def _get_stream_price(self, symbol: str) -> Optional[float]:
+        """从 WebSocket 最新值存储读取价格，不可用时返回 None"""
+        if self.data_fetcher is None:
+            return None
+        return self.data_fetcher.get_ws_price(symbol, max_age=self.max_stream_age)
+    
     def get_current_prices(self) -> Dict[str, float]:
         """
         获取当前所有代币的价格
@@ -24,7 +41,19 @@ class MarketData:
         Returns:
             价格字典
         """
-        return self.exchange_api.get_latest_prices(self.symbols)
+        prices = {}
+        missing = []
+        for symbol in self.symbols:
+            price = self._get_stream_price(symbol)
+            if price is None:
+                missing.append(symbol)
+            else:
+                prices[symbol] = price
+        
+        # 流数据缺失或过期的交易对回退到REST快照
+        if missing:
+            prices.update(self.exchange_api.get_latest_prices(missing))
+        return {symbol: prices[symbol] for symbol in self.symbols}
     
     def get_price(self, symbol: str) -> float:
         """
@@ -36,6 +65,9 @@ class MarketData:
         Returns:
             价格
         """
+        price = self._get_stream_price(symbol)
+        if price is not None:
+            return price
         return self.exchange_api.get_single_price(symbol)
     
     def get_symbols(self) -> List[str]:
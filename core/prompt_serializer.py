@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+提示词数值序列化
+按交易对的最小价格变动单位（tick size）与有效数字舍入数值，并给每个序列分配token预算：
+超出预算时对较早的数据点降采样，保证币种增加时提示词大小仍然有界
+"""
+
+import math
+import re
+from typing import Any, Dict, Iterable, Optional, Sequence, Set
+
+# 币安现货 USDT 交易对的价格步长（exchangeInfo 中 PRICE_FILTER.tickSize）
+DEFAULT_TICK_SIZES = {
+    'BTC': 0.01,
+    'ETH': 0.01,
+    'SOL': 0.01,
+    'BNB': 0.01,
+    'DOGE': 0.00001,
+    'XRP': 0.0001,
+}
+
+# 数字按最多3位一组切分，其余每个符号约一个token（近似常见BPE分词器对数字的切分）
+_TOKEN_RE = re.compile(r'\d{1,3}|[^\d\s]')
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    估算数值文本的token数
+
+    Args:
+        text: 以数字为主的文本
+
+    Returns:
+        估算的token数
+    """
+    return len(_TOKEN_RE.findall(text))
+
+
+def tick_decimals(tick_size: float) -> int:
+    """
+    tick size 对应的小数位数
+
+    Args:
+        tick_size: 价格步长，如 0.01
+
+    Returns:
+        小数位数，如 2
+    """
+    if tick_size >= 1:
+        return 0
+    return max(0, -int(math.floor(math.log10(tick_size) + 1e-9)))
+
+
+def infer_tick_size(price: float, sig_digits: int = 5) -> float:
+    """
+    未知交易对按价格量级推断步长，保留约 sig_digits 位有效数字
+
+    Args:
+        price: 参考价格
+        sig_digits: 有效数字位数
+
+    Returns:
+        推断的步长
+    """
+    if not price or price != price:
+        return 0.01
+    return 10.0 ** (math.floor(math.log10(abs(price))) - sig_digits + 1)
+
+
+def format_decimals(value: Any, decimals: int) -> str:
+    """按固定小数位格式化，去掉多余的尾随0"""
+    if value is None or value != value:
+        return 'N/A'
+    text = f"{float(value):.{decimals}f}"
+    if '.' in text:
+        text = text.rstrip('0').rstrip('.')
+    return '0' if text == '-0' else text
+
+
+def format_significant(value: Any, sig_digits: int) -> str:
+    """按有效数字格式化（不使用科学计数法）"""
+    if value is None or value != value:
+        return 'N/A'
+    value = float(value)
+    if value == 0:
+        return '0'
+    decimals = sig_digits - 1 - int(math.floor(math.log10(abs(value))))
+    if decimals < 0:
+        # 整数部分超过有效数字位数：舍入到十、百……位
+        return format_decimals(round(value, decimals), 0)
+    return format_decimals(value, decimals)
+
+
+class PromptSerializer:
+    """
+    提示词数值序列化器
+
+    字段按名称分为三类：
+    - 价格类（price/ema/atr）：按交易对 tick size 的小数位舍入
+    - RSI：保留 rsi_decimals 位小数
+    - 其他（MACD、成交量、持仓量、资金费率等）：保留 sig_digits 位有效数字
+
+    每个周期调用 prepare() 处理全部币种，之后通过 report 查看节省的token数。
+    """
+
+    PRICE_KEYS = ('price', 'ema', 'atr')
+
+    def __init__(self, tick_sizes: Optional[Dict[str, float]] = None, series_budget: int = 120,
+                 total_budget: Optional[int] = None, sig_digits: int = 4, rsi_decimals: int = 1,
+                 recent_points: int = 10, downsample: bool = True):
+        """
+        初始化序列化器
+
+        Args:
+            tick_sizes: {币种: 价格步长}，默认为 DEFAULT_TICK_SIZES，未知币种按价格量级推断
+            series_budget: 单个序列的token预算
+            total_budget: 所有币种序列的总token预算，币种增多时按数量均分，None 表示不限
+            sig_digits: 非价格数值保留的有效数字
+            rsi_decimals: RSI 保留的小数位
+            recent_points: 降采样时保持原始分辨率的最新数据点数
+            downsample: 超出预算时是否对较早的数据点降采样（否则直接截去最早的数据点）
+        """
+        self.tick_sizes = dict(DEFAULT_TICK_SIZES if tick_sizes is None else tick_sizes)
+        self.series_budget = series_budget
+        self.total_budget = total_budget
+        self.sig_digits = sig_digits
+        self.rsi_decimals = rsi_decimals
+        self.recent_points = recent_points
+        self.downsample = downsample
+        self.report = self._empty_report()
+
+    @staticmethod
+    def _empty_report() -> Dict[str, int]:
+        return {'raw_tokens': 0, 'tokens': 0, 'saved_tokens': 0, 'series': 0, 'reduced_series': 0}
+
+    def tick_size(self, coin: str, reference_price: Optional[float] = None) -> float:
+        """
+        获取币种的价格步长
+
+        Args:
+            coin: 币种，如'BTC'
+            reference_price: 未配置步长时用于推断的参考价格
+
+        Returns:
+            价格步长
+        """
+        tick = self.tick_sizes.get(coin)
+        if tick is None:
+            tick = infer_tick_size(reference_price) if reference_price else 0.01
+            self.tick_sizes[coin] = tick
+        return tick
+
+    def _formatter(self, field: str, tick: float):
+        if 'rsi' in field:
+            decimals = self.rsi_decimals
+            return lambda v: format_decimals(v, decimals)
+        if any(key in field for key in self.PRICE_KEYS):
+            decimals = tick_decimals(tick)
+            return lambda v: format_decimals(v, decimals)
+        sig_digits = self.sig_digits
+        return lambda v: format_significant(v, sig_digits)
+
+    def format_value(self, field: str, value: Any, tick: float) -> str:
+        """
+        格式化单个数值
+
+        Args:
+            field: 字段名（决定舍入方式）
+            value: 数值
+            tick: 价格步长
+
+        Returns:
+            格式化后的文本
+        """
+        if value is None or isinstance(value, (str, bool)):
+            return 'N/A' if value is None else str(value)
+        text = self._formatter(field, tick)(value)
+        self.report['raw_tokens'] += estimate_tokens(repr(float(value)))
+        self.report['tokens'] += estimate_tokens(text)
+        return text
+
+    def format_series(self, field: str, values: Sequence[Any], tick: float,
+                      budget: Optional[int] = None) -> str:
+        """
+        在token预算内格式化序列（顺序为旧 → 新）
+
+        超出预算时保留最新的 recent_points 个点，较早的点按 2、4、8… 的步长降采样
+        （始终保留最早的点与降采样段的最后一个点）；仍超出时截去最早的数据点。
+
+        Args:
+            field: 字段名
+            values: 数值序列
+            tick: 价格步长
+            budget: token预算，默认为 series_budget
+
+        Returns:
+            逗号分隔的数值文本
+        """
+        budget = self.series_budget if budget is None else budget
+        fmt = self._formatter(field, tick)
+        items = [fmt(v) for v in values]
+        raw = ', '.join(repr(float(v)) if v is not None else 'N/A' for v in values)
+        text = ', '.join(items)
+        tokens = estimate_tokens(text)
+
+        reduced = False
+        if tokens > budget and len(items) > self.recent_points:
+            reduced = True
+            old, recent = items[:-self.recent_points], items[-self.recent_points:]
+            stride = 2
+            while self.downsample and len(old) // stride >= 1:
+                sampled = old[::stride]
+                if (len(old) - 1) % stride:
+                    sampled.append(old[-1])
+                text = ', '.join(sampled + recent)
+                tokens = estimate_tokens(text)
+                if tokens <= budget:
+                    break
+                stride *= 2
+            else:
+                text = ', '.join(recent)
+                tokens = estimate_tokens(text)
+        if tokens > budget:
+            # 截去最早的数据点，直到满足预算（至少保留最新的一个点）
+            reduced = True
+            parts = text.split(', ')
+            while len(parts) > 1 and tokens > budget:
+                parts.pop(0)
+                text = ', '.join(parts)
+                tokens = estimate_tokens(text)
+
+        self.report['raw_tokens'] += estimate_tokens(raw)
+        self.report['tokens'] += tokens
+        self.report['series'] += 1
+        if reduced:
+            self.report['reduced_series'] += 1
+        return text
+
+    def prepare(self, coins: Dict[str, Dict[str, Any]], series_fields: Optional[Iterable[str]] = None,
+                reset: bool = True) -> Dict[str, Dict[str, str]]:
+        """
+        将所有币种的数值序列化为提示词文本（结果可直接传给 PromptTemplate.render）
+
+        Args:
+            coins: {币种: {字段: 数值或序列}}
+            series_fields: 序列字段名，默认把 list/tuple/ndarray 类型的值视为序列
+            reset: 是否重置本周期的 report
+
+        Returns:
+            {币种: {字段: 文本}}
+        """
+        if reset:
+            self.report = self._empty_report()
+        series_fields: Optional[Set[str]] = set(series_fields) if series_fields is not None else None
+
+        budget = self.series_budget
+        if self.total_budget is not None and coins:
+            n_series = max(sum(1 for v in data.values() if isinstance(v, (list, tuple)) or hasattr(v, 'shape'))
+                           for data in coins.values())
+            if n_series:
+                budget = min(budget, max(1, self.total_budget // (len(coins) * n_series)))
+
+        prepared = {}
+        for coin, data in coins.items():
+            tick = self.tick_size(coin, data.get('price'))
+            out = {}
+            for field, value in data.items():
+                is_series = (field in series_fields if series_fields is not None
+                             else isinstance(value, (list, tuple)) or hasattr(value, 'shape'))
+                if is_series:
+                    out[field] = self.format_series(field, list(value), tick, budget)
+                else:
+                    out[field] = self.format_value(field, value, tick)
+            prepared[coin] = out
+
+        self.report['saved_tokens'] = self.report['raw_tokens'] - self.report['tokens']
+        return prepared
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+提示词模板编译器
+启动时将 prompt/user_prompt.md 解析一次，编译为静态文本片段与带类型的占位符：
+- 每个币种的数据段由模板中的 BTC 段生成（btc_ 前缀的占位符变为币种字段）
+- 持仓列表由代码块中的单个持仓模板生成
+每个周期只需格式化取值并做一次 join，不再重新解析模板
+"""
+
+import os
+import re
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# 默认的用户提示词模板
+DEFAULT_TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                     'prompt', 'user_prompt.md')
+
+# 占位符：{标识符}，代码块中的 "{" 换行等普通花括号不会被匹配
+PLACEHOLDER_RE = re.compile(r'\{([a-z_][a-z0-9_]*)\}')
+COIN_HEADING_RE = re.compile(r'^### ALL ([A-Z0-9]+) DATA$', re.MULTILINE)
+SECTION_RE = re.compile(r'^## ', re.MULTILINE)
+POSITIONS_BLOCK_RE = re.compile(r'```python\n\[\n(?P<item>  \{\n.*?\n  \},\n).*?```', re.DOTALL)
+
+# 占位符类型
+NUMBER = 'number'
+SERIES = 'series'
+TEXT = 'text'
+
+# (前导静态文本, 字段名, 格式化函数)
+CompiledSlot = Tuple[str, str, Callable[[Any], str]]
+
+
+class MissingPlaceholderError(KeyError):
+    """渲染时缺少占位符的取值"""
+
+
+def format_number(value: Any) -> str:
+    """
+    默认的数值格式化
+
+    Args:
+        value: 数值、布尔值、已格式化的文本或 None
+
+    Returns:
+        格式化后的文本，None/NaN 显示为 N/A
+    """
+    if value is None:
+        return 'N/A'
+    if isinstance(value, str):
+        return value  # 已由调用方格式化（如 PromptSerializer）
+    if isinstance(value, bool):
+        return 'True' if value else 'False'
+    if isinstance(value, int):
+        return str(value)
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return str(value)
+    if value != value:
+        return 'N/A'
+    return f"{value:.10g}"
+
+
+def format_series(values: Optional[Iterable[Any]]) -> str:
+    """默认的序列格式化：逗号分隔的数值"""
+    if values is None:
+        return ''
+    if isinstance(values, str):
+        return values
+    return ', '.join(format_number(v) for v in values)
+
+
+def format_text(value: Any) -> str:
+    """默认的文本格式化"""
+    return 'N/A' if value is None else str(value)
+
+
+DEFAULT_FORMATTERS = {
+    NUMBER: format_number,
+    SERIES: format_series,
+    TEXT: format_text,
+}
+
+
+def slot_kind(text: str, start: int, end: int) -> str:
+    """
+    根据占位符两侧的字符推断类型
+
+    Args:
+        text: 模板文本
+        start: 占位符起始位置（"{" 处）
+        end: 占位符结束位置（"}" 之后）
+
+    Returns:
+        NUMBER / SERIES / TEXT
+    """
+    before = text[start - 1] if start > 0 else ''
+    after = text[end] if end < len(text) else ''
+    if before == '[' and after == ']':
+        return SERIES
+    if before == after and before in ('"', "'"):
+        return TEXT
+    return NUMBER
+
+
+class CompiledBlock:
+    """编译后的文本块：若干 (静态文本, 占位符) 对加上结尾静态文本"""
+
+    __slots__ = ('slots', 'tail', 'fields', 'kinds')
+
+    def __init__(self, text: str, formatters: Dict[str, Callable[[Any], str]],
+                 rename: Optional[Callable[[str], Optional[str]]] = None):
+        """
+        编译文本块
+
+        Args:
+            text: 模板文本
+            formatters: {类型: 格式化函数}
+            rename: 占位符名 -> 字段名的映射，返回 None 表示保留原样作为静态文本
+        """
+        slots: List[CompiledSlot] = []
+        kinds: Dict[str, str] = {}
+        pos = 0
+        pending = []
+        for match in PLACEHOLDER_RE.finditer(text):
+            field = match.group(1) if rename is None else rename(match.group(1))
+            if field is None:
+                continue
+            pending.append(text[pos:match.start()])
+            kind = slot_kind(text, match.start(), match.end())
+            kinds[field] = kind
+            slots.append((''.join(pending), field, formatters[kind]))
+            pending = []
+            pos = match.end()
+        pending.append(text[pos:])
+        self.slots = tuple(slots)
+        self.tail = ''.join(pending)
+        self.fields = frozenset(kinds)
+        self.kinds = kinds
+
+    def render_into(self, parts: List[str], values: Dict[str, Any], strict: bool):
+        """
+        将渲染结果追加到 parts
+
+        Args:
+            parts: 输出片段列表
+            values: {字段名: 取值}
+            strict: 为 False 时缺失字段按 None 格式化
+        """
+        append = parts.append
+        if strict:
+            for static, field, fmt in self.slots:
+                append(static)
+                append(fmt(values[field]))
+        else:
+            get = values.get
+            for static, field, fmt in self.slots:
+                append(static)
+                append(fmt(get(field)))
+        append(self.tail)
+
+
+class PromptTemplate:
+    """
+    预编译的用户提示词模板
+
+    渲染输入：
+    - values: 全局字段，如 minutes_elapsed、cash_available
+    - coins: {币种: {字段: 取值}}，字段名不带币种前缀，如 {'BTC': {'price': ..., 'ema20_3m': [...]}}；
+      币种数量与顺序不限，不在模板中的币种同样由 BTC 段生成
+    - positions: 持仓列表，每项字段对应持仓模板中的占位符
+    """
+
+    def __init__(self, text: str, base_coin: str = 'BTC',
+                 formatters: Optional[Dict[str, Callable[[Any], str]]] = None):
+        """
+        编译模板
+
+        Args:
+            text: 模板文本
+            base_coin: 作为币种段模板的币种
+            formatters: 覆盖默认的 {类型: 格式化函数}
+        """
+        self.formatters = dict(DEFAULT_FORMATTERS)
+        if formatters:
+            self.formatters.update(formatters)
+        self.base_coin = base_coin.upper()
+        prefix = base_coin.lower() + '_'
+
+        headings = list(COIN_HEADING_RE.finditer(text))
+        coin_names = [m.group(1) for m in headings]
+        if self.base_coin not in coin_names:
+            raise ValueError(f"模板中没有 ### ALL {self.base_coin} DATA 段")
+
+        # 币种段区域：第一个币种标题到其后的第一个二级标题
+        region_start = headings[0].start()
+        next_section = SECTION_RE.search(text, headings[-1].end())
+        region_end = next_section.start() if next_section else len(text)
+
+        sections = {}
+        for i, match in enumerate(headings):
+            end = headings[i + 1].start() if i + 1 < len(headings) else region_end
+            sections[match.group(1)] = text[match.end():end]
+
+        # 币种段 = 标题 + 主体 + 分隔线；主体由基准币种段编译
+        base = sections[self.base_coin]
+        split = base.rfind('\n---')
+        body = (base[:split] if split >= 0 else base).rstrip('\n')
+        self._section_tail = base[len(body):]
+
+        def strip_prefix(name: str) -> Optional[str]:
+            return name[len(prefix):] if name.startswith(prefix) else None
+
+        self.coin_block = CompiledBlock(body, self.formatters, strip_prefix)
+
+        # 其他币种段中额外的带占位符的行（如 DOGE 的流动性标签）只属于该币种
+        self.coin_extras: Dict[str, CompiledBlock] = {}
+        for coin, section in sections.items():
+            if coin == self.base_coin:
+                continue
+            coin_prefix = coin.lower() + '_'
+            lines = [line for line in section.split('\n')
+                     if any(m.group(1).startswith(coin_prefix) for m in PLACEHOLDER_RE.finditer(line))]
+            if lines:
+                self.coin_extras[coin] = CompiledBlock(
+                    ''.join('\n' + line for line in lines), self.formatters,
+                    lambda name, p=coin_prefix: name[len(p):] if name.startswith(p) else None)
+        self.template_coins = coin_names
+
+        # 全局部分：币种段之前与之后，持仓代码块单独编译
+        self.header = CompiledBlock(text[:region_start], self.formatters)
+        footer = text[region_end:]
+        positions = POSITIONS_BLOCK_RE.search(footer)
+        if positions:
+            self.footer = CompiledBlock(footer[:positions.start()], self.formatters)
+            self.position_block = CompiledBlock(positions.group('item'), self.formatters)
+            self.footer_after = CompiledBlock(footer[positions.end():], self.formatters)
+        else:
+            self.footer = CompiledBlock(footer, self.formatters)
+            self.position_block = None
+            self.footer_after = None
+
+        self.global_fields = self.header.fields | self.footer.fields
+        if self.footer_after is not None:
+            self.global_fields |= self.footer_after.fields
+
+    @classmethod
+    def from_file(cls, path: str = DEFAULT_TEMPLATE_PATH, **kwargs) -> 'PromptTemplate':
+        """
+        从文件编译模板
+
+        Args:
+            path: 模板路径，默认为 prompt/user_prompt.md
+
+        Returns:
+            编译后的模板
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(f.read(), **kwargs)
+
+    @property
+    def coin_fields(self) -> frozenset:
+        """每个币种必须提供的字段"""
+        return self.coin_block.fields
+
+    @property
+    def position_fields(self) -> frozenset:
+        """每个持仓必须提供的字段"""
+        return self.position_block.fields if self.position_block else frozenset()
+
+    def coin_fields_for(self, coin: str) -> frozenset:
+        """某个币种需要的全部字段（含该币种的额外字段）"""
+        extra = self.coin_extras.get(coin)
+        return self.coin_block.fields | extra.fields if extra else self.coin_block.fields
+
+    def missing(self, values: Dict[str, Any], coins: Dict[str, Dict[str, Any]],
+                positions: Sequence[Dict[str, Any]] = ()) -> List[str]:
+        """
+        检查缺失的占位符取值
+
+        Returns:
+            缺失项列表，币种字段写作 'eth_ema20_3m'，持仓字段写作 'positions[0].stop_loss'
+        """
+        missing = sorted(self.global_fields - values.keys())
+        for coin, data in coins.items():
+            lacking = self.coin_fields_for(coin) - data.keys()
+            if lacking:
+                missing.extend(f"{coin.lower()}_{field}" for field in sorted(lacking))
+        for i, position in enumerate(positions):
+            lacking = self.position_fields - position.keys()
+            missing.extend(f"positions[{i}].{field}" for field in sorted(lacking))
+        return missing
+
+    def render(self, values: Dict[str, Any], coins: Dict[str, Dict[str, Any]],
+               positions: Sequence[Dict[str, Any]] = (), strict: bool = True) -> str:
+        """
+        渲染提示词
+
+        Args:
+            values: 全局字段取值
+            coins: {币种: {字段: 取值}}，按给定顺序生成币种段
+            positions: 持仓列表
+            strict: 为 True 时缺少取值抛出 MissingPlaceholderError，否则显示为 N/A
+
+        Returns:
+            渲染后的提示词
+        """
+        if strict:
+            missing = self.missing(values, coins, positions)
+            if missing:
+                raise MissingPlaceholderError(f"提示词缺少取值: {', '.join(missing[:20])}"
+                                              + (f" 等{len(missing)}项" if len(missing) > 20 else ""))
+
+        parts: List[str] = []
+        self.header.render_into(parts, values, strict)
+        coin_block = self.coin_block
+        section_tail = self._section_tail
+        for coin, data in coins.items():
+            parts.append(f"### ALL {coin} DATA")
+            coin_block.render_into(parts, data, strict)
+            extra = self.coin_extras.get(coin)
+            if extra is not None:
+                extra.render_into(parts, data, strict)
+            parts.append(section_tail)
+
+        self.footer.render_into(parts, values, strict)
+        if self.position_block is not None:
+            if positions:
+                parts.append("```python\n[\n")
+                for position in positions:
+                    self.position_block.render_into(parts, position, strict)
+                parts.append("]\n```")
+            else:
+                parts.append("```python\n[]\n```")
+            self.footer_after.render_into(parts, values, strict)
+        return ''.join(parts)
+
+    def render_snapshot(self, snapshot: Dict[str, Any], strict: bool = True) -> str:
+        """
+        渲染单个字典形式的市场快照
+
+        Args:
+            snapshot: {'coins': {...}, 'positions': [...], 其余键为全局字段}
+
+        Returns:
+            渲染后的提示词
+        """
+        values = {k: v for k, v in snapshot.items() if k not in ('coins', 'positions')}
+        return self.render(values, snapshot.get('coins', {}), snapshot.get('positions', ()), strict)
+
+
+_default_template: Optional[PromptTemplate] = None
+
+
+def get_user_prompt_template() -> PromptTemplate:
+    """
+    获取进程内共享的 prompt/user_prompt.md 编译结果（首次调用时编译）
+
+    Returns:
+        编译后的模板
+    """
+    global _default_template
+    if _default_template is None:
+        _default_template = PromptTemplate.from_file()
+    return _default_template
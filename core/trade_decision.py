@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+完整交易决策格式
+对应 prompt/system_prompt.md 的输出格式（buy/sell/hold），字段规则与跨字段规则在导入时编译一次：
+买入的止损必须低于当前价、止盈高于当前价，盈亏比与 risk_usd 需符合风控要求
+"""
+
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from core.decision_parser import (DecisionParser, DecisionSchema, SlotDecision, enum_field, number_field,
+                                  optional_str_field, text_field)
+
+SIGNALS = ('buy', 'sell', 'hold')
+COINS = ('BTC', 'ETH', 'SOL', 'BNB', 'DOGE', 'XRP')
+QUOTE_ASSET = 'USDT'
+
+# 买入决策必须给出的风控字段
+BUY_FIELDS = ('coin', 'quantity', 'profit_target', 'stop_loss', 'invalidation_condition', 'confidence', 'risk_usd')
+
+
+def normalize_coin(value: str) -> str:
+    """币种规范化：大写并去掉计价资产后缀（'btcusdt' → 'BTC'）"""
+    value = value.upper()
+    if value.endswith(QUOTE_ASSET) and len(value) > len(QUOTE_ASSET):
+        value = value[:-len(QUOTE_ASSET)]
+    return value
+
+
+class TradeDecision(SlotDecision):
+    """
+    完整格式的交易决策
+
+    兼容旧格式的只读字段：action（BUY/SELL/HOLD）、symbol（如 BTCUSDT）、rationale（即 justification），
+    因此竞技场计票、默认决策判断与显示逻辑可以同时处理两种格式。
+    """
+
+    __slots__ = ('signal', 'coin', 'quantity', 'profit_target', 'stop_loss', 'invalidation_condition',
+                 'confidence', 'risk_usd', 'justification')
+    ALIASES = ('action', 'symbol', 'rationale')
+
+    def __init__(self, signal: str = 'hold', coin: Optional[str] = None, quantity: Optional[float] = None,
+                 profit_target: Optional[float] = None, stop_loss: Optional[float] = None,
+                 invalidation_condition: Optional[str] = None, confidence: Optional[float] = None,
+                 risk_usd: Optional[float] = None, justification: str = ''):
+        self.signal = signal
+        self.coin = coin
+        self.quantity = quantity
+        self.profit_target = profit_target
+        self.stop_loss = stop_loss
+        self.invalidation_condition = invalidation_condition
+        self.confidence = confidence
+        self.risk_usd = risk_usd
+        self.justification = justification
+
+    @classmethod
+    def fallback(cls, rationale: str) -> 'TradeDecision':
+        """调用或解析失败时的默认观望决策"""
+        return cls('hold', justification=rationale)
+
+    @property
+    def action(self) -> str:
+        return self.signal.upper()
+
+    @property
+    def symbol(self) -> Optional[str]:
+        return f"{self.coin}{QUOTE_ASSET}" if self.coin else None
+
+    @property
+    def rationale(self) -> str:
+        return self.justification
+
+
+def build_trade_schema(coins: Sequence[str] = COINS, min_reward_risk: Optional[float] = 2.0,
+                       risk_range: Optional[Tuple[float, float]] = (0.01, 0.03),
+                       risk_tolerance: Optional[float] = 0.1) -> DecisionSchema:
+    """
+    编译完整格式的字段规则
+
+    依赖当前价格的规则从上下文 {'prices': {币种: 价格}, 'account_value': 账户价值} 取值，
+    上下文中缺少对应数据时跳过该规则。
+
+    Args:
+        coins: 允许交易的币种
+        min_reward_risk: 买入的最小盈亏比 (止盈 - 现价) / (现价 - 止损)，None 表示不检查
+        risk_range: risk_usd 占账户价值的比例范围，None 表示不检查
+        risk_tolerance: risk_usd 与 |现价 - 止损| × 数量 的允许相对误差，None 表示不检查
+
+    Returns:
+        DecisionSchema
+    """
+    def buy_fields(v: Dict[str, Any], context: Dict[str, Any]) -> Optional[str]:
+        signal = v['signal']
+        if signal == 'buy':
+            for name in BUY_FIELDS:
+                if v[name] is None:
+                    return f"buy 决策缺少字段: {name}"
+            if v['quantity'] <= 0 or v['stop_loss'] <= 0:
+                return "buy 决策的 quantity 与 stop_loss 必须大于0"
+        elif signal == 'sell' and v['coin'] is None:
+            return "sell 决策缺少字段: coin"
+        return None
+
+    def price_levels(v: Dict[str, Any], context: Dict[str, Any]) -> Optional[str]:
+        if v['signal'] != 'buy':
+            return None
+        stop_loss, profit_target = v['stop_loss'], v['profit_target']
+        if stop_loss >= profit_target:
+            return f"止损 {stop_loss} 必须低于止盈 {profit_target}"
+        price = context.get('prices', {}).get(v['coin'])
+        if not price:
+            return None
+        if not stop_loss < price < profit_target:
+            return f"买入要求 止损 {stop_loss} < 现价 {price} < 止盈 {profit_target}"
+        if min_reward_risk is not None and (profit_target - price) < min_reward_risk * (price - stop_loss):
+            ratio = (profit_target - price) / (price - stop_loss)
+            return f"盈亏比 {ratio:.2f} 低于 {min_reward_risk}"
+        if risk_tolerance is not None:
+            expected = (price - stop_loss) * v['quantity']
+            if abs(v['risk_usd'] - expected) > risk_tolerance * expected:
+                return f"risk_usd {v['risk_usd']} 与 |现价 - 止损| × 数量 = {expected:.2f} 不符"
+        return None
+
+    def risk_budget(v: Dict[str, Any], context: Dict[str, Any]) -> Optional[str]:
+        account_value = context.get('account_value')
+        if v['signal'] != 'buy' or not account_value:
+            return None
+        ratio = v['risk_usd'] / account_value
+        if not risk_range[0] <= ratio <= risk_range[1]:
+            return f"risk_usd 占账户价值 {ratio:.2%}，超出 {risk_range[0]:.0%}-{risk_range[1]:.0%}"
+        return None
+
+    rules = [buy_fields, price_levels]
+    if risk_range is not None:
+        rules.append(risk_budget)
+
+    return DecisionSchema({
+        'signal': (True, enum_field(SIGNALS, normalize=str.lower)),
+        'coin': (False, enum_field(coins, normalize=normalize_coin)),
+        'quantity': (False, number_field(0.0)),
+        'profit_target': (False, number_field(0.0)),
+        'stop_loss': (False, number_field(0.0)),
+        'invalidation_condition': (False, optional_str_field()),
+        'confidence': (False, number_field(0.0, 1.0)),
+        'risk_usd': (False, number_field(0.0)),
+        'justification': (True, text_field),
+    }, rules)
+
+
+# 导入时编译一次
+TRADE_DECISION_SCHEMA = build_trade_schema()
+
+
+class TradeDecisionParser(DecisionParser):
+    """完整格式决策的解析器（以 signal 字段识别决策对象）"""
+
+    def __init__(self, schema: DecisionSchema = TRADE_DECISION_SCHEMA):
+        """
+        初始化解析器
+
+        Args:
+            schema: 字段规则，默认为 TRADE_DECISION_SCHEMA，可用 build_trade_schema() 调整风控参数
+        """
+        super().__init__(schema, TradeDecision, key_field='signal')
@@ -0,0 +1 @@
+# Alpha Arena MVP Data
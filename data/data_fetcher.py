@@ -0,0 +1,503 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+交易数据获取器
+通过币安 WebSocket 组合流实时接收K线与行情，并提供REST数据接口
+"""
+
+import json
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from binance.spot import Spot
+
+from adapters.rate_limiter import get_global_limiter, install_weight_hook, request_weight
+
+from .indicators import IndicatorEngine
+from .kline_cache import INTERVAL_MS, KlineCache
+from .kline_store import KlineStore
+from .resample import TimeframeResampler
+
+try:
+    from binance.um_futures import UMFutures
+except ImportError:
+    print("❌ 请安装binance-futures-connector: pip install binance-futures-connector")
+    UMFutures = None
+
+
+# 默认的交易对宇宙（与 prompt/system_prompt.md 中的 Asset Universe 一致）
+DEFAULT_COINS = ['BTC', 'ETH', 'SOL', 'BNB', 'DOGE', 'XRP']
+
+# 币安现货 WebSocket 地址，可通过环境变量指向本地替身服务
+DEFAULT_WS_URL = "wss://stream.binance.com:9443"
+
+
+class LatestValueStore:
+    """
+    单写多读的最新值存储
+
+    每个交易对对应一个不可变快照字典。写入方（WebSocket线程）复制旧快照、修改后整体替换引用，
+    字典项赋值在 GIL 下是原子操作，因此读取方无需加锁，也不会阻塞写入线程。
+    """
+
+    def __init__(self):
+        """初始化存储"""
+        self._snapshots: Dict[str, Dict[str, Any]] = {}
+
+    def update(self, symbol: str, field: str, value: Any):
+        """
+        更新某个交易对的一个字段（仅由写入线程调用）
+
+        Args:
+            symbol: 交易对符号，如'BTCUSDT'
+            field: 字段名，如'kline'、'ticker'
+            value: 字段值
+        """
+        snapshot = dict(self._snapshots.get(symbol, {}))
+        snapshot[field] = value
+        self._snapshots[symbol] = snapshot
+
+    def get(self, symbol: str) -> Dict[str, Any]:
+        """
+        读取某个交易对的最新快照（调用方不应修改返回值）
+
+        Args:
+            symbol: 交易对符号
+
+        Returns:
+            快照字典，不存在时返回空字典
+        """
+        return self._snapshots.get(symbol, {})
+
+    def symbols(self) -> List[str]:
+        """获取已有数据的交易对列表"""
+        return list(self._snapshots)
+
+
+class TradingDataFetcher:
+    """交易数据获取器"""
+
+    def __init__(self, use_websocket: bool = True, coins: Optional[List[str]] = None,
+                 ws_stream_url: Optional[str] = None,
+                 ws_client_factory: Optional[Callable[..., Any]] = None,
+                 kline_store: Optional[KlineStore] = None):
+        """
+        初始化数据获取器
+
+        Args:
+            use_websocket: 是否启用 WebSocket 实时数据
+            coins: 币种列表，默认使用 DEFAULT_COINS
+            ws_stream_url: WebSocket 地址，默认读取 BINANCE_WS_URL 环境变量
+            ws_client_factory: WebSocket 客户端工厂 (stream_url, on_message) -> client，
+                               用于替换为本地替身；默认使用 binance-connector 的组合流客户端
+            kline_store: 本地K线存储，默认在设置 KLINE_STORE_PATH 环境变量时打开该文件；
+                         热启动时历史K线从本地读取，只向交易所请求之后的新K线
+        """
+        api_key = os.getenv('BINANCE_API_KEY')
+        api_secret = os.getenv('BINANCE_API_SECRET')
+
+        if api_key and api_secret:
+            self.spot_client = Spot(api_key=api_key, api_secret=api_secret)
+            self.is_authenticated = True
+        else:
+            self.spot_client = Spot()
+            self.is_authenticated = False
+
+        self.futures_client = UMFutures() if UMFutures else None
+
+        # 与 ExchangeAPI 共用进程内的限流器，现货与合约分别计量
+        self.spot_limiter = get_global_limiter('spot')
+        self.futures_limiter = get_global_limiter('futures')
+        install_weight_hook(self.spot_client, self.spot_limiter)
+        if self.futures_client is not None:
+            install_weight_hook(self.futures_client, self.futures_limiter)
+
+        self.coins = list(coins or DEFAULT_COINS)
+        self.use_websocket = use_websocket
+        self.ws_stream_url = ws_stream_url or os.getenv('BINANCE_WS_URL', DEFAULT_WS_URL)
+        self.ws_client_factory = ws_client_factory or self._create_ws_client
+        self.ws_client = None
+        self.ws_store = LatestValueStore()
+        if kline_store is None and os.getenv('KLINE_STORE_PATH'):
+            kline_store = KlineStore(os.getenv('KLINE_STORE_PATH'))
+        self.kline_store = kline_store
+        self.kline_cache = KlineCache(self._fetch_klines, store=kline_store)
+        self.resampler = TimeframeResampler()
+        # REST 轮询模式下各交易对最近一次同步基础周期时的收盘边界（毫秒），同一根基础K线收盘前不重复请求
+        self._base_synced: Dict[str, int] = {}
+        self.indicator_engine = IndicatorEngine()
+
+    # ==================== K线数据 ====================
+
+    def _fetch_klines(self, symbol: str, interval: str, limit: int,
+                      start_time: Optional[int] = None) -> List[List[Any]]:
+        """
+        从币安REST接口拉取原始K线
+
+        Args:
+            symbol: 交易对符号
+            interval: K线周期
+            limit: 条数
+            start_time: 起始开盘时间（毫秒），None 表示最近 limit 条
+
+        Returns:
+            币安 klines 原始行列表
+        """
+        params = {'limit': limit}
+        if start_time is not None:
+            params['startTime'] = start_time
+        self.spot_limiter.acquire(request_weight('klines'))
+        return self.spot_client.klines(symbol, interval, **params)
+
+    def get_klines(self, symbol: str, interval: str = '5m', limit: int = 100) -> pd.DataFrame:
+        """
+        获取K线数据（增量缓存，每个周期只拉取新收盘的K线）
+
+        Args:
+            symbol: 交易对符号，如'BTCUSDT'
+            interval: K线周期，如'3m'、'5m'、'15m'、'4h'
+            limit: 返回条数
+
+        Returns:
+            列为 timestamp/open/high/low/close/volume 的 DataFrame，失败返回空 DataFrame
+        """
+        columns = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+        try:
+            if self.resampler.has(symbol, interval):
+                # 已启用本地重采样：REST 轮询模式下只同步基础周期，WebSocket 模式下由推送更新
+                if self.ws_client is None:
+                    self.sync_base_klines(symbol)
+                open_time, ohlcv = self.resampler.get(symbol, interval, limit)
+            else:
+                open_time, ohlcv = self.kline_cache.get(symbol, interval, limit)
+        except Exception as e:
+            print(f"❌ 获取{symbol} {interval} K线失败: {e}")
+            return pd.DataFrame(columns=columns)
+
+        df = pd.DataFrame(ohlcv, columns=columns[1:])
+        df.insert(0, 'timestamp', pd.to_datetime(open_time, unit='ms'))
+        return df
+
+    def enable_resampling(self, symbols: Optional[List[str]] = None, limit: int = 200):
+        """
+        启用多周期本地重采样：每个目标周期只从交易所预热一次历史，
+        之后的 3m/5m/15m/4h K线全部由基础周期（1m）在本地合成
+
+        Args:
+            symbols: 交易对列表，默认为 coins 对应的 USDT 交易对
+            limit: 每个目标周期预热的K线条数
+        """
+        if symbols is None:
+            symbols = [f"{coin}USDT" for coin in self.coins]
+
+        now_ms = int(self.kline_cache.clock() * 1000)
+        for symbol in symbols:
+            for interval in self.resampler.intervals:
+                try:
+                    rows = self._fetch_klines(symbol, interval, limit)
+                except Exception as e:
+                    print(f"❌ 预热{symbol} {interval} K线失败: {e}")
+                    continue
+                closed = [row for row in rows if int(row[6]) < now_ms]
+                self.resampler.seed(symbol, interval,
+                                    [int(row[0]) for row in closed],
+                                    [[float(x) for x in row[1:6]] for row in closed])
+            self.sync_base_klines(symbol)
+
+    def sync_base_klines(self, symbol: str, limit: int = 300):
+        """
+        REST 轮询模式下同步基础周期K线，并把新收盘的K线喂给重采样器
+
+        每根基础K线收盘后最多请求一次：同一周期内多个目标周期的 get_klines 共用一次同步。
+
+        Args:
+            symbol: 交易对符号
+            limit: 基础周期缓存条数（应覆盖两次同步之间的间隔）
+        """
+        base = self.resampler.base_interval
+        now_ms = int(self.kline_cache.clock() * 1000)
+        boundary = now_ms - now_ms % INTERVAL_MS[base]
+        if self._base_synced.get(symbol) == boundary:
+            return
+        open_time, ohlcv = self.kline_cache.get(symbol, base, limit)
+        closed = open_time + INTERVAL_MS[base] <= now_ms
+        self.resampler.on_base_closes(symbol, open_time[closed], ohlcv[closed])
+        self._base_synced[symbol] = boundary
+
+    # ==================== 技术指标 ====================
+    # 以下 calculate_* 为逐序列的 pandas 参考实现；批量计算请使用 data/indicators.IndicatorEngine
+
+    @staticmethod
+    def calculate_ema(prices: pd.Series, period: int) -> pd.Series:
+        """
+        计算EMA
+
+        Args:
+            prices: 价格序列
+            period: 周期
+
+        Returns:
+            EMA序列
+        """
+        return prices.ewm(span=period, adjust=False).mean()
+
+    @staticmethod
+    def calculate_macd(df: pd.DataFrame, fast: int = 12, slow: int = 26, signal: int = 9):
+        """
+        计算MACD
+
+        Args:
+            df: 包含 close 列的K线数据
+            fast: 快线周期
+            slow: 慢线周期
+            signal: 信号线周期
+
+        Returns:
+            (MACD线, 信号线, 柱状图)
+        """
+        close = df['close']
+        macd = close.ewm(span=fast, adjust=False).mean() - close.ewm(span=slow, adjust=False).mean()
+        signal_line = macd.ewm(span=signal, adjust=False).mean()
+        return macd, signal_line, macd - signal_line
+
+    @staticmethod
+    def calculate_rsi(prices: pd.Series, period: int = 14) -> pd.Series:
+        """
+        计算RSI（Wilder平滑）
+
+        Args:
+            prices: 价格序列
+            period: 周期
+
+        Returns:
+            RSI序列
+        """
+        delta = prices.diff()
+        avg_gain = delta.clip(lower=0).ewm(alpha=1 / period, adjust=False).mean()
+        avg_loss = (-delta.clip(upper=0)).ewm(alpha=1 / period, adjust=False).mean()
+        return 100 - 100 / (1 + avg_gain / avg_loss)
+
+    @staticmethod
+    def calculate_atr(df: pd.DataFrame, period: int = 14) -> pd.Series:
+        """
+        计算ATR（Wilder平滑）
+
+        Args:
+            df: 包含 high/low/close 列的K线数据
+            period: 周期
+
+        Returns:
+            ATR序列
+        """
+        prev_close = df['close'].shift(1)
+        tr = pd.concat([
+            df['high'] - df['low'],
+            (df['high'] - prev_close).abs(),
+            (df['low'] - prev_close).abs(),
+        ], axis=1).max(axis=1)
+        return tr.ewm(alpha=1 / period, adjust=False).mean()
+
+    def get_technical_indicators(self, symbol: str, interval: str = '5m', limit: int = 200,
+                                 series_length: int = 20, volume_window: int = 20) -> Dict[str, Any]:
+        """
+        获取单个交易对在某个周期上的完整技术指标
+
+        Args:
+            symbol: 交易对符号
+            interval: K线周期
+            limit: 用于计算的K线条数
+            series_length: 输出序列的长度
+            volume_window: 成交量均值的K线条数
+
+        Returns:
+            指标字典，失败返回空字典
+        """
+        df = self.get_klines(symbol, interval, limit)
+        if df.empty:
+            return {}
+
+        high = df['high'].to_numpy()[np.newaxis, :]
+        low = df['low'].to_numpy()[np.newaxis, :]
+        close = df['close'].to_numpy()[np.newaxis, :]
+        results, _ = self.indicator_engine.compute(high, low, close)
+
+        def current(name: str) -> float:
+            return float(results[name][0, -1])
+
+        def series(values: np.ndarray) -> List[float]:
+            return [float(v) for v in values[-series_length:]]
+
+        volume = df['volume'].to_numpy()
+        volume_avg = float(volume[-volume_window:].mean())
+        return {
+            'current_price': float(close[0, -1]),
+            'ema20_current': current('ema20'),
+            'ema50_current': current('ema50'),
+            'macd_current': current('macd'),
+            'macd_signal_current': current('macd_signal'),
+            'macd_hist_current': current('macd_hist'),
+            'rsi14_current': current('rsi14'),
+            'atr14_current': current('atr14'),
+            'atr3_current': current('atr3'),
+            'volume_current': float(volume[-1]),
+            'volume_avg': volume_avg,
+            'volume_ratio': float(volume[-1] / volume_avg) if volume_avg > 0 else 0.0,
+            'prices': series(close[0]),
+            'ema20_series': series(results['ema20'][0]),
+            'macd_series': series(results['macd'][0]),
+            'rsi14_series': series(results['rsi14'][0]),
+        }
+
+    # ==================== WebSocket ====================
+
+    @staticmethod
+    def _create_ws_client(stream_url: str, on_message: Callable[[Any, str], None]):
+        """创建币安组合流 WebSocket 客户端"""
+        from binance.websocket.spot.websocket_stream import SpotWebsocketStreamClient
+        return SpotWebsocketStreamClient(stream_url=stream_url, on_message=on_message, is_combined=True)
+
+    def start_websocket(self, symbols: Optional[List[str]] = None, interval: str = '1m'):
+        """
+        启动 WebSocket，通过一条组合流连接订阅所有交易对的K线与24h行情
+
+        Args:
+            symbols: 交易对列表，默认为 coins 对应的 USDT 交易对
+            interval: K线周期
+        """
+        if not self.use_websocket:
+            print("⚠️ 未启用WebSocket（use_websocket=False）")
+            return
+
+        if self.ws_client is not None:
+            self.stop_websocket()
+
+        if symbols is None:
+            symbols = [f"{coin}USDT" for coin in self.coins]
+
+        streams = []
+        for symbol in symbols:
+            name = symbol.lower()
+            streams.append(f"{name}@kline_{interval}")
+            streams.append(f"{name}@ticker")
+
+        self.ws_client = self.ws_client_factory(self.ws_stream_url, self._on_message)
+        self.ws_client.subscribe(stream=streams)
+        print(f"✅ WebSocket已订阅 {len(symbols)} 个交易对（{len(streams)} 条流）")
+
+    def stop_websocket(self):
+        """停止 WebSocket"""
+        if self.ws_client is None:
+            return
+        try:
+            self.ws_client.stop()
+        except Exception as e:
+            print(f"⚠️ WebSocket关闭失败: {e}")
+        finally:
+            self.ws_client = None
+
+    def _on_message(self, _, message: str):
+        """
+        WebSocket 消息回调（运行在 WebSocket 线程）
+
+        Args:
+            _: socket manager（未使用）
+            message: 原始JSON消息
+        """
+        try:
+            payload = json.loads(message)
+        except (TypeError, ValueError):
+            return
+
+        # 组合流消息格式：{"stream": "...", "data": {...}}
+        data = payload.get('data', payload) if isinstance(payload, dict) else None
+        if not isinstance(data, dict):
+            return
+
+        event = data.get('e')
+        try:
+            if event == 'kline':
+                self._handle_kline(data)
+            elif event == '24hrTicker':
+                self._handle_ticker(data)
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"⚠️ WebSocket消息解析失败: {e}")
+
+    def _handle_kline(self, data: Dict[str, Any]):
+        """
+        处理K线推送
+
+        Args:
+            data: 币安 kline 事件数据
+        """
+        k = data['k']
+        symbol = data['s']
+        self.ws_store.update(symbol, 'kline', {
+            'open_time': int(k['t']),
+            'open': float(k['o']),
+            'high': float(k['h']),
+            'low': float(k['l']),
+            'close': float(k['c']),
+            'volume': float(k['v']),
+            'is_closed': bool(k['x']),
+            'received_at': time.monotonic(),
+        })
+
+        # 基础周期K线收盘时更新所有高周期K线
+        if k['x'] and k.get('i', self.resampler.base_interval) == self.resampler.base_interval:
+            self.resampler.on_base_close(symbol, int(k['t']), [k['o'], k['h'], k['l'], k['c'], k['v']])
+
+    def _handle_ticker(self, data: Dict[str, Any]):
+        """
+        处理24h行情推送
+
+        Args:
+            data: 币安 24hrTicker 事件数据
+        """
+        self.ws_store.update(data['s'], 'ticker', {
+            'price': float(data['c']),
+            'volume': float(data['v']),
+            'change_pct': float(data['P']),
+            'high': float(data['h']),
+            'low': float(data['l']),
+            'received_at': time.monotonic(),
+        })
+
+    def get_ws_data(self, symbol: str) -> Dict[str, Any]:
+        """
+        获取交易对最新的 WebSocket 数据（无锁读取）
+
+        Args:
+            symbol: 交易对符号
+
+        Returns:
+            {'kline': {...}, 'ticker': {...}}，无数据时返回空字典
+        """
+        return self.ws_store.get(symbol)
+
+    def get_ws_price(self, symbol: str, max_age: Optional[float] = None) -> Optional[float]:
+        """
+        获取交易对最新成交价
+
+        Args:
+            symbol: 交易对符号
+            max_age: 最大数据年龄（秒），超过则视为无效
+
+        Returns:
+            价格，无数据或已过期时返回 None
+        """
+        snapshot = self.ws_store.get(symbol)
+        # 行情与K线推送频率不同，取最新的一条
+        latest = None
+        for field, price_key in (('ticker', 'price'), ('kline', 'close')):
+            entry = snapshot.get(field)
+            if entry and (latest is None or entry['received_at'] > latest[1]):
+                latest = (entry[price_key], entry['received_at'])
+
+        if latest is None:
+            return None
+        if max_age is not None and time.monotonic() - latest[1] > max_age:
+            return None
+        return latest[0]
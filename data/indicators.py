@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+技术指标引擎
+在 (交易对数, K线数) 的二维 NumPy 数组上批量计算 EMA / MACD / RSI / ATR，
+并支持从保存的状态按K线 O(1) 增量更新
+
+计算公式与 TradingDataFetcher.calculate_* 的 pandas 参考实现一致：
+- EMA:  series.ewm(span=period, adjust=False).mean()
+- RSI:  Wilder 平滑，gain/loss.ewm(alpha=1/period, adjust=False)
+- ATR:  真实波幅的 Wilder 平滑，首根K线 TR = high - low
+"""
+
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def _ewm(values: np.ndarray, alpha: float) -> np.ndarray:
+    """
+    沿最后一维计算 adjust=False 的指数加权均值，前导 NaN 保持为 NaN
+
+    递推形式与 pandas 的 ewm 实现逐步一致：w = (old_wt * w + alpha * x) / (old_wt + alpha)，
+    其中 old_wt = 1 - alpha。
+
+    Args:
+        values: 形状 (N, T) 的数组
+        alpha: 平滑系数
+
+    Returns:
+        形状 (N, T) 的数组
+    """
+    old_wt = 1.0 - alpha
+    denom = old_wt + alpha
+    out = np.empty_like(values, dtype=np.float64)
+    weighted = values[:, 0].astype(np.float64)
+    out[:, 0] = weighted
+
+    for t in range(1, values.shape[1]):
+        x = values[:, t]
+        updated = (old_wt * weighted + alpha * x) / denom
+        weighted = np.where(np.isnan(weighted), x, np.where(np.isnan(x), weighted, updated))
+        out[:, t] = weighted
+    return out
+
+
+def _ewm_step(weighted: np.ndarray, x: np.ndarray, alpha: float) -> np.ndarray:
+    """单步 EWM 更新，与 _ewm 的递推完全一致"""
+    old_wt = 1.0 - alpha
+    updated = (old_wt * weighted + alpha * x) / (old_wt + alpha)
+    return np.where(np.isnan(weighted), x, np.where(np.isnan(x), weighted, updated))
+
+
+def _rsi_from_averages(avg_gain: np.ndarray, avg_loss: np.ndarray) -> np.ndarray:
+    """由平均涨幅/跌幅计算 RSI，跌幅为 0 时 RSI = 100"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = avg_gain / avg_loss
+        return 100.0 - 100.0 / (1.0 + rs)
+
+
+def ema(close: np.ndarray, period: int) -> np.ndarray:
+    """
+    批量计算 EMA
+
+    Args:
+        close: 形状 (N, T) 的收盘价
+        period: 周期
+
+    Returns:
+        形状 (N, T) 的 EMA
+    """
+    return _ewm(np.atleast_2d(close), 2.0 / (period + 1))
+
+
+def macd(close: np.ndarray, fast: int = 12, slow: int = 26,
+         signal: int = 9) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    批量计算 MACD
+
+    Returns:
+        (MACD线, 信号线, 柱状图)，形状均为 (N, T)
+    """
+    close = np.atleast_2d(close)
+    macd_line = ema(close, fast) - ema(close, slow)
+    signal_line = ema(macd_line, signal)
+    return macd_line, signal_line, macd_line - signal_line
+
+
+def _gains_losses(close: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    delta = np.full(close.shape, np.nan)
+    delta[:, 1:] = np.diff(close, axis=1)
+    gain = np.where(delta > 0, delta, np.where(np.isnan(delta), np.nan, 0.0))
+    loss = np.where(delta < 0, -delta, np.where(np.isnan(delta), np.nan, 0.0))
+    return gain, loss
+
+
+def rsi(close: np.ndarray, period: int = 14) -> np.ndarray:
+    """
+    批量计算 RSI（Wilder 平滑）
+
+    Returns:
+        形状 (N, T) 的 RSI，首列为 NaN
+    """
+    close = np.atleast_2d(close)
+    gain, loss = _gains_losses(close)
+    alpha = 1.0 / period
+    return _rsi_from_averages(_ewm(gain, alpha), _ewm(loss, alpha))
+
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """
+    批量计算真实波幅，首根K线为 high - low
+
+    Returns:
+        形状 (N, T) 的 TR
+    """
+    high, low, close = np.atleast_2d(high), np.atleast_2d(low), np.atleast_2d(close)
+    tr = high - low
+    prev_close = close[:, :-1]
+    # fmax 忽略 NaN：左侧补齐的交易对在首根有效K线上同样取 high - low
+    tr[:, 1:] = np.fmax(tr[:, 1:], np.fmax(np.abs(high[:, 1:] - prev_close),
+                                           np.abs(low[:, 1:] - prev_close)))
+    return tr
+
+
+def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = 14) -> np.ndarray:
+    """
+    批量计算 ATR（Wilder 平滑）
+
+    Returns:
+        形状 (N, T) 的 ATR
+    """
+    return _ewm(true_range(high, low, close), 1.0 / period)
+
+
+class IndicatorState:
+    """一组交易对在某个时间周期上的递推状态，每个字段都是长度为 N 的数组"""
+
+    __slots__ = ('emas', 'macd_fast', 'macd_slow', 'macd_signal',
+                 'avg_gain', 'avg_loss', 'atrs', 'prev_close')
+
+    def __init__(self, emas: Dict[int, np.ndarray], macd_fast: np.ndarray, macd_slow: np.ndarray,
+                 macd_signal: np.ndarray, avg_gain: np.ndarray, avg_loss: np.ndarray,
+                 atrs: Dict[int, np.ndarray], prev_close: np.ndarray):
+        self.emas = emas
+        self.macd_fast = macd_fast
+        self.macd_slow = macd_slow
+        self.macd_signal = macd_signal
+        self.avg_gain = avg_gain
+        self.avg_loss = avg_loss
+        self.atrs = atrs
+        self.prev_close = prev_close
+
+
+class IndicatorEngine:
+    """
+    批量技术指标引擎
+
+    compute() 对全部历史做一次完整计算并返回递推状态；之后每根新收盘K线调用 update()，
+    只做 O(1) 的向量运算，不再重算历史。
+    """
+
+    def __init__(self, ema_periods: Sequence[int] = (20, 50), macd_periods: Tuple[int, int, int] = (12, 26, 9),
+                 rsi_period: int = 14, atr_periods: Sequence[int] = (3, 14)):
+        """
+        初始化指标引擎
+
+        Args:
+            ema_periods: EMA 周期列表
+            macd_periods: MACD (快线, 慢线, 信号线) 周期
+            rsi_period: RSI 周期
+            atr_periods: ATR 周期列表
+        """
+        self.ema_periods = tuple(ema_periods)
+        self.macd_periods = tuple(macd_periods)
+        self.rsi_period = rsi_period
+        self.atr_periods = tuple(atr_periods)
+
+    def compute(self, high: np.ndarray, low: np.ndarray,
+                close: np.ndarray) -> Tuple[Dict[str, np.ndarray], IndicatorState]:
+        """
+        对全部历史计算所有指标
+
+        Args:
+            high: 形状 (N, T) 的最高价
+            low: 形状 (N, T) 的最低价
+            close: 形状 (N, T) 的收盘价
+
+        Returns:
+            ({指标名: (N, T) 数组}, 递推状态)
+        """
+        high, low, close = np.atleast_2d(high), np.atleast_2d(low), np.atleast_2d(close)
+        fast, slow, signal = self.macd_periods
+        results = {}
+
+        emas = {}
+        for period in self.ema_periods:
+            results[f'ema{period}'] = ema(close, period)
+            emas[period] = results[f'ema{period}'][:, -1].copy()
+
+        ema_fast = ema(close, fast)
+        ema_slow = ema(close, slow)
+        macd_line = ema_fast - ema_slow
+        signal_line = ema(macd_line, signal)
+        results['macd'] = macd_line
+        results['macd_signal'] = signal_line
+        results['macd_hist'] = macd_line - signal_line
+
+        gain, loss = _gains_losses(close)
+        alpha = 1.0 / self.rsi_period
+        avg_gain = _ewm(gain, alpha)
+        avg_loss = _ewm(loss, alpha)
+        results[f'rsi{self.rsi_period}'] = _rsi_from_averages(avg_gain, avg_loss)
+
+        tr = true_range(high, low, close)
+        atrs = {}
+        for period in self.atr_periods:
+            results[f'atr{period}'] = _ewm(tr, 1.0 / period)
+            atrs[period] = results[f'atr{period}'][:, -1].copy()
+
+        state = IndicatorState(
+            emas=emas,
+            macd_fast=ema_fast[:, -1].copy(),
+            macd_slow=ema_slow[:, -1].copy(),
+            macd_signal=signal_line[:, -1].copy(),
+            avg_gain=avg_gain[:, -1].copy(),
+            avg_loss=avg_loss[:, -1].copy(),
+            atrs=atrs,
+            prev_close=close[:, -1].copy(),
+        )
+        return results, state
+
+    def update(self, state: IndicatorState, high: np.ndarray, low: np.ndarray,
+               close: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        用一根新收盘K线增量更新所有指标（原地修改 state）
+
+        Args:
+            state: compute() 或上一次 update() 后的状态
+            high: 形状 (N,) 的最高价
+            low: 形状 (N,) 的最低价
+            close: 形状 (N,) 的收盘价
+
+        Returns:
+            {指标名: (N,) 最新值}
+        """
+        high = np.asarray(high, dtype=np.float64)
+        low = np.asarray(low, dtype=np.float64)
+        close = np.asarray(close, dtype=np.float64)
+        fast, slow, signal = self.macd_periods
+        latest = {}
+
+        for period in self.ema_periods:
+            state.emas[period] = _ewm_step(state.emas[period], close, 2.0 / (period + 1))
+            latest[f'ema{period}'] = state.emas[period]
+
+        state.macd_fast = _ewm_step(state.macd_fast, close, 2.0 / (fast + 1))
+        state.macd_slow = _ewm_step(state.macd_slow, close, 2.0 / (slow + 1))
+        macd_line = state.macd_fast - state.macd_slow
+        state.macd_signal = _ewm_step(state.macd_signal, macd_line, 2.0 / (signal + 1))
+        latest['macd'] = macd_line
+        latest['macd_signal'] = state.macd_signal
+        latest['macd_hist'] = macd_line - state.macd_signal
+
+        delta = close - state.prev_close
+        alpha = 1.0 / self.rsi_period
+        state.avg_gain = _ewm_step(state.avg_gain, np.where(delta > 0, delta, 0.0), alpha)
+        state.avg_loss = _ewm_step(state.avg_loss, np.where(delta < 0, -delta, 0.0), alpha)
+        latest[f'rsi{self.rsi_period}'] = _rsi_from_averages(state.avg_gain, state.avg_loss)
+
+        tr = np.fmax(high - low, np.fmax(np.abs(high - state.prev_close),
+                                         np.abs(low - state.prev_close)))
+        for period in self.atr_periods:
+            state.atrs[period] = _ewm_step(state.atrs[period], tr, 1.0 / period)
+            latest[f'atr{period}'] = state.atrs[period]
+
+        state.prev_close = close
+        return latest
+
+
+def stack_series(series: Sequence[np.ndarray], length: Optional[int] = None) -> np.ndarray:
+    """
+    将多个交易对的一维序列按右对齐堆叠为 (N, T) 数组，长度不足的在左侧补 NaN
+
+    Args:
+        series: 各交易对的一维数组
+        length: 目标长度，默认取最长序列的长度
+
+    Returns:
+        形状 (N, T) 的数组
+    """
+    length = length or max((len(s) for s in series), default=0)
+    out = np.full((len(series), length), np.nan)
+    for i, s in enumerate(series):
+        s = np.asarray(s, dtype=np.float64)[-length:]
+        if len(s):
+            out[i, length - len(s):] = s
+    return out
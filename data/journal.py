@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PostgreSQL 交易日志
+记录每个周期的市场快照、提示词、模型原始响应与解析后的决策。
+log_cycle() 只在调用线程中组装行并放入队列，后台线程按批用 COPY 写入（提示词按哈希去重，
+用多行 INSERT ... ON CONFLICT DO NOTHING），决策周期的延迟几乎不受影响。
+"""
+
+import hashlib
+import io
+import json
+import os
+import queue
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from adapters.llm_base import require_sdk
+
+# COPY 文本格式的转义：反斜杠、制表符与换行
+_COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+DECISION_COLUMNS = ('cycle_id', 'ts', 'model', 'prompt_hash', 'response', 'latency',
+                    'symbol', 'action', 'confidence', 'fallback', 'decision')
+CYCLE_COLUMNS = ('cycle_id', 'ts', 'snapshot')
+
+
+def dsn_from_env() -> Dict[str, Any]:
+    """
+    从环境变量读取连接参数，默认与 test/test_postgreSQL.py 使用的本地 trading_system 数据库一致
+
+    Returns:
+        psycopg2.connect 的关键字参数
+    """
+    return {
+        'host': os.getenv('POSTGRES_HOST', 'localhost'),
+        'port': int(os.getenv('POSTGRES_PORT', '5432')),
+        'dbname': os.getenv('POSTGRES_DB', 'trading_system'),
+        'user': os.getenv('POSTGRES_USER', 'alpha_trading'),
+        'password': os.getenv('POSTGRES_PASSWORD', ''),
+    }
+
+
+def prompt_hash(prompt: str) -> str:
+    """提示词的 sha256 十六进制摘要（同一快照发给多个模型的提示词只存一份）"""
+    return hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+
+
+def _json_default(value: Any) -> Any:
+    # NumPy 标量等带 item() 的类型转为Python数值，其余转为字符串
+    if hasattr(value, 'item'):
+        return value.item()
+    if hasattr(value, 'to_dict'):
+        return value.to_dict()
+    return str(value)
+
+
+def to_json(value: Any) -> str:
+    """序列化为 JSONB 文本"""
+    return json.dumps(value, ensure_ascii=False, default=_json_default)
+
+
+def copy_value(value: Any) -> str:
+    """单个值的 COPY 文本格式表示（None 为 \\N）"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, str):
+        return value.translate(_COPY_ESCAPES)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def copy_buffer(rows: Sequence[Tuple[Any, ...]]) -> io.StringIO:
+    """
+    把多行编码为 COPY ... FROM STDIN 的文本格式
+
+    Args:
+        rows: 行元组
+
+    Returns:
+        可直接传给 cursor.copy_expert 的缓冲区
+    """
+    buffer = io.StringIO()
+    buffer.writelines('\t'.join(map(copy_value, row)) + '\n' for row in rows)
+    buffer.seek(0)
+    return buffer
+
+
+def cycle_rows(cycle_id: str, ts: datetime, snapshot: Dict[str, Any], decisions: Dict[str, Any],
+               prompts: Optional[Dict[str, str]] = None, responses: Optional[Dict[str, Optional[str]]] = None,
+               latencies: Optional[Dict[str, float]] = None, is_fallback=None
+               ) -> Tuple[Tuple[Any, ...], Dict[str, str], List[Tuple[Any, ...]]]:
+    """
+    把一个周期组装为各表的行
+
+    Args:
+        cycle_id: 周期ID
+        ts: 周期时间
+        snapshot: 市场快照
+        decisions: {模型名称: 决策（字典或 SlotDecision）}
+        prompts: {模型名称: 提示词}
+        responses: {模型名称: 原始响应}
+        latencies: {模型名称: 耗时（秒）}
+        is_fallback: 判断默认决策的函数，默认为 DecisionMaker.is_fallback
+
+    Returns:
+        (周期行, {提示词哈希: 提示词}, 决策行列表)
+    """
+    if is_fallback is None:
+        from core.decision import DecisionMaker
+        is_fallback = DecisionMaker.is_fallback
+    prompts, responses, latencies = prompts or {}, responses or {}, latencies or {}
+
+    prompt_rows: Dict[str, str] = {}
+    decision_rows = []
+    for model, decision in decisions.items():
+        prompt = prompts.get(model)
+        digest = None
+        if prompt is not None:
+            digest = prompt_hash(prompt)
+            prompt_rows[digest] = prompt
+        fields = decision.to_dict() if hasattr(decision, 'to_dict') else dict(decision)
+        confidence = decision.get('confidence')
+        decision_rows.append((
+            cycle_id, ts, model, digest, responses.get(model), latencies.get(model),
+            decision.get('symbol'), decision.get('action'),
+            None if confidence is None else float(confidence),
+            is_fallback(decision), to_json(fields),
+        ))
+    return (cycle_id, ts, to_json(snapshot)), prompt_rows, decision_rows
+
+
+class TradingJournal:
+    """带连接池与后台批量写入的交易日志"""
+
+    def __init__(self, table_prefix: str = 'journal', minconn: int = 1, maxconn: int = 4,
+                 max_batch: int = 200, flush_interval: float = 1.0, create_tables: bool = True,
+                 **connect_kwargs):
+        """
+        初始化交易日志
+
+        Args:
+            table_prefix: 表名前缀（测试使用独立前缀）
+            minconn/maxconn: 连接池大小
+            max_batch: 每批最多写入的周期数
+            flush_interval: 队列空闲时后台线程的等待时间（秒）
+            create_tables: 是否创建表与索引（已存在时跳过）
+            **connect_kwargs: psycopg2.connect 参数，默认见 dsn_from_env()
+        """
+        require_sdk('psycopg2', 'psycopg2-binary')
+        from psycopg2.pool import ThreadedConnectionPool
+
+        self.table_prefix = table_prefix
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.pool = ThreadedConnectionPool(minconn, maxconn, **(connect_kwargs or dsn_from_env()))
+
+        self.cycles_logged = 0
+        self.rows_written = 0
+        self.batches = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+
+        if create_tables:
+            self.create_tables()
+
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._writer = threading.Thread(target=self._run, name=f"{table_prefix}-writer", daemon=True)
+        self._writer.start()
+
+    # ---- 连接与表结构 ----
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        """从连接池借出连接，正常退出时提交，异常时回滚"""
+        conn = self.pool.getconn()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self.pool.putconn(conn)
+
+    def table(self, name: str) -> str:
+        return f"{self.table_prefix}_{name}"
+
+    def create_tables(self):
+        """创建表与按时间、模型查询的索引"""
+        cycles, prompts, decisions = self.table('cycles'), self.table('prompts'), self.table('decisions')
+        with self.connection() as conn, conn.cursor() as cur:
+            cur.execute(
+                f"CREATE TABLE IF NOT EXISTS {cycles} ("
+                " cycle_id UUID PRIMARY KEY,"
+                " ts TIMESTAMPTZ NOT NULL,"
+                " snapshot JSONB NOT NULL)"
+            )
+            cur.execute(f"CREATE INDEX IF NOT EXISTS {cycles}_ts_idx ON {cycles} (ts)")
+            cur.execute(
+                f"CREATE TABLE IF NOT EXISTS {prompts} ("
+                " prompt_hash TEXT PRIMARY KEY,"
+                " prompt TEXT NOT NULL)"
+            )
+            cur.execute(
+                f"CREATE TABLE IF NOT EXISTS {decisions} ("
+                " cycle_id UUID NOT NULL,"
+                " ts TIMESTAMPTZ NOT NULL,"
+                " model TEXT NOT NULL,"
+                " prompt_hash TEXT,"
+                " response TEXT,"
+                " latency REAL,"
+                " symbol TEXT,"
+                " action TEXT,"
+                " confidence REAL,"
+                " fallback BOOLEAN NOT NULL,"
+                " decision JSONB NOT NULL,"
+                " PRIMARY KEY (cycle_id, model))"
+            )
+            cur.execute(f"CREATE INDEX IF NOT EXISTS {decisions}_ts_idx ON {decisions} (ts)")
+            cur.execute(f"CREATE INDEX IF NOT EXISTS {decisions}_model_ts_idx ON {decisions} (model, ts)")
+
+    def drop_tables(self):
+        """删除本前缀的所有表"""
+        with self.connection() as conn, conn.cursor() as cur:
+            for name in ('decisions', 'prompts', 'cycles'):
+                cur.execute(f"DROP TABLE IF EXISTS {self.table(name)}")
+
+    # ---- 写入 ----
+
+    def log_cycle(self, snapshot: Dict[str, Any], decisions: Dict[str, Any],
+                  prompts: Optional[Dict[str, str]] = None, responses: Optional[Dict[str, Optional[str]]] = None,
+                  latencies: Optional[Dict[str, float]] = None, ts: Optional[datetime] = None) -> str:
+        """
+        记录一个周期（只入队，不等待写入）
+
+        Args:
+            snapshot: 市场快照
+            decisions: {模型名称: 决策}
+            prompts: {模型名称: 提示词}
+            responses: {模型名称: 原始响应}
+            latencies: {模型名称: 耗时（秒）}
+            ts: 周期时间，默认为当前UTC时间
+
+        Returns:
+            周期ID
+        """
+        cycle_id = str(uuid.uuid4())
+        rows = cycle_rows(cycle_id, ts or datetime.now(timezone.utc), snapshot, decisions,
+                          prompts, responses, latencies)
+        self._queue.put(rows)
+        self.cycles_logged += 1
+        return cycle_id
+
+    def _run(self):
+        """后台写入线程：取出队列中已有的周期（最多 max_batch 个）合并为一批写入"""
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = [item]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in batch
+            rows = [entry for entry in batch if entry is not None]
+            if rows:
+                self._write(rows)
+            for _ in batch:
+                self._queue.task_done()
+            if stop:
+                return
+
+    def _write(self, batch: List[tuple]):
+        """在一个事务中写入一批周期"""
+        cycles, prompt_rows, decision_rows = [], {}, []
+        for cycle, prompts, decisions in batch:
+            cycles.append(cycle)
+            prompt_rows.update(prompts)
+            decision_rows.extend(decisions)
+        try:
+            from psycopg2.extras import execute_values
+            with self.connection() as conn, conn.cursor() as cur:
+                if prompt_rows:
+                    execute_values(
+                        cur,
+                        f"INSERT INTO {self.table('prompts')} (prompt_hash, prompt) VALUES %s"
+                        " ON CONFLICT (prompt_hash) DO NOTHING",
+                        list(prompt_rows.items()), page_size=len(prompt_rows),
+                    )
+                cur.copy_expert(f"COPY {self.table('cycles')} ({', '.join(CYCLE_COLUMNS)}) FROM STDIN",
+                                copy_buffer(cycles))
+                if decision_rows:
+                    cur.copy_expert(f"COPY {self.table('decisions')} ({', '.join(DECISION_COLUMNS)}) FROM STDIN",
+                                    copy_buffer(decision_rows))
+            self.rows_written += len(cycles) + len(prompt_rows) + len(decision_rows)
+            self.batches += 1
+        except Exception as e:
+            self.errors += 1
+            self.last_error = str(e)
+            print(f"❌ 交易日志写入失败（丢弃 {len(batch)} 个周期）: {e}")
+
+    def flush(self):
+        """等待已入队的周期全部写入"""
+        self._queue.join()
+
+    def close(self):
+        """写入剩余数据，停止后台线程并关闭连接池"""
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+        self.pool.closeall()
+
+    # ---- 查询 ----
+
+    def decisions(self, model: Optional[str] = None, start: Optional[datetime] = None,
+                  end: Optional[datetime] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        按时间与模型查询决策（使用 (model, ts) 与 ts 索引）
+
+        Args:
+            model: 模型名称，None 表示全部
+            start/end: 时间范围 [start, end)
+            limit: 最多返回的条数（按时间倒序）
+
+        Returns:
+            [{'cycle_id', 'ts', 'model', 'symbol', 'action', 'confidence', 'fallback', 'latency', 'response',
+              'prompt', 'decision'}]
+        """
+        conditions, params = [], []
+        if model is not None:
+            conditions.append("d.model = %s")
+            params.append(model)
+        if start is not None:
+            conditions.append("d.ts >= %s")
+            params.append(start)
+        if end is not None:
+            conditions.append("d.ts < %s")
+            params.append(end)
+        sql = (
+            "SELECT d.cycle_id::text, d.ts, d.model, d.symbol, d.action, d.confidence, d.fallback, d.latency,"
+            " d.response, p.prompt, d.decision"
+            f" FROM {self.table('decisions')} d"
+            f" LEFT JOIN {self.table('prompts')} p ON p.prompt_hash = d.prompt_hash"
+        )
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY d.ts DESC, d.model"
+        if limit is not None:
+            sql += " LIMIT %s"
+            params.append(limit)
+        columns = ('cycle_id', 'ts', 'model', 'symbol', 'action', 'confidence', 'fallback', 'latency',
+                   'response', 'prompt', 'decision')
+        with self.connection() as conn, conn.cursor() as cur:
+            cur.execute(sql, params)
+            return [dict(zip(columns, row)) for row in cur.fetchall()]
+
+    def snapshot(self, cycle_id: str) -> Optional[Dict[str, Any]]:
+        """
+        读取某个周期的市场快照
+
+        Args:
+            cycle_id: log_cycle() 返回的周期ID
+
+        Returns:
+            快照字典，不存在时返回 None
+        """
+        with self.connection() as conn, conn.cursor() as cur:
+            cur.execute(f"SELECT snapshot FROM {self.table('cycles')} WHERE cycle_id = %s", (cycle_id,))
+            row = cur.fetchone()
+            return row[0] if row else None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取写入统计
+
+        Returns:
+            {'cycles_logged', 'pending', 'rows_written', 'batches', 'errors'}
+        """
+        return {
+            'cycles_logged': self.cycles_logged,
+            'pending': self._queue.qsize(),
+            'rows_written': self.rows_written,
+            'batches': self.batches,
+            'errors': self.errors,
+        }
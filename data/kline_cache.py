@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+K线增量缓存
+按 (symbol, interval) 缓存OHLCV，每个周期只请求最后一根已收盘K线之后的新数据
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+# 币安K线周期对应的毫秒数
+INTERVAL_MS = {
+    '1m': 60_000,
+    '3m': 180_000,
+    '5m': 300_000,
+    '15m': 900_000,
+    '30m': 1_800_000,
+    '1h': 3_600_000,
+    '2h': 7_200_000,
+    '4h': 14_400_000,
+    '6h': 21_600_000,
+    '8h': 28_800_000,
+    '12h': 43_200_000,
+    '1d': 86_400_000,
+}
+
+# 币安 klines 接口单次最多返回的条数
+MAX_KLINES_PER_REQUEST = 1000
+
+
+class KlineBuffer:
+    """
+    定长列式K线缓冲区
+
+    open_time 与 OHLCV 分别存放在预分配的 NumPy 数组中，新K线原地追加；
+    超出容量时丢弃最旧的数据。最后一根K线可能尚未收盘，刷新时会被替换。
+    """
+
+    def __init__(self, capacity: int):
+        """
+        初始化缓冲区
+
+        Args:
+            capacity: 最多保留的K线条数
+        """
+        self.capacity = capacity
+        self.open_time = np.empty(capacity, dtype=np.int64)
+        self.ohlcv = np.empty((capacity, 5), dtype=np.float64)
+        self.size = 0
+        self.closed_size = 0
+
+    def append(self, rows: List[List[Any]], now_ms: int):
+        """
+        原地追加K线，先丢弃上次保留的未收盘K线
+
+        Args:
+            rows: 币安 klines 原始行 [open_time, o, h, l, c, v, close_time, ...]，按时间升序
+            now_ms: 当前时间（毫秒），close_time 小于它的K线视为已收盘
+        """
+        rows = rows[-self.capacity:]
+        open_time = np.array([int(row[0]) for row in rows], dtype=np.int64)
+        ohlcv = np.array([row[1:6] for row in rows], dtype=np.float64).reshape(-1, 5)
+        closed = sum(1 for row in rows if int(row[6]) < now_ms)
+        self._write(open_time, ohlcv, closed)
+
+    def extend_closed(self, open_time: np.ndarray, ohlcv: np.ndarray):
+        """
+        原地追加一批已收盘K线（用于本地合成的K线）
+
+        Args:
+            open_time: 形状 (n,) 的开盘时间
+            ohlcv: 形状 (n, 5) 的OHLCV
+        """
+        open_time = np.asarray(open_time, dtype=np.int64)[-self.capacity:]
+        ohlcv = np.asarray(ohlcv, dtype=np.float64).reshape(-1, 5)[-self.capacity:]
+        self._write(open_time, ohlcv, len(open_time))
+
+    def _write(self, open_time: np.ndarray, ohlcv: np.ndarray, closed: int):
+        """丢弃未收盘K线后写入新数据，前 closed 条为已收盘K线"""
+        self.size = self.closed_size
+        n = len(open_time)
+        if n == 0:
+            return
+
+        overflow = self.size + n - self.capacity
+        if overflow > 0:
+            keep = self.size - overflow
+            self.open_time[:keep] = self.open_time[overflow:self.size]
+            self.ohlcv[:keep] = self.ohlcv[overflow:self.size]
+            self.size = keep
+
+        end = self.size + n
+        self.open_time[self.size:end] = open_time
+        self.ohlcv[self.size:end] = ohlcv
+        self.closed_size = self.size + closed
+        self.size = end
+
+    def last_closed_open_time(self) -> Optional[int]:
+        """最后一根已收盘K线的开盘时间"""
+        if self.closed_size == 0:
+            return None
+        return int(self.open_time[self.closed_size - 1])
+
+    def tail(self, limit: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        获取最近 limit 条K线（返回副本，调用方可自由修改）
+
+        Returns:
+            (open_time 数组, OHLCV 二维数组)
+        """
+        start = max(self.size - limit, 0)
+        return self.open_time[start:self.size].copy(), self.ohlcv[start:self.size].copy()
+
+
+class KlineCache:
+    """按 (symbol, interval) 的增量K线缓存"""
+
+    def __init__(self, fetch_klines: Callable[..., List[List[Any]]], capacity: int = 500,
+                 clock: Callable[[], float] = time.time, store: Optional[Any] = None):
+        """
+        初始化K线缓存
+
+        Args:
+            fetch_klines: 拉取函数 (symbol, interval, limit, start_time) -> 币安 klines 原始行
+            capacity: 每个 (symbol, interval) 默认保留的K线条数
+            clock: 时间函数（秒），测试与回测可注入虚拟时钟
+            store: 可选的 data/kline_store.KlineStore：冷启动时先读取本地历史，新收盘的K线写回存储
+        """
+        self.fetch_klines = fetch_klines
+        self.capacity = capacity
+        self.clock = clock
+        self.store = store
+        self._buffers: Dict[Tuple[str, str], KlineBuffer] = {}
+        self._locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock_for(self, key: Tuple[str, str]) -> threading.Lock:
+        with self._locks_guard:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = threading.Lock()
+            return lock
+
+    def get(self, symbol: str, interval: str, limit: int = 100) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        获取最近 limit 条K线，必要时只增量拉取新数据
+
+        Args:
+            symbol: 交易对符号
+            interval: K线周期，如'5m'
+            limit: 返回条数
+
+        Returns:
+            (open_time 数组, OHLCV 二维数组)，按时间升序
+        """
+        key = (symbol, interval)
+        interval_ms = INTERVAL_MS[interval]
+
+        with self._lock_for(key):
+            now_ms = int(self.clock() * 1000)
+            buffer = self._buffers.get(key)
+            last_closed = buffer.last_closed_open_time() if buffer else None
+
+            # 刷新后至少会补回一根K线（新的未收盘K线），因此已收盘 limit - 1 根即可增量更新
+            start_time = None
+            if buffer is not None and last_closed is not None and buffer.closed_size >= limit - 1:
+                start_time = last_closed + interval_ms
+                missing = (now_ms - start_time) // interval_ms + 1
+                if missing > min(buffer.capacity, MAX_KLINES_PER_REQUEST):
+                    start_time = None
+
+            if start_time is None:
+                capacity = max(self.capacity, limit)
+                buffer = KlineBuffer(capacity)
+                self._buffers[key] = buffer
+                start_time = self._seed_from_store(buffer, symbol, interval, limit, now_ms)
+
+            if start_time is None:
+                # 冷启动、请求条数超过缓存或中断太久：全量拉取并重建缓冲区
+                fetch_limit = min(limit, MAX_KLINES_PER_REQUEST)
+                rows = self.fetch_klines(symbol, interval, fetch_limit, None)
+            else:
+                missing = (now_ms - start_time) // interval_ms + 1
+                rows = self.fetch_klines(symbol, interval, int(missing), start_time)
+            buffer.append(rows, now_ms)
+            if self.store is not None:
+                self.store.upsert_rows(symbol, interval, [row for row in rows if int(row[6]) < now_ms])
+
+            return buffer.tail(limit)
+
+    def _seed_from_store(self, buffer: KlineBuffer, symbol: str, interval: str, limit: int,
+                         now_ms: int) -> Optional[int]:
+        """
+        用本地存储的历史填充空缓冲区
+
+        Returns:
+            需要继续增量拉取的起始开盘时间；本地历史不足或距今太久时返回 None（全量拉取）
+        """
+        if self.store is None:
+            return None
+        open_time, ohlcv = self.store.read(symbol, interval, limit=buffer.capacity)
+        # 只使用最后一段连续的K线，避免跨越存储中的缺口计算指标
+        gaps = np.flatnonzero(np.diff(open_time) != INTERVAL_MS[interval])
+        if len(gaps):
+            open_time, ohlcv = open_time[gaps[-1] + 1:], ohlcv[gaps[-1] + 1:]
+        if len(open_time) < limit - 1:
+            return None
+        start_time = int(open_time[-1]) + INTERVAL_MS[interval]
+        if (now_ms - start_time) // INTERVAL_MS[interval] + 1 > MAX_KLINES_PER_REQUEST:
+            return None
+        buffer.extend_closed(open_time, ohlcv)
+        return start_time
+
+    def invalidate(self, symbol: Optional[str] = None):
+        """
+        清除缓存
+
+        Args:
+            symbol: 只清除该交易对，None 表示全部清除
+        """
+        for key in list(self._buffers):
+            if symbol is None or key[0] == symbol:
+                self._buffers.pop(key, None)
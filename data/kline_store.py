@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地K线存储
+SQLite 文件中按 (周期, 月份) 分区存放已收盘的OHLCV，每个分区是以 (symbol, open_time) 为主键的
+WITHOUT ROWID 表：批量写入按主键幂等覆盖，区间读取只访问相关月份并直接返回 NumPy 数组，
+可传给 IndicatorEngine 与 KlineBuffer，热启动时不再从交易所重新下载历史
+"""
+
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .kline_cache import INTERVAL_MS, MAX_KLINES_PER_REQUEST
+
+_COLUMNS = 'symbol, open_time, open, high, low, close, volume'
+
+
+def partition_key(open_time_ms: int) -> int:
+    """开盘时间所在的月份分区，如 202501"""
+    month = np.datetime64(int(open_time_ms), 'ms').astype('datetime64[M]').astype(int)
+    return (1970 + month // 12) * 100 + month % 12 + 1
+
+
+def _partition_keys(open_time: np.ndarray) -> np.ndarray:
+    months = open_time.astype('datetime64[ms]').astype('datetime64[M]').astype(np.int64)
+    return (1970 + months // 12) * 100 + months % 12 + 1
+
+
+class KlineStore:
+    """按周期与月份分区的K线存储"""
+
+    def __init__(self, path: str = ':memory:'):
+        """
+        初始化K线存储
+
+        Args:
+            path: SQLite 文件路径，默认为内存数据库
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        if path != ':memory:':
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+        # {周期: 已存在的月份分区（升序）}
+        self._partitions: Dict[str, List[int]] = {}
+        for (name,) in self._db.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'klines_%'"):
+            _, interval, key = name.split('_')
+            self._partitions.setdefault(interval, []).append(int(key))
+        for keys in self._partitions.values():
+            keys.sort()
+
+    @staticmethod
+    def _table(interval: str, key: int) -> str:
+        return f'"klines_{interval}_{key}"'
+
+    def _ensure_partition(self, interval: str, key: int):
+        keys = self._partitions.setdefault(interval, [])
+        if key in keys:
+            return
+        self._db.execute(
+            f"CREATE TABLE IF NOT EXISTS {self._table(interval, key)} ("
+            " symbol TEXT NOT NULL,"
+            " open_time INTEGER NOT NULL,"
+            " open REAL NOT NULL,"
+            " high REAL NOT NULL,"
+            " low REAL NOT NULL,"
+            " close REAL NOT NULL,"
+            " volume REAL NOT NULL,"
+            " PRIMARY KEY (symbol, open_time)) WITHOUT ROWID"
+        )
+        keys.append(key)
+        keys.sort()
+
+    def upsert(self, symbol: str, interval: str, open_time: Sequence[int], ohlcv: Any) -> int:
+        """
+        批量写入K线，(symbol, interval, open_time) 相同的行被覆盖，重复写入结果不变
+
+        Args:
+            symbol: 交易对符号
+            interval: K线周期
+            open_time: 开盘时间（毫秒）
+            ohlcv: 形状 (n, 5) 的OHLCV
+
+        Returns:
+            写入的行数
+        """
+        if interval not in INTERVAL_MS:
+            raise ValueError(f"不支持的K线周期: {interval}")
+        open_time = np.asarray(open_time, dtype=np.int64)
+        ohlcv = np.asarray(ohlcv, dtype=np.float64).reshape(-1, 5)
+        if len(open_time) == 0:
+            return 0
+        keys = _partition_keys(open_time)
+        with self._lock, self._db:
+            for key in np.unique(keys):
+                mask = keys == key
+                self._ensure_partition(interval, int(key))
+                rows = zip([symbol] * int(mask.sum()), open_time[mask].tolist(), *ohlcv[mask].T.tolist())
+                self._db.executemany(
+                    f"INSERT INTO {self._table(interval, int(key))} ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)"
+                    " ON CONFLICT (symbol, open_time) DO UPDATE SET"
+                    " open = excluded.open, high = excluded.high, low = excluded.low,"
+                    " close = excluded.close, volume = excluded.volume",
+                    rows,
+                )
+        return len(open_time)
+
+    def upsert_rows(self, symbol: str, interval: str, rows: List[List[Any]]) -> int:
+        """
+        写入币安 klines 原始行 [open_time, o, h, l, c, v, ...]（调用方只应传入已收盘的K线）
+
+        Returns:
+            写入的行数
+        """
+        if not rows:
+            return 0
+        return self.upsert(symbol, interval, [int(row[0]) for row in rows], [row[1:6] for row in rows])
+
+    def read(self, symbol: str, interval: str, start: Optional[int] = None, end: Optional[int] = None,
+             limit: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        读取开盘时间在 [start, end) 内的K线
+
+        Args:
+            symbol: 交易对符号
+            interval: K线周期
+            start/end: 开盘时间范围（毫秒），None 表示不限
+            limit: 只返回区间内最近的 limit 条
+
+        Returns:
+            (open_time int64 数组, OHLCV (n, 5) float64 数组)，按时间升序
+        """
+        first = partition_key(start) if start is not None else None
+        last = partition_key(end - 1) if end is not None else None
+        conditions, params = ["symbol = ?"], [symbol]
+        if start is not None:
+            conditions.append("open_time >= ?")
+            params.append(start)
+        if end is not None:
+            conditions.append("open_time < ?")
+            params.append(end)
+        where = " AND ".join(conditions)
+
+        chunks = []
+        remaining = limit
+        with self._lock:
+            keys = [key for key in self._partitions.get(interval, [])
+                    if (first is None or key >= first) and (last is None or key <= last)]
+            # 从最新的分区向前读，取满 limit 条即停止
+            for key in reversed(keys):
+                sql = f"SELECT open_time, open, high, low, close, volume FROM {self._table(interval, key)}" \
+                      f" WHERE {where} ORDER BY open_time DESC"
+                if remaining is not None:
+                    sql += f" LIMIT {int(remaining)}"
+                rows = self._db.execute(sql, params).fetchall()
+                if rows:
+                    chunks.append(rows)
+                if remaining is not None:
+                    remaining -= len(rows)
+                    if remaining <= 0:
+                        break
+
+        if not chunks:
+            return np.empty(0, dtype=np.int64), np.empty((0, 5), dtype=np.float64)
+        data = np.array([row for rows in reversed(chunks) for row in reversed(rows)], dtype=np.float64)
+        return data[:, 0].astype(np.int64), np.ascontiguousarray(data[:, 1:])
+
+    def last_open_time(self, symbol: str, interval: str) -> Optional[int]:
+        """已存储的最后一根K线的开盘时间，没有数据时返回 None"""
+        open_time, _ = self.read(symbol, interval, limit=1)
+        return int(open_time[-1]) if len(open_time) else None
+
+    def backfill(self, fetch_klines: Callable[..., List[List[Any]]], symbol: str, interval: str,
+                 start: int, end: Optional[int] = None, clock: Callable[[], float] = time.time) -> int:
+        """
+        补齐 [start, end) 的历史：从已存储的最后一根K线之后开始，每次请求 MAX_KLINES_PER_REQUEST 条，
+        中断后再次调用会从断点继续
+
+        Args:
+            fetch_klines: 拉取函数 (symbol, interval, limit, start_time) -> 币安 klines 原始行
+            symbol: 交易对符号
+            interval: K线周期
+            start: 起始开盘时间（毫秒）
+            end: 结束开盘时间（毫秒），默认为当前时间
+            clock: 时间函数（秒）
+
+        Returns:
+            新写入的K线条数
+        """
+        interval_ms = INTERVAL_MS[interval]
+        now_ms = int(clock() * 1000)
+        end = now_ms if end is None else min(end, now_ms)
+        last = self.last_open_time(symbol, interval)
+        cursor = max(start, last + interval_ms) if last is not None else start
+        written = 0
+        while cursor < end:
+            rows = fetch_klines(symbol, interval, MAX_KLINES_PER_REQUEST, cursor)
+            closed = [row for row in rows if int(row[0]) < end and int(row[6]) < now_ms]
+            written += self.upsert_rows(symbol, interval, closed)
+            if len(rows) < MAX_KLINES_PER_REQUEST or not closed:
+                break
+            cursor = int(closed[-1][0]) + interval_ms
+        return written
+
+    def close(self):
+        """关闭数据库"""
+        with self._lock:
+            self._db.close()
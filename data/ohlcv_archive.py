@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+内存映射的列式OHLCV归档
+每个 (symbol, interval) 一个目录，open_time 与 OHLCV 各自存为定宽的小端二进制列文件，
+读取时用 np.memmap 只读映射：按时间区间切片不复制数据，多个进程共享同一份页缓存；
+追加只写文件末尾，已映射的读取方调用 refresh() 即可看到新数据
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows 上不做跨进程写锁
+    fcntl = None
+
+TIME_COLUMN = 'open_time'
+VALUE_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+COLUMN_DTYPES = {TIME_COLUMN: np.dtype('<i8'), **{name: np.dtype('<f8') for name in VALUE_COLUMNS}}
+
+
+class ArchiveSeries:
+    """
+    一个 (symbol, interval) 的只读列视图
+
+    各列是 np.memmap（或其切片），按时间切片返回新的视图而不复制数据。
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        self.columns = columns
+        self.open_time = columns[TIME_COLUMN]
+        self.open = columns['open']
+        self.high = columns['high']
+        self.low = columns['low']
+        self.close = columns['close']
+        self.volume = columns['volume']
+
+    def __len__(self) -> int:
+        return len(self.open_time)
+
+    def slice(self, start: Optional[int] = None, end: Optional[int] = None) -> 'ArchiveSeries':
+        """
+        开盘时间在 [start, end) 内的视图（二分查找，零拷贝）
+
+        Args:
+            start/end: 开盘时间（毫秒），None 表示不限
+
+        Returns:
+            ArchiveSeries
+        """
+        lo = 0 if start is None else int(np.searchsorted(self.open_time, start, side='left'))
+        hi = len(self) if end is None else int(np.searchsorted(self.open_time, end, side='left'))
+        return ArchiveSeries({name: column[lo:hi] for name, column in self.columns.items()})
+
+    def tail(self, limit: int) -> 'ArchiveSeries':
+        """最近 limit 条的视图"""
+        start = max(len(self) - limit, 0)
+        return ArchiveSeries({name: column[start:] for name, column in self.columns.items()})
+
+    def ohlcv(self) -> np.ndarray:
+        """复制为 (n, 5) 的OHLCV数组（与 KlineBuffer/KlineStore 的布局一致）"""
+        return np.column_stack([self.columns[name] for name in VALUE_COLUMNS])
+
+
+class OHLCVArchive:
+    """按 (symbol, interval) 组织的列式归档"""
+
+    def __init__(self, root: str):
+        """
+        初始化归档
+
+        Args:
+            root: 归档根目录，不存在时创建
+        """
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        # {(symbol, interval): (映射时 open_time 文件的大小, ArchiveSeries)}
+        self._mapped: Dict[Tuple[str, str], Tuple[int, ArchiveSeries]] = {}
+
+    def _dir(self, symbol: str, interval: str) -> str:
+        return os.path.join(self.root, symbol, interval)
+
+    def _path(self, symbol: str, interval: str, column: str) -> str:
+        return os.path.join(self._dir(symbol, interval), f"{column}.bin")
+
+    def _rows(self, symbol: str, interval: str) -> int:
+        """
+        完整写入的行数：追加时先写数值列、最后写 open_time，
+        因此取各列长度的最小值即可忽略中断写入留下的半行
+        """
+        rows = None
+        for column, dtype in COLUMN_DTYPES.items():
+            path = self._path(symbol, interval, column)
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            count = size // dtype.itemsize
+            rows = count if rows is None else min(rows, count)
+        return rows or 0
+
+    @contextmanager
+    def _write_lock(self, symbol: str, interval: str) -> Iterator[None]:
+        """同一 (symbol, interval) 的进程内与跨进程写锁"""
+        os.makedirs(self._dir(symbol, interval), exist_ok=True)
+        with self._lock, open(os.path.join(self._dir(symbol, interval), '.lock'), 'w') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def append(self, symbol: str, interval: str, open_time, ohlcv) -> int:
+        """
+        追加K线，只写入开盘时间晚于已归档最后一根的数据
+
+        Args:
+            symbol: 交易对符号
+            interval: K线周期
+            open_time: 开盘时间（毫秒），升序
+            ohlcv: 形状 (n, 5) 的OHLCV
+
+        Returns:
+            实际追加的条数
+        """
+        open_time = np.asarray(open_time, dtype=COLUMN_DTYPES[TIME_COLUMN])
+        ohlcv = np.asarray(ohlcv, dtype=np.float64).reshape(-1, 5)
+        if len(open_time) > 1 and np.any(np.diff(open_time) <= 0):
+            raise ValueError("open_time 必须严格递增")
+
+        with self._write_lock(symbol, interval):
+            rows = self._rows(symbol, interval)
+            if rows:
+                last = np.fromfile(self._path(symbol, interval, TIME_COLUMN), dtype=COLUMN_DTYPES[TIME_COLUMN],
+                                   count=1, offset=(rows - 1) * COLUMN_DTYPES[TIME_COLUMN].itemsize)[0]
+                keep = open_time > last
+                open_time, ohlcv = open_time[keep], ohlcv[keep]
+            if len(open_time) == 0:
+                return 0
+            for index, column in enumerate(VALUE_COLUMNS):
+                self._append_column(symbol, interval, column, rows, ohlcv[:, index])
+            self._append_column(symbol, interval, TIME_COLUMN, rows, open_time)
+        return len(open_time)
+
+    def _append_column(self, symbol: str, interval: str, column: str, rows: int, values: np.ndarray):
+        dtype = COLUMN_DTYPES[column]
+        with open(self._path(symbol, interval, column), 'ab') as f:
+            # 丢弃上次中断写入留下的多余数据后再追加
+            f.truncate(rows * dtype.itemsize)
+            f.write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+
+    def open(self, symbol: str, interval: str) -> ArchiveSeries:
+        """
+        映射一个 (symbol, interval) 的全部列；文件增长后再次调用会重新映射
+
+        Args:
+            symbol: 交易对符号
+            interval: K线周期
+
+        Returns:
+            ArchiveSeries（只读）
+        """
+        key = (symbol, interval)
+        time_path = self._path(symbol, interval, TIME_COLUMN)
+        size = os.path.getsize(time_path) if os.path.exists(time_path) else 0
+        with self._lock:
+            cached = self._mapped.get(key)
+            if cached is not None and cached[0] == size:
+                return cached[1]
+            rows = self._rows(symbol, interval)
+            columns = {}
+            for column, dtype in COLUMN_DTYPES.items():
+                if rows:
+                    columns[column] = np.memmap(self._path(symbol, interval, column), dtype=dtype,
+                                                mode='r', shape=(rows,))
+                else:
+                    columns[column] = np.empty(0, dtype=dtype)
+            series = ArchiveSeries(columns)
+            self._mapped[key] = (size, series)
+            return series
+
+    def refresh(self, symbol: str, interval: str) -> ArchiveSeries:
+        """重新映射以包含其他进程追加的数据（等同于 open）"""
+        return self.open(symbol, interval)
+
+    def read(self, symbol: str, interval: str, start: Optional[int] = None,
+             end: Optional[int] = None) -> ArchiveSeries:
+        """
+        开盘时间在 [start, end) 内的零拷贝视图
+
+        Args:
+            symbol: 交易对符号
+            interval: K线周期
+            start/end: 开盘时间（毫秒），None 表示不限
+
+        Returns:
+            ArchiveSeries
+        """
+        return self.open(symbol, interval).slice(start, end)
+
+    def symbols(self) -> List[str]:
+        """已归档的交易对"""
+        return sorted(name for name in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, name)))
+
+    def intervals(self, symbol: str) -> List[str]:
+        """某个交易对已归档的K线周期"""
+        path = os.path.join(self.root, symbol)
+        return sorted(os.listdir(path)) if os.path.isdir(path) else []
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多周期本地重采样
+从单一基础周期（默认1m）的K线在本地合成 3m/5m/15m/4h 等更高周期K线，
+基础K线每收盘一根就更新一次高周期的未收盘K线
+"""
+
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .kline_cache import INTERVAL_MS, KlineBuffer
+
+
+def resample_ohlcv(open_time: np.ndarray, ohlcv: np.ndarray,
+                   interval: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    将按时间升序的基础K线批量聚合为更高周期K线
+
+    Args:
+        open_time: 形状 (n,) 的基础K线开盘时间（毫秒）
+        ohlcv: 形状 (n, 5) 的基础K线OHLCV
+        interval: 目标周期，如'15m'
+
+    Returns:
+        (目标周期开盘时间, 目标周期OHLCV, 每根目标K线包含的基础K线数)
+    """
+    open_time = np.asarray(open_time, dtype=np.int64)
+    ohlcv = np.asarray(ohlcv, dtype=np.float64).reshape(-1, 5)
+    if len(open_time) == 0:
+        return open_time, ohlcv, np.zeros(0, dtype=np.int64)
+
+    target_ms = INTERVAL_MS[interval]
+    buckets = open_time - open_time % target_ms
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(open_time)] - 1
+
+    out = np.empty((len(starts), 5))
+    out[:, 0] = ohlcv[starts, 0]
+    out[:, 1] = np.maximum.reduceat(ohlcv[:, 1], starts)
+    out[:, 2] = np.minimum.reduceat(ohlcv[:, 2], starts)
+    out[:, 3] = ohlcv[ends, 3]
+    out[:, 4] = np.add.reduceat(ohlcv[:, 4], starts)
+    return buckets[starts], out, ends - starts + 1
+
+
+class TimeframeResampler:
+    """
+    多周期K线合成器
+
+    每个 (symbol, interval) 维护已收盘K线缓冲区和一根未收盘K线。高周期历史先用 seed()
+    从交易所一次性预热（或用 seed_from_base() 从基础周期历史合成），之后只需喂入基础周期的已收盘K线。
+    """
+
+    def __init__(self, base_interval: str = '1m', intervals: Sequence[str] = ('3m', '5m', '15m', '4h'),
+                 capacity: int = 500):
+        """
+        初始化合成器
+
+        Args:
+            base_interval: 基础周期
+            intervals: 需要合成的目标周期，必须是基础周期的整数倍
+            capacity: 每个 (symbol, interval) 保留的已收盘K线条数
+        """
+        self.base_interval = base_interval
+        self.base_ms = INTERVAL_MS[base_interval]
+        for interval in intervals:
+            if INTERVAL_MS[interval] % self.base_ms:
+                raise ValueError(f"{interval} 不是 {base_interval} 的整数倍")
+        self.intervals = tuple(intervals)
+        self.capacity = capacity
+
+        self._closed: Dict[Tuple[str, str], KlineBuffer] = {}
+        # 未收盘K线：[bucket_open_time, open, high, low, close, volume]
+        self._partial: Dict[Tuple[str, str], Optional[List[float]]] = {}
+        self._last_base_open: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def has(self, symbol: str, interval: str) -> bool:
+        """该 (symbol, interval) 是否已有数据"""
+        key = (symbol, interval)
+        return key in self._closed or self._partial.get(key) is not None
+
+    def seed(self, symbol: str, interval: str, open_time: np.ndarray, ohlcv: np.ndarray):
+        """
+        用已收盘的历史K线预热某个目标周期
+
+        Args:
+            symbol: 交易对符号
+            interval: 目标周期
+            open_time: 已收盘K线的开盘时间
+            ohlcv: 已收盘K线的OHLCV
+        """
+        with self._lock:
+            key = (symbol, interval)
+            buffer = KlineBuffer(self.capacity)
+            buffer.extend_closed(open_time, ohlcv)
+            self._closed[key] = buffer
+            self._partial[key] = None
+
+    def seed_from_base(self, symbol: str, open_time: np.ndarray, ohlcv: np.ndarray):
+        """
+        用基础周期历史一次性合成所有目标周期（基础历史足够长时使用）
+
+        Args:
+            symbol: 交易对符号
+            open_time: 基础周期已收盘K线的开盘时间
+            ohlcv: 基础周期已收盘K线的OHLCV
+        """
+        for interval in self.intervals:
+            bucket_time, bars, counts = resample_ohlcv(open_time, ohlcv, interval)
+            full = INTERVAL_MS[interval] // self.base_ms
+            complete = len(bars)
+            if complete and counts[-1] < full:
+                complete -= 1
+            self.seed(symbol, interval, bucket_time[:complete], bars[:complete])
+            if complete < len(bars):
+                self._partial[(symbol, interval)] = [int(bucket_time[-1]), *bars[-1].tolist()]
+        if len(open_time):
+            self._last_base_open[symbol] = int(open_time[-1])
+
+    def on_base_close(self, symbol: str, open_time: int, bar: Sequence[float]) -> Dict[str, Tuple[int, List[float]]]:
+        """
+        喂入一根已收盘的基础K线，更新所有目标周期
+
+        Args:
+            symbol: 交易对符号
+            open_time: 基础K线开盘时间（毫秒）
+            bar: [open, high, low, close, volume]
+
+        Returns:
+            本次收盘的目标周期K线 {interval: (open_time, [o, h, l, c, v])}
+        """
+        open_time = int(open_time)
+        closed_now = {}
+        with self._lock:
+            # 重复或乱序的基础K线直接忽略
+            last = self._last_base_open.get(symbol)
+            if last is not None and open_time <= last:
+                return closed_now
+            self._last_base_open[symbol] = open_time
+
+            o, h, l, c, v = (float(x) for x in bar)
+            for interval in self.intervals:
+                target_ms = INTERVAL_MS[interval]
+                key = (symbol, interval)
+                bucket = open_time - open_time % target_ms
+
+                buffer = self._closed.get(key)
+                if buffer is None:
+                    continue  # 未预热的 (symbol, interval) 不合成，避免用极短的历史替代交易所数据
+                last_closed = buffer.last_closed_open_time()
+                if last_closed is not None and bucket <= last_closed:
+                    continue  # 已包含在预热历史中
+
+                partial = self._partial.get(key)
+                if partial is not None and partial[0] != bucket:
+                    # 新的周期开始而旧K线未显式收盘（例如基础K线缺失），先归档旧K线
+                    buffer.extend_closed([partial[0]], [partial[1:]])
+                    closed_now[interval] = (partial[0], partial[1:])
+                    partial = None
+
+                if partial is None:
+                    partial = [bucket, o, h, l, c, v]
+                else:
+                    partial[2] = max(partial[2], h)
+                    partial[3] = min(partial[3], l)
+                    partial[4] = c
+                    partial[5] += v
+
+                if open_time + self.base_ms >= bucket + target_ms:
+                    buffer.extend_closed([bucket], [partial[1:]])
+                    closed_now[interval] = (bucket, partial[1:])
+                    partial = None
+                self._partial[key] = partial
+        return closed_now
+
+    def on_base_closes(self, symbol: str, open_time: Iterable[int], ohlcv: np.ndarray):
+        """
+        批量喂入基础K线（已处理过的会被忽略）
+
+        Args:
+            symbol: 交易对符号
+            open_time: 开盘时间序列
+            ohlcv: 形状 (n, 5) 的OHLCV
+        """
+        for t, bar in zip(open_time, np.asarray(ohlcv).tolist()):
+            self.on_base_close(symbol, t, bar)
+
+    def get(self, symbol: str, interval: str, limit: int = 100,
+            include_partial: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        获取合成后的K线
+
+        Args:
+            symbol: 交易对符号
+            interval: 目标周期
+            limit: 返回条数
+            include_partial: 是否包含当前未收盘K线
+
+        Returns:
+            (open_time 数组, OHLCV 二维数组)，按时间升序
+        """
+        key = (symbol, interval)
+        with self._lock:
+            buffer = self._closed.get(key)
+            partial = self._partial.get(key) if include_partial else None
+            closed_limit = limit - 1 if partial is not None else limit
+            if buffer is not None:
+                open_time, ohlcv = buffer.tail(closed_limit)
+            else:
+                open_time, ohlcv = np.zeros(0, dtype=np.int64), np.zeros((0, 5))
+
+        if partial is not None:
+            open_time = np.append(open_time, np.int64(partial[0]))
+            ohlcv = np.vstack([ohlcv, [partial[1:]]])
+        return open_time, ohlcv
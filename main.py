@@ -8,17 +8,89 @@ Alpha Arena MVP - 主程序
 import os
 import sys
 from datetime import datetime
-from dotenv import load_dotenv
-
-# 加载环境变量
-load_dotenv()
+from typing import Dict, Optional
 
 # 添加当前目录到Python路径
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from core.market import MarketData
 from core.decision import DecisionMaker
-from adapters.qwen_adapter import QwenAdapter
+from core.arena import DecisionArena
+from core.trade_decision import TradeDecisionParser
+from adapters.registry import create_adapter, load_env
+from adapters.llm_base import load_system_prompt
+from adapters.llm_cache import CachedLLMAdapter, ResponseCache
+from adapters.circuit_breaker import CircuitBreakerAdapter, load_breaker_states, save_breaker_states
+
+# 加载环境变量
+load_env()
+
+# 参与对比的模型：(显示名称, 供应商, 模型名)，供应商见 adapters/registry.ADAPTER_REGISTRY，
+# 只有用到的供应商才会导入对应的SDK
+MODEL_CONFIGS = [
+    ("Qwen", "qwen", "qwen3-max"),
+    ("Deepseek", "deepseek", "deepseek-v3.1"),
+]
+
+# 账户价值（USDT）：随快照传给决策引擎，用于校验 risk_usd 占账户价值 1%-3% 的风险预算，
+# 默认为 prompt/system_prompt.md 中的初始资金
+ACCOUNT_VALUE = float(os.getenv('ACCOUNT_VALUE', '10000'))
+
+# 每个周期的决策截止时间（秒）：超时的模型被取消，5分钟周期不会被单个慢模型拖延
+DECISION_DEADLINE = 90.0
+
+
+def build_adapter(provider: str, model: str, response_cache: Optional[ResponseCache] = None):
+    """
+    创建参与对比的适配器
+
+    Args:
+        provider: 供应商名称
+        model: 模型名称
+        response_cache: 响应缓存，None 表示不缓存
+
+    Returns:
+        经过熔断器（及可选的响应缓存）包装的适配器
+    """
+    # 流式输出：决策JSON完整后立即结束，不等待模型追加的说明文字；
+    # prompt/system_prompt.md 作为逐字节不变的系统前缀，Claude 以 cache_control 标记、OpenAI兼容接口自动缓存
+    adapter = create_adapter(provider, model=model, streaming=True, system_prompt=load_system_prompt())
+    # 供应商故障时熔断，之后的调用立即返回默认响应而不是等待超时。
+    # main.py 每次运行只调用一次：熔断器状态由 main() 跨运行保存，断开超时后下一次运行的调用即半开试探，
+    # 不启动在进程退出前等不到的后台探测
+    adapter = CircuitBreakerAdapter(adapter, background_probe=False)
+    if response_cache is not None:
+        adapter = CachedLLMAdapter(adapter, response_cache)
+    return adapter
+
+
+def build_decision_maker(provider: str, model: str, response_cache: Optional[ResponseCache] = None) -> DecisionMaker:
+    """
+    创建参与对比的决策引擎
+
+    Args:
+        provider: 供应商名称
+        model: 模型名称
+        response_cache: 响应缓存，None 表示不缓存
+
+    Returns:
+        按 prompt/system_prompt.md 的输出格式（signal/coin/quantity/justification）构建提示词并解析的决策引擎
+    """
+    return DecisionMaker(build_adapter(provider, model, response_cache), parser=TradeDecisionParser())
+
+
+def build_snapshot(prices: Dict[str, float], account_value: float = ACCOUNT_VALUE) -> Dict[str, float]:
+    """
+    构建传给决策引擎的市场快照
+
+    Args:
+        prices: {交易对: 价格}
+        account_value: 账户价值（USDT）
+
+    Returns:
+        {交易对: 价格, 'account_value': 账户价值}
+    """
+    return dict(prices, account_value=account_value)
 
 
 def main():
@@ -28,6 +100,7 @@ def main():
     print(f"📅 运行时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print()
 
+    journal = None
     try:
         # 初始化市场数据管理器
         print("📊 初始化市场数据管理器...")
@@ -53,73 +126,119 @@ def main():
         # 初始化LLM适配器
         print("\n🤖 初始化AI模型...")
 
-        # Qwen适配器
-        try:
-            qwen_adapter = QwenAdapter(model="qwen3-max")
-            qwen_decision_maker = DecisionMaker(qwen_adapter)
-            print(f"✅ Qwen ({qwen_adapter.get_model_name()}) 初始化成功")
-        except Exception as e:
-            print(f"❌ Qwen初始化失败: {e}")
-            qwen_decision_maker = None
-
-        # Deepseek适配器
-        try:
-            deepseek_adapter = QwenAdapter(model="deepseek-v3.1")
-            deepseek_decision_maker = DecisionMaker(deepseek_adapter)
-            print(f"✅ Deepseek ({deepseek_adapter.get_model_name()}) 初始化成功")
-        except Exception as e:
-            print(f"❌ Deepseek初始化失败: {e}")
-            deepseek_decision_maker = None
-
-        if not qwen_decision_maker and not deepseek_decision_maker:
+        # 设置 LLM_CACHE_PATH 后，相同快照的重复运行直接复用缓存的响应
+        cache_path = os.getenv('LLM_CACHE_PATH')
+        response_cache = ResponseCache(cache_path) if cache_path else None
+
+        # 设置 JOURNAL_ENABLED=1 后记录快照、提示词、原始响应与决策（连接参数见 data/journal.dsn_from_env）
+        if os.getenv('JOURNAL_ENABLED') == '1':
+            from data.journal import TradingJournal
+            try:
+                journal = TradingJournal()
+                print("✅ 交易日志已连接")
+            except Exception as e:
+                print(f"❌ 交易日志连接失败: {e}")
+
+        decision_makers = {}
+        for display_name, provider, model in MODEL_CONFIGS:
+            try:
+                maker = build_decision_maker(provider, model, response_cache)
+                decision_makers[display_name] = maker
+                print(f"✅ {display_name} ({maker.model_name}) 初始化成功")
+            except Exception as e:
+                print(f"❌ {display_name}初始化失败: {e}")
+
+        if not decision_makers:
             print("❌ 没有可用的AI模型，请检查API密钥配置")
             return
 
-        # 获取AI决策
+        # 并发获取AI决策：周期耗时取决于最慢的模型，而不是所有模型之和
         print("\n🧠 获取AI交易决策...")
 
-        decisions = {}
+        # 共识引擎依赖 NumPy，在这里导入以保持 import main 的启动耗时
+        from core.consensus import ConsensusEngine
+        history_path = os.getenv('CONSENSUS_HISTORY_PATH')
+        if history_path and os.path.exists(history_path):
+            consensus = ConsensusEngine.load(history_path)
+        else:
+            consensus = ConsensusEngine(list(decision_makers))
 
-        # Qwen决策
-        if qwen_decision_maker:
-            print("\n🤖 Qwen决策:")
-            try:
-                qwen_decision = qwen_decision_maker.get_decision(prices)
-                decisions['Qwen'] = qwen_decision
-                print(qwen_decision_maker.format_decision_for_display(qwen_decision))
-            except Exception as e:
-                print(f"❌ Qwen决策获取失败: {e}")
+        arena = DecisionArena(decision_makers)
+        # 按时率计数与熔断器状态保存在共识历史旁边，多次运行累计
+        on_time_path = f"{os.path.splitext(history_path)[0]}_on_time.json" if history_path else None
+        breaker_path = f"{os.path.splitext(history_path)[0]}_breakers.json" if history_path else None
+        breakers = [maker.llm_adapter.breaker for maker in decision_makers.values()]
+        if history_path:
+            arena.load_on_time_counts(on_time_path)
+            load_breaker_states(breakers, breaker_path)
+        snapshot = build_snapshot(prices)
+        result = arena.race(snapshot, deadline=DECISION_DEADLINE)
+        if history_path:
+            arena.save_on_time_counts(on_time_path)
+            save_breaker_states(breakers, breaker_path)
+        decisions = result['decisions']
+        for model_name, decision in decisions.items():
+            print(f"\n🤖 {model_name}决策 ({result['elapsed'][model_name]:.2f}s):")
+            stats = decision_makers[model_name].llm_adapter.last_call_stats
+            if stats and stats['decision'] is not None:
+                print(f"   首个token: {stats['first_token']:.2f}s  决策完成: {stats['decision']:.2f}s")
+            usage = decision_makers[model_name].llm_adapter.last_usage
+            if usage:
+                print(f"   输入token: {usage['input_tokens']} (缓存命中 {usage['cached_tokens']})")
+            print(decision_makers[model_name].format_decision_for_display(decision))
 
-        # Deepseek-决策
-        if deepseek_decision_maker:
-            print("\n🤖 Deepseek决策:")
-            try:
-                deepseek_decision = deepseek_decision_maker.get_decision(prices)
-                decisions['Deepseek'] = deepseek_decision
-                print(deepseek_decision_maker.format_decision_for_display(deepseek_decision))
-            except Exception as e:
-                print(f"❌ Deepseek决策获取失败: {e}")
+        for model_name in result['elapsed']:
+            if model_name not in decisions:
+                print(f"\n❌ {model_name} 未返回有效决策")
+        for model_name in result['late']:
+            print(f"\n⏰ {model_name} 超过截止时间 {DECISION_DEADLINE:.0f}s，已取消")
+        print(f"\n⏱️ 按时率（截止 {DECISION_DEADLINE:.0f}s）:")
+        for model_name, rate in arena.get_on_time_rates().items():
+            on_time, total = arena.on_time_counts[model_name]
+            print(f"   {model_name}: {rate:.1%} ({on_time}/{total})")
+        for model_name, maker in decision_makers.items():
+            breaker_stats = maker.llm_adapter.breaker.get_stats()
+            if breaker_stats['state'] != 'closed':
+                print(f"   ⚠️ {model_name} 熔断器{breaker_stats['state']}，错误率 {breaker_stats['error_rate']:.0%}")
 
-        # 决策对比
-        if len(decisions) >= 2:
-            print("\n📊 决策对比:")
-            print("-" * 30)
+        # 决策对比：按 置信度 × 历史准确率 加权投票，历史保存在 CONSENSUS_HISTORY_PATH
+        print("\n📊 决策对比:")
+        print("-" * 30)
+        for model_name, decision in decisions.items():
+            print(f"   {model_name}: {decision.get('action', 'HOLD')} {decision.get('symbol', 'None')}")
 
-            for model_name, decision in decisions.items():
-                symbol = decision.get('symbol', 'None')
-                action = decision.get('action', 'HOLD')
-                print(f"   {model_name}: {action} {symbol}")
+        results = consensus.score(prices)
+        if results:
+            correct = [name for name, ok in results.items() if ok]
+            print(f"   📏 上周期决策评估: {len(correct)}/{len(results)} 正确")
+        consensus.record({name: decisions.get(name) for name in decision_makers}, prices)
+        vote = consensus.vote(decisions)
+        if vote is not None:
+            print(f"   🗳️ 加权共识: {vote['action']} {vote['symbol']} ({vote['rationale']})")
+        if consensus.cycles >= 2:
+            print(f"   🎯 历史 {consensus.cycles} 个周期，全体一致率 {consensus.unanimity_rate():.1%}")
+            for model_name, model_stats in consensus.model_stats().items():
+                if model_name in decision_makers:
+                    print(f"   {model_name}: 准确率 {model_stats['accuracy']:.1%}  "
+                          f"与其他模型一致率 {model_stats['agreement']:.1%}")
+        if result['consensus'] is not None:
+            print(f"   ⚡ 最先达到法定票数: {result['consensus']['action']} {result['consensus']['symbol']}")
+        if history_path:
+            consensus.save(history_path)
 
-            # 检查是否一致
-            if len(decisions) == 2:
-                qwen_decision = decisions.get('Qwen', {})
-                deepseek_decision = decisions.get('Deepseek', {})
+        # 交易日志：只入队，由后台线程批量写入 PostgreSQL
+        if journal is not None:
+            journal.log_cycle(
+                {'prices': prices, 'account_value': snapshot['account_value']},
+                decisions,
+                prompts={name: maker.last_prompt for name, maker in decision_makers.items()},
+                responses={name: maker.last_response for name, maker in decision_makers.items()},
+                latencies=result['elapsed'],
+            )
 
-                if (qwen_decision.get('symbol') == deepseek_decision.get('symbol') and
-                        qwen_decision.get('action') == deepseek_decision.get('action')):
-                    print("   🎯 两个AI达成一致！")
-                else:
-                    print("   ⚡ 两个AI意见分歧")
+        if response_cache is not None:
+            stats = response_cache.get_stats()
+            print(f"\n💾 响应缓存: 命中 {stats['hits']} / 未命中 {stats['misses']}")
 
         print("\n✅ 运行完成！")
 
@@ -129,6 +248,11 @@ def main():
         print(f"\n❌ 程序运行出错: {e}")
         import traceback
         traceback.print_exc()
+    finally:
+        if journal is not None:
+            journal.close()
+            stats = journal.get_stats()
+            print(f"🗄️ 交易日志: 写入 {stats['rows_written']} 行，失败批次 {stats['errors']}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+决策竞技场单元测试
+使用本地假适配器验证多模型并发决策
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+# 添加父目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from adapters.llm_base import LLMAdapter, FALLBACK_RESPONSE
+from core.decision import DecisionMaker
+from core.arena import DecisionArena
+
+
+class SlowAdapter(LLMAdapter):
+    """按固定延迟返回固定决策的假适配器"""
+
+    def __init__(self, name: str, delay: float, action: str = "HOLD"):
+        super().__init__(api_key="test")
+        self.name = name
+        self.delay = delay
+        self.action = action
+
+    def call(self, prompt: str) -> str:
+        time.sleep(self.delay)
+        return ('{"symbol": "BTCUSDT", "action": "%s", "confidence": 0.8, "rationale": "test"}'
+                % self.action)
+
+    async def acall(self, prompt: str) -> str:
+        await asyncio.sleep(self.delay)
+        return ('{"symbol": "BTCUSDT", "action": "%s", "confidence": 0.8, "rationale": "test"}'
+                % self.action)
+
+    def get_model_name(self) -> str:
+        return self.name
+
+
+class TestDecisionArena(unittest.TestCase):
+    """决策竞技场测试类"""
+
+    def setUp(self):
+        self.prices = {'BTCUSDT': 65000.0, 'ETHUSDT': 3200.0}
+
+    def test_01_latency_bounded_by_slowest(self):
+        """周期耗时应接近最慢模型，而不是所有模型之和"""
+        makers = {f"m{i}": DecisionMaker(SlowAdapter(f"m{i}", 0.2)) for i in range(5)}
+        arena = DecisionArena(makers)
+
+        start = time.perf_counter()
+        decisions = arena.run(self.prices)
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(list(decisions), list(makers))
+        self.assertLess(elapsed, 0.6, "并发执行耗时应远小于 5 × 0.2s")
+
+    def test_02_results_in_completion_order(self):
+        """iter_decisions 应按完成顺序产出"""
+        makers = {
+            'slow': DecisionMaker(SlowAdapter('slow', 0.3, 'BUY')),
+            'fast': DecisionMaker(SlowAdapter('fast', 0.0, 'SELL')),
+        }
+        order = [name for name, _, _ in DecisionArena(makers).iter_decisions(self.prices)]
+        self.assertEqual(order, ['fast', 'slow'])
+
+    def test_03_failed_model_falls_back_to_hold(self):
+        """单个模型抛出异常时返回默认观望决策"""
+        maker = DecisionMaker(SlowAdapter('broken', 0.0))
+        maker.get_decision = lambda market_data: 1 / 0
+        decisions = DecisionArena({'broken': maker}).run(self.prices)
+        self.assertEqual(decisions['broken']['action'], 'HOLD')
+
+    def test_04_async_fan_out(self):
+        """arun 在单个事件循环中并发等待所有模型"""
+        makers = {f"m{i}": DecisionMaker(SlowAdapter(f"m{i}", 0.2, 'BUY')) for i in range(50)}
+
+        start = time.perf_counter()
+        decisions = asyncio.run(DecisionArena(makers).arun(self.prices))
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(len(decisions), 50)
+        self.assertTrue(all(d['action'] == 'BUY' for d in decisions.values()))
+        self.assertLess(elapsed, 1.0)
+
+    def test_05_deadline_cancels_stragglers(self):
+        """截止时间到达时取消慢模型并记录按时率"""
+        makers = {
+            'fast': DecisionMaker(SlowAdapter('fast', 0.05, 'BUY')),
+            'medium': DecisionMaker(SlowAdapter('medium', 0.1, 'BUY')),
+            'stuck': DecisionMaker(SlowAdapter('stuck', 30.0, 'SELL')),
+        }
+        arena = DecisionArena(makers)
+
+        start = time.perf_counter()
+        result = arena.race(self.prices, deadline=0.3)
+        self.assertLess(time.perf_counter() - start, 0.6)
+        self.assertEqual(result['reason'], 'deadline')
+        self.assertEqual(result['late'], ['stuck'])
+        self.assertEqual(list(result['decisions']), ['fast', 'medium'])
+        self.assertEqual(result['consensus']['action'], 'BUY')
+
+        arena.race(self.prices, deadline=0.3)
+        rates = arena.get_on_time_rates()
+        self.assertEqual(rates['fast'], 1.0)
+        self.assertEqual(rates['stuck'], 0.0)
+
+    def test_06_quorum_and_first_n(self):
+        """达到法定票数或前 N 个有效决策时立即返回，失败的模型不计票"""
+        makers = {
+            'a': DecisionMaker(SlowAdapter('a', 0.02, 'BUY')),
+            'b': DecisionMaker(SlowAdapter('b', 0.05, 'BUY')),
+            'c': DecisionMaker(SlowAdapter('c', 0.08, 'SELL')),
+            'slow': DecisionMaker(SlowAdapter('slow', 5.0, 'SELL')),
+        }
+        broken = DecisionMaker(SlowAdapter('broken', 0.0))
+        broken.llm_adapter.acall = lambda prompt: asyncio.sleep(0, result=FALLBACK_RESPONSE)
+        makers['broken'] = broken
+        arena = DecisionArena(makers)
+
+        start = time.perf_counter()
+        result = arena.race(self.prices, deadline=2.0, quorum=2)
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual(result['reason'], 'quorum')
+        self.assertEqual(result['consensus']['action'], 'BUY')
+        self.assertNotIn('broken', result['decisions'])
+        self.assertEqual(result['late'], [])
+
+        result = arena.race(self.prices, deadline=2.0, first_n=3)
+        self.assertEqual(result['reason'], 'first_n')
+        self.assertEqual(set(result['decisions']), {'a', 'b', 'c'})
+        self.assertEqual(result['consensus']['action'], 'BUY')
+        self.assertNotIn('slow', arena.get_on_time_rates())
+
+    def test_07_on_time_counts_persist(self):
+        """按时率计数保存到文件，每次运行新建的竞技场加载后继续累计"""
+        makers = {
+            'fast': DecisionMaker(SlowAdapter('fast', 0.01, 'BUY')),
+            'stuck': DecisionMaker(SlowAdapter('stuck', 30.0, 'SELL')),
+        }
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "consensus_history_on_time.json")
+            for _ in range(2):
+                arena = DecisionArena(makers)
+                arena.load_on_time_counts(path)
+                arena.race(self.prices, deadline=0.1)
+                arena.save_on_time_counts(path)
+
+            arena = DecisionArena(makers)
+            arena.load_on_time_counts(path)
+            self.assertEqual(arena.on_time_counts, {'fast': [2, 2], 'stuck': [0, 2]})
+            self.assertEqual(arena.get_on_time_rates(), {'fast': 1.0, 'stuck': 0.0})
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
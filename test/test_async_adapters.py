@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+原生异步调用单元测试
+使用假的异步客户端验证 Qwen/OpenAI/Claude 非流式 acall 的请求参数、用量记录与异常时的默认响应
+"""
+
+import asyncio
+import os
+import sys
+import unittest
+from types import SimpleNamespace
+
+# 添加父目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from adapters.claude_adapter import ClaudeAdapter
+from adapters.llm_base import FALLBACK_RESPONSE
+from adapters.openai_adapter import OpenAIAdapter
+from adapters.qwen_adapter import QwenAdapter
+
+DECISION = '{"symbol": "BTCUSDT", "action": "BUY", "confidence": 0.8, "rationale": "test"}'
+
+
+class AsyncCreate:
+    """记录每次请求参数的假异步 create 方法，error 不为 None 时抛出"""
+
+    def __init__(self, response, error: Exception = None):
+        self.response = response
+        self.error = error
+        self.payloads = []
+
+    async def __call__(self, **kwargs):
+        self.payloads.append(kwargs)
+        await asyncio.sleep(0)
+        if self.error is not None:
+            raise self.error
+        return self.response
+
+
+def openai_response():
+    usage = SimpleNamespace(prompt_tokens=1200, completion_tokens=30,
+                            prompt_tokens_details=SimpleNamespace(cached_tokens=1024))
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=f"\n{DECISION}  "))], usage=usage)
+
+
+def claude_response():
+    usage = SimpleNamespace(input_tokens=40, cache_read_input_tokens=1900, cache_creation_input_tokens=0,
+                            output_tokens=30)
+    return SimpleNamespace(content=[SimpleNamespace(text=f"{DECISION}\n")], usage=usage)
+
+
+def openai_compatible(adapter, create: AsyncCreate):
+    adapter.async_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    return adapter
+
+
+def claude(adapter, create: AsyncCreate):
+    adapter.async_client = SimpleNamespace(messages=SimpleNamespace(create=create))
+    return adapter
+
+
+class TestAsyncAdapters(unittest.TestCase):
+    """原生异步调用测试类"""
+
+    def test_01_openai_compatible_payload(self):
+        """Qwen/OpenAI 的 acall 经异步客户端发送与同步调用相同的 chat.completions 请求，不创建同步客户端"""
+        for cls, model in ((QwenAdapter, "qwen3-max"), (OpenAIAdapter, "gpt-4o")):
+            create = AsyncCreate(openai_response())
+            adapter = openai_compatible(cls(api_key="test", model=model, system_prompt="SYSTEM"), create)
+            self.assertEqual(asyncio.run(adapter.acall("cycle")), DECISION)
+            self.assertEqual(create.payloads, [{
+                "model": model,
+                "messages": [{"role": "system", "content": "SYSTEM"}, {"role": "user", "content": "cycle"}],
+                "max_tokens": 500,
+                "temperature": 0.7,
+            }])
+            self.assertEqual((adapter.last_usage['input_tokens'], adapter.last_usage['cached_tokens']), (1200, 1024))
+            self.assertNotIn('client', adapter.__dict__)
+
+    def test_02_claude_payload(self):
+        """Claude 的 acall 以带 cache_control 的系统前缀发送 messages 请求，并记录缓存读取用量"""
+        create = AsyncCreate(claude_response())
+        adapter = claude(ClaudeAdapter(api_key="test", model="claude-sonnet-4-5", system_prompt="SYSTEM"), create)
+        self.assertEqual(asyncio.run(adapter.acall("cycle")), DECISION)
+        self.assertEqual(create.payloads, [{
+            "model": "claude-sonnet-4-5",
+            "max_tokens": 500,
+            "temperature": 0.7,
+            "system": [{"type": "text", "text": "SYSTEM", "cache_control": {"type": "ephemeral"}}],
+            "messages": [{"role": "user", "content": "cycle"}],
+        }])
+        self.assertEqual(adapter.last_usage['input_tokens'], 1940)
+        self.assertEqual(adapter.last_usage['cached_tokens'], 1900)
+        self.assertNotIn('client', adapter.__dict__)
+
+    def test_03_fallback_on_exception(self):
+        """异步客户端抛出异常或响应结构异常时返回默认响应，不向调用方抛出"""
+        creates = [AsyncCreate(None, ConnectionError("timeout")), AsyncCreate(None, RuntimeError("500")),
+                   AsyncCreate(None, ConnectionError("overloaded")),
+                   AsyncCreate(SimpleNamespace(choices=[], usage=None))]
+        adapters = [
+            openai_compatible(QwenAdapter(api_key="test"), creates[0]),
+            openai_compatible(OpenAIAdapter(api_key="test"), creates[1]),
+            claude(ClaudeAdapter(api_key="test"), creates[2]),
+            openai_compatible(QwenAdapter(api_key="test"), creates[3]),
+        ]
+        for adapter, create in zip(adapters, creates):
+            self.assertEqual(asyncio.run(adapter.acall("cycle")), FALLBACK_RESPONSE)
+            self.assertEqual(len(create.payloads), 1)
+            self.assertIsNone(adapter.last_usage)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
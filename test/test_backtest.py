@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+回测引擎单元测试
+使用按提示词中价格做决策的假适配器，验证手续费与滑点计算、无未来数据、止损止盈、
+响应缓存在重复回放时不再调用适配器，以及从本地存储加载历史
+"""
+
+import os
+import re
+import sys
+import tempfile
+import time
+import unittest
+
+import numpy as np
+
+# 添加父目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from adapters.llm_base import LLMAdapter
+from adapters.llm_cache import ResponseCache
+from core.backtest import BacktestEngine, Portfolio, VirtualClock, load_history
+from core.decision import DecisionMaker
+from data.kline_cache import INTERVAL_MS
+from data.kline_store import KlineStore
+from data.ohlcv_archive import OHLCVArchive
+
+STEP = INTERVAL_MS['5m']
+START = 1_699_999_200_000  # 整点
+
+
+class PriceRuleAdapter(LLMAdapter):
+    """按提示词中的BTC价格决策：低于 buy_below 买入，高于 sell_above 卖出"""
+
+    def __init__(self, name: str = "rule", buy_below: float = 100.0, sell_above: float = 105.0):
+        super().__init__(api_key="test")
+        self.name = name
+        self.buy_below = buy_below
+        self.sell_above = sell_above
+        self.prompts = []
+
+    def call(self, prompt: str) -> str:
+        self.prompts.append(prompt)
+        price = float(re.search(r"BTCUSDT: \$([\d.]+)", prompt).group(1))
+        action = 'BUY' if price < self.buy_below else 'SELL' if price > self.sell_above else 'HOLD'
+        return '{"symbol": "BTCUSDT", "action": "%s", "confidence": 0.8, "rationale": "%.4f"}' % (action, price)
+
+    def get_model_name(self) -> str:
+        return self.name
+
+
+def history(close, start: int = START, open_=None):
+    close = np.asarray(close, dtype=np.float64)
+    open_ = close if open_ is None else np.asarray(open_, dtype=np.float64)
+    open_time = start + np.arange(len(close), dtype=np.int64) * STEP
+    return {'BTCUSDT': (open_time, open_, np.maximum(open_, close) + 1, np.minimum(open_, close) - 1, close)}
+
+
+class TestBacktest(unittest.TestCase):
+    """回测引擎测试类"""
+
+    def test_01_fee_and_slippage(self):
+        """买入价上浮、卖出价下浮滑点，每笔按成交额扣0.1%手续费"""
+        portfolio = Portfolio(10_000.0, fee_rate=0.001, slippage=0.0005)
+        buy = portfolio.buy('BTCUSDT', 100.0, 1, quantity=10)
+        self.assertAlmostEqual(buy['price'], 100.05)
+        self.assertAlmostEqual(buy['fee'], 1.0005)
+        self.assertAlmostEqual(portfolio.cash, 10_000 - 1000.5 - 1.0005)
+        self.assertIsNone(portfolio.buy('BTCUSDT', 100.0, 2, quantity=1))
+
+        sell = portfolio.sell('BTCUSDT', 110.0, 3)
+        self.assertAlmostEqual(sell['price'], 109.945)
+        self.assertAlmostEqual(sell['pnl'], 1099.45 - 1.09945 - 1001.5005)
+        self.assertAlmostEqual(portfolio.cash, 10_000 + sell['pnl'])
+        self.assertAlmostEqual(portfolio.fees, 1.0005 + 1.09945)
+        self.assertIsNone(portfolio.sell('BTCUSDT', 110.0, 4))
+
+        # 资金不足时按可用资金缩减数量
+        small = Portfolio(100.0)
+        trade = small.buy('BTCUSDT', 100.0, 1, quantity=5)
+        self.assertAlmostEqual(small.cash, 0.0)
+        self.assertLess(trade['quantity'], 1)
+
+    def test_02_no_lookahead(self):
+        """决策点的提示词与实盘相同，只包含该时刻已收盘K线的价格"""
+        close = np.arange(90.0, 120.0)
+        adapter = PriceRuleAdapter()
+        maker = DecisionMaker(adapter)
+        engine = BacktestEngine({'rule': maker}, history(close))
+        report = engine.run()['rule']
+
+        self.assertEqual(len(adapter.prompts), len(close))
+        self.assertEqual(adapter.prompts[0], maker.build_prompt({'BTCUSDT': 90.0}))
+        for i, prompt in enumerate(adapter.prompts):
+            self.assertIn(f"BTCUSDT: ${close[i]:.4f}", prompt)
+        np.testing.assert_array_equal(report['equity_curve'][0], START + (np.arange(len(close)) + 1) * STEP)
+
+        # 第一根K线买入（20%资金），价格超过105后卖出
+        trades = engine.portfolios['rule'].trades
+        self.assertEqual([(t['side'], t['time']) for t in trades[:2]],
+                         [('buy', START + STEP), ('sell', START + 17 * STEP)])
+        self.assertAlmostEqual(trades[0]['quantity'] * trades[0]['price'], 2000.0, places=6)
+        self.assertGreater(report['return_pct'], 0)
+        self.assertEqual(report['decisions'], len(close))
+
+    def test_03_exit_plan(self):
+        """完整格式决策的止损/止盈在之后的K线最高/最低价触及时成交，同时触及按止损处理"""
+        engine = BacktestEngine({'rule': DecisionMaker(PriceRuleAdapter())},
+                                history([100.0, 100.0, 100.0]), slippage=0.0)
+        engine.prices = {'BTCUSDT': 100.0}
+        engine.execute('rule', {'action': 'BUY', 'symbol': 'BTCUSDT', 'quantity': 1.0,
+                                'stop_loss': 99.5, 'profit_target': 100.5}, START)
+        # 入场的那根K线不检查退出
+        engine._check_exits(0, START)
+        self.assertIn('BTCUSDT', engine.portfolios['rule'].positions)
+
+        engine._check_exits(1, START + STEP)
+        trade = engine.portfolios['rule'].trades[-1]
+        self.assertEqual((trade['reason'], trade['price']), ('stop_loss', 99.5))
+
+        engine.execute('rule', {'action': 'BUY', 'symbol': 'BTCUSDT', 'quantity': 1.0,
+                                'stop_loss': 90.0, 'profit_target': 100.5}, START + STEP)
+        engine._check_exits(2, START + 2 * STEP)
+        self.assertEqual(engine.portfolios['rule'].trades[-1]['reason'], 'profit_target')
+
+    def test_06_gap_fills_at_open(self):
+        """开盘跳空越过止损/止盈时按开盘价成交，而不是按触发价"""
+        engine = BacktestEngine({'rule': DecisionMaker(PriceRuleAdapter())},
+                                history([100.0, 90.0, 100.0, 112.0], open_=[100.0, 92.0, 100.0, 110.0]),
+                                slippage=0.0005)
+        engine.prices = {'BTCUSDT': 100.0}
+        plan = {'action': 'BUY', 'symbol': 'BTCUSDT', 'quantity': 1.0, 'stop_loss': 98.0, 'profit_target': 104.0}
+        engine.execute('rule', plan, START)
+        engine._check_exits(1, START + STEP)
+        trade = engine.portfolios['rule'].trades[-1]
+        self.assertEqual(trade['reason'], 'stop_loss')
+        self.assertAlmostEqual(trade['price'], 92.0 * (1 - 0.0005))
+
+        engine.execute('rule', plan, START + 2 * STEP)
+        engine._check_exits(3, START + 3 * STEP)
+        trade = engine.portfolios['rule'].trades[-1]
+        self.assertEqual(trade['reason'], 'profit_target')
+        self.assertAlmostEqual(trade['price'], 110.0 * (1 - 0.0005))
+
+    def test_04_cached_replay(self):
+        """第二次回放全部命中缓存，不调用适配器，TTL按虚拟时间计算"""
+        rng = np.random.default_rng(0)
+        close = 100 + np.cumsum(rng.normal(0, 0.5, 288))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "llm_cache.sqlite")
+            reports = []
+            for _ in range(2):
+                clock = VirtualClock()
+                cache = ResponseCache(path, clock=clock.time)
+                adapters = {name: PriceRuleAdapter(name, buy_below=100 + i) for i, name in enumerate(['a', 'b'])}
+                engine = BacktestEngine({name: DecisionMaker(a) for name, a in adapters.items()},
+                                        history(close), response_cache=cache, clock=clock)
+                start = time.perf_counter()
+                reports.append(engine.run())
+                elapsed = time.perf_counter() - start
+                cache.close()
+            self.assertEqual([a.prompts for a in adapters.values()], [[], []])
+            self.assertEqual(clock.now_ms, START + len(close) * STEP)
+            self.assertLess(elapsed, 5.0)
+            for name in adapters:
+                self.assertEqual(reports[0][name]['final_equity'], reports[1][name]['final_equity'])
+                self.assertEqual(reports[0][name]['trades'], reports[1][name]['trades'])
+
+    def test_05_load_history(self):
+        """从K线存储与列式归档加载的历史一致；决策间隔可大于K线周期"""
+        close = np.linspace(95, 110, 60)
+        open_time, open_, high, low, _ = history(close)['BTCUSDT']
+        ohlcv = np.column_stack([open_, high, low, close, np.ones(len(close))])
+        with tempfile.TemporaryDirectory() as tmp:
+            store = KlineStore()
+            store.upsert('BTCUSDT', '5m', open_time, ohlcv)
+            archive = OHLCVArchive(tmp)
+            archive.append('BTCUSDT', '5m', open_time, ohlcv)
+            from_store = load_history(store, ['BTCUSDT', 'ETHUSDT'], '5m')
+            from_archive = load_history(archive, ['BTCUSDT'], '5m', start=int(open_time[10]))
+            store.close()
+
+            self.assertEqual(list(from_store), ['BTCUSDT'])
+            for a, b in zip(from_store['BTCUSDT'], from_archive['BTCUSDT']):
+                np.testing.assert_array_equal(np.asarray(a)[10:], b)
+
+            engine = BacktestEngine({'rule': DecisionMaker(PriceRuleAdapter())}, from_store, decision_interval='15m')
+            report = engine.run(start=int(open_time[30]))['rule']
+            self.assertTrue(np.all(report['equity_curve'][0] % INTERVAL_MS['15m'] == 0))
+            self.assertEqual(report['decisions'], 11)
+            with self.assertRaises(ValueError):
+                BacktestEngine({}, from_store, decision_interval='3m')
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+离线批量推理单元测试
+使用本地执行器与假适配器代替供应商的 Batch 接口产生结果文件
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+# 添加父目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from adapters.llm_base import FALLBACK_RESPONSE, LLMAdapter
+from adapters.claude_adapter import ClaudeAdapter
+from adapters.qwen_adapter import QwenAdapter
+from core.batch import (LocalBatchExecutor, ingest_decisions, iter_jsonl, read_batch_output,
+                        submit_batch, write_batch_input, write_decision_batch)
+from core.decision import DecisionMaker
+
+
+class EchoAdapter(LLMAdapter):
+    """按提示词中的BTC价格给出决策；价格为0时模拟调用失败"""
+
+    def __init__(self, delay: float = 0.01):
+        super().__init__(api_key="test")
+        self.delay = delay
+        self.prompts = []
+
+    def call(self, prompt: str) -> str:
+        raise AssertionError("批量执行应使用 acall")
+
+    async def acall(self, prompt: str) -> str:
+        self.prompts.append(prompt)
+        await asyncio.sleep(self.delay)
+        if "BTCUSDT: $0.0000" in prompt:
+            return FALLBACK_RESPONSE
+        return json.dumps({"symbol": "BTCUSDT", "action": "BUY", "confidence": 0.7, "rationale": prompt[-20:]})
+
+    def get_model_name(self) -> str:
+        return "echo"
+
+
+def snapshots(n: int) -> dict:
+    return {f"ts-{i:04d}": {'BTCUSDT': 60000.0 + i} for i in range(n)}
+
+
+class TestBatch(unittest.TestCase):
+    """离线批量推理测试类"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.input_path = os.path.join(self.tmpdir.name, "batch_input.jsonl")
+        self.output_path = os.path.join(self.tmpdir.name, "batch_output.jsonl")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_01_input_format(self):
+        """输入文件每行为 OpenAI 兼容的批量请求，body 与实时调用的请求参数一致"""
+        adapter = QwenAdapter(api_key="test", model="qwen3-max")
+        maker = DecisionMaker(adapter)
+        count = write_decision_batch(self.input_path, maker, snapshots(3))
+        lines = list(iter_jsonl(self.input_path))
+
+        self.assertEqual(count, 3)
+        self.assertEqual(lines[0]['custom_id'], "ts-0000")
+        self.assertEqual(lines[0]['method'], "POST")
+        self.assertEqual(lines[0]['url'], "/v1/chat/completions")
+        self.assertEqual(lines[1]['body'], adapter.build_request(maker.build_prompt({'BTCUSDT': 60001.0})))
+
+        with self.assertRaises(ValueError):
+            write_batch_input(self.input_path, adapter, [("a", "p"), ("a", "q")])
+
+    def test_02_local_executor_bounded_concurrency(self):
+        """本地执行器以有限并发执行，结果按 custom_id 解析回决策，失败的请求返回默认决策"""
+        adapter = EchoAdapter()
+        maker = DecisionMaker(adapter)
+        data = snapshots(20)
+        data['ts-bad'] = {'BTCUSDT': 0.0}
+        write_decision_batch(self.input_path, maker, data)
+
+        executor = LocalBatchExecutor(adapter, max_concurrency=4)
+        summary = executor.run(self.input_path, self.output_path)
+        self.assertEqual(summary, {'total': 21, 'skipped': 0, 'succeeded': 20, 'failed': 1})
+        self.assertLessEqual(executor.max_in_flight, 4)
+        self.assertGreater(executor.max_in_flight, 1)
+
+        decisions = ingest_decisions(self.output_path, maker, custom_ids=list(data) + ['ts-missing'])
+        self.assertEqual(decisions['ts-0005']['action'], 'BUY')
+        self.assertTrue(DecisionMaker.is_fallback(decisions['ts-bad']))
+        self.assertTrue(DecisionMaker.is_fallback(decisions['ts-missing']))
+
+    def test_03_resume(self):
+        """续跑时跳过已成功的请求，只重跑失败或未执行的请求"""
+        adapter = EchoAdapter(delay=0)
+        maker = DecisionMaker(adapter)
+        data = snapshots(5)
+        data['ts-bad'] = {'BTCUSDT': 0.0}
+        write_decision_batch(self.input_path, maker, data)
+
+        executor = LocalBatchExecutor(adapter)
+        executor.run(self.input_path, self.output_path)
+        adapter.prompts.clear()
+        summary = executor.run(self.input_path, self.output_path)
+        self.assertEqual(summary['skipped'], 5)
+        self.assertEqual(len(adapter.prompts), 1)
+        self.assertIsNone(read_batch_output(self.output_path)['ts-bad'])
+
+    def test_04_provider_output_and_submit(self):
+        """解析供应商结果文件（含 error 行），并通过兼容客户端提交批量任务"""
+        with open(self.output_path, 'w', encoding='utf-8') as f:
+            ok = {"id": "batch_req_1", "custom_id": "a", "error": None,
+                  "response": {"status_code": 200, "request_id": "r1",
+                               "body": {"choices": [{"message": {"role": "assistant", "content": "hi"}}]}}}
+            failed = {"id": "batch_req_2", "custom_id": "b", "response": {"status_code": 400, "body": {}},
+                      "error": None}
+            f.write(json.dumps(ok) + "\n" + json.dumps(failed) + "\n")
+        self.assertEqual(read_batch_output(self.output_path), {'a': 'hi', 'b': None})
+
+        calls = {}
+        client = SimpleNamespace(
+            files=SimpleNamespace(create=lambda file, purpose: calls.setdefault('file', SimpleNamespace(id="file-1"))),
+            batches=SimpleNamespace(create=lambda **kwargs: calls.setdefault('batch', SimpleNamespace(id="batch-1", **kwargs))),
+        )
+        write_batch_input(self.input_path, EchoAdapter(), [("a", "p")])
+        self.assertEqual(submit_batch(client, self.input_path), "batch-1")
+        self.assertEqual(calls['batch'].input_file_id, "file-1")
+        self.assertEqual(calls['batch'].endpoint, "/v1/chat/completions")
+
+    def test_05_claude_body_in_chat_format(self):
+        """Claude 的 Messages 格式请求转换为 chat.completions 格式，不带 cache_control"""
+        adapter = ClaudeAdapter(api_key="test", model="claude-sonnet-4-5")
+        write_batch_input(self.input_path, adapter, [("a", "prompt")])
+        body = next(iter_jsonl(self.input_path))['body']
+
+        self.assertNotIn('system', body)
+        self.assertEqual(body['messages'], [{"role": "system", "content": adapter.system_prompt},
+                                            {"role": "user", "content": "prompt"}])
+        self.assertEqual((body['model'], body['max_tokens']), ("claude-sonnet-4-5", adapter.max_tokens))
+        self.assertNotIn('cache_control', json.dumps(body))
+        self.assertEqual(LocalBatchExecutor.user_prompt(body), "prompt")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
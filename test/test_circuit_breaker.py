@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+熔断器单元测试
+使用可控的假时钟、假适配器与假客户端验证断开、跳过、半开探测与恢复
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import unittest
+from types import SimpleNamespace
+
+# 添加父目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from binance.error import ClientError
+
+from adapters.circuit_breaker import (CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitBreakerAdapter, CircuitOpenError,
+                                      load_breaker_states, save_breaker_states)
+from adapters.claude_adapter import ClaudeAdapter
+from adapters.exchange_api import ExchangeAPI, is_exchange_failure
+from adapters.openai_adapter import OpenAIAdapter
+from adapters.qwen_adapter import QwenAdapter
+from adapters.llm_base import FALLBACK_RESPONSE, LLMAdapter, load_system_prompt
+from adapters.rate_limiter import WeightRateLimiter
+from core.arena import DecisionArena
+from core.decision import DecisionMaker
+
+DECISION = '{"symbol": "BTC", "action": "BUY", "confidence": 0.8, "rationale": "test"}'
+
+
+class FakeClock:
+    """手动推进的时钟"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FlakyAdapter(LLMAdapter):
+    """down 为 True 时模拟供应商故障（适配器吞掉异常并返回默认响应）"""
+
+    def __init__(self, delay: float = 0.0):
+        super().__init__(api_key="test")
+        self.down = True
+        self.delay = delay
+        self.calls = 0
+
+    def call(self, prompt: str) -> str:
+        self.calls += 1
+        time.sleep(self.delay)
+        return FALLBACK_RESPONSE if self.down else DECISION
+
+    def get_model_name(self) -> str:
+        return "flaky"
+
+
+class HangingAdapter(LLMAdapter):
+    """异步调用一直等待，模拟响应过慢的供应商"""
+
+    def call(self, prompt: str) -> str:
+        return DECISION
+
+    async def acall(self, prompt: str) -> str:
+        await asyncio.sleep(10)
+        return DECISION
+
+    def get_model_name(self) -> str:
+        return "hanging"
+
+
+class FakeSpot:
+    """ticker_price 按 down 状态失败的假币安客户端"""
+
+    def __init__(self):
+        self.down = True
+        self.calls = 0
+
+    def ticker_price(self, symbol=None, symbols=None):
+        self.calls += 1
+        if self.down:
+            raise ConnectionError("binance unreachable")
+        return {'symbol': symbol, 'price': '65000.0'}
+
+    def ping(self):
+        if self.down:
+            raise ConnectionError("binance unreachable")
+        return {}
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """熔断器测试类"""
+
+    def test_01_opens_on_error_rate(self):
+        """窗口内错误率达到阈值后断开，断开期间调用被立即跳过"""
+        breaker = CircuitBreaker('test', failure_threshold=0.5, min_calls=4, window=10, clock=FakeClock())
+        for ok in (True, False, True):
+            breaker.record_success() if ok else breaker.record_failure()
+        self.assertEqual(breaker.state, CLOSED)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, OPEN)
+        self.assertFalse(breaker.allow())
+        with self.assertRaises(CircuitOpenError):
+            breaker.call(lambda: 1)
+        stats = breaker.get_stats()
+        self.assertEqual(stats['skipped'], 2)
+        self.assertEqual(stats['health'], 0.0)
+
+    def test_02_half_open_trial(self):
+        """无探测函数时，超时后只放行一次试探调用；失败则退避加倍，成功则闭合"""
+        clock = FakeClock()
+        breaker = CircuitBreaker('test', min_calls=2, open_timeout=10, clock=clock)
+        breaker.record_failure()
+        breaker.record_failure()
+        self.assertFalse(breaker.allow())
+
+        clock.now = 10
+        self.assertTrue(breaker.allow())
+        self.assertEqual(breaker.state, HALF_OPEN)
+        self.assertFalse(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, OPEN)
+
+        clock.now = 25
+        self.assertFalse(breaker.allow())
+        clock.now = 30
+        self.assertTrue(breaker.allow())
+        breaker.record_success(0.1)
+        self.assertEqual(breaker.state, CLOSED)
+        self.assertEqual(breaker.health_score(), 1.0)
+
+    def test_03_slow_calls_count_as_failures(self):
+        """超过慢调用阈值的成功调用计为失败"""
+        breaker = CircuitBreaker('test', min_calls=3, slow_call_threshold=1.0, clock=FakeClock())
+        breaker.record_success(0.2)
+        self.assertAlmostEqual(breaker.health_score(), 1.0)
+        breaker.record_success(5.0)
+        breaker.record_success(6.0)
+        self.assertEqual(breaker.state, OPEN)
+        self.assertAlmostEqual(breaker.get_stats()['avg_latency'], 11.2 / 3)
+
+    def test_04_adapter_skips_open_circuit(self):
+        """供应商故障时断开：后续调用不再等待，后台探测成功后自动恢复"""
+        inner = FlakyAdapter(delay=0.05)
+        adapter = CircuitBreakerAdapter(inner, min_calls=3, open_timeout=0.05)
+        for _ in range(3):
+            self.assertEqual(adapter.call("cycle"), FALLBACK_RESPONSE)
+        self.assertEqual(adapter.breaker.state, OPEN)
+
+        calls = inner.calls
+        start = time.perf_counter()
+        self.assertEqual(adapter.call("cycle"), FALLBACK_RESPONSE)
+        self.assertLess(time.perf_counter() - start, 0.01)
+        self.assertEqual(inner.calls, calls)
+
+        inner.down = False
+        deadline = time.time() + 2.0
+        while adapter.breaker.state != CLOSED and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(adapter.breaker.state, CLOSED)
+        self.assertEqual(adapter.call("cycle"), DECISION)
+        self.assertEqual(adapter.get_model_name(), "flaky")
+
+    def test_05_exchange_api_breaker(self):
+        """交易所不可用时熔断，价格请求立即返回 0.0；参数错误不计为故障"""
+        api = ExchangeAPI(rate_limiter=WeightRateLimiter())
+        spot = FakeSpot()
+        api.client = spot
+        api.breaker = CircuitBreaker('binance-spot', min_calls=3, open_timeout=0.05, probe=api._probe)
+
+        for symbol in ('BTCUSDT', 'ETHUSDT', 'SOLUSDT'):
+            self.assertEqual(api.get_current_price(symbol), 0.0)
+        self.assertEqual(api.breaker.state, OPEN)
+        calls = spot.calls
+        self.assertEqual(api.get_current_price('BNBUSDT'), 0.0)
+        self.assertEqual(spot.calls, calls)
+
+        spot.down = False
+        deadline = time.time() + 2.0
+        while api.breaker.state != CLOSED and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(api.get_current_price('BTCUSDT'), 65000.0)
+
+        self.assertFalse(is_exchange_failure(ClientError(400, -1121, "Invalid symbol.", {})))
+        self.assertTrue(is_exchange_failure(ClientError(429, -1003, "Too many requests.", {})))
+
+
+    def test_06_race_deadline_counts_as_failure(self):
+        """在竞技场截止时间被取消的调用计为失败；半开试探被取消时重新断开"""
+        clock = FakeClock()
+        adapter = CircuitBreakerAdapter(HangingAdapter(api_key="test"), background_probe=False,
+                                        min_calls=3, open_timeout=30.0, clock=clock)
+        arena = DecisionArena({'hanging': DecisionMaker(adapter)})
+        prices = {'BTCUSDT': 65000.0}
+
+        for _ in range(3):
+            self.assertEqual(arena.race(prices, deadline=0.05)['late'], ['hanging'])
+        stats = adapter.breaker.get_stats()
+        self.assertEqual((stats['state'], stats['error_rate'], stats['health']), (OPEN, 1.0, 0.0))
+
+        start = time.perf_counter()
+        self.assertEqual(arena.race(prices, deadline=0.05)['late'], [])
+        self.assertLess(time.perf_counter() - start, 0.05)
+
+        clock.now += 31
+        self.assertEqual(arena.race(prices, deadline=0.05)['late'], ['hanging'])
+        self.assertEqual(adapter.breaker.state, OPEN)
+
+    def test_07_state_persists_across_runs(self):
+        """每次运行只调用一次时，熔断器状态跨运行保存：累计失败后断开，下次运行跳过调用，超时后试探恢复"""
+        wall = FakeClock()
+        wall.now = 1_700_000_000.0
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "consensus_history_breakers.json")
+
+            def run(down: bool):
+                # 模拟一次 main.py 运行：新进程的单调时钟与适配器，加载状态、调用一次、保存
+                inner = FlakyAdapter()
+                inner.down = down
+                clock = FakeClock()
+                clock.now = wall.now % 1000
+                adapter = CircuitBreakerAdapter(inner, background_probe=False, clock=clock, wall_clock=wall)
+                load_breaker_states([adapter.breaker], path)
+                adapter.call("cycle")
+                save_breaker_states([adapter.breaker], path)
+                wall.now += 300
+                return inner.calls, adapter.breaker
+
+            for _ in range(4):
+                self.assertEqual(run(down=True)[1].state, CLOSED)
+            calls, breaker = run(down=True)
+            self.assertEqual((calls, breaker.state, breaker.opened_count), (1, OPEN, 1))
+
+            # 断开后的下一次运行在 open_timeout 之后，作为半开试探：仍失败则保持断开
+            calls, breaker = run(down=True)
+            self.assertEqual((calls, breaker.state), (1, OPEN))
+
+            wall.now -= 300 - 10  # 下一次运行距离上次不到 open_timeout，调用被跳过
+            calls, breaker = run(down=False)
+            self.assertEqual((calls, breaker.state, breaker.skipped), (0, OPEN, 1))
+
+            calls, breaker = run(down=False)
+            self.assertEqual((calls, breaker.state, breaker.health_score()), (1, CLOSED, 1.0))
+
+    def test_08_probe_is_minimal_request(self):
+        """后台探测不带系统提示词、只生成1个token；请求失败时探测返回 False"""
+        payloads = []
+
+        def create(**kwargs):
+            payloads.append(kwargs)
+            if len(payloads) > 3:
+                raise ConnectionError("down")
+            return SimpleNamespace()
+
+        endpoint = SimpleNamespace(create=create)
+        adapters = [QwenAdapter(api_key="test", model="qwen3-max", system_prompt=load_system_prompt()),
+                    OpenAIAdapter(api_key="test", model="gpt-4o", system_prompt=load_system_prompt()),
+                    ClaudeAdapter(api_key="test", model="claude-sonnet-4-5", system_prompt=load_system_prompt())]
+        adapters[0].client = adapters[1].client = SimpleNamespace(chat=SimpleNamespace(completions=endpoint))
+        adapters[2].client = SimpleNamespace(messages=endpoint)
+
+        for adapter in adapters:
+            self.assertTrue(CircuitBreakerAdapter(adapter)._probe())
+        for adapter, payload in zip(adapters, payloads):
+            self.assertEqual(payload, {"model": adapter.model, "max_tokens": 1,
+                                       "messages": [{"role": "user", "content": "ping"}]})
+        self.assertFalse(CircuitBreakerAdapter(adapters[0])._probe())
+        self.assertEqual(adapters[0].usage_totals['calls'], 0)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+共识引擎单元测试
+验证加权投票、上周期决策评估、滚动一致率矩阵、环形缓冲区覆盖与持久化
+"""
+
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+import numpy as np
+
+# 添加父目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.consensus import ConsensusEngine
+from core.decision_parser import Decision
+from core.trade_decision import TradeDecision
+
+
+def decision(symbol, action, confidence=0.8) -> Decision:
+    return Decision(symbol, action, confidence, "test")
+
+
+class TestConsensus(unittest.TestCase):
+    """共识引擎测试类"""
+
+    def test_01_weighted_vote(self):
+        """任意数量模型加权投票；默认决策不参与，HOLD 不区分币种"""
+        engine = ConsensusEngine()
+        decisions = {
+            'a': decision('BTCUSDT', 'BUY', 0.9),
+            'b': decision('BTCUSDT', 'BUY', 0.3),
+            'c': decision('ETHUSDT', 'SELL', 0.7),
+            'd': decision('ETHUSDT', 'HOLD', 0.5),
+            'e': TradeDecision.fallback("API调用失败"),
+        }
+        vote = engine.vote(decisions)
+        self.assertEqual((vote['symbol'], vote['action']), ('BTCUSDT', 'BUY'))
+        self.assertAlmostEqual(vote['share'], 1.2 / 2.4)
+        self.assertAlmostEqual(vote['confidence'], (0.9 * 0.9 + 0.3 * 0.3) / 1.2)
+        self.assertEqual(list(vote['support'])[0], ('BTCUSDT', 'BUY'))
+        self.assertIn((None, 'HOLD'), vote['support'])
+        self.assertEqual(engine.models, ['a', 'b', 'c', 'd', 'e'])
+
+        self.assertIsNone(engine.vote(decisions, min_share=0.6))
+        self.assertIsNone(engine.vote({'e': decisions['e'], 'f': None}))
+
+    def test_02_accuracy_weights(self):
+        """score() 用当前价格评估上周期决策，准确率高的模型权重更大"""
+        engine = ConsensusEngine(['good', 'bad'], prior_strength=1.0)
+        for i in range(10):
+            price = 100.0 + i
+            engine.score({'BTCUSDT': price})
+            engine.record({'good': decision('BTCUSDT', 'BUY'), 'bad': decision('BTCUSDT', 'SELL')},
+                          {'BTCUSDT': price})
+        results = engine.score({'BTCUSDT': 110.0})
+        self.assertEqual(results, {'good': True, 'bad': False})
+        accuracy = engine.accuracy()
+        self.assertAlmostEqual(accuracy[0], (10 + 0.5) / 11)
+        self.assertAlmostEqual(accuracy[1], 0.5 / 11)
+        # 置信度较低但一直正确的模型胜出
+        vote = engine.vote({'good': decision('ETHUSDT', 'BUY', 0.4), 'bad': decision('ETHUSDT', 'SELL', 0.9)})
+        self.assertEqual(vote['action'], 'BUY')
+        self.assertEqual(engine.score({'BTCUSDT': 111.0}), {})
+
+        engine.record({'good': decision(None, 'HOLD'), 'bad': decision('BTCUSDT', 'BUY')}, {'BTCUSDT': 110.0})
+        self.assertEqual(engine.score({'BTCUSDT': 110.05}), {'good': True, 'bad': False})
+
+    def test_03_agreement_matrix(self):
+        """滚动一致率与按窗口重新计算的结果一致；缓冲区覆盖后只统计保留的周期"""
+        rng = np.random.default_rng(7)
+        names = [f"m{i}" for i in range(6)]
+        options = [('BTCUSDT', 'BUY'), ('ETHUSDT', 'SELL'), (None, 'HOLD')]
+        engine = ConsensusEngine(names, capacity=50)
+        history = []
+        for _ in range(80):
+            picks = rng.integers(0, 4, size=len(names))
+            decisions = {name: decision(*options[p]) if p < 3 else None for name, p in zip(names, picks)}
+            history.append(picks)
+            engine.record(decisions)
+
+        kept = np.array(history[-50:])
+        expected = np.full((6, 6), np.nan)
+        for i in range(6):
+            for j in range(6):
+                both = (kept[:, i] < 3) & (kept[:, j] < 3)
+                if both.any():
+                    expected[i, j] = (kept[both, i] == kept[both, j]).mean()
+        np.testing.assert_allclose(engine.agreement_matrix(), expected)
+        np.testing.assert_allclose(engine.agreement_matrix(last=50), expected)
+
+        recent = kept[-10:]
+        both = (recent[:, 0] < 3) & (recent[:, 1] < 3)
+        self.assertAlmostEqual(engine.agreement_matrix(last=10)[0, 1], (recent[both, 0] == recent[both, 1]).mean())
+
+        valid = kept < 3
+        counted = valid.sum(axis=1) >= 2
+        unanimous = [len(set(row[ok])) == 1 for row, ok in zip(kept, valid)]
+        self.assertAlmostEqual(engine.unanimity_rate(), np.array(unanimous)[counted].mean())
+        self.assertEqual(engine.model_stats()['m0']['decisions'], int(valid[:, 0].sum()))
+
+    def test_04_save_load(self):
+        """保存后恢复的历史、滚动计数与待评估周期一致"""
+        engine = ConsensusEngine(['a', 'b'], capacity=5)
+        for i in range(8):
+            engine.record({'a': decision('BTCUSDT', 'BUY'), 'b': decision('BTCUSDT', 'BUY' if i % 2 else 'SELL')},
+                          {'BTCUSDT': 100.0 + i})
+            if i < 7:
+                engine.score({'BTCUSDT': 101.0 + i})
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "consensus.npz")
+            engine.save(path)
+            loaded = ConsensusEngine.load(path)
+        self.assertEqual((loaded.models, loaded.options, loaded.cycles), (engine.models, engine.options, 8))
+        np.testing.assert_allclose(loaded.agreement_matrix(), engine.agreement_matrix())
+        np.testing.assert_allclose(loaded.accuracy(), engine.accuracy())
+        self.assertEqual(loaded.score({'BTCUSDT': 120.0}), engine.score({'BTCUSDT': 120.0}))
+
+    def test_05_statistics_cost(self):
+        """90天的5分钟周期 × 40个模型的统计在毫秒级"""
+        engine = ConsensusEngine([f"m{i}" for i in range(40)])
+        for option in [('BTCUSDT', 'BUY'), ('BTCUSDT', 'SELL'), ('ETHUSDT', 'BUY'), (None, 'HOLD')]:
+            engine.encode(decision(*option))
+        rng = np.random.default_rng(0)
+        engine._codes[:] = rng.integers(-1, 4, size=engine._codes.shape)
+        engine.cycles = engine.capacity
+
+        start = time.perf_counter()
+        matrix = engine.agreement_matrix(last=engine.capacity)
+        engine.unanimity_rate()
+        engine.accuracy(last=engine.capacity)
+        elapsed = time.perf_counter() - start
+        self.assertEqual(matrix.shape, (40, 40))
+        self.assertLess(elapsed, 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
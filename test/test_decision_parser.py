@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+决策解析器单元测试
+验证任意位置的JSON提取、预编译字段规则与 __slots__ 决策对象
+"""
+
+import io
+import os
+import sys
+import unittest
+from contextlib import redirect_stdout
+
+# 添加父目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from adapters.llm_base import FALLBACK_RESPONSE, LLMAdapter
+from core.decision import DecisionMaker
+from core.decision_parser import Decision, DecisionParser, extract_json_object
+
+DECISION = '{"symbol": "BTCUSDT", "action": "BUY", "confidence": 0.8, "rationale": "突破 {阻力位}"}'
+
+
+class StubAdapter(LLMAdapter):
+    """只用于构造 DecisionMaker 的假适配器"""
+
+    def call(self, prompt: str) -> str:
+        return FALLBACK_RESPONSE
+
+    def get_model_name(self) -> str:
+        return "stub"
+
+
+class TestDecisionParser(unittest.TestCase):
+    """决策解析器测试类"""
+
+    def test_01_extract_anywhere(self):
+        """代码块、前置说明、追加解释、<think> 推理段与包装对象中都能找到决策"""
+        expected = {'symbol': 'BTCUSDT', 'action': 'BUY', 'confidence': 0.8, 'rationale': '突破 {阻力位}'}
+        responses = [
+            DECISION,
+            f"```json\n{DECISION}\n```",
+            f"```\n{DECISION}\n```\n以上为决策。",
+            f"好的，根据 {{当前}} 行情，我的决策如下：\n{DECISION}\n注意：仅供参考。",
+            f"<think>先考虑 {{\"action\": \"SELL\"}} 的可能</think>\n{DECISION}",
+            f'{{"decision": {DECISION}}}',
+        ]
+        parser = DecisionParser()
+        for text in responses:
+            decision = parser.parse(text)
+            self.assertIsNotNone(decision, text)
+            self.assertEqual(decision, expected)
+        self.assertIsNone(extract_json_object("没有JSON {也没有闭合"))
+
+    def test_02_schema_rules(self):
+        """action/confidence 规范化，缺少字段时失败并记录原因"""
+        parser = DecisionParser()
+        decision = parser.parse('{"symbol": "null", "action": " buy ", "confidence": "0.7", "rationale": 1}')
+        self.assertEqual(decision.to_dict(), {'symbol': None, 'action': 'BUY', 'confidence': 0.7, 'rationale': '1'})
+
+        decision = parser.parse('{"symbol": "ETHUSDT", "action": "LONG", "confidence": 3, "rationale": "x"}')
+        self.assertEqual((decision.action, decision.confidence), ('HOLD', 0.5))
+
+        self.assertIsNone(parser.parse('{"symbol": "ETHUSDT", "action": "BUY", "confidence": 0.6}'))
+        self.assertIn("rationale", parser.last_error)
+        self.assertIsNone(parser.parse('{"symbol": ["BTC"], "action": "BUY", "confidence": 0.6, "rationale": "x"}'))
+        self.assertIsNone(parser.parse(""))
+        self.assertEqual((parser.parsed, parser.failed), (2, 3))
+
+    def test_03_slots_decision(self):
+        """决策对象无 __dict__，支持字典式读取与修改"""
+        decision = Decision("BTCUSDT", "SELL", 0.6, "test")
+        self.assertFalse(hasattr(decision, '__dict__'))
+        self.assertEqual(decision['action'], 'SELL')
+        self.assertEqual(decision.get('missing', 'x'), 'x')
+        self.assertIn('confidence', decision)
+        decision['action'] = 'HOLD'
+        self.assertEqual(decision.action, 'HOLD')
+        with self.assertRaises(KeyError):
+            decision['other'] = 1
+        self.assertEqual(decision.to_dict(), {'symbol': 'BTCUSDT', 'action': 'HOLD',
+                                              'confidence': 0.6, 'rationale': 'test'})
+
+    def test_04_decision_maker_silent_fallback(self):
+        """DecisionMaker 解析失败时返回默认决策且不输出"""
+        maker = DecisionMaker(StubAdapter(api_key="test"))
+        output = io.StringIO()
+        with redirect_stdout(output):
+            decision = maker.parse_decision("抱歉，我无法给出决策。")
+        self.assertEqual(output.getvalue(), "")
+        self.assertTrue(DecisionMaker.is_fallback(decision))
+        self.assertEqual(maker.parser.last_error, "未找到决策JSON")
+        self.assertTrue(DecisionMaker.is_fallback(maker.parse_decision(FALLBACK_RESPONSE)))
+        self.assertEqual(maker.parse_decision(DECISION).symbol, 'BTCUSDT')
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+对冲请求单元测试
+使用本地延迟可控的假客户端代替币安主机
+"""
+
+import os
+import sys
+import time
+import unittest
+
+# 添加父目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from adapters.hedging import HedgedRequester
+
+
+class FakeHost:
+    """按固定延迟返回的假主机"""
+
+    def __init__(self, name: str, delay: float, fail: bool = False):
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+
+    def ticker_price(self, symbol=None, symbols=None):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError(f"{self.name} down")
+        return {'symbol': symbol, 'price': '100.0', 'host': self.name}
+
+
+class TestHedgedRequester(unittest.TestCase):
+    """对冲请求测试类"""
+
+    def test_01_fast_primary_no_hedge(self):
+        """主机在对冲延迟内返回时不发送副本"""
+        hosts = {'a': FakeHost('a', 0.0), 'b': FakeHost('b', 0.0)}
+        hedger = HedgedRequester(hosts, default_delay=0.2)
+        result = hedger.call('ticker_price', 2, 'BTCUSDT')
+        self.assertEqual(result['price'], '100.0')
+        self.assertEqual(hedger.hedges_sent, 0)
+        self.assertEqual(hosts['a'].calls + hosts['b'].calls, 1)
+
+    def test_02_slow_primary_is_hedged(self):
+        """主机过慢时由备用主机先返回，总耗时接近 对冲延迟 + 备用延迟"""
+        hosts = {'slow': FakeHost('slow', 1.0), 'fast': FakeHost('fast', 0.01)}
+        hedger = HedgedRequester(hosts, default_delay=0.05)
+        hedger.ranked_hosts = lambda: ['slow', 'fast']
+
+        start = time.perf_counter()
+        result = hedger.call('ticker_price', 2, 'BTCUSDT')
+        self.assertEqual(result['host'], 'fast')
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual(hedger.hedges_won, 1)
+
+    def test_03_fastest_host_becomes_primary(self):
+        """积累统计后延迟最低的主机成为主机"""
+        hosts = {'slow': FakeHost('slow', 0.05), 'fast': FakeHost('fast', 0.0)}
+        hedger = HedgedRequester(hosts, default_delay=0.5, min_samples=3)
+        for _ in range(3):
+            hedger._timed_call('slow', 'ticker_price', ('BTCUSDT',), {})
+            hedger._timed_call('fast', 'ticker_price', ('BTCUSDT',), {})
+        self.assertEqual(hedger.ranked_hosts()[0], 'fast')
+        self.assertLess(hedger.hedge_delay('fast'), 0.05)
+
+    def test_04_failed_primary_falls_back(self):
+        """主机失败时使用备用主机的结果，并记录错误"""
+        hosts = {'down': FakeHost('down', 0.0, fail=True), 'up': FakeHost('up', 0.0)}
+        hedger = HedgedRequester(hosts, default_delay=0.5)
+        hedger.ranked_hosts = lambda: ['down', 'up']
+        self.assertEqual(hedger.call('ticker_price', 2, 'BTCUSDT')['host'], 'up')
+        self.assertEqual(hedger.get_stats()['down']['errors'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
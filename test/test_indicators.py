@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+技术指标引擎单元测试
+验证批量计算、增量更新与 pandas 参考实现（TradingDataFetcher.calculate_*）结果一致
+"""
+
+import os
+import sys
+import unittest
+
+import numpy as np
+import pandas as pd
+
+# 添加父目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.data_fetcher import TradingDataFetcher
+from data.indicators import IndicatorEngine, stack_series
+
+
+def random_ohlc(n_symbols: int, n_bars: int, seed: int = 7):
+    """生成随机游走的OHLC数据"""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (n_symbols, n_bars)), axis=1))
+    high = close * (1 + rng.uniform(0, 0.01, close.shape))
+    low = close * (1 - rng.uniform(0, 0.01, close.shape))
+    return high, low, close
+
+
+class TestIndicatorEngine(unittest.TestCase):
+    """指标引擎测试类"""
+
+    def setUp(self):
+        self.engine = IndicatorEngine()
+        self.high, self.low, self.close = random_ohlc(8, 300)
+
+    def reference(self, i: int):
+        df = pd.DataFrame({'high': self.high[i], 'low': self.low[i], 'close': self.close[i]})
+        macd, signal, hist = TradingDataFetcher.calculate_macd(df)
+        return {
+            'ema20': TradingDataFetcher.calculate_ema(df['close'], 20),
+            'ema50': TradingDataFetcher.calculate_ema(df['close'], 50),
+            'macd': macd,
+            'macd_signal': signal,
+            'macd_hist': hist,
+            'rsi14': TradingDataFetcher.calculate_rsi(df['close'], 14),
+            'atr3': TradingDataFetcher.calculate_atr(df, 3),
+            'atr14': TradingDataFetcher.calculate_atr(df, 14),
+        }
+
+    def test_01_batch_matches_reference(self):
+        """批量计算与逐序列 pandas 参考实现一致"""
+        results, _ = self.engine.compute(self.high, self.low, self.close)
+        for i in range(self.close.shape[0]):
+            for name, expected in self.reference(i).items():
+                np.testing.assert_allclose(results[name][i], expected.to_numpy(),
+                                           rtol=1e-12, atol=1e-12, equal_nan=True, err_msg=name)
+
+    def test_02_incremental_matches_full(self):
+        """增量更新与完整重算结果一致"""
+        warmup = 200
+        _, state = self.engine.compute(self.high[:, :warmup], self.low[:, :warmup], self.close[:, :warmup])
+        for t in range(warmup, self.close.shape[1]):
+            latest = self.engine.update(state, self.high[:, t], self.low[:, t], self.close[:, t])
+
+        full, _ = self.engine.compute(self.high, self.low, self.close)
+        for name, values in latest.items():
+            np.testing.assert_allclose(values, full[name][:, -1], rtol=1e-12, atol=1e-12, err_msg=name)
+
+    def test_03_ragged_histories(self):
+        """历史长度不同的交易对左侧补 NaN 后结果与单独计算一致"""
+        short = 120
+        stacked = [stack_series([self.high[0], self.high[1, -short:]]),
+                   stack_series([self.low[0], self.low[1, -short:]]),
+                   stack_series([self.close[0], self.close[1, -short:]])]
+        results, _ = self.engine.compute(*stacked)
+        alone, _ = self.engine.compute(self.high[1:2, -short:], self.low[1:2, -short:], self.close[1:2, -short:])
+        for name in ('ema50', 'macd_hist', 'rsi14', 'atr14'):
+            np.testing.assert_allclose(results[name][1, -short:], alone[name][0], rtol=1e-12, err_msg=name)
+
+    def test_04_rsi_range(self):
+        """RSI 取值在 [0, 100]"""
+        results, _ = self.engine.compute(self.high, self.low, self.close)
+        rsi = results['rsi14'][:, 1:]
+        self.assertTrue(((rsi >= 0) & (rsi <= 100)).all())
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PostgreSQL 交易日志单元测试
+行组装与 COPY 编码不需要数据库；写入与查询测试需要本地 PostgreSQL（连接参数见 data/journal.dsn_from_env），
+连接失败时跳过
+"""
+
+import os
+import sys
+import time
+import unittest
+from datetime import datetime, timedelta, timezone
+
+# 添加父目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.decision_parser import Decision
+from core.trade_decision import TradeDecision
+from data.journal import TradingJournal, copy_buffer, cycle_rows, dsn_from_env, prompt_hash
+
+
+def postgres_available() -> bool:
+    try:
+        import psycopg2
+        psycopg2.connect(connect_timeout=2, **dsn_from_env()).close()
+        return True
+    except Exception:
+        return False
+
+
+POSTGRES = postgres_available()
+TS = datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+class TestJournalRows(unittest.TestCase):
+    """行组装与 COPY 编码测试类"""
+
+    def test_01_copy_encoding(self):
+        """None 编码为 \\N，制表符、换行与反斜杠转义，布尔值为 t/f"""
+        buffer = copy_buffer([(None, True, 'a\tb\nc\\d', 1.5, TS), ('', False, '', 0, None)])
+        lines = buffer.getvalue().split('\n')
+        self.assertEqual(lines[0], '\\N\tt\ta\\tb\\nc\\\\d\t1.5\t2025-01-01T12:00:00+00:00')
+        self.assertEqual(lines[1], '\tf\t\t0\t\\N')
+        self.assertEqual(lines[2], '')
+
+    def test_02_cycle_rows(self):
+        """同一提示词只保留一份，默认决策被标记，决策序列化为JSON"""
+        prompt = "当前价格 BTCUSDT 65000"
+        decisions = {
+            'qwen': Decision('BTCUSDT', 'BUY', 0.8, 'up'),
+            'deepseek': TradeDecision.fallback("API调用失败"),
+        }
+        cycle, prompts, rows = cycle_rows(
+            'id-1', TS, {'prices': {'BTCUSDT': 65000.0}}, decisions,
+            prompts={'qwen': prompt, 'deepseek': prompt}, responses={'qwen': '{"action": "BUY"}'},
+            latencies={'qwen': 1.2},
+        )
+        self.assertEqual(cycle, ('id-1', TS, '{"prices": {"BTCUSDT": 65000.0}}'))
+        self.assertEqual(prompts, {prompt_hash(prompt): prompt})
+        qwen, deepseek = rows
+        self.assertEqual(qwen[2:10], ('qwen', prompt_hash(prompt), '{"action": "BUY"}', 1.2,
+                                      'BTCUSDT', 'BUY', 0.8, False))
+        self.assertEqual(deepseek[4:10], (None, None, None, 'HOLD', None, True))
+        self.assertIn('"justification": "API调用失败"', deepseek[10])
+
+
+@unittest.skipUnless(POSTGRES, "本地 PostgreSQL 不可用")
+class TestTradingJournal(unittest.TestCase):
+    """交易日志写入与查询测试类（需要本地 PostgreSQL）"""
+
+    def setUp(self):
+        self.journal = TradingJournal(table_prefix=f"test_journal_{os.getpid()}", flush_interval=0.05)
+
+    def tearDown(self):
+        self.journal.flush()
+        self.journal.drop_tables()
+        self.journal.close()
+
+    def test_01_log_and_query(self):
+        """批量写入后按模型与时间范围查询，提示词通过哈希关联"""
+        models = [f"model-{i}" for i in range(20)]
+        ids = []
+        for i in range(5):
+            decisions = {name: Decision('BTCUSDT', 'BUY' if i % 2 else 'SELL', 0.6, f"第{i}周期")
+                         for name in models}
+            ids.append(self.journal.log_cycle({'prices': {'BTCUSDT': 65000.0 + i}}, decisions,
+                                              prompts={name: f"prompt {i}" for name in models},
+                                              responses={name: 'raw\tresponse\n' for name in models},
+                                              ts=TS + timedelta(minutes=5 * i)))
+        self.journal.flush()
+        self.assertEqual(self.journal.get_stats()['errors'], 0, self.journal.last_error)
+
+        rows = self.journal.decisions(model='model-3')
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]['action'], 'SELL')
+        self.assertEqual((rows[0]['prompt'], rows[0]['response']), ("prompt 4", 'raw\tresponse\n'))
+        self.assertEqual(rows[0]['decision']['rationale'], "第4周期")
+
+        window = self.journal.decisions(start=TS + timedelta(minutes=5), end=TS + timedelta(minutes=15))
+        self.assertEqual(len(window), 2 * len(models))
+        self.assertEqual(self.journal.snapshot(ids[2]), {'prices': {'BTCUSDT': 65002.0}})
+
+    def test_02_log_cycle_latency(self):
+        """log_cycle 只入队：几十个模型的周期在毫秒内返回"""
+        decisions = {f"model-{i}": Decision('ETHUSDT', 'HOLD', 0.5, "x" * 200) for i in range(40)}
+        prompts = {name: "p" * 20000 for name in decisions}
+        start = time.perf_counter()
+        for _ in range(10):
+            self.journal.log_cycle({'prices': {'ETHUSDT': 3200.0}}, decisions, prompts=prompts)
+        per_cycle = (time.perf_counter() - start) / 10
+        self.journal.flush()
+        self.assertLess(per_cycle, 0.01)
+        self.assertEqual(len(self.journal.decisions(limit=50)), 50)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
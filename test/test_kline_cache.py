@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+K线增量缓存单元测试
+使用本地生成的K线与虚拟时钟，验证每个周期只请求新K线
+"""
+
+import os
+import sys
+import unittest
+
+# 添加父目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.kline_cache import KlineCache, INTERVAL_MS
+
+
+class FakeExchange:
+    """按虚拟时钟生成K线的本地交易所替身，记录每次请求"""
+
+    def __init__(self, now_ms: int):
+        self.now_ms = now_ms
+        self.requests = []
+
+    def bar(self, open_time: int, interval_ms: int):
+        price = float(open_time // interval_ms % 1000)
+        return [open_time, price, price + 2, price - 1, price + 1, 10.0,
+                open_time + interval_ms - 1]
+
+    def klines(self, symbol, interval, limit, start_time=None):
+        self.requests.append((symbol, interval, limit, start_time))
+        interval_ms = INTERVAL_MS[interval]
+        current = self.now_ms // interval_ms * interval_ms
+        if start_time is None:
+            start_time = current - (limit - 1) * interval_ms
+        rows = []
+        t = start_time
+        while t <= current and len(rows) < limit:
+            rows.append(self.bar(t, interval_ms))
+            t += interval_ms
+        return rows
+
+
+class TestKlineCache(unittest.TestCase):
+    """K线缓存测试类"""
+
+    def setUp(self):
+        self.exchange = FakeExchange(now_ms=1_700_000_000_000)
+        self.cache = KlineCache(self.exchange.klines, capacity=200,
+                                clock=lambda: self.exchange.now_ms / 1000)
+
+    def test_01_cold_start_full_fetch(self):
+        """冷启动全量拉取 limit 条"""
+        open_time, ohlcv = self.cache.get('BTCUSDT', '5m', 100)
+        self.assertEqual(len(open_time), 100)
+        self.assertEqual(ohlcv.shape, (100, 5))
+        self.assertEqual(self.exchange.requests, [('BTCUSDT', '5m', 100, None)])
+
+    def test_02_incremental_fetch_only_new_bars(self):
+        """下一个周期只请求最后一根已收盘K线之后的数据"""
+        first_times, _ = self.cache.get('BTCUSDT', '5m', 100)
+        self.exchange.now_ms += 5 * 60_000
+
+        open_time, ohlcv = self.cache.get('BTCUSDT', '5m', 100)
+        symbol, interval, limit, start_time = self.exchange.requests[-1]
+        self.assertEqual(start_time, int(first_times[-1]))  # 上次未收盘的K线被替换
+        self.assertLessEqual(limit, 2)
+
+        # 与全量拉取的结果完全一致
+        expected = self.exchange.klines('BTCUSDT', '5m', 100)
+        self.assertEqual(list(open_time), [row[0] for row in expected])
+        self.assertEqual(ohlcv.tolist(), [row[1:6] for row in expected])
+
+    def test_03_many_cycles_keep_window(self):
+        """连续多个周期后窗口长度与内容保持正确"""
+        for _ in range(300):
+            self.exchange.now_ms += 5 * 60_000
+            open_time, _ = self.cache.get('ETHUSDT', '5m', 50)
+        self.assertEqual(len(open_time), 50)
+        expected = self.exchange.klines('ETHUSDT', '5m', 50)
+        self.assertEqual(list(open_time), [row[0] for row in expected])
+        full_fetches = [r for r in self.exchange.requests if r[3] is None]
+        self.assertEqual(len(full_fetches), 2)  # 首次 + 上面 expected 的比对请求
+
+    def test_04_larger_limit_refetches(self):
+        """请求条数超过已缓存的条数时重新全量拉取"""
+        self.cache.get('SOLUSDT', '15m', 20)
+        open_time, _ = self.cache.get('SOLUSDT', '15m', 80)
+        self.assertEqual(len(open_time), 80)
+        self.assertEqual(self.exchange.requests[-1][3], None)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地K线存储单元测试
+验证幂等批量写入、跨月份分区的区间读取、断点续传补齐历史以及 KlineCache 热启动
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+# 添加父目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.kline_cache import INTERVAL_MS, KlineCache
+from data.kline_store import KlineStore, partition_key
+
+# 2025-01-31 23:00 UTC，5分钟K线在一小时后跨入2月分区
+START = 1_738_364_400_000
+STEP = INTERVAL_MS['5m']
+
+
+class FakeExchange:
+    """按虚拟时钟生成K线的本地交易所替身，记录每次请求"""
+
+    def __init__(self, now_ms: int):
+        self.now_ms = now_ms
+        self.requests = []
+
+    def klines(self, symbol, interval, limit, start_time=None):
+        self.requests.append((symbol, interval, limit, start_time))
+        interval_ms = INTERVAL_MS[interval]
+        current = self.now_ms // interval_ms * interval_ms
+        if start_time is None:
+            start_time = current - (limit - 1) * interval_ms
+        rows = []
+        t = start_time
+        while t <= current and len(rows) < limit:
+            price = float(t // interval_ms % 1000)
+            rows.append([t, price, price + 2, price - 1, price + 1, 10.0, t + interval_ms - 1])
+            t += interval_ms
+        return rows
+
+
+def bars(n: int, start: int = START, offset: float = 0.0):
+    open_time = start + np.arange(n, dtype=np.int64) * STEP
+    close = np.arange(n, dtype=np.float64) + 100 + offset
+    ohlcv = np.column_stack([close - 1, close + 1, close - 2, close, np.full(n, 5.0)])
+    return open_time, ohlcv
+
+
+class TestKlineStore(unittest.TestCase):
+    """K线存储测试类"""
+
+    def test_01_idempotent_upsert(self):
+        """重复写入不产生重复行，相同主键的数据被覆盖"""
+        store = KlineStore()
+        open_time, ohlcv = bars(30)
+        store.upsert('BTCUSDT', '5m', open_time, ohlcv)
+        store.upsert('BTCUSDT', '5m', open_time, ohlcv)
+        t, data = store.read('BTCUSDT', '5m')
+        np.testing.assert_array_equal(t, open_time)
+        np.testing.assert_array_equal(data, ohlcv)
+
+        _, updated = bars(5, start=int(open_time[-5]), offset=1000)
+        store.upsert('BTCUSDT', '5m', open_time[-5:], updated)
+        t, data = store.read('BTCUSDT', '5m')
+        self.assertEqual(len(t), 30)
+        np.testing.assert_array_equal(data[-5:], updated)
+        self.assertEqual(len(store.read('ETHUSDT', '5m')[0]), 0)
+        with self.assertRaises(ValueError):
+            store.upsert('BTCUSDT', '7m', open_time, ohlcv)
+
+    def test_02_partitioned_range_reads(self):
+        """按月份分区存放；区间与 limit 读取跨分区时结果连续且为升序数组"""
+        store = KlineStore()
+        open_time, ohlcv = bars(24)
+        store.upsert('BTCUSDT', '5m', open_time, ohlcv)
+        self.assertEqual(store._partitions['5m'], [202501, 202502])
+        self.assertEqual(partition_key(START), 202501)
+
+        t, data = store.read('BTCUSDT', '5m', start=int(open_time[6]), end=int(open_time[18]))
+        np.testing.assert_array_equal(t, open_time[6:18])
+        self.assertEqual((t.dtype, data.dtype, data.shape, data.flags['C_CONTIGUOUS']),
+                         (np.dtype(np.int64), np.dtype(np.float64), (12, 5), True))
+
+        t, data = store.read('BTCUSDT', '5m', limit=15)
+        np.testing.assert_array_equal(t, open_time[-15:])
+        np.testing.assert_array_equal(data, ohlcv[-15:])
+        self.assertEqual(store.last_open_time('BTCUSDT', '5m'), int(open_time[-1]))
+
+    def test_03_backfill_resumes(self):
+        """补齐历史按最大条数分页，再次调用只请求断点之后的数据"""
+        now_ms = START + 2500 * STEP
+        exchange = FakeExchange(now_ms)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "klines.sqlite")
+            store = KlineStore(path)
+            written = store.backfill(exchange.klines, 'BTCUSDT', '5m', START, START + 2100 * STEP,
+                                     clock=lambda: now_ms / 1000)
+            self.assertEqual(written, 2100)
+            self.assertEqual(len(exchange.requests), 3)
+            store.close()
+
+            # 重新打开文件：分区从数据库恢复，只补齐剩余已收盘的K线
+            store = KlineStore(path)
+            exchange.requests.clear()
+            written = store.backfill(exchange.klines, 'BTCUSDT', '5m', START, clock=lambda: now_ms / 1000)
+            self.assertEqual(written, 400)
+            self.assertEqual(exchange.requests[0][3], START + 2100 * STEP)
+            self.assertEqual(len(store.read('BTCUSDT', '5m')[0]), 2500)
+            store.close()
+
+    def test_04_kline_cache_warm_start(self):
+        """冷启动结果写入存储；新进程的缓存从存储读取历史，只增量请求新K线"""
+        exchange = FakeExchange(now_ms=START + 300 * STEP + 1000)
+        store = KlineStore()
+        cold = KlineCache(exchange.klines, capacity=200, clock=lambda: exchange.now_ms / 1000, store=store)
+        cold_time, cold_data = cold.get('BTCUSDT', '5m', 100)
+        self.assertEqual(len(store.read('BTCUSDT', '5m')[0]), 99)
+
+        exchange.now_ms += 3 * STEP
+        exchange.requests.clear()
+        warm = KlineCache(exchange.klines, capacity=200, clock=lambda: exchange.now_ms / 1000, store=store)
+        open_time, ohlcv = warm.get('BTCUSDT', '5m', 100)
+        self.assertEqual(exchange.requests, [('BTCUSDT', '5m', 4, int(cold_time[-2]) + STEP)])
+        np.testing.assert_array_equal(open_time[:-3], cold_time[3:])
+        np.testing.assert_array_equal(open_time, np.arange(int(cold_time[3]), int(cold_time[-1]) + 4 * STEP, STEP))
+        self.assertEqual(len(store.read('BTCUSDT', '5m')[0]), 102)
+
+        # 存储中的历史不足 limit 时仍全量拉取
+        exchange.requests.clear()
+        KlineCache(exchange.klines, store=store, clock=lambda: exchange.now_ms / 1000).get('BTCUSDT', '5m', 300)
+        self.assertEqual(exchange.requests[0][3], None)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LLM响应缓存单元测试
+使用计数假适配器与虚拟时钟验证命中、持久化、TTL与容量淘汰
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import unittest
+
+# 添加父目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from adapters.llm_base import LLMAdapter, FALLBACK_RESPONSE
+from adapters.llm_cache import CachedLLMAdapter, ResponseCache
+
+
+class CountingAdapter(LLMAdapter):
+    """记录调用次数的假适配器"""
+
+    def __init__(self, name: str = "fake", fail: bool = False):
+        super().__init__(api_key="test")
+        self.name = name
+        self.fail = fail
+        self.calls = 0
+
+    def call(self, prompt: str) -> str:
+        self.calls += 1
+        if self.fail:
+            return FALLBACK_RESPONSE
+        return '{"symbol": "BTCUSDT", "action": "BUY", "confidence": 0.7, "rationale": "%s"}' % prompt
+
+    def get_model_name(self) -> str:
+        return self.name
+
+
+class VirtualClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestResponseCache(unittest.TestCase):
+    """LLM响应缓存测试类"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "llm_cache.sqlite")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_01_hit_and_key_params(self):
+        """相同提示词命中缓存；模型或采样参数不同则不命中"""
+        cache = ResponseCache()
+        adapter = CountingAdapter()
+        cached = CachedLLMAdapter(adapter, cache)
+
+        first = cached.call("p1")
+        self.assertEqual(cached.call("p1"), first)
+        self.assertEqual(asyncio.run(cached.acall("p1")), first)
+        self.assertEqual(adapter.calls, 1)
+
+        adapter.temperature = 0.1
+        cached.call("p1")
+        self.assertEqual(adapter.calls, 2)
+
+        other = CachedLLMAdapter(CountingAdapter(name="other"), cache)
+        other.call("p1")
+        self.assertEqual(other.adapter.calls, 1)
+        self.assertEqual(cache.hits, 2)
+        self.assertEqual(cached.get_model_name(), "fake")
+
+    def test_02_persistent_across_instances(self):
+        """磁盘存储在新进程（新实例）中仍然命中，且失败响应不缓存"""
+        cache = ResponseCache(self.path)
+        CachedLLMAdapter(CountingAdapter(), cache).call("p1")
+        failing = CachedLLMAdapter(CountingAdapter(fail=True), cache)
+        failing.call("p2")
+        cache.close()
+
+        reopened = ResponseCache(self.path)
+        adapter = CountingAdapter()
+        cached = CachedLLMAdapter(adapter, reopened)
+        cached.call("p1")
+        self.assertEqual(adapter.calls, 0)
+        cached.call("p2")
+        self.assertEqual(adapter.calls, 1)
+        reopened.close()
+
+    def test_03_ttl_expiry(self):
+        """超过TTL的条目在内存与磁盘中均失效"""
+        clock = VirtualClock()
+        cache = ResponseCache(self.path, ttl=60, clock=clock)
+        adapter = CountingAdapter()
+        cached = CachedLLMAdapter(adapter, cache)
+
+        cached.call("p1")
+        clock.now += 30
+        cached.call("p1")
+        self.assertEqual(adapter.calls, 1)
+
+        clock.now += 31
+        cached.call("p1")
+        self.assertEqual(adapter.calls, 2)
+        cache.close()
+
+    def test_04_size_eviction(self):
+        """内存LRU与磁盘都按容量淘汰最久未访问的条目"""
+        clock = VirtualClock()
+        cache = ResponseCache(self.path, max_entries=2, max_disk_entries=3, clock=clock)
+        adapter = CountingAdapter()
+        cached = CachedLLMAdapter(adapter, cache)
+
+        for prompt in ["a", "b", "c"]:
+            cached.call(prompt)
+            clock.now += 1
+        self.assertEqual(len(cache._memory), 2)
+
+        # "a" 只在磁盘中，读取后刷新访问时间
+        cached.call("a")
+        clock.now += 1
+        self.assertEqual(adapter.calls, 3)
+
+        cached.call("d")  # 磁盘超出容量，淘汰最久未访问的 "b"
+        cache._memory.clear()
+        cached.call("b")
+        self.assertEqual(adapter.calls, 5)
+        cached.call("a")
+        self.assertEqual(adapter.calls, 5)
+        cache.close()
+
+    def test_05_batched_access_time(self):
+        """磁盘命中的访问时间批量写回，关闭时不丢失"""
+        clock = VirtualClock()
+        cache = ResponseCache(self.path, max_entries=1, clock=clock)
+        cached = CachedLLMAdapter(CountingAdapter(), cache)
+        cached.call("a")
+        cached.call("b")
+
+        clock.now += 10
+        cached.call("a")
+        self.assertEqual(cache._touched, {cached._key("a"): clock.now})
+        cache.close()
+
+        reopened = ResponseCache(self.path)
+        accessed = dict(reopened._db.execute("SELECT key, accessed_at FROM llm_cache").fetchall())
+        self.assertEqual(accessed[cached._key("a")], clock.now)
+        reopened.close()
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+列式OHLCV归档单元测试
+验证追加去重、内存映射的零拷贝区间切片、中断写入恢复以及其他进程追加后的重新映射
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+# 添加父目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.indicators import IndicatorEngine
+from data.kline_cache import INTERVAL_MS
+from data.ohlcv_archive import OHLCVArchive
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+START = 1_700_000_000_000
+STEP = INTERVAL_MS['1m']
+
+
+def bars(n: int, start: int = START):
+    open_time = start + np.arange(n, dtype=np.int64) * STEP
+    close = 100 + np.sin(np.arange(n) / 10.0) + np.arange(n) * 0.01
+    ohlcv = np.column_stack([close - 0.1, close + 0.5, close - 0.5, close, np.full(n, 3.0)])
+    return open_time, ohlcv
+
+
+class TestOHLCVArchive(unittest.TestCase):
+    """列式归档测试类"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.archive = OHLCVArchive(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_01_append_and_dedup(self):
+        """追加只写入更晚的K线；重复追加不改变数据"""
+        open_time, ohlcv = bars(100)
+        self.assertEqual(self.archive.append('BTCUSDT', '1m', open_time[:60], ohlcv[:60]), 60)
+        self.assertEqual(self.archive.append('BTCUSDT', '1m', open_time[40:], ohlcv[40:]), 40)
+        self.assertEqual(self.archive.append('BTCUSDT', '1m', open_time, ohlcv), 0)
+
+        series = self.archive.open('BTCUSDT', '1m')
+        np.testing.assert_array_equal(series.open_time, open_time)
+        np.testing.assert_array_equal(series.ohlcv(), ohlcv)
+        self.assertEqual((self.archive.symbols(), self.archive.intervals('BTCUSDT')), (['BTCUSDT'], ['1m']))
+        self.assertEqual(len(self.archive.open('ETHUSDT', '1m')), 0)
+        with self.assertRaises(ValueError):
+            self.archive.append('BTCUSDT', '1m', open_time[::-1], ohlcv)
+
+    def test_02_zero_copy_slices(self):
+        """区间切片是内存映射的只读视图，可直接传给指标引擎"""
+        open_time, ohlcv = bars(1000)
+        self.archive.append('BTCUSDT', '1m', open_time, ohlcv)
+        series = self.archive.open('BTCUSDT', '1m')
+        self.assertIsInstance(series.close, np.memmap)
+
+        window = self.archive.read('BTCUSDT', '1m', start=int(open_time[100]) + 1, end=int(open_time[300]))
+        np.testing.assert_array_equal(window.open_time, open_time[101:300])
+        self.assertTrue(np.shares_memory(window.close, series.close))
+        self.assertFalse(window.close.flags.writeable)
+        self.assertEqual(len(series.tail(50)), 50)
+
+        result, _ = IndicatorEngine().compute(window.high, window.low, window.close)
+        expected, _ = IndicatorEngine().compute(ohlcv[101:300, 1], ohlcv[101:300, 2], ohlcv[101:300, 3])
+        np.testing.assert_allclose(result['ema20'], expected['ema20'])
+
+    def test_03_interrupted_append(self):
+        """中断写入留下的半行被忽略，下次追加时截断"""
+        open_time, ohlcv = bars(20)
+        self.archive.append('BTCUSDT', '1m', open_time[:10], ohlcv[:10])
+        # 模拟只写完部分数值列就中断
+        with open(os.path.join(self.tmp.name, 'BTCUSDT', '1m', 'close.bin'), 'ab') as f:
+            f.write(np.arange(3, dtype='<f8').tobytes())
+        self.assertEqual(len(self.archive.open('BTCUSDT', '1m')), 10)
+
+        self.archive.append('BTCUSDT', '1m', open_time[10:], ohlcv[10:])
+        series = self.archive.open('BTCUSDT', '1m')
+        np.testing.assert_array_equal(series.close, ohlcv[:, 3])
+
+    def test_04_other_process_append(self):
+        """其他进程追加后，已打开的归档重新映射即可看到新数据"""
+        open_time, ohlcv = bars(30)
+        self.archive.append('BTCUSDT', '1m', open_time[:20], ohlcv[:20])
+        before = self.archive.open('BTCUSDT', '1m')
+
+        script = (
+            "import sys, numpy as np; sys.path.insert(0, sys.argv[1]);"
+            "from data.ohlcv_archive import OHLCVArchive;"
+            "t = np.load(sys.argv[3]); v = np.load(sys.argv[4]);"
+            "print(OHLCVArchive(sys.argv[2]).append('BTCUSDT', '1m', t, v))"
+        )
+        np.save(os.path.join(self.tmp.name, 't.npy'), open_time)
+        np.save(os.path.join(self.tmp.name, 'v.npy'), ohlcv)
+        out = subprocess.run([sys.executable, "-c", script, ROOT_DIR, self.tmp.name,
+                              os.path.join(self.tmp.name, 't.npy'), os.path.join(self.tmp.name, 'v.npy')],
+                             capture_output=True, text=True, check=True)
+        self.assertEqual(out.stdout.strip(), "10")
+
+        self.assertEqual(len(before), 20)
+        after = self.archive.refresh('BTCUSDT', '1m')
+        np.testing.assert_array_equal(after.open_time, open_time)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
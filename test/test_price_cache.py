@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+价格快照缓存单元测试
+"""
+
+import os
+import sys
+import time
+import unittest
+
+# 添加父目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from adapters.price_cache import PriceSnapshotCache
+
+
+class TestPriceSnapshotCache(unittest.TestCase):
+    """价格缓存测试类"""
+
+    def test_01_hit_and_miss(self):
+        """TTL内命中，未写入的交易对记为缺失"""
+        cache = PriceSnapshotCache(ttl=10)
+        cache.update({'BTCUSDT': 65000.0, 'ETHUSDT': 3200.0})
+
+        hits, misses = cache.get_many(['BTCUSDT', 'ETHUSDT', 'SOLUSDT'])
+        self.assertEqual(hits, {'BTCUSDT': 65000.0, 'ETHUSDT': 3200.0})
+        self.assertEqual(misses, ['SOLUSDT'])
+        self.assertEqual(cache.get('BTCUSDT'), 65000.0)
+
+    def test_02_expiry(self):
+        """过期后应返回 None"""
+        cache = PriceSnapshotCache(ttl=0.05)
+        cache.update({'BTCUSDT': 65000.0})
+        time.sleep(0.1)
+        self.assertIsNone(cache.get('BTCUSDT'))
+
+    def test_03_disabled(self):
+        """ttl <= 0 时不缓存"""
+        cache = PriceSnapshotCache(ttl=0)
+        cache.update({'BTCUSDT': 65000.0})
+        self.assertIsNone(cache.get('BTCUSDT'))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
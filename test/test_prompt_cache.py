@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+提示词前缀缓存单元测试
+使用捕获请求参数的假客户端验证固定前缀、cache_control 标记与缓存用量统计
+"""
+
+import json
+import os
+import sys
+import unittest
+from types import SimpleNamespace
+
+# 添加父目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from adapters.llm_base import load_system_prompt
+from adapters.claude_adapter import ClaudeAdapter
+from adapters.qwen_adapter import QwenAdapter
+from main import build_decision_maker
+
+DECISION = '{"symbol": null, "action": "HOLD", "confidence": 0.5, "rationale": "test"}'
+
+
+class CapturingCreate:
+    """记录每次请求参数并返回预设响应的假 create 方法"""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.payloads = []
+
+    def __call__(self, **kwargs):
+        self.payloads.append(kwargs)
+        return self.responses.pop(0)
+
+
+def claude_response(input_tokens, cache_read, cache_write, output_tokens=30):
+    usage = SimpleNamespace(input_tokens=input_tokens, cache_read_input_tokens=cache_read,
+                            cache_creation_input_tokens=cache_write, output_tokens=output_tokens)
+    return SimpleNamespace(content=[SimpleNamespace(text=DECISION)], usage=usage)
+
+
+def openai_usage(prompt_tokens, cached_tokens, completion_tokens=30):
+    return SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                           prompt_tokens_details=SimpleNamespace(cached_tokens=cached_tokens))
+
+
+def openai_response(prompt_tokens, cached_tokens):
+    message = SimpleNamespace(message=SimpleNamespace(content=DECISION))
+    return SimpleNamespace(choices=[message], usage=openai_usage(prompt_tokens, cached_tokens))
+
+
+class StreamResponse(list):
+    """假流式响应：按文本片段返回 chat.completions 数据块"""
+
+    def __init__(self, pieces):
+        super().__init__(SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))])
+                         for piece in pieces)
+
+    def close(self):
+        pass
+
+
+class TestPromptCache(unittest.TestCase):
+    """提示词前缀缓存测试类"""
+
+    def test_01_claude_cache_control(self):
+        """Claude 的系统提示词以 cache_control 标记，缓存读取/写入计入用量"""
+        adapter = ClaudeAdapter(api_key="test")
+        adapter.system_prompt = load_system_prompt()
+        create = CapturingCreate([claude_response(40, 0, 1900), claude_response(45, 1900, 0)])
+        adapter.client = SimpleNamespace(messages=SimpleNamespace(create=create))
+
+        adapter.call("cycle 1")
+        self.assertEqual(adapter.last_usage['cache_write_tokens'], 1900)
+        self.assertEqual(adapter.last_usage['cached_tokens'], 0)
+        adapter.call("cycle 2")
+
+        first, second = create.payloads
+        self.assertEqual(first['system'], second['system'])
+        self.assertEqual(first['system'][0]['cache_control'], {"type": "ephemeral"})
+        self.assertIn("JSON", first['system'][0]['text'])
+        self.assertEqual(adapter.last_usage, {
+            'input_tokens': 1945, 'cached_tokens': 1900, 'uncached_tokens': 45,
+            'cache_write_tokens': 0, 'output_tokens': 30,
+        })
+        self.assertEqual(adapter.usage_totals['calls'], 2)
+
+    def test_02_claude_cache_disabled(self):
+        """关闭 prompt_cache 时系统提示词以普通字符串发送"""
+        adapter = ClaudeAdapter(api_key="test")
+        adapter.prompt_cache = False
+        create = CapturingCreate([claude_response(40, 0, 0)])
+        adapter.client = SimpleNamespace(messages=SimpleNamespace(create=create))
+        adapter.call("cycle")
+        self.assertEqual(create.payloads[0]['system'], adapter.system_prompt)
+
+    def test_03_openai_compatible_prefix(self):
+        """OpenAI兼容接口：系统消息逐字节不变地位于首位，cached_tokens 从用量明细读取"""
+        adapter = QwenAdapter(api_key="test", model="qwen3-max")
+        adapter.system_prompt = load_system_prompt()
+        create = CapturingCreate([openai_response(2100, 0), openai_response(2150, 1920)])
+        adapter.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+        adapter.call("cycle 1")
+        adapter.call("cycle 2 with different market data")
+        first, second = create.payloads
+        self.assertEqual(first['messages'][0], second['messages'][0])
+        self.assertEqual(first['messages'][0]['role'], 'system')
+        self.assertEqual(adapter.last_usage['cached_tokens'], 1920)
+        self.assertEqual(adapter.last_usage['uncached_tokens'], 230)
+        self.assertEqual(adapter.usage_totals['input_tokens'], 4250)
+
+    def test_04_stream_usage(self):
+        """流式请求带上 include_usage，完整读完时记录最后一个数据块中的用量"""
+        adapter = QwenAdapter(api_key="test", model="qwen3-max", streaming=True)
+
+        class FakeStream:
+            def __iter__(self):
+                delta = SimpleNamespace(delta=SimpleNamespace(content="无法给出决策"))
+                yield SimpleNamespace(choices=[delta], usage=None)
+                yield SimpleNamespace(choices=[], usage=openai_usage(2000, 1536))
+
+            def close(self):
+                pass
+
+        create = CapturingCreate([FakeStream()])
+        adapter.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        self.assertEqual(adapter.call("cycle"), "无法给出决策")
+        self.assertEqual(create.payloads[0]['stream_options'], {"include_usage": True})
+        self.assertEqual(adapter.last_usage['cached_tokens'], 1536)
+
+
+    def test_05_production_adapters_carry_full_prefix(self):
+        """main.py 创建的适配器以完整的 prompt/system_prompt.md（约7.5KB）作为系统前缀，并按其输出格式解析决策"""
+        prefix = load_system_prompt()
+        self.assertGreater(len(prefix.encode('utf-8')), 7000)
+        keys = {'QWEN_API_KEY': 'test', 'ANTHROPIC_API_KEY': 'test'}
+        saved = {key: os.environ.get(key) for key in keys}
+        os.environ.update(keys)
+        try:
+            qwen = build_decision_maker('qwen', 'qwen3-max')
+            claude = build_decision_maker('claude', 'claude-sonnet-4-5')
+        finally:
+            for key, value in saved.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+
+        body = qwen.llm_adapter.build_request("cycle")
+        self.assertEqual(body['messages'][0], {"role": "system", "content": prefix})
+        body = claude.llm_adapter.build_request("cycle")
+        self.assertEqual(body['system'][0]['text'], prefix)
+        self.assertEqual(body['system'][0]['cache_control'], {"type": "ephemeral"})
+
+        # 系统提示词格式的响应经 main.py 的决策引擎解析为买入，而不是被当作解析失败的观望
+        response = json.dumps({
+            "signal": "buy", "coin": "BTC", "quantity": 0.05, "profit_target": 66800.0, "stop_loss": 64100.0,
+            "invalidation_condition": "5m close below EMA50", "confidence": 0.65, "risk_usd": 45.0,
+            "justification": "EMA20 上穿 EMA50",
+        })
+        create = CapturingCreate([StreamResponse([response[:40], response[40:]])])
+        qwen.llm_adapter.adapter.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        decision = qwen.get_decision({'BTCUSDT': 65000.0, 'ETHUSDT': 3200.0})
+        self.assertIsNone(qwen.parser.last_error)
+        self.assertEqual((decision['action'], decision['symbol'], decision.quantity), ('BUY', 'BTCUSDT', 0.05))
+        self.assertIn("BTC: $65000.0000", qwen.last_prompt)
+        self.assertIn('"signal": "buy"', create.payloads[0]['messages'][1]['content'])
+        self.assertEqual(create.payloads[0]['messages'][0]['content'], prefix)
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
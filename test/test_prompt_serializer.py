@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+提示词数值序列化单元测试
+验证 tick size 舍入、token预算、降采样与提示词大小上界
+"""
+
+import os
+import sys
+import unittest
+
+import numpy as np
+
+# 添加父目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.prompt_serializer import (PromptSerializer, estimate_tokens, format_significant,
+                                    infer_tick_size, tick_decimals)
+from core.prompt_template import SERIES, get_user_prompt_template
+
+
+def coin_data(price: float, n: int = 60, seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    series = price * np.exp(np.cumsum(rng.normal(0, 0.001, n)))
+    return {
+        'price': float(series[-1]),
+        'prices_3m': series,
+        'rsi14_3m': list(50 + 10 * rng.standard_normal(n)),
+        'macd_3m': list(price * 1e-4 * rng.standard_normal(n)),
+        'volume_5m_current': 1234567.891,
+    }
+
+
+class TestPromptSerializer(unittest.TestCase):
+    """提示词数值序列化测试类"""
+
+    def test_01_rounding(self):
+        """价格按 tick size 舍入，RSI 保留1位小数，其他按有效数字"""
+        self.assertEqual(tick_decimals(0.01), 2)
+        self.assertEqual(tick_decimals(0.00001), 5)
+        self.assertEqual(tick_decimals(1.0), 0)
+        self.assertAlmostEqual(infer_tick_size(0.2345), 0.00001)
+        self.assertEqual(format_significant(0.000123456, 3), '0.000123')
+        self.assertEqual(format_significant(1234567.891, 4), '1235000')
+
+        serializer = PromptSerializer()
+        self.assertEqual(serializer.format_value('price', 65000.123456, 0.01), '65000.12')
+        self.assertEqual(serializer.format_value('ema20_5m_current', 0.123456789, 0.00001), '0.12346')
+        self.assertEqual(serializer.format_value('rsi14_5m_current', 55.5555, 0.01), '55.6')
+        self.assertEqual(serializer.format_value('macd_5m_current', -12.34567, 0.01), '-12.35')
+        self.assertEqual(serializer.format_value('liquidity_level', 'low', 0.01), 'low')
+
+    def test_02_series_budget(self):
+        """超出预算的序列保留最新点、对较早的点降采样，且不超过预算"""
+        serializer = PromptSerializer(series_budget=80, recent_points=10)
+        values = [65000.0 + i * 1.25 for i in range(60)]
+        text = serializer.format_series('prices_3m', values, 0.01)
+        parts = text.split(', ')
+
+        self.assertLessEqual(estimate_tokens(text), 80)
+        self.assertEqual(parts[-10:], [f"{v:.2f}".rstrip('0').rstrip('.') for v in values[-10:]])
+        self.assertEqual(parts[0], '65000')
+        self.assertLess(len(parts), 60)
+        self.assertEqual(serializer.report['reduced_series'], 1)
+
+        truncating = PromptSerializer(series_budget=30, downsample=False)
+        text = truncating.format_series('prices_3m', values, 0.01)
+        self.assertLessEqual(estimate_tokens(text), 30)
+        self.assertTrue(text.endswith('65073.75'))
+
+    def test_03_prepare_report(self):
+        """prepare 报告每周期节省的token数，输出可直接用于模板渲染"""
+        serializer = PromptSerializer(series_budget=120)
+        prepared = serializer.prepare({'BTC': coin_data(65000.0), 'DOGE': coin_data(0.123, seed=1)})
+
+        self.assertIsInstance(prepared['BTC']['prices_3m'], str)
+        self.assertNotIn('e-', prepared['DOGE']['macd_3m'])
+        report = serializer.report
+        self.assertGreater(report['saved_tokens'], 0)
+        self.assertEqual(report['saved_tokens'], report['raw_tokens'] - report['tokens'])
+        self.assertEqual(report['series'], 6)
+
+        template = get_user_prompt_template()
+        fields = {f: ([1.0] * 5 if template.coin_block.kinds[f] == SERIES else 1.0) for f in template.coin_fields}
+        fields.update(prepared['BTC'])
+        prompt = template.render({f: 1 for f in template.global_fields}, {'BTC': fields})
+        self.assertIn(f"- Mid prices (3m): [{prepared['BTC']['prices_3m']}]", prompt)
+
+    def test_04_total_budget_bounds_prompt(self):
+        """设置总预算后，序列部分的token数不随币种数量增长而超出上限"""
+        serializer = PromptSerializer(series_budget=200, total_budget=6000)
+        for n_coins in (6, 60, 300):
+            coins = {f"C{i}": coin_data(100.0 + i, seed=i) for i in range(n_coins)}
+            prepared = serializer.prepare(coins)
+            series_tokens = sum(estimate_tokens(data[field]) for data in prepared.values()
+                                for field in ('prices_3m', 'rsi14_3m', 'macd_3m'))
+            self.assertLessEqual(series_tokens, 6000)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+提示词模板单元测试
+验证 prompt/user_prompt.md 的编译、渲染与缺失占位符检查
+"""
+
+import os
+import sys
+import unittest
+
+# 添加父目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.prompt_template import (MissingPlaceholderError, PromptTemplate, SERIES,
+                                  get_user_prompt_template)
+
+
+def sample_coin(template: PromptTemplate, coin: str, base: float) -> dict:
+    """按字段类型生成一个币种的测试数据"""
+    data = {}
+    for field in template.coin_fields_for(coin):
+        if template.coin_block.kinds.get(field) == SERIES:
+            data[field] = [base, base + 0.5, base + 1.25]
+        else:
+            data[field] = base
+    if 'liquidity_level' in data:
+        data['liquidity_level'] = 'low'
+    return data
+
+
+class TestPromptTemplate(unittest.TestCase):
+    """提示词模板测试类"""
+
+    def setUp(self):
+        self.template = get_user_prompt_template()
+        self.values = {field: 1 for field in self.template.global_fields}
+        self.values['minutes_elapsed'] = 42
+
+    def test_01_compiled_fields(self):
+        """BTC 段编译为不带前缀的币种字段，DOGE/XRP 的额外行只属于对应币种"""
+        template = self.template
+        self.assertIn('ema20_5m_current', template.coin_fields)
+        self.assertEqual(template.coin_block.kinds['prices_3m'], SERIES)
+        self.assertIn('minutes_elapsed', template.global_fields)
+        self.assertNotIn('btc_price', template.global_fields)
+        self.assertIn('liquidity_level', template.coin_fields_for('DOGE'))
+        self.assertNotIn('liquidity_level', template.coin_fields_for('ETH'))
+        self.assertIn('stop_loss', template.position_fields)
+
+    def test_02_render_matches_template(self):
+        """渲染结果与直接替换原始模板中的 BTC 段一致，且不残留占位符"""
+        template = self.template
+        coins = {'BTC': sample_coin(template, 'BTC', 65000.5), 'DOGE': sample_coin(template, 'DOGE', 0.12)}
+        prompt = template.render(self.values, coins)
+
+        self.assertTrue(prompt.startswith("It has been 42 minutes"))
+        self.assertIn("### ALL BTC DATA\n\n**Current Snapshot (5m primary):**\n- current_price = 65000.5", prompt)
+        self.assertIn("- Mid prices (3m): [0.12, 0.62, 1.37]", prompt)
+        self.assertIn("- Liquidity level tag (high/medium/low): low\n\n---", prompt)
+        self.assertNotIn("### ALL ETH DATA", prompt)
+        self.assertNotIn("{btc_", prompt)
+        self.assertIn("```python\n[]\n```", prompt)
+
+        position = {field: 1.0 for field in template.position_fields}
+        position.update(coin_symbol='BTC', position_open_ts='2024-01-01T00:00:00')
+        prompt = template.render(self.values, coins, [position, position])
+        self.assertEqual(prompt.count("'symbol': 'BTC'"), 2)
+
+    def test_03_missing_placeholders(self):
+        """缺失的取值被一次性列出；非严格模式显示为 N/A"""
+        template = self.template
+        coins = {'ETH': sample_coin(template, 'ETH', 3200.0)}
+        del coins['ETH']['rsi14_4h']
+        values = dict(self.values)
+        del values['sharpe_ratio']
+
+        self.assertEqual(template.missing(values, coins), ['sharpe_ratio', 'eth_rsi14_4h'])
+        with self.assertRaises(MissingPlaceholderError):
+            template.render(values, coins)
+        prompt = template.render(values, coins, strict=False)
+        self.assertIn("- Sharpe Ratio: N/A", prompt)
+        self.assertIn("- RSI(14) indicators (4h, series): []", prompt)
+
+    def test_04_scales_to_many_symbols(self):
+        """任意数量的币种都由同一个编译块生成"""
+        template = self.template
+        coins = {f"C{i}": sample_coin(template, f"C{i}", float(i)) for i in range(300)}
+        prompt = template.render(self.values, coins)
+        self.assertEqual(prompt.count("### ALL "), 300)
+        self.assertIn("### ALL C299 DATA", prompt)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+请求权重限流器单元测试
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import unittest
+
+# 添加父目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from adapters.rate_limiter import WeightRateLimiter, request_weight
+
+
+class TestWeightRateLimiter(unittest.TestCase):
+    """限流器测试类"""
+
+    def test_01_endpoint_weights(self):
+        """单个/批量交易对的权重不同"""
+        self.assertEqual(request_weight('ticker_price', 'BTCUSDT'), 2)
+        self.assertEqual(request_weight('ticker_price', symbols=['BTCUSDT', 'ETHUSDT']), 4)
+        self.assertEqual(request_weight('ticker_price'), 4)
+        self.assertEqual(request_weight('klines', 'BTCUSDT', '5m'), 2)
+        self.assertEqual(request_weight('ticker_24hr'), 80)
+        self.assertEqual(request_weight('unknown_endpoint'), 1)
+
+    def test_02_threads_never_exceed_budget(self):
+        """多线程并发时，任意时刻消耗的权重不超过桶容量 + 已补充的令牌"""
+        limiter = WeightRateLimiter(limit=100, window=1.0, safety_margin=1.0)
+        consumed = []
+        lock = threading.Lock()
+
+        def worker():
+            for _ in range(10):
+                limiter.acquire(2)
+                with lock:
+                    consumed.append(time.monotonic())
+
+        start = time.monotonic()
+        threads = [threading.Thread(target=worker) for _ in range(10)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.monotonic() - start
+
+        # 200 权重，容量 100 + 每秒补充 100 → 至少需要约 1 秒
+        self.assertEqual(len(consumed), 100)
+        self.assertGreater(elapsed, 0.9)
+
+    def test_03_async_tasks(self):
+        """asyncio 任务等待时不阻塞事件循环"""
+        limiter = WeightRateLimiter(limit=20, window=1.0, safety_margin=1.0)
+        ticks = []
+
+        async def heartbeat():
+            for _ in range(10):
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.05)
+
+        async def run():
+            await asyncio.gather(heartbeat(), *(limiter.acquire_async(2) for _ in range(20)))
+
+        start = time.monotonic()
+        asyncio.run(run())
+        self.assertGreater(time.monotonic() - start, 0.9)
+        self.assertEqual(len(ticks), 10)
+
+    def test_04_header_sync_and_penalty(self):
+        """响应头的已用权重向下校正令牌，429 后暂停请求"""
+        limiter = WeightRateLimiter(limit=6000, safety_margin=0.9)
+        limiter.update_from_headers({'X-MBX-USED-WEIGHT-1M': '5000'})
+        self.assertLess(limiter.available(), 401)
+
+        limiter.penalize(0.2)
+        self.assertFalse(limiter.acquire(1, timeout=0.05))
+        self.assertTrue(limiter.acquire(1, timeout=1.0))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+适配器注册表单元测试
+验证按供应商名称创建适配器、SDK延迟导入与客户端延迟创建
+"""
+
+import os
+import subprocess
+import sys
+import unittest
+
+# 添加父目录到Python路径
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from adapters.registry import (ADAPTER_REGISTRY, available_providers, create_adapter, get_adapter_class,
+                               register_adapter)
+
+
+class TestRegistry(unittest.TestCase):
+    """适配器注册表测试类"""
+
+    def test_01_create_by_provider(self):
+        """按供应商名称创建适配器，登记的默认参数可被覆盖"""
+        self.assertIn('qwen', available_providers())
+        deepseek = create_adapter('deepseek', api_key="test")
+        self.assertEqual(deepseek.get_model_name(), 'deepseek-v3.1')
+        qwen = create_adapter('qwen', api_key="test", model="qwen3-max", streaming=True)
+        self.assertEqual(qwen.get_model_name(), 'qwen3-max')
+        self.assertTrue(qwen.streaming)
+        claude = create_adapter('claude', api_key="test", model="claude-sonnet-4-5")
+        self.assertEqual(claude.build_request("p")['model'], 'claude-sonnet-4-5')
+
+        with self.assertRaises(KeyError):
+            create_adapter('unknown')
+
+    def test_02_client_created_on_first_use(self):
+        """客户端在首次访问时才创建，测试中可直接替换"""
+        adapter = create_adapter('openai', api_key="test")
+        self.assertNotIn('client', adapter.__dict__)
+        client = adapter.client
+        self.assertIs(adapter.client, client)
+        adapter.client = "fake"
+        self.assertEqual(adapter.client, "fake")
+
+    def test_03_register_custom(self):
+        """登记自定义适配器时不导入模块"""
+        register_adapter('custom', 'adapters.not_installed', 'Missing')
+        self.addCleanup(ADAPTER_REGISTRY.pop, 'custom')
+        self.assertIn('custom', available_providers())
+        with self.assertRaises(ImportError):
+            get_adapter_class('custom')
+
+    def test_04_sdk_not_imported_at_startup(self):
+        """导入 main 时不导入LLM SDK与币安客户端"""
+        code = ("import sys, main; "
+                "print(','.join(m for m in ('openai', 'anthropic', 'binance.spot') if m in sys.modules))")
+        result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip(), '')
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多周期本地重采样单元测试
+验证由1m基础K线合成的高周期K线与直接聚合的结果一致，以及 REST 轮询模式下基础周期的同步次数
+"""
+
+import os
+import sys
+import unittest
+
+import numpy as np
+
+# 添加父目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.data_fetcher import TradingDataFetcher
+from data.kline_cache import INTERVAL_MS, KlineCache
+from data.resample import TimeframeResampler, resample_ohlcv
+
+START_MS = 1_700_006_400_000  # 4h 对齐的时间点
+
+
+def base_bars(n: int, seed: int = 3):
+    """生成 n 根1m K线"""
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 0.5, n))
+    open_ = np.r_[100.0, close[:-1]]
+    high = np.maximum(open_, close) + rng.uniform(0, 0.3, n)
+    low = np.minimum(open_, close) - rng.uniform(0, 0.3, n)
+    volume = rng.uniform(1, 10, n)
+    open_time = START_MS + np.arange(n, dtype=np.int64) * INTERVAL_MS['1m']
+    return open_time, np.column_stack([open_, high, low, close, volume])
+
+
+class FakeKlines:
+    """按虚拟时钟返回币安格式K线的REST替身，记录每次请求"""
+
+    def __init__(self, now_ms: int):
+        self.now_ms = now_ms
+        self.requests = []
+
+    def __call__(self, symbol, interval, limit, start_time=None):
+        self.requests.append((symbol, interval))
+        step = INTERVAL_MS[interval]
+        current = self.now_ms - self.now_ms % step
+        if start_time is None:
+            start_time = current - (limit - 1) * step
+        return [[t, 100.0, 101.0, 99.0, 100.5, 1.0, t + step - 1]
+                for t in range(start_time, current + 1, step)][:limit]
+
+
+class TestTimeframeResampler(unittest.TestCase):
+    """重采样测试类"""
+
+    def test_01_batch_aggregation(self):
+        """批量聚合的OHLCV规则正确"""
+        open_time, ohlcv = base_bars(15)
+        bucket_time, bars, counts = resample_ohlcv(open_time, ohlcv, '5m')
+        self.assertEqual(list(counts), [5, 5, 5])
+        self.assertEqual(bucket_time[1], START_MS + 5 * 60_000)
+        np.testing.assert_allclose(bars[1], [ohlcv[5, 0], ohlcv[5:10, 1].max(), ohlcv[5:10, 2].min(),
+                                             ohlcv[9, 3], ohlcv[5:10, 4].sum()])
+
+    def test_02_streaming_matches_batch(self):
+        """逐根喂入的结果与批量聚合一致，且 3m/5m/15m/4h 相互一致"""
+        open_time, ohlcv = base_bars(600)
+        warm = 240
+        resampler = TimeframeResampler()
+        resampler.seed_from_base('BTCUSDT', open_time[:warm], ohlcv[:warm])
+        resampler.on_base_closes('BTCUSDT', open_time[warm:], ohlcv[warm:])
+
+        for interval in ('3m', '5m', '15m', '4h'):
+            expected_time, expected, _ = resample_ohlcv(open_time, ohlcv, interval)
+            got_time, got = resampler.get('BTCUSDT', interval, limit=len(expected_time))
+            np.testing.assert_array_equal(got_time, expected_time, err_msg=interval)
+            np.testing.assert_allclose(got, expected, err_msg=interval)
+
+    def test_03_partial_bar_updates(self):
+        """基础K线收盘时更新未收盘的高周期K线"""
+        open_time, ohlcv = base_bars(17)
+        resampler = TimeframeResampler(intervals=('15m',))
+        resampler.seed('ETHUSDT', '15m', [], np.zeros((0, 5)))
+
+        closed = {}
+        for t, bar in zip(open_time, ohlcv):
+            closed.update(resampler.on_base_close('ETHUSDT', t, bar))
+        self.assertEqual(closed['15m'][0], START_MS)
+
+        got_time, got = resampler.get('ETHUSDT', '15m', limit=2)
+        self.assertEqual(list(got_time), [START_MS, START_MS + 15 * 60_000])
+        self.assertAlmostEqual(got[-1, 3], ohlcv[-1, 3])
+        self.assertAlmostEqual(got[-1, 4], ohlcv[15:, 4].sum())
+
+        closed_time, _ = resampler.get('ETHUSDT', '15m', limit=2, include_partial=False)
+        self.assertEqual(list(closed_time), [START_MS])
+
+    def test_04_duplicates_and_unseeded_ignored(self):
+        """重复的基础K线被忽略，未预热的交易对不合成"""
+        open_time, ohlcv = base_bars(5)
+        resampler = TimeframeResampler(intervals=('5m',))
+        resampler.seed('BTCUSDT', '5m', [], np.zeros((0, 5)))
+        resampler.on_base_closes('BTCUSDT', open_time, ohlcv)
+        resampler.on_base_closes('BTCUSDT', open_time, ohlcv)
+        _, bars = resampler.get('BTCUSDT', '5m')
+        self.assertAlmostEqual(bars[0, 4], ohlcv[:, 4].sum())
+
+        resampler.on_base_closes('SOLUSDT', open_time, ohlcv)
+        self.assertFalse(resampler.has('SOLUSDT', '5m'))
+
+    def test_05_rest_base_sync_once_per_close(self):
+        """REST 轮询模式下每个交易对每根1m K线收盘后只请求一次基础周期"""
+        exchange = FakeKlines(START_MS + 30_000)
+        fetcher = TradingDataFetcher(use_websocket=False)
+        fetcher._fetch_klines = exchange
+        fetcher.kline_cache = KlineCache(exchange, clock=lambda: exchange.now_ms / 1000)
+        symbols = ['BTCUSDT', 'ETHUSDT']
+        fetcher.enable_resampling(symbols, limit=50)
+
+        for _ in range(3):
+            exchange.now_ms += INTERVAL_MS['1m']
+            exchange.requests.clear()
+            for _ in range(2):  # 同一根1m K线内的重复周期不再请求
+                for symbol in symbols:
+                    for interval in fetcher.resampler.intervals:
+                        self.assertFalse(fetcher.get_klines(symbol, interval, 20).empty)
+            self.assertEqual(exchange.requests, [(symbol, '1m') for symbol in symbols])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
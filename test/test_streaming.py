@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式输出单元测试
+验证增量JSON扫描器，以及决策JSON闭合后提前关闭流
+"""
+
+import asyncio
+import os
+import sys
+import time
+import unittest
+from types import SimpleNamespace
+
+# 添加父目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from adapters.json_stream import JSONObjectScanner, find_json_object, is_decision
+from adapters.llm_base import LLMAdapter
+from adapters.qwen_adapter import QwenAdapter
+
+DECISION = '{"symbol": "BTCUSDT", "action": "BUY", "confidence": 0.8, "rationale": "突破{关键}阻力\\"位\\""}'
+
+
+class ChattyAdapter(LLMAdapter):
+    """先输出决策JSON，随后缓慢输出大量说明文字的假适配器"""
+
+    def __init__(self, chunk_delay: float = 0.05):
+        super().__init__(api_key="test")
+        self.chunk_delay = chunk_delay
+        self.closed = False
+        self.streaming = True
+
+    def _chunks(self):
+        text = "好的，以下是我的决策：\n```json\n" + DECISION + "\n```\n"
+        for i in range(0, len(text), 7):
+            yield text[i:i + 7]
+        for _ in range(20):
+            yield "以下是详细分析……"
+
+    def call(self, prompt: str) -> str:
+        return self.call_streaming(prompt)
+
+    def stream(self, prompt: str):
+        try:
+            for i, chunk in enumerate(self._chunks()):
+                if i > 20:
+                    time.sleep(self.chunk_delay)
+                yield chunk
+        finally:
+            self.closed = True
+
+    async def astream(self, prompt: str):
+        try:
+            for i, chunk in enumerate(self._chunks()):
+                if i > 20:
+                    await asyncio.sleep(self.chunk_delay)
+                yield chunk
+        finally:
+            self.closed = True
+
+    def get_model_name(self) -> str:
+        return "chatty"
+
+
+class FakeStream:
+    """模拟 openai 的 Stream 对象"""
+
+    def __init__(self, pieces):
+        self.pieces = pieces
+        self.closed = False
+
+    def __iter__(self):
+        for piece in self.pieces:
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))])
+
+    def close(self):
+        self.closed = True
+
+
+class TestStreaming(unittest.TestCase):
+    """流式输出测试类"""
+
+    def test_01_scanner_chunk_boundaries(self):
+        """任意切分方式下都能找到同一个对象，字符串中的花括号与转义引号不影响深度"""
+        text = '思考 {草稿} 中…… {"a": 1}' + DECISION + ' 之后的文字 {"action": "SELL"}'
+        for size in (1, 2, 5, 13, len(text)):
+            scanner = JSONObjectScanner(is_decision)
+            found = None
+            for i in range(0, len(text), size):
+                found = found or scanner.feed(text[i:i + size])
+            self.assertEqual(found, DECISION)
+            self.assertEqual(scanner.result['action'], 'BUY')
+
+        self.assertIsNone(find_json_object('没有JSON {"unterminated": '))
+        self.assertEqual(find_json_object('{"x": {"y": [1, {"z": 2}]}}'), '{"x": {"y": [1, {"z": 2}]}}')
+
+    def test_02_early_termination(self):
+        """决策JSON闭合后立即关闭流，不再等待后续说明文字"""
+        adapter = ChattyAdapter(chunk_delay=0.05)
+        start = time.perf_counter()
+        response = adapter.call("prompt")
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(response, DECISION)
+        self.assertTrue(adapter.closed)
+        self.assertLess(elapsed, 0.5)
+        stats = adapter.last_call_stats
+        self.assertTrue(stats['early_stop'])
+        self.assertLessEqual(stats['first_token'], stats['decision'])
+
+    def test_03_async_early_termination(self):
+        """异步流同样提前结束"""
+        adapter = ChattyAdapter(chunk_delay=0.05)
+        start = time.perf_counter()
+        response = asyncio.run(adapter.acall_streaming("prompt"))
+        self.assertEqual(response, DECISION)
+        self.assertTrue(adapter.closed)
+        self.assertLess(time.perf_counter() - start, 0.5)
+
+    def test_04_qwen_stream_closed(self):
+        """QwenAdapter 以 stream=True 请求，提前结束时关闭底层流"""
+        adapter = QwenAdapter(api_key="test", model="qwen3-max", streaming=True)
+        stream = FakeStream(['思考中\n', DECISION[:30], DECISION[30:], None, '\n补充说明', '……'])
+        captured = {}
+
+        def create(**kwargs):
+            captured.update(kwargs)
+            return stream
+
+        adapter.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        self.assertEqual(adapter.call("prompt"), DECISION)
+        self.assertTrue(captured['stream'])
+        self.assertTrue(stream.closed)
+        self.assertEqual(adapter.last_call_stats['chunks'], 3)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+完整交易决策格式单元测试
+验证 buy/sell/hold 字段规则、依赖当前价格与账户价值的跨字段规则以及校验耗时
+"""
+
+import json
+import os
+import sys
+import time
+import unittest
+
+# 添加父目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from adapters.llm_base import LLMAdapter
+from core.arena import DecisionArena
+from core.decision import DecisionMaker
+from core.trade_decision import TRADE_DECISION_SCHEMA, TradeDecision, TradeDecisionParser, build_trade_schema
+from main import build_snapshot
+
+CONTEXT = {'prices': {'BTC': 65000.0, 'ETH': 3200.0}, 'account_value': 3000.0}
+
+
+def buy(**overrides) -> dict:
+    decision = {
+        "signal": "buy", "coin": "BTC", "quantity": 0.05, "profit_target": 66800.0, "stop_loss": 64100.0,
+        "invalidation_condition": "5m close below EMA50", "confidence": 0.65, "risk_usd": 45.0,
+        "justification": "EMA20 上穿 EMA50，MACD 转正",
+    }
+    decision.update(overrides)
+    return decision
+
+
+class FixedAdapter(LLMAdapter):
+    """返回固定响应的假适配器"""
+
+    def __init__(self, response: str):
+        super().__init__(api_key="test")
+        self.response = response
+
+    def call(self, prompt: str) -> str:
+        return self.response
+
+    def get_model_name(self) -> str:
+        return "fixed"
+
+
+class TestTradeDecision(unittest.TestCase):
+    """完整交易决策格式测试类"""
+
+    def test_01_buy_decision(self):
+        """合法的买入决策解析为 TradeDecision，并提供旧格式的兼容字段"""
+        parser = TradeDecisionParser()
+        decision = parser.parse(f"```json\n{json.dumps(buy(signal='BUY', coin='btcusdt'))}\n```", CONTEXT)
+        self.assertIsNotNone(decision, parser.last_error)
+        self.assertEqual((decision.signal, decision.coin, decision.quantity), ('buy', 'BTC', 0.05))
+        self.assertEqual((decision['action'], decision.get('symbol')), ('BUY', 'BTCUSDT'))
+        self.assertEqual(decision['rationale'], decision.justification)
+        self.assertEqual(decision.to_dict()['risk_usd'], 45.0)
+        self.assertFalse(hasattr(decision, '__dict__'))
+
+    def test_02_sell_and_hold(self):
+        """sell 需要 coin，hold 只需要 justification；buy 缺少风控字段时失败"""
+        parser = TradeDecisionParser()
+        sell = parser.parse('{"signal": "sell", "coin": "ETH", "justification": "触发止损"}', CONTEXT)
+        self.assertEqual((sell.action, sell.symbol, sell.quantity), ('SELL', 'ETHUSDT', None))
+        hold = parser.parse('{"signal": "hold", "quantity": null, "justification": "无机会"}')
+        self.assertEqual((hold.action, hold.symbol), ('HOLD', None))
+
+        self.assertIsNone(parser.parse('{"signal": "sell", "justification": "x"}'))
+        self.assertIn("coin", parser.last_error)
+        self.assertIsNone(parser.parse(json.dumps({k: v for k, v in buy().items() if k != 'risk_usd'})))
+        self.assertIn("risk_usd", parser.last_error)
+        self.assertIsNone(parser.parse(json.dumps(buy(coin="PEPE"))))
+        self.assertIsNone(parser.parse(json.dumps(buy(signal="short"))))
+
+    def test_03_cross_field_rules(self):
+        """止损低于现价、止盈高于现价，盈亏比、risk_usd 计算与风险预算"""
+        parser = TradeDecisionParser()
+        cases = {
+            "低于止盈": buy(stop_loss=67000.0),
+            "现价": buy(stop_loss=65500.0, profit_target=70000.0),
+            "盈亏比": buy(profit_target=65500.0),
+            "不符": buy(risk_usd=20.0),
+            "账户价值": buy(quantity=0.2, risk_usd=180.0),
+        }
+        for reason, decision in cases.items():
+            self.assertIsNone(parser.parse(json.dumps(decision), CONTEXT), reason)
+            self.assertIn(reason, parser.last_error)
+
+        # 无上下文时只检查与价格无关的规则
+        self.assertIsNotNone(parser.parse(json.dumps(buy(risk_usd=20.0))))
+        self.assertIsNone(parser.parse(json.dumps(buy(stop_loss=67000.0))))
+
+        relaxed = TradeDecisionParser(build_trade_schema(min_reward_risk=None, risk_range=None))
+        self.assertIsNotNone(relaxed.parse(json.dumps(buy(profit_target=65500.0, quantity=0.2, risk_usd=180.0)),
+                                           CONTEXT))
+
+    def test_04_decision_maker(self):
+        """DecisionMaker 使用完整格式解析器时从快照取上下文，失败时返回完整格式的默认决策"""
+        snapshot = {'coins': {'BTC': {'price': 65000.0}}, 'account_value': 3000.0}
+        maker = DecisionMaker(FixedAdapter(json.dumps(buy())), parser=TradeDecisionParser())
+        self.assertEqual(maker.decision_context(snapshot), {'prices': {'BTC': 65000.0}, 'account_value': 3000.0})
+        maker.build_prompt = lambda market_data: "prompt"
+        decision = maker.get_decision(snapshot)
+        self.assertEqual(decision.signal, 'buy')
+        self.assertIn("止损 64100.0", maker.format_decision_for_display(decision))
+
+        bad = DecisionMaker(FixedAdapter(json.dumps(buy(stop_loss=65500.0))), parser=TradeDecisionParser())
+        bad.build_prompt = maker.build_prompt
+        fallback = bad.get_decision(snapshot)
+        self.assertIsInstance(fallback, TradeDecision)
+        self.assertTrue(DecisionMaker.is_fallback(fallback))
+
+        consensus = DecisionArena.majority_decision({'a': decision, 'b': decision, 'c': fallback})
+        self.assertEqual((consensus['symbol'], consensus['action']), ('BTCUSDT', 'BUY'))
+
+    def test_05_validation_cost(self):
+        """预编译规则的单次校验在微秒级"""
+        obj = buy()
+        n = 20000
+        start = time.perf_counter()
+        for _ in range(n):
+            TRADE_DECISION_SCHEMA.validate(obj, CONTEXT)
+        per_decision = (time.perf_counter() - start) / n
+        self.assertLess(per_decision, 50e-6)
+
+    def test_06_main_snapshot_risk_budget(self):
+        """main.py 的快照携带账户价值，get_decision 经内置价格提示词执行 1%-3% 风险预算规则"""
+        snapshot = build_snapshot({'BTCUSDT': 65000.0, 'ETHUSDT': 3200.0}, account_value=10000.0)
+        within = buy(quantity=0.2, risk_usd=180.0)
+        maker = DecisionMaker(FixedAdapter(json.dumps(within)), parser=TradeDecisionParser())
+        decision = maker.get_decision(snapshot)
+        self.assertEqual((decision.signal, decision.quantity), ('buy', 0.2))
+        self.assertIn("账户价值: 10000.00 USDT", maker.last_prompt)
+        self.assertIn("- BTC: $65000.0000", maker.last_prompt)
+
+        # risk_usd 45 只占账户价值的 0.45%，低于风险预算下限
+        small = DecisionMaker(FixedAdapter(json.dumps(buy())), parser=TradeDecisionParser())
+        self.assertTrue(DecisionMaker.is_fallback(small.get_decision(snapshot)))
+        self.assertIn("risk_usd 占账户价值 0.45%", small.parser.last_error)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
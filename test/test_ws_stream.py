@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+WebSocket 行情引擎单元测试
+使用本地 WebSocket 替身客户端回放组合流消息，无需网络
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import unittest
+
+# 添加父目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.data_fetcher import TradingDataFetcher
+
+
+class LocalStreamClient:
+    """本地 WebSocket 替身：在后台线程中按组合流格式推送消息"""
+
+    def __init__(self, stream_url, on_message):
+        self.stream_url = stream_url
+        self.on_message = on_message
+        self.streams = []
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def subscribe(self, stream, id=None):
+        self.streams.extend(stream)
+
+    def replay(self, messages, repeat: int = 1):
+        """在后台线程推送消息，模拟 socket 线程"""
+        def run():
+            for _ in range(repeat):
+                for message in messages:
+                    if self.stopped.is_set():
+                        return
+                    self.on_message(None, json.dumps(message))
+
+        self.thread = threading.Thread(target=run, daemon=True)
+        self.thread.start()
+        return self.thread
+
+    def stop(self):
+        self.stopped.set()
+
+
+def kline_message(symbol, close, closed=False):
+    return {
+        'stream': f"{symbol.lower()}@kline_1m",
+        'data': {
+            'e': 'kline', 's': symbol,
+            'k': {'t': 1640000000000, 'o': '1', 'h': str(close), 'l': '1',
+                  'c': str(close), 'v': '10', 'x': closed},
+        },
+    }
+
+
+def ticker_message(symbol, price):
+    return {
+        'stream': f"{symbol.lower()}@ticker",
+        'data': {'e': '24hrTicker', 's': symbol, 'c': str(price), 'v': '1000',
+                 'P': '1.5', 'h': str(price), 'l': str(price)},
+    }
+
+
+class TestWebsocketStream(unittest.TestCase):
+    """WebSocket 行情引擎测试类"""
+
+    def setUp(self):
+        self.clients = []
+
+        def factory(stream_url, on_message):
+            client = LocalStreamClient(stream_url, on_message)
+            self.clients.append(client)
+            return client
+
+        self.fetcher = TradingDataFetcher(use_websocket=True, coins=['BTC', 'ETH'],
+                                          ws_stream_url='ws://127.0.0.1:9999',
+                                          ws_client_factory=factory)
+
+    def tearDown(self):
+        self.fetcher.stop_websocket()
+
+    def test_01_subscribes_combined_streams(self):
+        """一次订阅所有交易对的K线与行情流"""
+        self.fetcher.start_websocket()
+        client = self.clients[0]
+        self.assertEqual(client.stream_url, 'ws://127.0.0.1:9999')
+        self.assertEqual(sorted(client.streams), sorted([
+            'btcusdt@kline_1m', 'btcusdt@ticker', 'ethusdt@kline_1m', 'ethusdt@ticker'
+        ]))
+
+    def test_02_replay_updates_store(self):
+        """回放的消息应写入最新值存储"""
+        self.fetcher.start_websocket()
+        self.clients[0].replay([
+            {'result': None, 'id': 1},
+            kline_message('BTCUSDT', 50500),
+            ticker_message('BTCUSDT', 50510),
+            ticker_message('ETHUSDT', 3200),
+        ]).join(timeout=2)
+
+        btc = self.fetcher.get_ws_data('BTCUSDT')
+        self.assertEqual(btc['kline']['close'], 50500.0)
+        self.assertEqual(btc['ticker']['price'], 50510.0)
+        self.assertEqual(self.fetcher.get_ws_price('ETHUSDT'), 3200.0)
+        self.assertIsNone(self.fetcher.get_ws_price('SOLUSDT'))
+
+    def test_03_readers_never_see_partial_snapshot(self):
+        """写入线程持续更新时，读者拿到的快照始终完整"""
+        self.fetcher.start_websocket()
+        messages = [ticker_message('BTCUSDT', 50000 + i) for i in range(200)]
+        thread = self.clients[0].replay(messages, repeat=20)
+
+        reads = 0
+        while thread.is_alive() or reads == 0:
+            snapshot = self.fetcher.get_ws_data('BTCUSDT')
+            if snapshot:
+                self.assertIn('price', snapshot['ticker'])
+            reads += 1
+        self.assertEqual(self.fetcher.get_ws_price('BTCUSDT'), 50199.0)
+
+    def test_04_stale_price_rejected(self):
+        """超过 max_age 的价格视为无效"""
+        self.fetcher._handle_ticker(ticker_message('BTCUSDT', 50000)['data'])
+        time.sleep(0.05)
+        self.assertIsNone(self.fetcher.get_ws_price('BTCUSDT', max_age=0.01))
+        self.assertEqual(self.fetcher.get_ws_price('BTCUSDT', max_age=10), 50000.0)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)